@@ -11,21 +11,23 @@ Does not comfort. Does not speculate without evidence.
 "Your save rate was 3.1%. Median in your Framework Drop posts is 4.7%. Here's the gap."
 """
 
-from app.models.router import get_model
-from agno.agent import Agent
-from agno.memory import MemoryManager
-from agno.tools.memory import MemoryTools
+from typing import TYPE_CHECKING
+
+from app.models.router import get_healthy_model, get_memory_model
 
-from app.agents.db import agno_db
 from app.agents.knowledge import get_skills_knowledge
 from app.agents.tools import (
     compute_patterns_tool,
     export_task_tool,
     skill_load,
+    skill_search,
     web_search_tool,
 )
 from app.agents.base import UNIVERSAL_SYSTEM_PROMPT
 
+if TYPE_CHECKING:
+    from agno.agent import Agent
+
 ANALYST_INSTRUCTIONS = f"""
 {UNIVERSAL_SYSTEM_PROMPT}
 
@@ -81,13 +83,21 @@ When reviewing aggregate data across multiple posts:
 def build_analyst(
     user_id: str = "default_user",
     session_id: str | None = None,
-) -> Agent:
+) -> "Agent":
     """Build the Analyst agent — Tier 3 exclusively."""
-    model = get_model(tier=3)
+    from agno.agent import Agent
+    from agno.memory import MemoryManager
+    from agno.tools.memory import MemoryTools
+
+    from app.agents.db import get_agno_db
+
+    agno_db = get_agno_db()
+
+    model = get_healthy_model(tier=3, claim_probe=False)
 
     memory_manager = MemoryManager(
         db=agno_db,
-        model=get_model(tier=1),
+        model=get_memory_model(),
         additional_instructions=(
             "Store post-mortem findings tagged with archetype, domain, and outcome. "
             "Record causal hypotheses explicitly so future Discovery agents can retrieve them. "
@@ -104,6 +114,7 @@ def build_analyst(
         tools=[
             memory_tools,
             skill_load,
+            skill_search,
             compute_patterns_tool,
             export_task_tool,
             web_search_tool,
@@ -0,0 +1,187 @@
+"""
+BroCoDDE — Rolling History Compaction
+Keeps long Deep-mode sessions inside a fixed context budget without dropping
+early Discovery / Extraction context.
+
+Each CoDDE-task stores a running summary of chat_history[:history_summary_upto].
+Before every agent turn the harness calls prepare_history():
+
+    summary (older turns, compressed)  +  chat_history[upto:] (recent, verbatim)
+
+While the verbatim tail fits in HISTORY_TOKEN_BUDGET nothing happens. Once it
+crosses the budget, everything but the last HISTORY_KEEP_RECENT_MESSAGES is
+folded into the summary with one Tier-1 `context_compression` call. The fold
+is incremental: the model sees the previous summary plus only the newly folded
+messages, never the whole transcript.
+
+The result replaces Agno's fixed `num_history_runs` window (apply_history()).
+"""
+
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.db.models import CoddeTask
+
+# Rough token estimate (~4 chars/token for English prose) — good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+Summarizer = Callable[[str | None, list[dict]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def message_tokens(messages: list[dict]) -> int:
+    return sum(estimate_tokens(m.get("content") or "") for m in messages)
+
+
+def _transcript(messages: list[dict]) -> str:
+    lines = []
+    for m in messages:
+        speaker = "User" if m.get("role") == "user" else "Agent"
+        lines.append(f"{speaker}: {(m.get('content') or '').strip()}")
+    return "\n\n".join(lines)
+
+
+@dataclass
+class HistoryContext:
+    summary: str | None
+    recent: list[dict] = field(default_factory=list)
+    compacted: bool = False      # a fold ran for this turn
+    dropped: int = 0             # messages left out because a fold failed
+
+    @property
+    def summary_tokens(self) -> int:
+        return estimate_tokens(self.summary or "")
+
+    @property
+    def recent_tokens(self) -> int:
+        return message_tokens(self.recent)
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_tokens + self.recent_tokens
+
+    def render(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append(
+                "<conversation_summary>\n"
+                "Summary of the earlier part of this session (older turns, compressed):\n"
+                f"{self.summary.strip()}\n"
+                "</conversation_summary>"
+            )
+        if self.recent:
+            parts.append(f"<recent_turns>\n{_transcript(self.recent)}\n</recent_turns>")
+        return "\n\n".join(parts)
+
+
+# ── Summarizer ────────────────────────────────────────────────────────────────
+
+async def summarize_history(previous_summary: str | None, messages: list[dict]) -> str:
+    """Fold `messages` into `previous_summary` with the Tier-1 context_compression model."""
+    from app.models.router import TASK_TIERS, call_with_failover, get_openai_client
+
+    system_prompt = (
+        "You maintain a running summary of a content-coaching session between a user and "
+        "BroCoDDE's agents. Merge the new turns into the existing summary. Preserve: the "
+        "topic and angle chosen in Discovery, the user's own experiences, examples and numbers "
+        "from Extraction, the chosen archetype and skeleton, draft decisions, lint feedback, and "
+        "open questions. Drop pleasantries and repetition. Write terse bullet points, no preamble."
+    )
+    user_prompt = (
+        f"Existing summary:\n{previous_summary or '(none yet)'}\n\n"
+        f"New turns to merge:\n{_transcript(messages)}\n\n"
+        "Return the updated summary only."
+    )
+
+    client = get_openai_client()
+
+    async def _summarize(model):
+        return await client.chat.completions.create(
+            model=model.id,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.1,
+            max_tokens=settings.history_summary_max_tokens,
+        )
+
+    response = await call_with_failover(TASK_TIERS["context_compression"], _summarize)
+    return (response.choices[0].message.content or "").strip()
+
+
+# ── Compaction ────────────────────────────────────────────────────────────────
+
+async def prepare_history(task_id: str, summarize: Summarizer = summarize_history) -> HistoryContext | None:
+    """
+    Return the summary + recent turns for the next agent turn, folding older turns
+    into the summary first when the verbatim tail is over budget.
+    """
+    from app.db.concurrency import TaskConflictError, mutate_task
+    from app.db.database import AsyncSessionLocal
+    from app.logger import logger
+
+    async with AsyncSessionLocal() as session:
+        task = await session.get(CoddeTask, task_id)
+        if not task:
+            return None
+        history = list(task.chat_history or [])
+        upto = min(task.history_summary_upto or 0, len(history))
+        summary = task.history_summary
+
+    pending = history[upto:]
+    keep = max(settings.history_keep_recent_messages, 0)
+    if message_tokens(pending) <= settings.history_token_budget or len(pending) <= keep:
+        return HistoryContext(summary=summary, recent=pending)
+
+    fold = pending[:len(pending) - keep]
+    try:
+        new_summary = await summarize(summary, fold)
+        if not new_summary:
+            raise ValueError("empty summary")
+    except Exception as e:
+        # Degrade to a plain sliding window: newest messages that fit the budget
+        recent: list[dict] = []
+        used = 0
+        for m in reversed(pending):
+            used += message_tokens([m])
+            if recent and used > settings.history_token_budget:
+                break
+            recent.insert(0, m)
+        logger.warning(f"History compaction failed for {task_id}: {e} — sending last {len(recent)} messages")
+        return HistoryContext(summary=summary, recent=recent, dropped=len(pending) - len(recent))
+
+    new_upto = upto + len(fold)
+
+    def _apply(db_task: CoddeTask) -> None:
+        # Another turn may have folded concurrently — never move the summary backwards
+        if (db_task.history_summary_upto or 0) == upto:
+            db_task.history_summary = new_summary
+            db_task.history_summary_upto = new_upto
+
+    try:
+        async with AsyncSessionLocal() as session:
+            if await mutate_task(session, task_id, _apply):
+                await session.commit()
+    except TaskConflictError:
+        pass  # The summary is still valid for this turn; the next turn retries the save
+
+    logger.info(
+        f"History compacted for {task_id}: folded {len(fold)} messages "
+        f"({message_tokens(fold)} → {estimate_tokens(new_summary)} tokens)",
+        extra={"task_id": task_id, "folded_messages": len(fold),
+               "folded_tokens": message_tokens(fold), "summary_tokens": estimate_tokens(new_summary)},
+    )
+    return HistoryContext(summary=new_summary, recent=history[new_upto:], compacted=True)
+
+
+def apply_history(agent, context: HistoryContext) -> None:
+    """Swap Agno's fixed num_history_runs window for summary + recent turns."""
+    agent.add_history_to_context = False
+    rendered = context.render()
+    if rendered:
+        agent.additional_context = rendered
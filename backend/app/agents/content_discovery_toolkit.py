@@ -11,17 +11,199 @@ Unified Agno Toolkit for the Discovery stage. All signal sources in one place:
   search_news           | Exa (news)          | What's the industry coverage saying?
   search_research       | Exa (papers)        | What research exists on this angle?
   search_underrated     | Exa (niche)         | What angles are flying under the radar?
+  triangulate           | all but HF daily    | All of the above for one topic, in one call
 
 Discovery strategy: pair HF papers (academic frontier) + HN (practitioner sentiment)
 to find the gap — that gap is where "Bridge" content lives.
 Underrated search surfaces non-viral, under-covered angles worth owning early.
+
+triangulate(query) fires HF papers, HN and the three Exa searches concurrently,
+each under its own timeout (TRIANGULATE_SOURCE_TIMEOUT_SECONDS), and returns one
+compact digest with cross-source duplicates merged — one tool round trip for
+the model instead of five sequential ones.
+
+Every tool has an async twin registered through Toolkit(async_tools=...), which
+Agno prefers inside agent.arun(): HackerNews goes through a shared
+httpx.AsyncClient, and the blocking HfApi / Exa SDK calls run in a worker
+thread (asyncio.to_thread). A slow source never stalls the event loop — and so
+never stalls other users' chat streams. The sync methods remain for agent.run().
+
+The async twins read through the shared signal cache (app/agents/prefetch.py),
+which Discovery prefetch warms on stage entry. Errors and triangulations with a
+timed-out or failing source are not cached.
 """
 
 import asyncio
-from typing import Any
-
+import re
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+import httpx
 from agno.tools import Toolkit
 
+HN_SEARCH_URL = "https://hn.algolia.com/api/v1/search"
+HTTP_TIMEOUT_SECONDS = 10
+
+# Non-mainstream publication domains targeted by search_underrated
+NICHE_DOMAINS = [
+    "substack.com",
+    "medium.com",
+    "lesswrong.com",
+    "gwern.net",
+    "simonwillison.net",
+    "eugeneyan.com",
+    "lilianweng.github.io",
+    "interconnects.ai",
+    "thesequence.substack.com",
+    "inference.substack.com",
+]
+
+_client: tuple[asyncio.AbstractEventLoop, httpx.AsyncClient] | None = None
+
+
+def _http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for async discovery tools (one per event loop)."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop or _client[1].is_closed:
+        _client = (loop, httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SECONDS,
+            headers={"User-Agent": "BroCoDDE/0.4"},
+        ))
+    return _client[1]
+
+
+async def close_http_client() -> None:
+    """Close the shared client (app shutdown)."""
+    global _client
+    if _client is not None:
+        client, _client = _client[1], None
+        await client.aclose()
+
+
+def _async_twin(sync_tool: Callable) -> Callable[[Callable], Callable]:
+    """Give an async tool the docstring — the model-facing description — of its sync version."""
+    def decorate(async_tool: Callable) -> Callable:
+        async_tool.__doc__ = sync_tool.__doc__
+        return async_tool
+    return decorate
+
+
+def _cacheable(result: str) -> bool:
+    status = result.split("\n", 2)[:2]
+    return not result.startswith("[ContentDiscovery]") and not any(
+        " timed out after " in line or " error: " in line for line in status
+    )
+
+
+async def _cached(key: tuple, fetch: Callable[[], Awaitable[str]]) -> str:
+    from app.agents.prefetch import signal_cache
+    return await signal_cache.get_or_fetch(key, fetch, cacheable=_cacheable)
+
+
+def _format_hn(hits: list[dict], query: str, limit: int) -> str:
+    if not hits:
+        return f"No HackerNews stories found for: '{query}'"
+
+    lines = [f"## HackerNews — '{query}'\n"]
+    for i, h in enumerate(hits[:limit], 1):
+        title = h.get("title", "No title")
+        score = h.get("points", 0) or 0
+        comments = h.get("num_comments", 0) or 0
+        story_url = h.get("url") or f"https://news.ycombinator.com/item?id={h.get('objectID', '')}"
+        hn_url = f"https://news.ycombinator.com/item?id={h.get('objectID', '')}"
+
+        lines.append(f"**{i}. {title}** ({score} pts, {comments} comments)")
+        if story_url != hn_url:
+            lines.append(f"   Article: {story_url}")
+        lines.append(f"   HN: {hn_url}")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+# ── Triangulation digest ──────────────────────────────────────────────────────
+
+TRIANGULATE_SOURCES: dict[str, str] = {
+    "HF": "Research frontier (HuggingFace)",
+    "HN": "Practitioners (HackerNews)",
+    "News": "Industry news (Exa)",
+    "Research": "Research (Exa)",
+    "Underrated": "Underrated angles (Exa niche)",
+}
+
+
+class SourceSkipped(Exception):
+    """A triangulation source that is not configured (e.g. no EXA_API_KEY)."""
+
+
+@dataclass
+class Signal:
+    source: str
+    title: str
+    url: str
+    detail: str = ""
+    also: list[str] = field(default_factory=list)   # other sources that returned it
+
+
+def _url_key(url: str) -> str:
+    parts = urllib.parse.urlsplit(url.strip().lower())
+    host = parts.netloc.removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def _title_key(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+def triangulation_digest(query: str, outcomes: dict[str, list[Signal] | str]) -> str:
+    """
+    Render per-source signals (or a status string for a source that timed out,
+    failed or was skipped) as one digest. A result seen by several sources is
+    listed once, under the first, with the others noted.
+    """
+    seen: dict[str, Signal] = {}
+    merged = 0
+    kept: dict[str, list[Signal]] = {}
+    for source in TRIANGULATE_SOURCES:
+        signals = outcomes.get(source)
+        if not isinstance(signals, list):
+            continue
+        for signal in signals:
+            keys = [k for k in (_url_key(signal.url) if signal.url else "", _title_key(signal.title)) if k]
+            first = next((seen[k] for k in keys if k in seen), None)
+            if first is not None:
+                if signal.source not in first.also and signal.source != first.source:
+                    first.also.append(signal.source)
+                merged += 1
+                continue
+            for k in keys:
+                seen[k] = signal
+            kept.setdefault(source, []).append(signal)
+
+    status = " · ".join(
+        f"{source} {len(found) if isinstance(found := outcomes.get(source, 'skipped'), list) else found}"
+        for source in TRIANGULATE_SOURCES
+    )
+    lines = [f"## Triangulation — '{query}'", f"Sources: {status}" + (f" ({merged} duplicates merged)" if merged else "")]
+    for source, heading in TRIANGULATE_SOURCES.items():
+        if not kept.get(source):
+            continue
+        lines.append(f"\n### {heading}")
+        for signal in kept[source]:
+            line = f"- [{signal.title}]({signal.url})" if signal.url else f"- {signal.title}"
+            if signal.detail:
+                line += f" — {signal.detail}"
+            if signal.also:
+                line += f" (also on {', '.join(signal.also)})"
+            lines.append(line)
+    if not kept:
+        lines.append("\nNo signals found on any source.")
+    return "\n".join(lines)
+
 
 class ContentDiscoveryToolkit(Toolkit):
     """
@@ -43,6 +225,16 @@ class ContentDiscoveryToolkit(Toolkit):
                 self.search_news,
                 self.search_research,
                 self.search_underrated,
+                self.triangulate,
+            ],
+            async_tools=[
+                (self.aget_hf_daily_papers, "get_hf_daily_papers"),
+                (self.asearch_hf_papers, "search_hf_papers"),
+                (self.asearch_hackernews, "search_hackernews"),
+                (self.asearch_news, "search_news"),
+                (self.asearch_research, "search_research"),
+                (self.asearch_underrated, "search_underrated"),
+                (self.atriangulate, "triangulate"),
             ],
             **kwargs,
         )
@@ -137,15 +329,7 @@ class ContentDiscoveryToolkit(Toolkit):
             Matching papers with titles, upvotes, summaries, and HF URLs.
         """
         try:
-            from huggingface_hub import HfApi
-        except ImportError:
-            return "[ContentDiscovery] huggingface_hub not installed."
-
-        try:
-            api = HfApi(token=self.hf_token)
-            all_papers = list(api.list_papers(query=query))
-            # Filter: only papers with meaningful community signal (>10 upvotes)
-            papers = [p for p in all_papers if getattr(p, "upvotes", 0) > 10][:limit]
+            papers = self._hf_papers(query, limit)
 
             if not papers:
                 return f"No HF papers with more than 10 upvotes found for: '{query}'"
@@ -170,9 +354,19 @@ class ContentDiscoveryToolkit(Toolkit):
 
             return "\n".join(lines)
 
+        except ImportError:
+            return "[ContentDiscovery] huggingface_hub not installed."
         except Exception as e:
             return f"[ContentDiscovery] HF search error: {e}"
 
+    def _hf_papers(self, query: str, limit: int) -> list:
+        from huggingface_hub import HfApi
+
+        api = HfApi(token=self.hf_token)
+        all_papers = list(api.list_papers(query=query))
+        # Filter: only papers with meaningful community signal (>10 upvotes)
+        return [p for p in all_papers if getattr(p, "upvotes", 0) > 10][:limit]
+
     # ── HackerNews ────────────────────────────────────────────────────────────
 
     def search_hackernews(
@@ -194,60 +388,61 @@ class ContentDiscoveryToolkit(Toolkit):
         Returns:
             HN stories with titles, scores, comment counts, and URLs.
         """
-        import urllib.request
-        import urllib.parse
-        import json as _json
-
         try:
-            params = urllib.parse.urlencode({
-                "query": query,
-                "tags": "story",
-                "hitsPerPage": min(limit, 20),
-            })
-            url = f"https://hn.algolia.com/api/v1/search?{params}"
-
-            req = urllib.request.Request(url, headers={"User-Agent": "BroCoDDE/0.4"})
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                data = _json.loads(resp.read())
-
-            hits = data.get("hits", [])
-            if not hits:
-                return f"No HackerNews stories found for: '{query}'"
-
-            lines = [f"## HackerNews — '{query}'\n"]
-            for i, h in enumerate(hits[:limit], 1):
-                title = h.get("title", "No title")
-                score = h.get("points", 0) or 0
-                comments = h.get("num_comments", 0) or 0
-                story_url = h.get("url") or f"https://news.ycombinator.com/item?id={h.get('objectID', '')}"
-                hn_url = f"https://news.ycombinator.com/item?id={h.get('objectID', '')}"
-
-                lines.append(f"**{i}. {title}** ({score} pts, {comments} comments)")
-                if story_url != hn_url:
-                    lines.append(f"   Article: {story_url}")
-                lines.append(f"   HN: {hn_url}")
-                lines.append("")
-
-            return "\n".join(lines)
-
+            return _format_hn(self._hn_hits(query, limit), query, limit)
         except Exception as e:
             return f"[ContentDiscovery] HackerNews error: {e}"
 
+    @staticmethod
+    def _hn_params(query: str, limit: int) -> dict[str, Any]:
+        return {"query": query, "tags": "story", "hitsPerPage": min(limit, 20)}
+
+    def _hn_hits(self, query: str, limit: int) -> list[dict]:
+        import json as _json
+        import urllib.request
+
+        url = f"{HN_SEARCH_URL}?{urllib.parse.urlencode(self._hn_params(query, limit))}"
+        req = urllib.request.Request(url, headers={"User-Agent": "BroCoDDE/0.4"})
+        with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_SECONDS) as resp:
+            return _json.loads(resp.read()).get("hits", [])
+
+    async def _ahn_hits(self, query: str, limit: int) -> list[dict]:
+        resp = await _http_client().get(HN_SEARCH_URL, params=self._hn_params(query, limit))
+        resp.raise_for_status()
+        return resp.json().get("hits", [])
+
     # ── Exa Neural Search ────────────────────────────────────────────────────
 
-    def _exa_search(self, query: str, num_results: int, category: str | None, include_domains: list[str] | None = None) -> str:
-        """Internal: run Exa search synchronously (called from sync toolkit methods)."""
+    def _exa_key(self) -> str:
         from app.config import settings
-        api_key = self._exa_api_key or settings.exa_api_key
+        return self._exa_api_key or settings.exa_api_key
 
-        if not api_key:
+    def _exa_search(self, query: str, num_results: int, category: str | None, include_domains: list[str] | None = None) -> str:
+        """Internal: run Exa search synchronously (called from sync toolkit methods)."""
+        if not self._exa_key():
             return (
                 f"[ContentDiscovery] No EXA_API_KEY set — skipping Exa search for '{query}'.\n"
                 f"Add EXA_API_KEY to .env to enable."
             )
 
+        results = self._exa_results(query, num_results, category, include_domains)
+        if not results:
+            return f"No Exa results for: '{query}'"
+
+        lines = []
+        for r in results:
+            text = ""
+            if hasattr(r, "text") and r.text:
+                text = r.text[:350].strip().replace("\n", " ")
+            lines.append(f"- **{r.title or 'Untitled'}**")
+            if text:
+                lines.append(f"  {text}...")
+            lines.append(f"  {r.url}")
+        return "\n".join(lines)
+
+    def _exa_results(self, query: str, num_results: int, category: str | None, include_domains: list[str] | None = None) -> list:
         from exa_py import Exa
-        exa = Exa(api_key=api_key)
+        exa = Exa(api_key=self._exa_key())
 
         search_kwargs: dict[str, Any] = {
             "query": query,
@@ -260,21 +455,7 @@ class ContentDiscoveryToolkit(Toolkit):
         if include_domains:
             search_kwargs["include_domains"] = include_domains
 
-        results = exa.search(**search_kwargs)
-
-        if not results.results:
-            return f"No Exa results for: '{query}'"
-
-        lines = []
-        for r in results.results:
-            text = ""
-            if hasattr(r, "text") and r.text:
-                text = r.text[:350].strip().replace("\n", " ")
-            lines.append(f"- **{r.title or 'Untitled'}**")
-            if text:
-                lines.append(f"  {text}...")
-            lines.append(f"  {r.url}")
-        return "\n".join(lines)
+        return list(exa.search(**search_kwargs).results or [])
 
     def search_news(
         self,
@@ -347,23 +528,11 @@ class ContentDiscoveryToolkit(Toolkit):
         """
         try:
             # Target niche/non-mainstream publication domains
-            niche_domains = [
-                "substack.com",
-                "medium.com",
-                "lesswrong.com",
-                "gwern.net",
-                "simonwillison.net",
-                "eugeneyan.com",
-                "lilianweng.github.io",
-                "interconnects.ai",
-                "thesequence.substack.com",
-                "inference.substack.com",
-            ]
             result = self._exa_search(
                 query,
                 num_results=limit,
                 category=None,
-                include_domains=niche_domains,
+                include_domains=NICHE_DOMAINS,
             )
             # If niche search returns nothing (domains not matching), fall back to broad
             if "No Exa results" in result:
@@ -371,3 +540,207 @@ class ContentDiscoveryToolkit(Toolkit):
             return f"## Underrated Angles — '{query}'\n\n{result}"
         except Exception as e:
             return f"[ContentDiscovery] Exa underrated error: {e}"
+
+    # ── Triangulation ────────────────────────────────────────────────────────
+
+    def triangulate(
+        self,
+        query: str,
+        limit: int = 3,
+    ) -> str:
+        """
+        Query every discovery source for one topic at once and get a single digest.
+
+        Fires HF paper search, HackerNews, and Exa news / research / underrated
+        concurrently, each with its own timeout, and merges results that several
+        sources found. Prefer this over calling the individual search tools one by
+        one when brainstorming a topic; use an individual tool only to go deeper on
+        one source.
+
+        Args:
+            query: Topic or angle to triangulate (e.g. 'speculative decoding').
+            limit: Results per source (1-5, default 3).
+
+        Returns:
+            One digest: per-source status line, then linked results grouped by source.
+        """
+        from app.config import settings
+
+        timeout = settings.triangulate_source_timeout_seconds
+        durations: dict[str, float] = {}
+
+        def _timed(source: str, fetch: Callable[[], list[Signal]]) -> list[Signal]:
+            began = time.perf_counter()
+            try:
+                return fetch()
+            finally:
+                durations[source] = time.perf_counter() - began
+
+        start = time.perf_counter()
+        outcomes: dict[str, list[Signal] | str] = {}
+        pool = ThreadPoolExecutor(max_workers=len(TRIANGULATE_SOURCES))
+        try:
+            futures = {
+                pool.submit(_timed, source, fetch): source
+                for source, fetch in self._signal_fetchers(query, limit).items()
+            }
+            done, _ = wait(futures, timeout=timeout)
+            for future, source in futures.items():
+                if future not in done:
+                    outcomes[source] = f"timed out after {timeout:g}s"
+                elif future.exception() is not None:
+                    outcomes[source] = self._failure(future.exception())
+                else:
+                    outcomes[source] = future.result()
+        finally:
+            # Stragglers finish in the background; their results are dropped
+            pool.shutdown(wait=False, cancel_futures=True)
+        return self._finish_triangulation(query, outcomes, durations, time.perf_counter() - start)
+
+    @_async_twin(triangulate)
+    async def atriangulate(self, query: str, limit: int = 3) -> str:
+        return await _cached(("triangulate", query, limit), lambda: self._atriangulate(query, limit))
+
+    async def _atriangulate(self, query: str, limit: int) -> str:
+        from app.config import settings
+
+        timeout = settings.triangulate_source_timeout_seconds
+        durations: dict[str, float] = {}
+
+        async def _one(source: str, fetch: Callable[[], Awaitable[list[Signal]]]) -> list[Signal] | str:
+            began = time.perf_counter()
+            try:
+                return await asyncio.wait_for(fetch(), timeout)
+            except asyncio.TimeoutError:
+                return f"timed out after {timeout:g}s"
+            except Exception as e:
+                return self._failure(e)
+            finally:
+                durations[source] = time.perf_counter() - began
+
+        start = time.perf_counter()
+        fetchers = self._asignal_fetchers(query, limit)
+        results = await asyncio.gather(*(_one(source, fetch) for source, fetch in fetchers.items()))
+        outcomes = dict(zip(fetchers, results))
+        return self._finish_triangulation(query, outcomes, durations, time.perf_counter() - start)
+
+    @staticmethod
+    def _failure(error: BaseException) -> str:
+        if isinstance(error, SourceSkipped):
+            return f"skipped ({error})"
+        return f"error: {error}"
+
+    @staticmethod
+    def _finish_triangulation(
+        query: str,
+        outcomes: dict[str, list[Signal] | str],
+        durations: dict[str, float],
+        elapsed: float,
+    ) -> str:
+        from app.logger import logger
+
+        found = sum(len(v) for v in outcomes.values() if isinstance(v, list))
+        failed = [s for s, v in outcomes.items() if not isinstance(v, list)]
+        logger.info(
+            f"[triangulate] '{query}' — {len(outcomes)} sources in {elapsed:.2f}s "
+            f"(sum of source times {sum(durations.values()):.2f}s), {found} results"
+            + (f", no data from {', '.join(failed)}" if failed else "")
+        )
+        return triangulation_digest(query, outcomes)
+
+    # Per-source fetchers returning Signals (sync for triangulate, async for atriangulate)
+
+    def _hf_signals(self, query: str, limit: int) -> list[Signal]:
+        return [
+            Signal(
+                "HF",
+                getattr(p, "title", "No title"),
+                f"https://huggingface.co/papers/{p.id}" if getattr(p, "id", "") else "",
+                f"{getattr(p, 'upvotes', 0)} upvotes",
+            )
+            for p in self._hf_papers(query, limit)
+        ]
+
+    @staticmethod
+    def _hn_signals(hits: list[dict], limit: int) -> list[Signal]:
+        return [
+            Signal(
+                "HN",
+                h.get("title") or "No title",
+                h.get("url") or f"https://news.ycombinator.com/item?id={h.get('objectID', '')}",
+                f"{h.get('points') or 0} pts, {h.get('num_comments') or 0} comments",
+            )
+            for h in hits[:limit]
+        ]
+
+    def _exa_signals(self, source: str, query: str, limit: int) -> list[Signal]:
+        if not self._exa_key():
+            raise SourceSkipped("no EXA_API_KEY")
+        if source == "Underrated":
+            results = self._exa_results(query, limit, None, NICHE_DOMAINS)
+        else:
+            results = self._exa_results(query, limit, "news" if source == "News" else "research paper")
+        return [
+            Signal(source, r.title or "Untitled", r.url,
+                   (getattr(r, "text", "") or "")[:140].strip().replace("\n", " "))
+            for r in results
+        ]
+
+    def _signal_fetchers(self, query: str, limit: int) -> dict[str, Callable[[], list[Signal]]]:
+        limit = max(1, min(limit, 5))
+        return {
+            "HF": lambda: self._hf_signals(query, limit),
+            "HN": lambda: self._hn_signals(self._hn_hits(query, limit), limit),
+            **{source: (lambda source=source: self._exa_signals(source, query, limit))
+               for source in ("News", "Research", "Underrated")},
+        }
+
+    def _asignal_fetchers(self, query: str, limit: int) -> dict[str, Callable[[], Awaitable[list[Signal]]]]:
+        limit = max(1, min(limit, 5))
+
+        async def _hn() -> list[Signal]:
+            return self._hn_signals(await self._ahn_hits(query, limit), limit)
+
+        return {
+            "HF": lambda: asyncio.to_thread(self._hf_signals, query, limit),
+            "HN": _hn,
+            **{source: (lambda source=source: asyncio.to_thread(self._exa_signals, source, query, limit))
+               for source in ("News", "Research", "Underrated")},
+        }
+
+    # ── Async twins (used by agent.arun) ──────────────────────────────────────
+
+    @_async_twin(get_hf_daily_papers)
+    async def aget_hf_daily_papers(self, date: str | None = None, limit: int = 5) -> str:
+        return await _cached(("get_hf_daily_papers", date, limit),
+                             lambda: asyncio.to_thread(self.get_hf_daily_papers, date, limit))
+
+    @_async_twin(search_hf_papers)
+    async def asearch_hf_papers(self, query: str, limit: int = 5) -> str:
+        return await _cached(("search_hf_papers", query, limit),
+                             lambda: asyncio.to_thread(self.search_hf_papers, query, limit))
+
+    @_async_twin(search_hackernews)
+    async def asearch_hackernews(self, query: str, limit: int = 5) -> str:
+        async def _search() -> str:
+            try:
+                return _format_hn(await self._ahn_hits(query, limit), query, limit)
+            except Exception as e:
+                return f"[ContentDiscovery] HackerNews error: {e}"
+
+        return await _cached(("search_hackernews", query, limit), _search)
+
+    @_async_twin(search_news)
+    async def asearch_news(self, query: str, limit: int = 4) -> str:
+        return await _cached(("search_news", query, limit),
+                             lambda: asyncio.to_thread(self.search_news, query, limit))
+
+    @_async_twin(search_research)
+    async def asearch_research(self, query: str, limit: int = 4) -> str:
+        return await _cached(("search_research", query, limit),
+                             lambda: asyncio.to_thread(self.search_research, query, limit))
+
+    @_async_twin(search_underrated)
+    async def asearch_underrated(self, query: str, limit: int = 4) -> str:
+        return await _cached(("search_underrated", query, limit),
+                             lambda: asyncio.to_thread(self.search_underrated, query, limit))
@@ -1,12 +1,19 @@
 """
 BroCoDDE — Agno Database and Memory Setup
 Shared SqliteDb instance used by all agents for native memory and session storage.
+Created on first use (the first agent build), so importing the agent modules
+does not import Agno.
 """
 
+from functools import lru_cache
 from pathlib import Path
 
-from agno.db.sqlite import SqliteDb
-
 # Single shared DB for all agents — enables cross-agent memory sharing (Agno pattern)
 DB_PATH = Path(__file__).parent.parent.parent / "brocodde.db"
-agno_db = SqliteDb(db_file=str(DB_PATH))
+
+
+@lru_cache
+def get_agno_db():
+    from agno.db.sqlite import SqliteDb
+
+    return SqliteDb(db_file=str(DB_PATH))
@@ -7,21 +7,24 @@ probes gaps with questions, and crystallizes insights into ConceptNodes.
 No stage auto-advance — user drives exit entirely.
 """
 
+from typing import TYPE_CHECKING
+
 from app.config import settings
-from agno.agent import Agent
-from agno.memory import MemoryManager
-from agno.models.openai import OpenAIChat
-from agno.tools.memory import MemoryTools
 
-from app.agents.db import agno_db
 from app.agents.knowledge import get_skills_knowledge
 from app.agents.tools import (
+    concept_neighbors_tool,
+    related_concepts_tool,
     save_concept_tool,
     search_concepts_tool,
     web_fetch_tool,
     web_search_tool,
 )
 from app.agents.base import UNIVERSAL_SYSTEM_PROMPT
+from app.models.router import get_healthy_model, get_memory_model
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
 
 FEYNMAN_INSTRUCTIONS = f"""
 {UNIVERSAL_SYSTEM_PROMPT}
@@ -55,14 +58,16 @@ This is not a tutoring session. You are not here to teach. You are here to expos
 - Search your knowledge graph (search_concepts_tool) ONLY when:
   1. The user explicitly asks ("have we talked about X before?")
   2. The overlap is unmistakable — exact same mechanism, not vague thematic similarity
+- To check whether a mechanism the user just articulated matches a past concept in different words, use related_concepts_tool with a one-sentence description of it. It only returns close matches; treat anything it returns as a candidate, and surface it only if the mechanism is truly the same.
+- Once a past concept is on the table, concept_neighbors_tool shows what it is already linked to — use it instead of searching again.
 - Do NOT go fishing for cross-domain connections proactively. The session is deep, not wide.
 - When you do surface a connection, name it specifically: "This is the same feedback loop as [concept title]." One sentence. Then move on.
 
 **When the user signals they're done or wants to publish:**
 - If they say "let's save this", "publish this", "I'm done", "that's enough", etc.:
   1. Synthesize what they've understood into one crystallized insight (core_insight).
-  2. Call save_concept_tool with: title, core_insight, source_url (from session), domain, tags.
-  3. Confirm: "Saved to your concept graph: [title]."
+  2. Call save_concept_tool with: title, core_insight, source_url (from session), domain, tags. If the user says this revisits a concept they already saved, also pass merge_duplicate=true.
+  3. Confirm: "Saved to your concept graph: [title]." If the result flags a duplicate, say which existing concept it repeats instead. Otherwise, if it lists related concepts that share the exact mechanism, name the closest one in the same sentence.
   4. If they want a post: generate a tight 150-200 word micro-post that reads as a genuine insight — not a summary, not a list. A single compelling idea with one concrete implication. No stage advancement — the user controls what happens next.
 
 **If user asks you to generate a post without saving:**
@@ -93,28 +98,21 @@ When generating a publishable insight:
 def build_feynman(
     user_id: str = "default_user",
     session_id: str | None = None,
-) -> Agent:
+) -> "Agent":
     """Build a Feynman agent for Spark mode micro-learning sessions."""
+    from agno.agent import Agent
+    from agno.memory import MemoryManager
+    from agno.tools.memory import MemoryTools
+
+    from app.agents.db import get_agno_db
 
-    model_id = settings.tier3_model
-    max_tokens = 8192
+    agno_db = get_agno_db()
 
-    def _make_model():
-        return OpenAIChat(
-            id=model_id,
-            api_key=settings.openrouter_api_key or None,
-            base_url="https://openrouter.ai/api/v1",
-            max_tokens=max_tokens,
-        )
+    tier = 3
 
     memory_manager = MemoryManager(
         db=agno_db,
-        model=OpenAIChat(
-            id=settings.tier1_model,
-            api_key=settings.openrouter_api_key or None,
-            base_url="https://openrouter.ai/api/v1",
-            max_tokens=1024,
-        )
+        model=get_memory_model()
         if settings.has_any_ai_key
         else None,
         additional_instructions=(
@@ -128,7 +126,7 @@ def build_feynman(
 
     return Agent(
         name="feynman",
-        model=_make_model(),
+        model=get_healthy_model(tier=tier, claim_probe=False),
         instructions=FEYNMAN_INSTRUCTIONS,
         tools=[
             memory_tools,
@@ -136,6 +134,8 @@ def build_feynman(
             web_search_tool,
             save_concept_tool,
             search_concepts_tool,
+            related_concepts_tool,
+            concept_neighbors_tool,
         ],
         knowledge=get_skills_knowledge(),
         search_knowledge=False,  # No skill knowledge needed — this is pure dialogue
@@ -7,11 +7,22 @@ import asyncio
 from typing import AsyncIterator
 
 from app.agents.analyst import build_analyst
+from app.agents.compaction import HistoryContext, apply_history, prepare_history
 from app.agents.feynman import build_feynman
 from app.agents.interviewer import build_interviewer
 from app.agents.shaper import build_shaper
 from app.agents.strategist import build_strategist
-from app.models.router import is_mock_mode
+from app.config import settings
+from app.db.usage import TurnUsage, record_usage
+from app.logger import logger
+from app.memory.ranking import MemorySelection, apply_memory
+from app.models.router import (
+    claim_healthy_model,
+    failover_model,
+    is_mock_mode,
+    record_model_failure,
+    record_model_success,
+)
 
 STAGE_AGENT_MAP = {
     "discovery":    "strategist",
@@ -61,53 +72,194 @@ async def stream_chat(
     else:
         agent = build_shaper(mode=task_stage, user_id=user_id, session_id=session_id, deep_critique=deep_critique)
 
-    try:
-        # Run Agno agent asynchronously (supports async tools natively)
-        # stream_events=True emits ToolCallStarted, ReasoningContentDelta, etc.
-        thinking_open = False
-        async for event in agent.arun(message, user_id=user_id, stream=True, stream_events=True):
-            ev = getattr(event, "event", None)
-
-            # ── Tool-call activity markers ──────────────────────────────────
-            if ev == "ToolCallStarted":
-                tool = getattr(event, "tool", None)
-                name = getattr(tool, "tool_name", None) if tool else None
-                if name:
-                    yield f"[TOOL:{name}]"
-
-            elif ev == "MemoryUpdateStarted":
-                yield "[TOOL:memory_update]"
-
-            # ── Reasoning / thinking content (streamed deltas) ───────────────
-            elif ev == "ReasoningContentDelta":
-                rc = getattr(event, "reasoning_content", None)
-                if rc:
-                    if not thinking_open:
-                        yield "<thinking>"
-                        thinking_open = True
-                    yield rc
-
-            elif ev == "ReasoningCompleted":
-                if thinking_open:
-                    yield "</thinking>"
-                    thinking_open = False
-
-            # ── Regular text content (RunContent events only) ────────────────
-            elif ev == "RunContent":
-                # Close any open thinking block before regular content
-                if thinking_open:
-                    yield "</thinking>"
-                    thinking_open = False
-                content = getattr(event, "content", None)
-                if content:
-                    yield content
-
-        # Safety: close thinking if stream ended unexpectedly
-        if thinking_open:
-            yield "</thinking>"
-
-    except Exception as e:
-        yield f"\n[Agent error: {e}]"
+    # Summary + recent turns instead of a fixed num_history_runs window
+    history: HistoryContext | None = None
+    if settings.history_compaction_enabled:
+        try:
+            history = await prepare_history(task_id)
+        except Exception as e:
+            logger.warning(f"History preparation failed for {task_id}: {e}")
+        if history is not None:
+            apply_history(agent, history)
+
+    # Ranked memory instead of every Agno memory (app/memory/ranking.py)
+    memory = None
+    if settings.memory_ranking_enabled:
+        try:
+            memory = await _turn_memory(message, task_stage, user_id)
+        except Exception as e:
+            logger.warning(f"Memory ranking failed for {task_id}: {e}")
+        if memory is not None:
+            apply_memory(agent, memory.rendered)
+
+    # Failover: a run that fails before producing any output is retried once on the
+    # tier's alt model. Once anything reached the client (text, thinking or a tool
+    # call that may have side effects) the error is surfaced instead.
+    # Every attempt is metered into the usage ledger (app/db/usage.py).
+    # Builders leave a half-open breaker's probe alone; this run reports its outcome.
+    agent.model = claim_healthy_model(agent.model)
+    while True:
+        model = agent.model
+        usage = TurnUsage(task_id=task_id, stage=task_stage, agent=agent_name, model=model.id)
+        if memory is not None:
+            usage.memory_candidates = memory.candidates
+            usage.memory_injected = len(memory.items)
+            usage.memory_tokens = memory.tokens
+            usage.memory_seconds = memory.seconds
+        produced = False
+        # Stays "aborted" if the client goes away mid-stream (GeneratorExit / CancelledError)
+        status, error, alt = "aborted", None, None
+        try:
+            async for chunk in _run_agent(agent, message, user_id, task_id, agent_name, history, usage, memory):
+                if not produced:
+                    produced = True
+                    usage.first_chunk()
+                    record_model_success(model, usage.ttft_seconds)
+                yield chunk
+            status = "ok"
+        except Exception as e:
+            record_model_failure(model, e)
+            alt = None if produced else failover_model(model, f"{agent_name} run failed: {e}")
+            status, error = ("error" if alt is None else "failover"), e
+        finally:
+            usage.finish(status)
+            await record_usage(usage)
+        if status == "ok":
+            return
+        if alt is None:
+            yield f"\n[Agent error: {error}]"
+            return
+        agent.model = alt
+
+
+async def _turn_memory(message: str, stage: str, user_id: str) -> MemorySelection:
+    """Context entries + Agno memories ranked against this message, rendered for the prompt."""
+    from app.db.database import AsyncSessionLocal
+    from app.memory.models import ComposedContext
+    from app.memory.store import ranked_memory
+
+    async with AsyncSessionLocal() as db:
+        selection = await ranked_memory(db, stage, query=message, user_id=user_id)
+    selection.rendered = ComposedContext(
+        identity_memory=selection.of("user"),
+        agent_context=selection.of("agent"),
+        agno_memories=selection.of("agno"),
+    ).to_prompt_text()
+    return selection
+
+
+class AgentRunError(Exception):
+    """Agno reported a failed run through a RunError event instead of raising."""
+
+
+async def _run_agent(
+    agent,
+    message: str,
+    user_id: str,
+    task_id: str,
+    agent_name: str,
+    history: HistoryContext | None,
+    usage: TurnUsage | None = None,
+    memory: MemorySelection | None = None,
+) -> AsyncIterator[str]:
+    """Translate one Agno run's event stream into harness text chunks. Raises on failure."""
+    # Run Agno agent asynchronously (supports async tools natively)
+    # stream_events=True emits ToolCallStarted, ReasoningContentDelta, etc.
+    thinking_open = False
+    async for event in agent.arun(message, user_id=user_id, stream=True, stream_events=True):
+        ev = getattr(event, "event", None)
+
+        # ── Tool-call activity markers ──────────────────────────────────
+        if ev == "ToolCallStarted":
+            tool = getattr(event, "tool", None)
+            name = getattr(tool, "tool_name", None) if tool else None
+            if usage is not None:
+                usage.tool_calls += 1
+            if thinking_open:
+                yield "</thinking>"
+                thinking_open = False
+            if name:
+                yield f"[TOOL:{name}]"
+
+        elif ev == "MemoryUpdateStarted":
+            yield "[TOOL:memory_update]"
+
+        # ── Reasoning / thinking content (streamed deltas) ───────────────
+        elif ev == "ReasoningContentDelta":
+            rc = getattr(event, "reasoning_content", None)
+            if rc:
+                if not thinking_open:
+                    yield "<thinking>"
+                    thinking_open = True
+                yield rc
+
+        elif ev == "ReasoningCompleted":
+            if thinking_open:
+                yield "</thinking>"
+                thinking_open = False
+
+        # ── Regular text content (RunContent events only) ────────────────
+        elif ev == "RunContent":
+            # Model-native reasoning (delta.reasoning / reasoning_content) arrives
+            # on RunContent events rather than ReasoningContentDelta
+            rc = getattr(event, "reasoning_content", None)
+            if rc:
+                if not thinking_open:
+                    yield "<thinking>"
+                    thinking_open = True
+                yield rc
+            # Close any open thinking block before regular content
+            if thinking_open and getattr(event, "content", None):
+                yield "</thinking>"
+                thinking_open = False
+            content = getattr(event, "content", None)
+            if content:
+                yield content
+
+        # ── Per-turn token accounting ────────────────────────────────────
+        elif ev == "RunCompleted":
+            if usage is not None:
+                usage.add_metrics(getattr(event, "metrics", None))
+            _log_turn_tokens(task_id, agent_name, getattr(event, "metrics", None), history, memory)
+
+        elif ev == "RunError":
+            raise AgentRunError(getattr(event, "content", None) or "run failed")
+
+    # Safety: close thinking if stream ended unexpectedly
+    if thinking_open:
+        yield "</thinking>"
+
+
+def _log_turn_tokens(
+    task_id: str,
+    agent_name: str,
+    metrics,
+    history: HistoryContext | None,
+    memory: MemorySelection | None = None,
+) -> None:
+    """Report the turn's real prompt size (from the provider) next to the history and memory shares of it."""
+    input_tokens = getattr(metrics, "input_tokens", 0) or 0
+    output_tokens = getattr(metrics, "output_tokens", 0) or 0
+    history_tokens = history.tokens if history else None
+    memory_tokens = memory.tokens if memory else None
+    logger.info(
+        f"Turn tokens — {task_id} [{agent_name}]: input={input_tokens} output={output_tokens}"
+        + (f" history≈{history_tokens}" if history_tokens is not None else "")
+        + (f" memory≈{memory_tokens} ({len(memory.items)}/{memory.candidates} entries,"
+           f" {memory.seconds * 1000:.1f}ms)" if memory else ""),
+        extra={
+            "task_id": task_id,
+            "agent": agent_name,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_read_tokens": getattr(metrics, "cache_read_tokens", 0) or 0,
+            "history_tokens": history_tokens,
+            "history_compacted": bool(history and history.compacted),
+            "memory_tokens": memory_tokens,
+            "memory_injected": len(memory.items) if memory else None,
+            "memory_candidates": memory.candidates if memory else None,
+        },
+    )
 
 
 async def _mock_stream(stage: str, role: str) -> AsyncIterator[str]:
@@ -7,16 +7,24 @@ Adapts behavior to the selected role (Researcher, Archaeologist, etc).
 Loaded skills: content-extraction + role-specific reference file.
 """
 
+from typing import TYPE_CHECKING
+
 from app.config import settings
-from agno.agent import Agent
-from agno.memory import MemoryManager
-from agno.models.openai import OpenAIChat
-from agno.tools.memory import MemoryTools
 
-from app.agents.db import agno_db
 from app.agents.knowledge import get_skills_knowledge
-from app.agents.tools import skill_list, skill_load, skill_load_reference, web_search_tool, web_fetch_tool
+from app.agents.tools import (
+    skill_list,
+    skill_load,
+    skill_load_reference,
+    skill_search,
+    web_fetch_tool,
+    web_search_tool,
+)
 from app.agents.base import UNIVERSAL_SYSTEM_PROMPT
+from app.models.router import get_healthy_model, get_memory_model
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
 
 INTERVIEWER_INSTRUCTIONS = f"""
 {UNIVERSAL_SYSTEM_PROMPT}
@@ -87,16 +95,20 @@ def build_interviewer(
     role: str = "researcher",
     user_id: str = "default_user",
     session_id: str | None = None,
-) -> Agent:
+) -> "Agent":
     """Build an Interviewer agent adapted to the selected role."""
-    model_id = settings.tier2_model
+    from agno.agent import Agent
+    from agno.memory import MemoryManager
+    from agno.tools.memory import MemoryTools
+
+    from app.agents.db import get_agno_db
 
-    def _make_model():
-        return OpenAIChat(id=model_id, api_key=settings.openrouter_api_key or None, base_url="https://openrouter.ai/api/v1", max_tokens=4096)
+    agno_db = get_agno_db()
+    tier = 2
 
     memory_manager = MemoryManager(
         db=agno_db,
-        model=OpenAIChat(id=settings.tier1_model, api_key=settings.openrouter_api_key or None, base_url="https://openrouter.ai/api/v1", max_tokens=1024)
+        model=get_memory_model()
         if settings.has_any_ai_key
         else None,
         additional_instructions=(
@@ -107,13 +119,14 @@ def build_interviewer(
 
     return Agent(
         name="interviewer",
-        model=_make_model(),
+        model=get_healthy_model(tier=tier, claim_probe=False),
         instructions=INTERVIEWER_INSTRUCTIONS.replace("{role}", role.lower()),
         tools=[
             MemoryTools(db=agno_db),
             skill_list,
             skill_load,
             skill_load_reference,
+            skill_search,
             web_search_tool,
             web_fetch_tool,
         ],
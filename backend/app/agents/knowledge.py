@@ -1,23 +1,233 @@
 """
 BroCoDDE — Agno Knowledge Base
-Skills repository served as inline context via the skill_load tool.
-Vector RAG is skipped when no embedder key is available — which is always the
-case with OpenRouter-only setups. Skills are loaded on-demand by agents via
-the skill_load and skill_load_reference tools in tools.py.
+Skills repository (app/skills/<name>/SKILL.md plus references/*.md), split by
+heading into sections and indexed for BM25 search in memory. The index is
+built at startup (~40 KB of markdown, a few ms) and rebuilt if a file changes.
+
+Agents reach it two ways:
+- skill_search(query, k) in tools.py — the matching sections only, with token counts
+- get_skills_knowledge() — the same index as an Agno knowledge object, so
+  search_knowledge=True gives agents a search_knowledge_base tool over it
+
+Vector RAG is skipped: there is no embedder key in OpenRouter-only setups, and
+the skills are small and keyword-dense enough for BM25. skill_load still
+returns a whole skill, outlining the sections past its size cap.
 """
 
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
+from app.agents.compaction import estimate_tokens
+from app.memory.ranking import terms
+
 SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
+BM25_K1, BM25_B = 1.2, 0.75
+HEADING_WEIGHT = 2              # heading terms count this many times in a section
+SECTION_MAX_TOKENS = 600        # longer sections are split at paragraph boundaries
+
+_HEADING = re.compile(r"^(#{1,4})\s+(.+?)\s*#*\s*$")
+_RULE = re.compile(r"^\s*(-{3,}|\*{3,})\s*$")
+
+
+@dataclass
+class SkillSection:
+    skill: str                  # skill directory name
+    source: str                 # "SKILL.md" or "references/<name>.md"
+    heading: str                # breadcrumb below the title, e.g. "5. Two-Layer Context Architecture › Core distinction"
+    text: str
+    tokens: int
+
+
+# ── Splitting ─────────────────────────────────────────────────────────────────
+
+def _strip_frontmatter(content: str) -> str:
+    if content.startswith("---"):
+        parts = content.split("---", 2)
+        if len(parts) == 3:
+            return parts[2]
+    return content
+
+
+def _chunk(text: str) -> list[str]:
+    """Split an oversized section at blank lines into pieces of about SECTION_MAX_TOKENS."""
+    if estimate_tokens(text) <= SECTION_MAX_TOKENS:
+        return [text]
+    chunks, current = [], ""
+    for para in re.split(r"\n\s*\n", text):
+        if current and estimate_tokens(current) + estimate_tokens(para) > SECTION_MAX_TOKENS:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+    if current:
+        chunks.append(current)
+    return chunks
 
-def get_skills_knowledge():
+
+def split_sections(content: str, skill: str, source: str = "SKILL.md") -> list[SkillSection]:
     """
-    Returns None — skills are loaded on-demand from the filesystem via the
-    skill_load tool, which reads SKILL.md directly. This avoids requiring
-    an OpenAI embedding key while still giving agents full skill access.
+    One section per heading (outside code fences), titled with the path of
+    headings above it. Text before the first heading becomes an untitled
+    section; empty sections (a heading directly followed by a sub-heading) are dropped.
     """
-    return None
+    sections: list[SkillSection] = []
+    trail: list[tuple[int, str]] = []
+    lines: list[str] = []
+    in_fence = False
+
+    def flush() -> None:
+        text = "\n".join(line for line in lines if not _RULE.match(line)).strip()
+        if text:
+            # The H1 is the document title — the skill name already says that
+            heading = " › ".join(title for lvl, title in trail if lvl > 1) or " › ".join(t for _, t in trail)
+            for n, piece in enumerate(_chunk(text)):
+                title = heading if n == 0 else f"{heading} (cont. {n})"
+                sections.append(SkillSection(skill, source, title, piece, estimate_tokens(piece)))
+        lines.clear()
+
+    for line in _strip_frontmatter(content).splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        flush()
+        level = len(match.group(1))
+        trail = [(lvl, title) for lvl, title in trail if lvl < level]
+        trail.append((level, match.group(2)))
+    flush()
+    return sections
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+class SkillIndex:
+    """BM25 over skill sections. Postings are built once; a query touches only the sections sharing a term."""
+
+    def __init__(self, skills_dir: Path = SKILLS_DIR):
+        self.skills_dir = skills_dir
+        self.sections: list[SkillSection] = []
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        self._avg_length = 1.0
+        self._mtimes: dict[Path, float] = {}
+
+    def _files(self) -> list[tuple[str, str, Path]]:
+        files = []
+        for skill_dir in sorted(d for d in self.skills_dir.iterdir() if (d / "SKILL.md").exists()):
+            files.append((skill_dir.name, "SKILL.md", skill_dir / "SKILL.md"))
+            for ref in sorted((skill_dir / "references").glob("*.md")):
+                files.append((skill_dir.name, f"references/{ref.name}", ref))
+        return files
+
+    def stale(self) -> bool:
+        files = [path for _, _, path in self._files()]
+        return set(files) != set(self._mtimes) or any(p.stat().st_mtime != self._mtimes[p] for p in files)
+
+    def build(self) -> "SkillIndex":
+        from app.logger import logger
+
+        start = time.perf_counter()
+        self.sections, self._mtimes = [], {}
+        for skill, source, path in self._files():
+            self.sections += split_sections(path.read_text(), skill, source)
+            self._mtimes[path] = path.stat().st_mtime
+
+        postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._lengths = []
+        for idx, section in enumerate(self.sections):
+            words = list(terms(section.text)) + list(terms(f"{section.skill} {section.heading}")) * HEADING_WEIGHT
+            self._lengths.append(len(words))
+            for term, tf in Counter(words).items():
+                postings[term].append((idx, tf))
+        self._postings = dict(postings)
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 1.0
+        logger.info(
+            f"Skill index: {len(self.sections)} sections from {len(self._mtimes)} files "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return self
+
+    def search(self, query: str, k: int = 3, skill: str | None = None) -> list[tuple[SkillSection, float]]:
+        """Top `k` sections for a query, optionally within one skill (directory name or part of it)."""
+        n = len(self.sections)
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[idx] / self._avg_length)
+                scores[idx] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if skill:
+            wanted = skill.lower()
+            scores = {idx: s for idx, s in scores.items() if wanted in self.sections[idx].skill}
+        ranked = sorted(scores.items(), key=lambda pair: -pair[1])[:k]
+        return [(self.sections[idx], score) for idx, score in ranked]
+
+    def outline(self, skill: str) -> list[SkillSection]:
+        return [s for s in self.sections if s.skill == skill and s.source == "SKILL.md"]
+
+
+_index: SkillIndex | None = None
+
+
+def skill_index() -> SkillIndex:
+    """The process-wide index, built on first use (or at startup) and rebuilt when a skill file changes."""
+    global _index
+    if _index is None or _index.stale():
+        _index = SkillIndex().build()
+    return _index
+
+
+# ── Agno knowledge ────────────────────────────────────────────────────────────
+
+class SkillsKnowledge:
+    """Agno KnowledgeProtocol over the skill index (search_knowledge_base → retrieve())."""
+
+    max_results = 3
+
+    def build_context(self, **kwargs) -> str:
+        return (
+            "The BroCoDDE skills library (frameworks, platform rules, quality gates) is searchable: "
+            "use skill_search or search_knowledge_base with a specific question to get just the "
+            "relevant sections instead of loading a whole skill."
+        )
+
+    def get_tools(self, **kwargs) -> list:
+        return []
+
+    async def aget_tools(self, **kwargs) -> list:
+        return []
+
+    def retrieve(self, query: str, max_results: int | None = None, **kwargs) -> list:
+        from agno.knowledge.document import Document
+
+        return [
+            Document(
+                name=f"{section.skill}/{section.source}",
+                content=section.text,
+                meta_data={"skill": section.skill, "heading": section.heading,
+                           "tokens": section.tokens, "score": round(score, 3)},
+            )
+            for section, score in skill_index().search(query, k=max_results or self.max_results)
+        ]
+
+    async def aretrieve(self, query: str, max_results: int | None = None, **kwargs) -> list:
+        return self.retrieve(query, max_results=max_results, **kwargs)
+
+
+@lru_cache
+def get_skills_knowledge() -> SkillsKnowledge:
+    """The skills index as an Agno knowledge object (shared by every agent)."""
+    return SkillsKnowledge()
 
 
 def load_skill(skill_name: str) -> str | None:
@@ -0,0 +1,235 @@
+"""
+BroCoDDE — Discovery Prefetch & Signal Cache
+Warms the data a Strategist's first Discovery turn asks for before the user
+sends it.
+
+signal_cache is a process-wide TTL cache (DISCOVERY_CACHE_TTL_SECONDS) that
+the async discovery tools (content_discovery_toolkit.py), compute_patterns_tool
+and GET /memory/context read through. Keys are (tool, *args) with string args
+normalised, so triangulate("LLM Inference") and triangulate("llm inference ")
+share an entry. A lookup that arrives while the same key is still being fetched
+joins that fetch instead of starting another.
+
+When a task is created in `discovery` or moved there with PATCH /tasks/{id}/stage,
+schedule_discovery_prefetch() fires a background job that fills the cache with:
+
+- get_hf_daily_papers()        — the [AUTO_OPEN] frontier scan
+- triangulate(<task domain>)   — all sources for the session's domain
+- compute_patterns_tool()      — performance patterns
+
+The composed context (GET /memory/context) reads through the same cache but is
+not prefetched: agents never read it — the harness ranks memory against each
+message instead (ranked_memory()). Memory and task writes invalidate it.
+
+Prefetch hit rate = prefetched entries later read at least once / entries
+prefetched; it is reported with the rest of the cache stats on /health.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.config import settings
+
+_prefetching: ContextVar[bool] = ContextVar("discovery_prefetching", default=False)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+    prefetched: bool
+    hits: int = 0
+
+
+def _normalise(key: tuple) -> tuple:
+    return tuple(" ".join(part.lower().split()) if isinstance(part, str) else part for part in key)
+
+
+class SignalCache:
+    """TTL + LRU cache of discovery signals with in-flight de-duplication."""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._generations: defaultdict[str, int] = defaultdict(int)   # bumped by invalidate()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.lookups = self.hits = self.joined = 0
+        self.prefetched = self.prefetch_used = self.prefetch_runs = 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self.reset_stats()
+
+    def invalidate(self, tool: str) -> None:
+        """
+        Drop every entry for `tool` (e.g. after the data behind it changed). Fetches
+        already in flight read the old data: they are forgotten, and not stored.
+        """
+        self._generations[tool] += 1
+        for key in [k for k in self._entries if k[0] == tool]:
+            del self._entries[key]
+        for key in [k for k in self._inflight if k[0] == tool]:
+            del self._inflight[key]
+
+    def _fresh(self, key: Hashable) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > settings.discovery_cache_ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _hit(self, entry: _Entry) -> None:
+        self.hits += 1
+        if entry.prefetched and entry.hits == 0:
+            self.prefetch_used += 1
+        entry.hits += 1
+
+    def _store(self, key: Hashable, value: Any, prefetched: bool) -> None:
+        self._entries[key] = _Entry(value, time.monotonic(), prefetched)
+        self._entries.move_to_end(key)
+        if prefetched:
+            self.prefetched += 1
+        while len(self._entries) > max(settings.discovery_cache_max_entries, 1):
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        key: tuple,
+        fetch: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Cached value for `key`, else the result of `fetch()` (stored if `cacheable`)."""
+        key = _normalise(key)
+        prefetch = _prefetching.get()
+        if not prefetch:
+            self.lookups += 1
+
+        entry = self._fresh(key)
+        if entry is not None:
+            if not prefetch:
+                self._hit(entry)
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is not asyncio.get_running_loop():
+            task = None  # left over from another event loop (tests)
+        joined = task is not None
+        if task is None:
+            generation = self._generations[key[0]]
+
+            async def _fill() -> Any:
+                value = await fetch()
+                if cacheable(value) and self._generations[key[0]] == generation:
+                    self._store(key, value, prefetch)
+                return value
+
+            def _forget(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task = asyncio.ensure_future(_fill())
+            self._inflight[key] = task
+            task.add_done_callback(_forget)
+
+        # shield: a cancelled caller must not cancel a fetch others are waiting on
+        value = await asyncio.shield(task)
+        if joined and not prefetch:
+            self.joined += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._hit(entry)
+        return value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "joined_in_flight": self.joined,
+            "prefetch_runs": self.prefetch_runs,
+            "prefetched": self.prefetched,
+            "prefetch_used": self.prefetch_used,
+            "prefetch_hit_rate": round(self.prefetch_used / self.prefetched, 3) if self.prefetched else None,
+        }
+
+
+signal_cache = SignalCache()
+
+
+# ── Prefetch ──────────────────────────────────────────────────────────────────
+
+_background: set[asyncio.Task] = set()
+
+
+def schedule_discovery_prefetch(task_id: str, domain: str | None) -> bool:
+    """
+    Start warming the cache for a task entering Discovery. Returns False when
+    prefetch is disabled or in mock mode (the mock agent never calls tools).
+    """
+    from app.models.router import is_mock_mode
+
+    if not settings.discovery_prefetch_enabled or is_mock_mode():
+        return False
+    job = asyncio.create_task(prefetch_discovery(task_id, domain))
+    _background.add(job)
+    job.add_done_callback(_background.discard)
+    return True
+
+
+async def prefetch_discovery(task_id: str, domain: str | None) -> dict[str, bool]:
+    """Fill signal_cache for a Discovery task. Returns which jobs succeeded."""
+    from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+    from app.agents.tools import compute_patterns_tool
+    from app.logger import logger
+
+    toolkit = ContentDiscoveryToolkit()
+    jobs: dict[str, Awaitable[Any]] = {
+        "hf_daily": toolkit.aget_hf_daily_papers(),
+        "patterns": compute_patterns_tool(),
+    }
+    if domain:
+        jobs["triangulate"] = toolkit.atriangulate(domain)
+
+    token = _prefetching.set(True)
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+    finally:
+        _prefetching.reset(token)
+    signal_cache.prefetch_runs += 1
+
+    outcome = {name: not isinstance(r, BaseException) for name, r in zip(jobs, results)}
+    failed = [name for name, ok in outcome.items() if not ok]
+    logger.info(
+        f"[prefetch] {task_id} discovery signals warmed in {time.perf_counter() - start:.2f}s"
+        + (f" — failed: {', '.join(failed)}" if failed else "")
+    )
+    return outcome
+
+
+async def cached_composed_context(db, stage: str, task_id: str | None, query: str | None = None) -> Any:
+    """compose_context() through the signal cache."""
+    from app.memory.store import compose_context
+
+    return await signal_cache.get_or_fetch(
+        ("composed_context", stage, task_id, query),
+        lambda: compose_context(db, stage, task_id, query=query),
+    )
+
+
+async def cancel_prefetches() -> None:
+    """Cancel in-flight prefetch jobs (app shutdown)."""
+    for job in list(_background):
+        job.cancel()
+    await asyncio.gather(*_background, return_exceptions=True)
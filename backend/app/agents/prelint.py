@@ -0,0 +1,294 @@
+"""
+BroCoDDE — Heuristic Pre-Lint
+A deterministic, rule-based pass over a draft built from the content-vetting
+SKILL.md rules: regex banks for the phrase-level checks, sentence statistics
+for fluff / rant tone, and a scored opening line. Returns the same six-key
+schema as the model linter in a few hundred microseconds.
+
+lint_draft_tool() uses it two ways:
+- First pass: a phrase-level hit ("As a PhD…", "What do you think?", emoji runs,
+  "In today's fast-paced world") is a *conclusive* failure — the draft goes back
+  for a rewrite and is re-linted anyway, so no Tier-2 call is spent on it.
+- Fallback: when the model call fails (or no API key is set) the heuristic
+  result is returned instead of an all-fail error dict.
+
+Checks the rules can only estimate (rant tone, micro-learning, paragraph-level
+specificity) never short-circuit on their own.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+LINT_CHECKS = (
+    "rant_detection",
+    "fluff_detection",
+    "opening_strength",
+    "credential_stating",
+    "engagement_bait",
+    "micro_learning",
+)
+
+_I = re.IGNORECASE
+
+# ── Regex banks (SKILL.md "Patterns to catch") ────────────────────────────────
+# Each bank is compiled into one alternation and matched against the lowercased
+# draft — one scan per bank instead of one case-insensitive scan per pattern.
+
+CREDENTIAL_PATTERNS = [
+    r"\bas an? (?:[\w.&'-]+ ){0,3}(?:ph\.?d|doctoral|postdoc|professor|researcher|scientist|engineer|"
+    r"founder|ceo|cto|vp|director|expert|student|candidate|veteran|practitioner)\b",
+    r"\bwith (?:over |more than )?\d+\+? years? (?:of )?experience\b",
+    # First person only — "the cache ran 3 years in production" is not a credential
+    r"\bi(?:'ve| have)? (?:spent|worked|been|had) (?:over |more than |nearly |almost |the (?:last|past) )?"
+    r"\d+\+? years (?:of experience |working )?(?:in|at|as)\b",
+    r"\bmy \d+\+? years (?:of experience |working )?(?:in|at|as)\b",
+    r"\bhaving (?:worked|studied|led|built) (?:at|for|with)\b",
+    r"\bmy (?:research|phd|thesis|lab|team at \w+) (?:shows|showed|found|proves|proved|demonstrates)\b",
+    r"\b(?:ex-|former )(?:google|meta|facebook|amazon|apple|microsoft|openai|deepmind|mckinsey)\b",
+]
+
+BAIT_PATTERNS = [
+    r"\bwhat do you (?:all )?think\b",
+    r"\b(?:comment|drop a comment|let me know) (?:below|in the comments)\b",
+    r"\bthoughts\s*\?",
+    r"\bagree\s*\?",
+    r"\btag (?:someone|a friend|a colleague)\b",
+    # Calls to action only — "share and compare your numbers" is ordinary prose
+    r"\b(?:like|repost|share)(?: this(?: post)?)? (?:and|&) (?:like|repost|share|comment|follow|subscribe)\b",
+    r"\b(?:like|repost|share)(?: this(?: post)?)? if you\b",
+    r"\bfollow (?:me )?for more\b",
+    r"\bi(?:'m| am) (?:so |super |thrilled and )?(?:excited|thrilled|humbled) to (?:announce|share)\b",
+    r"\byou(?:'ve| have) got this\b",
+    r"\bwho else\b[^.?!]*\?",
+]
+
+FLUFF_PATTERNS = [
+    r"\bin today'?s (?:rapidly |ever[- ])?(?:changing|evolving|fast[- ]paced|digital|modern) (?:world|landscape|era)\b",
+    r"\bit'?s important to (?:remember|note|understand) that\b",
+    r"\bin this day and age\b",
+    r"\bat the end of the day\b",
+    r"\bnow more than ever\b",
+    r"\bneedless to say\b",
+    r"\bgame[- ]changer\b",
+    r"\bunlock(?:ing)? (?:the |your )?(?:full |true )?potential\b",
+    r"\bthe power of\b",
+    r"\b(?:think outside the box|move the needle|leverage synerg\w+|paradigm shift)\b",
+]
+
+RANT_PATTERNS = [
+    r"\bthis is why [^.?!]{1,60} (?:is|are) (?:broken|dead|wrong)\b",
+    r"\bi(?:'m| am) (?:so )?(?:tired|sick) of\b",
+    r"\bi can'?t believe\b",
+    r"\b(?:wake up|stop (?:doing|saying|pretending))\b",
+    r"\b(?:stupid|dumb|idiotic|ridiculous|corrupt|pathetic)\b",
+    r"\bmakes? me (?:so )?(?:angry|mad|furious)\b",
+]
+
+
+def _bank(patterns: list[str]) -> re.Pattern:
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+CREDENTIAL_BANK = _bank(CREDENTIAL_PATTERNS)
+BAIT_BANK = _bank(BAIT_PATTERNS)
+FLUFF_BANK = _bank(FLUFF_PATTERNS)
+RANT_BANK = _bank(RANT_PATTERNS)
+
+WEAK_OPENINGS = [
+    (re.compile(r"^i\b", _I), "starts with \"I\" — centers the author, not the reader"),
+    (re.compile(r"^(?:for the (?:past|last)|over the (?:past|last)|recently|lately|this (?:week|month|year)|"
+                r"today,? i|so,? i)\b", _I), "context-setting before the hook"),
+    (re.compile(r"^in today'?s\b", _I), "generic scene-setting opener"),
+]
+
+HOOK_MARKERS = re.compile(
+    r"\b(?:but|yet|wrong|myth|nobody|never|stop|actually|instead|not|isn'?t|don'?t|mistake|"
+    r"failed|killed|broke|secret|counterintuitive|surprising|worse|better)\b", _I
+)
+LEARNING_MARKERS = re.compile(
+    r"\b(?:because|so that|which means|here'?s (?:how|why|what)|the (?:fix|trick|lesson|rule|mechanism)|"
+    r"learned|turns out|the reason|step \d|instead of|rule of thumb)\b", _I
+)
+EMOJI = re.compile(
+    "[\U0001F300-\U0001FAFF\U00002600-\U000027BF\U0001F000-\U0001F2FF⭐⭕‼⁉⤴⤵]"
+)
+EMOJI_RUN = re.compile(f"(?:{EMOJI.pattern}\\s*){{3,}}")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD = re.compile(r"[A-Za-z0-9][\w'’%-]*")
+LETTER = re.compile(r"[A-Za-z]")
+UPPER = re.compile(r"[A-Z]")
+# A number, a quote, code, or a capitalised name mid-sentence ("… at Stripe")
+SPECIFIC = re.compile(r"\d|\"[^\"]+\"|“[^”]+”|`[^`]+`|(?<=[a-z,] )[A-Z][\w-]+")
+
+MAX_EMOJI = 2
+HOOK_PASS_SCORE = 50
+
+
+@dataclass
+class _Check:
+    passed: bool
+    notes: str = ""
+    conclusive: bool = False  # phrase-level evidence — safe to skip the model
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"pass": self.passed, "notes": self.notes}
+
+
+class _Draft:
+    """The draft plus its lowercased form, which the banks are matched against."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        lowered = text.lower()
+        # lower() can change the length of a few non-ASCII characters; spans must line up
+        self.lower = lowered if len(lowered) == len(text) else None
+
+    def first_match(self, bank: re.Pattern) -> str | None:
+        if self.lower is not None:
+            m = bank.search(self.lower)
+            return self.text[m.start():m.end()].strip() if m else None
+        m = re.search(bank.pattern, self.text, _I)
+        return m.group(0).strip() if m else None
+
+
+def _sentences(text: str) -> list[str]:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def draft_stats(text: str) -> dict[str, Any]:
+    """Sentence statistics used by the checks (also returned for the UI/agent)."""
+    sentences = _sentences(text)
+    lengths = [len(s.split()) for s in sentences] or [0]
+    words = sum(lengths)
+    letters = len(LETTER.findall(text))
+    return {
+        "words": words,
+        "sentences": len(sentences),
+        "avg_sentence_words": round(words / max(len(sentences), 1), 1),
+        "long_sentences": sum(1 for n in lengths if n > 35),
+        "exclamations": text.count("!"),
+        "caps_ratio": round(len(UPPER.findall(text)) / max(letters, 1), 3),
+        "emoji": len(EMOJI.findall(text)),
+    }
+
+
+def hook_score(first_line: str) -> tuple[int, list[str]]:
+    """Score the opening line 0–100 against SKILL.md's strong/weak opening rules."""
+    line = first_line.strip()
+    words = WORD.findall(line)
+    score, reasons = 50, []
+    for pattern, reason in WEAK_OPENINGS:
+        if pattern.search(line):
+            score -= 30
+            reasons.append(reason)
+    if line.rstrip().endswith("?"):
+        score -= 15
+        reasons.append("opens with a question")
+    if len(words) > 25:
+        score -= 15
+        reasons.append(f"{len(words)}-word first line — the hook lands too late")
+    if re.search(r"\d", line):
+        score += 20
+    if HOOK_MARKERS.search(line):
+        score += 20
+    if 0 < len(words) <= 12:
+        score += 10
+    return max(0, min(100, score)), reasons
+
+
+def _credential(draft: _Draft) -> _Check:
+    hit = draft.first_match(CREDENTIAL_BANK)
+    if hit:
+        return _Check(False, f"Explicit credential: \"{hit}\". Show the expertise through specifics instead.", True)
+    return _Check(True)
+
+
+def _engagement_bait(draft: _Draft, stats: dict[str, Any]) -> _Check:
+    text = draft.text
+    hit = draft.first_match(BAIT_BANK)
+    if hit:
+        return _Check(False, f"Engagement bait: \"{hit}\". End on reflection or action, not a comment prompt.", True)
+    run = EMOJI_RUN.search(text) if stats["emoji"] >= 3 else None
+    if run:
+        return _Check(False, f"Emoji run \"{run.group(0).strip()}\" reads as bait.", True)
+    if stats["emoji"] > MAX_EMOJI:
+        return _Check(False, f"{stats['emoji']} emoji — more than {MAX_EMOJI} in a professional post.", True)
+    return _Check(True)
+
+
+def _fluff(draft: _Draft) -> _Check:
+    text = draft.text
+    hit = draft.first_match(FLUFF_BANK)
+    if hit:
+        return _Check(False, f"Generic filler: \"{hit}\" could appear in anyone's post.", True)
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if len(WORD.findall(p)) >= 12]
+    bare = [p for p in paragraphs if not SPECIFIC.search(p)]
+    if paragraphs and len(bare) * 2 > len(paragraphs):
+        sample = bare[0].strip().split("\n")[0][:80]
+        return _Check(False, f"No number, name or concrete detail in \"{sample}…\" — what here is uniquely yours?")
+    return _Check(True)
+
+
+def _opening(text: str) -> tuple[_Check, int]:
+    # The hook is the first sentence of the first non-empty line
+    first_line = next((l for l in text.splitlines() if l.strip()), "")
+    first_line = (_sentences(first_line) or [""])[0]
+    score, reasons = hook_score(first_line)
+    if score >= HOOK_PASS_SCORE:
+        return _Check(True), score
+    detail = "; ".join(reasons) or "no tension, number or contrast in the first line"
+    # Only the explicit weak-opening patterns are conclusive; a low score alone is a judgement call
+    conclusive = any(p.search(first_line.strip()) for p, _ in WEAK_OPENINGS)
+    return _Check(False, f"Weak opening \"{first_line.strip()[:80]}\" (hook score {score}): {detail}.", conclusive), score
+
+
+def _rant(draft: _Draft, stats: dict[str, Any]) -> _Check:
+    text = draft.text
+    signals = []
+    hit = draft.first_match(RANT_BANK)
+    if hit:
+        signals.append(f"\"{hit}\"")
+    if stats["sentences"] and stats["exclamations"] / stats["sentences"] > 0.3:
+        signals.append(f"{stats['exclamations']} exclamation marks")
+    shouted = [w for w in WORD.findall(text) if len(w) > 2 and w.isupper() and w.isalpha()]
+    if len(shouted) >= 2:
+        signals.append(f"shouting ({', '.join(shouted[:3])})")
+    if len(signals) >= 2:
+        return _Check(False, f"Reactive tone: {'; '.join(signals)}. Where's the learning for the reader?")
+    return _Check(True)
+
+
+def _micro_learning(text: str, stats: dict[str, Any]) -> _Check:
+    has_mechanism = bool(LEARNING_MARKERS.search(text))
+    has_specifics = bool(re.search(r"\d", text)) or bool(re.search(r"^\s*(?:[-•*]|\d+[.)])\s", text, re.MULTILINE))
+    if stats["words"] < 25 or not (has_mechanism or has_specifics):
+        return _Check(False, "No extractable takeaway — state the one non-obvious thing the reader now knows.")
+    return _Check(True)
+
+
+def heuristic_lint(draft_content: str) -> dict[str, Any]:
+    """
+    Lint a draft with the rule banks. Same schema as the model linter, plus
+    `engine`, `conclusive` (some failure is phrase-level certain) and `stats`.
+    """
+    text = draft_content or ""
+    draft = _Draft(text)
+    stats = draft_stats(text)
+    opening, score = _opening(text)
+    stats["hook_score"] = score
+
+    checks = {
+        "rant_detection": _rant(draft, stats),
+        "fluff_detection": _fluff(draft),
+        "opening_strength": opening,
+        "credential_stating": _credential(draft),
+        "engagement_bait": _engagement_bait(draft, stats),
+        "micro_learning": _micro_learning(text, stats),
+    }
+    result: dict[str, Any] = {name: check.as_dict() for name, check in checks.items()}
+    result["overall_pass"] = all(check.passed for check in checks.values())
+    result["engine"] = "heuristic"
+    result["conclusive"] = any(not c.passed and c.conclusive for c in checks.values())
+    result["stats"] = stats
+    return result
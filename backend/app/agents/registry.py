@@ -2,18 +2,27 @@
 BroCoDDE — Agent Registry
 Registers all four agents with Agno AgentOS for named-service access, HTTP streaming,
 and the AgentOS control plane (monitoring, session inspection, error tracking).
+
+AgentOS is mounted at /agentapi behind LazyAgentAPI: the agents (models,
+MemoryManagers, toolkits) and the Agno app are built on the first request to
+/agentapi, not while the server starts.
 """
 
-from agno.agent import Agent
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable
 
-from app.agents.analyst import build_analyst
-from app.agents.interviewer import build_interviewer
-from app.agents.shaper import build_shaper
-from app.agents.strategist import build_strategist
+if TYPE_CHECKING:
+    from agno.agent import Agent
 
 
-def get_all_agents(user_id: str = "default_user") -> list[Agent]:
+def get_all_agents(user_id: str = "default_user") -> list["Agent"]:
     """Return all four agents — used when registering with AgentOS."""
+    from app.agents.analyst import build_analyst
+    from app.agents.interviewer import build_interviewer
+    from app.agents.shaper import build_shaper
+    from app.agents.strategist import build_strategist
+
     return [
         build_strategist(stage="discovery", user_id=user_id),
         build_interviewer(role="researcher", user_id=user_id),
@@ -31,3 +40,69 @@ def get_agent_api():
 
     agents = get_all_agents()
     return AgentAPI(agents=agents, prefix="/agentapi")
+
+
+class LazyAgentAPI:
+    """
+    ASGI app that builds the AgentOS sub-application on its first request.
+
+    The build runs in a worker thread (agent construction imports the SDKs and
+    creates clients) and at most once — concurrent first requests wait for the
+    same build. If Agno's AgentAPI is not installed the mount answers 503;
+    any other build error is logged and retried on the next request.
+    """
+
+    def __init__(self, factory: Callable[[], Any] = get_agent_api) -> None:
+        self._factory = factory
+        self._app: Any = None
+        self._unavailable: str | None = None
+        self._lock = threading.Lock()
+        self.build_seconds: float | None = None
+
+    @property
+    def status(self) -> str:
+        if self._app is not None:
+            return "loaded"
+        return "unavailable" if self._unavailable else "not loaded"
+
+    def _build(self) -> None:
+        from app.logger import logger
+
+        with self._lock:
+            if self._app is not None or self._unavailable:
+                return
+            start = time.perf_counter()
+            try:
+                agent_api = self._factory()
+            except ImportError as e:
+                self._unavailable = str(e)
+                logger.info(f"AgentOS not mounted — {e}; agents available via /tasks/:id/chat")
+                return
+            self._app = getattr(agent_api, "app", agent_api)
+            self.build_seconds = time.perf_counter() - start
+            logger.info(f"AgentOS built on first /agentapi request in {self.build_seconds:.2f}s")
+
+    async def __call__(self, scope, receive, send) -> None:
+        import asyncio
+
+        if scope["type"] == "lifespan":
+            return
+        if self._app is None and not self._unavailable:
+            try:
+                await asyncio.to_thread(self._build)
+            except Exception as e:
+                from app.logger import logger
+                logger.error(f"AgentOS build failed: {e}")
+                return await self._reject(scope, receive, send, f"AgentOS build failed: {e}")
+        if self._app is None:
+            return await self._reject(scope, receive, send, f"AgentOS unavailable: {self._unavailable}")
+        await self._app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope, receive, send, detail: str) -> None:
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1011, "reason": detail[:120]})
+            return
+        from starlette.responses import JSONResponse
+
+        await JSONResponse({"detail": detail}, status_code=503)(scope, receive, send)
@@ -9,23 +9,25 @@ Active during: Structuring, Drafting Q&A, and Vetting.
 Loaded skills: content-structuring, content-vetting, grammar-style, platform-linkedin
 """
 
+from typing import TYPE_CHECKING
+
 from app.config import settings
-from agno.agent import Agent
-from agno.memory import MemoryManager
-from agno.models.openai import OpenAIChat
-from agno.tools.memory import MemoryTools
 
-from app.agents.db import agno_db
 from app.agents.knowledge import get_skills_knowledge
 from app.agents.tools import (
     format_for_platform_tool,
     lint_draft_tool,
     skill_list,
     skill_load,
+    skill_search,
     web_search_tool,
     web_fetch_tool,
 )
 from app.agents.base import UNIVERSAL_SYSTEM_PROMPT
+from app.models.router import get_healthy_model, get_memory_model
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
 
 SHAPER_INSTRUCTIONS = f"""
 {UNIVERSAL_SYSTEM_PROMPT}
@@ -139,7 +141,7 @@ Hook rules: creates tension, curiosity, or recognition within 10 words. Does NOT
 
 After the table: one sentence offering to adjust ("Want to swap the hook type or drop a point?"). Do NOT write a paragraph per section.
 
-3. Use skill_load("content-structuring") only if you need edge-case technique guidance beyond what's above.
+3. Use skill_search (e.g. skill_search("open loop technique", skill="content-structuring")) only if you need edge-case technique guidance beyond what's above.
 
 **Structuring → Drafting advancement:**
 When the user approves the skeleton, say "Skeleton locked." and end with `[ADVANCE_STAGE]`. One line — no explanation of what Drafting involves.
@@ -170,7 +172,7 @@ When all checks pass OR user says draft is final, say "Draft cleared." and end w
 
 ## During Platform Formatting
 - Use format_for_platform tool to prepare the final draft.
-- For platform-specific edge cases beyond the LinkedIn rules above, use skill_load("platform-linkedin") or skill_load("platform-twitter").
+- For platform-specific edge cases beyond the LinkedIn rules above, use skill_search with skill="platform-linkedin" or skill="platform-twitter".
 
 **Ready → Post-Mortem advancement:**
 Only when user says they published and are sharing metrics. Say "Post is live — moving to Post-Mortem." and end with `[ADVANCE_STAGE]`.
@@ -182,23 +184,22 @@ def build_shaper(
     user_id: str = "default_user",
     session_id: str | None = None,
     deep_critique: bool = False,
-) -> Agent:
+) -> "Agent":
     """Build a Shaper agent for the given mode and critique depth."""
+    from agno.agent import Agent
+    from agno.memory import MemoryManager
+    from agno.tools.memory import MemoryTools
 
-    # Tier 3 for deep critique, Tier 2 for normal operation, Tier 1 for grammar-only
-    model_id = (
-        settings.tier3_model if deep_critique
-        else settings.tier2_model
-    )
+    from app.agents.db import get_agno_db
 
-    max_tokens = 8192 if deep_critique else 4096
+    agno_db = get_agno_db()
 
-    def _make_model():
-        return OpenAIChat(id=model_id, api_key=settings.openrouter_api_key or None, base_url="https://openrouter.ai/api/v1", max_tokens=max_tokens)
+    # Tier 3 for deep critique, Tier 2 for normal operation, Tier 1 for grammar-only
+    tier = 3 if deep_critique else 2
 
     memory_manager = MemoryManager(
         db=agno_db,
-        model=OpenAIChat(id=settings.tier1_model, api_key=settings.openrouter_api_key or None, base_url="https://openrouter.ai/api/v1", max_tokens=1024)
+        model=get_memory_model()
         if settings.has_any_ai_key
         else None,
         additional_instructions=(
@@ -210,12 +211,13 @@ def build_shaper(
 
     return Agent(
         name="shaper",
-        model=_make_model(),
+        model=get_healthy_model(tier=tier, claim_probe=False),
         instructions=SHAPER_INSTRUCTIONS,
         tools=[
             MemoryTools(db=agno_db),
             skill_list,
             skill_load,
+            skill_search,
             lint_draft_tool,
             format_for_platform_tool,
             web_search_tool,
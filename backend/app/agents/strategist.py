@@ -11,22 +11,23 @@ Analytical, framework-grounded. Opens with a Discovery brief combining:
 Loaded skills: content-discovery, audience-psychology, framework-library
 """
 
+from typing import TYPE_CHECKING
+
 from app.config import settings
-from agno.agent import Agent
-from agno.memory import MemoryManager
-from agno.models.openai import OpenAIChat
-from agno.tools.memory import MemoryTools
 
-from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
-from app.agents.db import agno_db
 from app.agents.knowledge import get_skills_knowledge
 from app.agents.tools import (
     compute_patterns_tool,
     skill_list,
     skill_load,
+    skill_search,
     web_fetch_tool,
 )
 from app.agents.base import UNIVERSAL_SYSTEM_PROMPT
+from app.models.router import get_healthy_model, get_memory_model
+
+if TYPE_CHECKING:
+    from agno.agent import Agent
 
 DISCOVERY_INSTRUCTIONS = f"""
 {UNIVERSAL_SYSTEM_PROMPT}
@@ -64,7 +65,7 @@ Do NOT explain. The user's own reading and synthesis is where the content insigh
 ## Context Sources (always check before opening)
 1. Search your memory (search_memories) for the user's identity, expertise, voice, and recent content history — both USER-provided context and AGENT-derived patterns.
 2. Use compute_patterns to pull performance data — what archetypes, domains, and roles are working.
-3. Use skill_load only when you need a specific framework mid-conversation — not as session preamble. The signals from memory + toolkit data are what matter at opening.
+3. Use skill_search (or skill_load for a whole skill) only when you need a specific framework mid-conversation — not as session preamble. The signals from memory + toolkit data are what matter at opening.
 
 ## Memory Lifecycle
 - **Read**: Before every session — retrieve all user context, past performance patterns, and Analyst findings.
@@ -73,7 +74,10 @@ Do NOT explain. The user's own reading and synthesis is where the content insigh
 - Use add_memory proactively when you synthesize something new — don't batch at the end.
 
 ## Discovery Signal Tools (use all when brainstorming)
-The ContentDiscovery toolkit has six tools — use them together to triangulate what's worth creating:
+Start with `triangulate(query)`: ONE call queries HF papers, HackerNews, and Exa news / research /
+underrated concurrently and returns a single deduplicated digest. Do not call the five search tools
+one by one to cover a topic — that costs five round trips for the same signal. Reach for an
+individual tool only to go deeper on one source (more results, a specific date, a follow-up query):
 
 | Tool                | Signal                                      | Use when...                                      |
 |---------------------|---------------------------------------------|--------------------------------------------------|
@@ -83,6 +87,7 @@ The ContentDiscovery toolkit has six tools — use them together to triangulate
 | search_news         | Industry news (Exa)                         | What mainstream tech media is covering           |
 | search_research     | Academic papers (Exa broader)               | Deep research on a topic beyond HF               |
 | search_underrated   | Niche/underrated angles (Exa + substacks)   | Find angles not yet mainstream — own them early  |
+| triangulate         | All of the above for one topic, at once     | Brainstorming a topic — the default first call   |
 
 **The Bridge content signal:** HF papers (research frontier) + HN (practitioner sentiment) gap
 → If researchers are publishing X but practitioners aren't talking about it yet = the Bridge opportunity.
@@ -114,7 +119,7 @@ After the table: one sentence maximum. Either a question ("Which of these pulls
 When you receive a message starting with `[AUTO_OPEN]`, the user just started a new content session. Do NOT acknowledge the signal or say "I see you've started a session." Open directly:
 1. Run `compute_patterns` to pull performance patterns — what's working, what archetypes are landing.
 2. Scan memory only if you have relevant prior context for this user (search_memories).
-3. Pull `get_hf_daily_papers` for the academic frontier — use results to populate the brief table.
+3. Pull `get_hf_daily_papers` for the academic frontier, plus `triangulate(<Domain>)` when the opening message names a Domain other than "general" — use results to populate the brief table.
 4. Present the 3-option Discovery Brief table immediately — no preamble, no process narration.
 The first thing the user sees should be the table with 3 sharp angles + source links. Total opening should be under 200 words.
 
@@ -151,22 +156,25 @@ def build_strategist(
     stage: str = "discovery",
     user_id: str = "default_user",
     session_id: str | None = None,
-) -> Agent:
+) -> "Agent":
     """Build a Strategist agent calibrated for Discovery or Structuring."""
+    from agno.agent import Agent
+    from agno.memory import MemoryManager
+    from agno.tools.memory import MemoryTools
+
+    from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+    from app.agents.db import get_agno_db
+
+    agno_db = get_agno_db()
 
     # Tier 3 for Discovery, Tier 2 for Structuring
     is_discovery = stage == "discovery"
-    model_id = settings.tier3_model if is_discovery else settings.tier2_model
+    tier = 3 if is_discovery else 2
     instructions = DISCOVERY_INSTRUCTIONS if is_discovery else STRUCTURING_INSTRUCTIONS
 
-    max_tokens = 8192 if is_discovery else 4096
-
-    def _make_model():
-        return OpenAIChat(id=model_id, api_key=settings.openrouter_api_key or None, base_url="https://openrouter.ai/api/v1", max_tokens=max_tokens)
-
     memory_manager = MemoryManager(
         db=agno_db,
-        model=OpenAIChat(id=settings.tier1_model, api_key=settings.openrouter_api_key or None, base_url="https://openrouter.ai/api/v1", max_tokens=1024)
+        model=get_memory_model()
         if settings.has_any_ai_key
         else None,
         additional_instructions=(
@@ -180,7 +188,7 @@ def build_strategist(
 
     return Agent(
         name="strategist",
-        model=_make_model(),
+        model=get_healthy_model(tier=tier, claim_probe=False),
         instructions=instructions,
         tools=[
             memory_tools,
@@ -188,6 +196,7 @@ def build_strategist(
             web_fetch_tool,             # direct URL fetch for deeper reads on specific articles
             skill_list,
             skill_load,
+            skill_search,
             compute_patterns_tool,
         ],
         knowledge=get_skills_knowledge(),
@@ -0,0 +1,69 @@
+"""
+BroCoDDE — Turn Event Side Channel
+Lets a tool running inside an agent turn push structured events (e.g. per-check
+lint results) straight to the client, instead of waiting for the agent to read
+the tool result and write about it.
+
+run_chat_turn() wraps the harness stream in merge_turn_events(): the agent run
+is pumped in a background task that inherits a context-local sink, and tools
+call emit_turn_event("lint", payload) from anywhere below it (Agno awaits async
+tools inside the run, so the ContextVar is visible to them). Outside a chat
+turn — tests, the AgentOS playground — emit_turn_event() is a no-op.
+"""
+
+import asyncio
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable
+
+_sink: ContextVar[Callable[[str, str], None] | None] = ContextVar("turn_event_sink", default=None)
+
+_END = object()
+
+
+def emit_turn_event(event: str, data: str) -> bool:
+    """Send (event, data) to the current chat turn's client. False when there is no turn."""
+    sink = _sink.get()
+    if sink is None:
+        return False
+    sink(event, data)
+    return True
+
+
+async def merge_turn_events(chunks: AsyncIterator[str]) -> AsyncIterator[tuple[str, str]]:
+    """
+    Yield ("chunk", text) for every harness chunk, interleaved with (event, data)
+    pairs emitted by tools while the run is in flight. Errors from the run are
+    re-raised here.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    token = _sink.set(lambda event, data: queue.put_nowait((event, data)))
+
+    async def _pump() -> None:
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(("chunk", chunk))
+        except BaseException as e:  # surfaced to the consumer below
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_END)
+
+    # The pump task copies the current context, sink included
+    pump = asyncio.create_task(_pump())
+    _sink.reset(token)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                if isinstance(item, asyncio.CancelledError):
+                    break
+                raise item
+            yield item
+    finally:
+        if not pump.done():
+            pump.cancel()
+            try:
+                await pump
+            except BaseException:
+                pass
@@ -0,0 +1,438 @@
+"""
+BroCoDDE — Model Linter
+The model-backed half of lint_draft_tool (app/agents/tools.py). Runs after the
+rule-based pre-lint (app/agents/prelint.py) has found nothing conclusive.
+
+Two modes (LINT_MODE):
+- single — one Tier-2 `lint_analysis` call returns all six checks as JSON.
+- fanout — one small focused call per check (or per LINT_FANOUT_GROUPS group),
+           each prompted with only its own SKILL.md section, all in flight at
+           once under a process-wide semaphore (LINT_MAX_CONCURRENCY). Each
+           group's verdicts are pushed to the client as an `event: lint` frame
+           the moment they land (app/agents/turn_events.py); a group whose call
+           fails keeps its heuristic verdict.
+
+Both modes return the same dict: the six check keys plus overall_pass/engine.
+
+Long drafts are never truncated. chunk_draft() splits them at section headings
+and paragraph breaks into chunks of LINT_CHUNK_MAX_TOKENS
+(chunk_token_budget()); every chunk is linted concurrently in the active mode
+(map) and reduce_chunk_results() merges the verdicts per check (reduce):
+
+- opening_strength — decided by the first chunk only
+- micro_learning   — passes if any chunk teaches something concrete
+- everything else  — fails if any chunk fails
+
+Failing notes carry the chunk's line range — or the exact line, when the note
+quotes a phrase found in the chunk — and the result gains a "chunks" list.
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from app.agents.compaction import CHARS_PER_TOKEN
+from app.agents.prelint import LINT_CHECKS
+from app.agents.turn_events import emit_turn_event
+from app.config import settings
+
+SINGLE_MAX_TOKENS = 800
+CHECK_MAX_TOKENS = 200    # per check in a fan-out group
+MIN_CHUNK_TOKENS = 200
+
+# How per-chunk verdicts combine into one; checks not listed use "all"
+REDUCE_RULES: dict[str, str] = {"opening_strength": "first", "micro_learning": "any"}
+
+_SYSTEM_PROMPT = """You are BroCoDDE's content linter. You apply specific quality gates to draft content.
+
+Here are the exact rules you enforce:
+{rules}
+
+You return ONLY valid JSON. No prose before or after.
+"""
+
+_CHECK_FORMAT = """Each key maps to an object with:
+- "pass": true or false
+- "notes": "" if pass, or a specific 1-2 sentence note citing the exact phrase or line that fails"""
+
+
+def _draft_block(draft: str, part: str = "") -> str:
+    if part:
+        return (f"Excerpt to lint ({part} of a longer draft). Judge only this excerpt "
+                f"and do not fail it for what the rest of the draft covers:\n---\n{draft}\n---")
+    return f"Draft to lint:\n---\n{draft}\n---"
+
+
+def _key_list(checks: tuple[str, ...]) -> str:
+    return "\n".join(f"- {c}" for c in checks)
+
+
+# ── Shared helpers ────────────────────────────────────────────────────────────
+
+def vetting_sections(skill_text: str) -> dict[str, str]:
+    """Split content-vetting SKILL.md into its six numbered check sections, keyed by check."""
+    parts = re.split(r"^### \d+\.", skill_text, flags=re.MULTILINE)[1:]
+    sections: dict[str, str] = {}
+    for check, part in zip(LINT_CHECKS, parts):
+        # The last section runs into "## Output Format" — stop at the next H2
+        sections[check] = "###" + part.split("\n## ", 1)[0].rstrip()
+    return sections
+
+
+def lint_groups() -> list[tuple[str, ...]]:
+    """LINT_FANOUT_GROUPS ("a,b;c;…") as check tuples; ungrouped checks get their own call."""
+    groups: list[tuple[str, ...]] = []
+    seen: set[str] = set()
+    for raw in settings.lint_fanout_groups.split(";"):
+        group = tuple(c.strip() for c in raw.split(",") if c.strip() in LINT_CHECKS and c.strip() not in seen)
+        if group:
+            groups.append(group)
+            seen.update(group)
+    groups.extend((check,) for check in LINT_CHECKS if check not in seen)
+    return groups
+
+
+_semaphore: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+def _lint_semaphore() -> asyncio.Semaphore:
+    """Process-wide cap on concurrent lint calls (one per event loop)."""
+    global _semaphore
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore[0] is not loop:
+        _semaphore = (loop, asyncio.Semaphore(max(settings.lint_max_concurrency, 1)))
+    return _semaphore[1]
+
+
+async def _complete_json(system_prompt: str, user_prompt: str, max_tokens: int) -> dict[str, Any]:
+    """One structured lint_analysis call (failover + hedging via call_hedged)."""
+    from app.models.router import call_hedged, get_openai_client
+
+    client = get_openai_client()
+
+    async def _lint(model):
+        return await client.chat.completions.create(
+            model=model.id,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.1,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+
+    async with _lint_semaphore():
+        response = await call_hedged("lint_analysis", _lint)
+    return json.loads(response.choices[0].message.content or "{}")
+
+
+def _verdict(raw: Any) -> dict[str, Any]:
+    raw = raw if isinstance(raw, dict) else {}
+    return {"pass": bool(raw.get("pass", False)), "notes": str(raw.get("notes") or "")}
+
+
+def finalize(results: dict[str, Any], engine: str) -> dict[str, Any]:
+    results["overall_pass"] = all(results.get(k, {}).get("pass", False) for k in LINT_CHECKS)
+    results["engine"] = engine
+    return results
+
+
+def emit_lint_results(results: dict[str, Any], checks: tuple[str, ...] = LINT_CHECKS) -> None:
+    """Push per-check verdicts to the current chat turn's client (`event: lint`)."""
+    engine = results.get("engine", "model")
+    for check in checks:
+        if check in results:
+            emit_turn_event("lint", json.dumps({"check": check, **results[check], "engine": engine}))
+
+
+# ── Single call ───────────────────────────────────────────────────────────────
+
+async def lint_single(
+    draft: str,
+    skill_text: str,
+    checks: tuple[str, ...] = LINT_CHECKS,
+    part: str = "",
+    emit: bool = True,
+) -> dict[str, Any]:
+    """All `checks` (default: the six) in one call."""
+    user_prompt = f"""Lint this draft and return a JSON object with exactly these {len(checks)} keys:
+{_key_list(checks)}
+
+{_CHECK_FORMAT}
+
+Also include a top-level "overall_pass": true only if ALL of these checks pass.
+
+{_draft_block(draft, part)}
+
+Respond with ONLY the JSON object."""
+
+    raw = await _complete_json(_SYSTEM_PROMPT.format(rules=skill_text), user_prompt, SINGLE_MAX_TOKENS)
+    results = {**raw, **{c: _verdict(raw.get(c)) for c in checks}}
+    results = finalize(results, "model")
+    if emit:
+        emit_lint_results(results)
+    return results
+
+
+# ── Fan-out ───────────────────────────────────────────────────────────────────
+
+async def _lint_group(draft: str, sections: dict[str, str], group: tuple[str, ...], part: str = "") -> dict[str, Any]:
+    rules = "\n\n".join(sections.get(c, c) for c in group)
+    user_prompt = f"""Lint this draft for {"this check" if len(group) == 1 else "these checks"} only \
+and return a JSON object with exactly {"this key" if len(group) == 1 else "these keys"}:
+{_key_list(group)}
+
+{_CHECK_FORMAT}
+
+{_draft_block(draft, part)}
+
+Respond with ONLY the JSON object."""
+    raw = await _complete_json(_SYSTEM_PROMPT.format(rules=rules), user_prompt, CHECK_MAX_TOKENS * len(group))
+    return {c: _verdict(raw.get(c)) for c in group}
+
+
+async def lint_fanout(
+    draft: str,
+    skill_text: str,
+    fallback: dict[str, Any],
+    checks: tuple[str, ...] = LINT_CHECKS,
+    part: str = "",
+    emit: bool = True,
+) -> dict[str, Any]:
+    """
+    Concurrent per-group calls merged into one result. Groups that fail keep the
+    `fallback` (heuristic) verdict; if every group fails the last error is raised.
+    """
+    sections = vetting_sections(skill_text)
+    groups = [g for g in (tuple(c for c in group if c in checks) for group in lint_groups()) if g]
+    pending = {asyncio.ensure_future(_lint_group(draft, sections, g, part)): g for g in groups}
+
+    results: dict[str, Any] = {}
+    failed: list[str] = []
+    error: Exception | None = None
+    try:
+        for next_done in asyncio.as_completed(pending):
+            try:
+                verdicts = await next_done
+            except Exception as e:
+                error = e
+                continue
+            results.update(verdicts)
+            if emit:
+                emit_lint_results({**verdicts, "engine": "model"}, tuple(verdicts))
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if not results and error is not None:
+        raise error
+    for check in checks:
+        if check not in results:
+            failed.append(check)
+            results[check] = fallback[check]
+            if emit:
+                emit_lint_results({check: fallback[check], "engine": "heuristic"}, (check,))
+    results = finalize(results, "model")
+    if failed:
+        results["heuristic_checks"] = failed
+        results["error"] = f"Lint AI call failed for {', '.join(failed)}: {error} — rule-based verdicts kept"
+    return results
+
+
+# ── Chunking ──────────────────────────────────────────────────────────────────
+
+_BLOCK = re.compile(r"(?:[^\n]*\S[^\n]*(?:\n|$))+")          # run of non-blank lines
+_HEADING = re.compile(r"^(?:#{1,6}\s+\S|\*\*[^*\n]{1,80}\*\*\s*$)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class DraftChunk:
+    index: int
+    text: str
+    start: int          # char offset into the draft
+    end: int
+    line_start: int     # 1-based, inclusive
+    line_end: int
+    heading: str = ""   # section the chunk sits in, if the draft has headings
+
+    @property
+    def label(self) -> str:
+        return f"part {self.index + 1}, lines {self.line_start}–{self.line_end}"
+
+    def span(self) -> dict[str, Any]:
+        return {
+            "index": self.index, "start": self.start, "end": self.end,
+            "line_start": self.line_start, "line_end": self.line_end, "heading": self.heading,
+        }
+
+
+def chunk_token_budget() -> int:
+    """Draft tokens per lint call — a fixed setting, far below any lint model's context window."""
+    return max(MIN_CHUNK_TOKENS, settings.lint_chunk_max_tokens)
+
+
+def _pieces(draft: str, max_chars: int) -> list[tuple[int, int, bool]]:
+    """(start, end, is_heading) for each paragraph; oversized paragraphs split at sentence ends."""
+    pieces: list[tuple[int, int, bool]] = []
+    for block in _BLOCK.finditer(draft):
+        start, end = block.start(), block.end()
+        if end - start <= max_chars:
+            pieces.append((start, end, bool(_HEADING.match(block.group()))))
+            continue
+        cuts = [start] + [m.end() for m in _SENTENCE_END.finditer(draft, start, end)] + [end]
+        piece_start = start
+        for prev, cut in zip(cuts, cuts[1:]):
+            if cut - piece_start > max_chars and prev > piece_start:
+                pieces.append((piece_start, prev, False))
+                piece_start = prev
+            # A single sentence longer than a chunk is hard-split
+            while cut - piece_start > max_chars:
+                pieces.append((piece_start, piece_start + max_chars, False))
+                piece_start += max_chars
+        if piece_start < end:
+            pieces.append((piece_start, end, False))
+    return pieces
+
+
+def chunk_draft(draft: str, max_tokens: int) -> list[DraftChunk]:
+    """
+    Pack paragraphs into chunks of at most `max_tokens`. A heading closes the
+    current chunk once it is half full, so sections stay together where they fit,
+    and is never left on its own at the end of a chunk.
+    """
+    max_chars = max(max_tokens, 1) * CHARS_PER_TOKEN
+    spans: list[tuple[int, int, str]] = []
+    chunk_start = chunk_end = None
+    heading = chunk_heading = ""
+    heading_only = False
+    for start, end, is_heading in _pieces(draft, max_chars):
+        if chunk_start is not None and not heading_only and (
+            end - chunk_start > max_chars
+            or (is_heading and chunk_end - chunk_start >= max_chars // 2)
+        ):
+            spans.append((chunk_start, chunk_end, chunk_heading))
+            chunk_start = None
+        if is_heading:
+            heading = draft[start:end].strip().strip("#*").strip()
+        if chunk_start is None:
+            chunk_start, chunk_heading = start, heading
+            heading_only = is_heading
+        else:
+            heading_only = heading_only and is_heading
+        chunk_end = end
+    if chunk_start is not None:
+        spans.append((chunk_start, chunk_end, chunk_heading))
+
+    chunks = []
+    for index, (start, end, section) in enumerate(spans):
+        text = draft[start:end].rstrip()
+        line_start = draft.count("\n", 0, start) + 1
+        chunks.append(DraftChunk(
+            index=index, text=text, start=start, end=start + len(text),
+            line_start=line_start, line_end=line_start + text.count("\n"), heading=section,
+        ))
+    return chunks
+
+
+# ── Map-reduce ────────────────────────────────────────────────────────────────
+
+_QUOTED = re.compile(r"[\"“‘']([^\"”’']{4,})[\"”’']")
+
+
+def _locate(chunk: DraftChunk, notes: str) -> dict[str, Any]:
+    """Where in the draft a note points: the quoted phrase's line if found, else the whole chunk."""
+    lowered = chunk.text.lower()
+    for quote in _QUOTED.findall(notes):
+        at = lowered.find(quote.strip().lower())
+        if at >= 0:
+            return {"line": chunk.line_start + chunk.text.count("\n", 0, at), "offset": chunk.start + at}
+    return {}
+
+
+def reduce_chunk_results(
+    chunks: list[DraftChunk],
+    per_chunk: list[dict[str, Any] | BaseException],
+    fallback: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Merge per-chunk verdicts by REDUCE_RULES. Failing verdicts keep their notes,
+    prefixed with where they point, plus a "locations" list. A check that no
+    chunk produced (every call for it failed) keeps the `fallback` verdict.
+    """
+    results: dict[str, Any] = {}
+    heuristic: list[str] = []
+    for check in LINT_CHECKS:
+        rule = REDUCE_RULES.get(check, "all")
+        verdicts = [
+            (chunk, result[check]) for chunk, result in zip(chunks, per_chunk)
+            if isinstance(result, dict) and check in result
+            and check not in result.get("heuristic_checks", ())
+            and (rule != "first" or chunk.index == 0)
+        ]
+        if not verdicts:
+            heuristic.append(check)
+            results[check] = fallback[check]
+            continue
+
+        passed = (any if rule == "any" else all)(v["pass"] for _, v in verdicts)
+        failing = [] if passed else [(c, v) for c, v in verdicts if not v["pass"]]
+        locations, notes = [], []
+        for chunk, verdict in failing:
+            where = {**chunk.span(), **_locate(chunk, verdict["notes"]), "notes": verdict["notes"]}
+            locations.append(where)
+            if verdict["notes"]:
+                prefix = f"line {where['line']}" if "line" in where else chunk.label
+                notes.append(f"[{prefix}] {verdict['notes']}")
+        results[check] = {"pass": passed, "notes": " ".join(notes)}
+        if locations:
+            results[check]["locations"] = locations
+
+    results = finalize(results, "model")
+    results["chunks"] = [c.span() for c in chunks]
+    errors = [r for r in per_chunk if isinstance(r, BaseException)]
+    errors += [r["error"] for r in per_chunk if isinstance(r, dict) and r.get("error")]
+    if heuristic:
+        results["heuristic_checks"] = heuristic
+    if errors:
+        results["error"] = f"Lint AI call failed for part of the draft: {errors[0]} — rule-based verdicts kept where needed"
+    return results
+
+
+async def _lint_chunk(chunk: DraftChunk, total: int, skill_text: str, fallback: dict[str, Any]) -> dict[str, Any]:
+    checks = tuple(c for c in LINT_CHECKS if chunk.index == 0 or REDUCE_RULES.get(c) != "first")
+    part = f"{chunk.label}; {chunk.index + 1} of {total}"
+    if settings.lint_mode == "fanout":
+        return await lint_fanout(chunk.text, skill_text, fallback, checks=checks, part=part, emit=False)
+    return await lint_single(chunk.text, skill_text, checks=checks, part=part, emit=False)
+
+
+async def lint_chunked(chunks: list[DraftChunk], skill_text: str, fallback: dict[str, Any]) -> dict[str, Any]:
+    """Lint every chunk concurrently, then reduce. Raises only if every chunk fails."""
+    per_chunk = await asyncio.gather(
+        *(_lint_chunk(chunk, len(chunks), skill_text, fallback) for chunk in chunks),
+        return_exceptions=True,
+    )
+    for result in per_chunk:
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+    if all(isinstance(r, BaseException) for r in per_chunk):
+        raise per_chunk[0]
+    results = reduce_chunk_results(chunks, per_chunk, fallback)
+    emit_lint_results(results)
+    return results
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+async def lint_model(draft: str, skill_text: str, fallback: dict[str, Any]) -> dict[str, Any]:
+    """Model lint in the configured mode, chunked when the draft exceeds one chunk budget."""
+    chunks = chunk_draft(draft, chunk_token_budget())
+    if len(chunks) > 1:
+        return await lint_chunked(chunks, skill_text, fallback)
+    if settings.lint_mode == "fanout":
+        return await lint_fanout(draft, skill_text, fallback=fallback)
+    return await lint_single(draft, skill_text)
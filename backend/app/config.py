@@ -22,11 +22,16 @@ class Settings(BaseSettings):
     # ── Environment ───────────────────────────────────────────────────────────
     environment: Literal["development", "staging", "production"] = "development"
     log_level: str = "INFO"
+    log_dir: str = "logs"
+    log_json: bool = False              # JSON-lines output instead of pipe-delimited text
+    log_get_sample_rate: float = 1.0    # fraction of successful GET requests that get a log line
     secret_key: str = "change-me-in-production"
 
     # ── OpenRouter (unified AI provider) ──────────────────────────────────────
     # All models accessed via https://openrouter.ai/api/v1 (OpenAI-compatible API)
     openrouter_api_key: str = ""
+    # Any OpenAI-compatible endpoint works — e.g. the local stub in benchmarks/llm_stub.py
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"
 
     # ── Model Tier Overrides ──────────────────────────────────────────────────
     # Tier 1: Standard utility — grammar checks, memory writes
@@ -36,12 +41,111 @@ class Settings(BaseSettings):
     tier2_model: str = "anthropic/claude-sonnet-4.6"          # balanced — main conversations
     tier3_model: str = "google/gemini-3.1-pro-preview"        # critical reasoning and analysis
 
+    # ── Model health & failover ───────────────────────────────────────────────
+    # Per-model circuit breaker (app/models/health.py). While a tier's primary is
+    # open, calls go to that tier's alt model in OPENROUTER_MODELS.
+    model_failover_enabled: bool = True
+    model_failure_threshold: int = 3            # consecutive failures that open the breaker
+    model_error_rate_threshold: float = 0.5     # error-rate EWMA that opens the breaker
+    model_slow_threshold_seconds: float = 30.0  # latency EWMA (time to first response) that opens it
+    model_health_min_calls: int = 5             # calls before rate/latency rules apply
+    model_breaker_cooldown_seconds: float = 60.0
+
+    # ── Hedged requests ───────────────────────────────────────────────────────
+    # Opt-in tail-latency hedging for single-shot calls (app/models/hedging.py):
+    # a second request fires once the first exceeds the task's latency percentile.
+    hedging_enabled: bool = False
+    hedge_tasks: str = "lint_analysis,voice_transcription"  # comma-separated task names
+    hedge_percentile: float = 0.9              # hedge delay = this percentile of recent latency
+    hedge_min_samples: int = 20                # samples before the percentile replaces the default
+    hedge_default_delay_seconds: float = 10.0
+    hedge_budget_ratio: float = 0.1            # hedge credits earned per call (~max hedge rate)
+    hedge_budget_burst: float = 2.0            # max banked credits
+    hedge_use_alt: bool = True                 # hedge on the tier's alt model (else same model)
+
+    # ── Content vetting ───────────────────────────────────────────────────────
+    # Rule-based pre-lint (app/agents/prelint.py): a conclusive heuristic failure
+    # (credential, bait, filler phrase) is returned without a Tier-2 model call.
+    lint_prelint_short_circuit: bool = True
+    lint_mode: str = "single"               # single | fanout (one concurrent call per check/group)
+    lint_fanout_groups: str = ""            # e.g. "rant_detection,fluff_detection;opening_strength" — rest run alone
+    lint_max_concurrency: int = 6           # lint calls in flight at once, process-wide
+    # Long drafts are split at section/paragraph boundaries and linted chunk by chunk
+    # (map-reduce) in chunks of this size — past a few thousand tokens line-level
+    # notes get vague, long before the lint model's context window is a concern.
+    lint_chunk_max_tokens: int = 1500
+
     # ── External APIs ─────────────────────────────────────────────────────────
     exa_api_key: str = ""  # https://exa.ai — used for Discovery web search
+    triangulate_source_timeout_seconds: float = 8.0  # per-source cap in the triangulate discovery tool
+
+    # ── Discovery prefetch ────────────────────────────────────────────────────
+    # Entering Discovery warms a shared cache (app/agents/prefetch.py) with the
+    # task's discovery signals, performance patterns and composed context.
+    discovery_prefetch_enabled: bool = True
+    discovery_cache_ttl_seconds: float = 900.0
+    discovery_cache_max_entries: int = 256
+
+    # ── Startup ───────────────────────────────────────────────────────────────
+    # Heavy SDKs are imported on first use; once the server is up they are
+    # imported in the background (app/warmup.py) so first requests don't pay for them.
+    import_warmup_enabled: bool = True
+    import_warmup_delay_seconds: float = 1.0
 
     # ── Database ──────────────────────────────────────────────────────────────
     database_url: str = "sqlite+aiosqlite:///./brocodde.db"
 
+    # ── Concept vectors ───────────────────────────────────────────────────────
+    # Local hashed embeddings for related-concept search (app/db/vectors.py).
+    # The search matrix lives beside the SQLite file (<db name>.vectors/) unless
+    # a directory is given.
+    concept_vector_dim: int = 512
+    concept_vector_dir: str = ""
+    concept_related_min_score: float = 0.15
+
+    # ── Concept de-duplication ────────────────────────────────────────────────
+    # Estimated Jaccard similarity of concept word sets (app/db/dedupe.py).
+    # Above the link threshold a "similar" edge is proposed; above the duplicate
+    # threshold (or from the same source_url) the new concept is flagged.
+    concept_duplicate_threshold: float = 0.6
+    concept_link_threshold: float = 0.4
+
+    # ── Memory injection ──────────────────────────────────────────────────────
+    # Context entries and Agno memories are ranked against the current message
+    # and stage (BM25 + recency + type priors, app/memory/ranking.py); only the
+    # top entries within the budget reach the prompt. Disabled: Agno's
+    # add_memories_to_context injects every memory, as before.
+    memory_ranking_enabled: bool = True
+    memory_inject_k: int = 12
+    memory_token_budget: int = 600
+    memory_recency_half_life_days: float = 30.0
+
+    # ── Memory consolidation ──────────────────────────────────────────────────
+    # Background job folding near-duplicate agent memories (context entries with
+    # source="agent", and Agno's memories) into one canonical entry each
+    # (app/memory/consolidate.py). Word-set Jaccard at or above the threshold is a
+    # duplicate; each pass looks at the newest MAX_ENTRIES memories. 0 hours = off.
+    memory_consolidation_interval_hours: float = 24.0
+    memory_consolidation_threshold: float = 0.6
+    memory_consolidation_max_entries: int = 5000
+
+    # ── History compaction ────────────────────────────────────────────────────
+    # Agents see a running summary plus the recent turns verbatim. Once the
+    # unsummarized turns exceed the budget, older ones are folded into the summary.
+    history_compaction_enabled: bool = True
+    history_token_budget: int = 6000        # unsummarized history tokens before a fold
+    history_keep_recent_messages: int = 6   # messages kept verbatim after a fold (~3 turns)
+    history_summary_max_tokens: int = 700
+
+    # ── Idempotency-Key store ─────────────────────────────────────────────────
+    idempotency_ttl_seconds: int = 24 * 3600
+    idempotency_max_entries: int = 1000
+
+    # ── WebSocket transport (/ws) ─────────────────────────────────────────────
+    ws_send_queue_size: int = 256            # outbound frames buffered per connection
+    ws_send_timeout_seconds: float = 15.0    # a turn stalls this long on a full buffer → slow consumer
+    ws_max_concurrent_turns: int = 4         # agent turns running at once per connection
+
     # ── CORS ──────────────────────────────────────────────────────────────────
     cors_origins: list[str] = [
         "http://localhost:3000",
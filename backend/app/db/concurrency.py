@@ -0,0 +1,73 @@
+"""
+BroCoDDE — Optimistic Concurrency for CoDDE-task Mutations
+
+CoddeTask carries a `version` column registered as SQLAlchemy's version_id_col, so
+every flush of a task is a compare-and-swap:
+
+    UPDATE codde_tasks SET ..., version = :v + 1 WHERE id = :id AND version = :v
+
+If another writer committed first, no row matches and SQLAlchemy raises
+StaleDataError. mutate_task() turns that into a bounded retry loop: reload the
+task, re-apply the mutation against the fresh state, flush again. Concurrent chat
+turns and draft saves therefore never need a global lock, and none of them can
+silently overwrite the other's chat_history / drafts.
+"""
+
+import asyncio
+import inspect
+import random
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.models import CoddeTask
+
+MAX_RETRIES = 5
+_BACKOFF_BASE_S = 0.01  # 10ms, 20ms, 40ms… plus jitter
+
+
+class TaskConflictError(Exception):
+    """Raised when a task mutation keeps losing the compare-and-swap race."""
+
+    def __init__(self, task_id: str, attempts: int):
+        self.task_id = task_id
+        self.attempts = attempts
+        super().__init__(f"Task {task_id} was modified concurrently ({attempts} attempts)")
+
+
+async def mutate_task(
+    db: AsyncSession,
+    task_id: str,
+    mutate: Callable[[CoddeTask], Any | Awaitable[Any]],
+    retries: int = MAX_RETRIES,
+) -> CoddeTask | None:
+    """
+    Apply `mutate(task)` and flush it with compare-and-swap semantics.
+
+    `mutate` may be sync or async and must be safe to re-run: on conflict it is
+    called again with a freshly loaded task. Derive new values from the task it
+    receives (append to task.drafts, not to a list read earlier).
+
+    The mutation should be the only pending write in `db` — a conflict rolls the
+    session back before retrying.
+
+    Returns the updated task, or None if the task does not exist.
+    Raises TaskConflictError after `retries` lost races.
+    """
+    for attempt in range(retries):
+        task = await db.get(CoddeTask, task_id, populate_existing=True)
+        if task is None:
+            return None
+
+        try:
+            result = mutate(task)
+            if inspect.isawaitable(result):
+                await result  # an async mutation may autoflush mid-way
+            await db.flush()
+            return task
+        except StaleDataError:
+            await db.rollback()
+            await asyncio.sleep(_BACKOFF_BASE_S * (2 ** attempt) * (1 + random.random()))
+
+    raise TaskConflictError(task_id, retries)
@@ -102,6 +102,35 @@ async def create_tables():
             await _sqlite_add_column_if_missing(
                 conn, "codde_tasks", "source_url", "VARCHAR(500)"
             )
+            await _sqlite_add_column_if_missing(
+                conn, "codde_tasks", "version", "INTEGER NOT NULL DEFAULT 1"
+            )
+            await _sqlite_add_column_if_missing(
+                conn, "codde_tasks", "history_summary", "TEXT"
+            )
+            await _sqlite_add_column_if_missing(
+                conn, "codde_tasks", "history_summary_upto", "INTEGER NOT NULL DEFAULT 0"
+            )
+            # usage_ledger memory-injection metrics (app/memory/ranking.py)
+            for column, definition in (
+                ("memory_candidates", "INTEGER NOT NULL DEFAULT 0"),
+                ("memory_injected", "INTEGER NOT NULL DEFAULT 0"),
+                ("memory_tokens", "INTEGER NOT NULL DEFAULT 0"),
+                ("memory_seconds", "FLOAT NOT NULL DEFAULT 0"),
+            ):
+                await _sqlite_add_column_if_missing(conn, "usage_ledger", column, definition)
+            # concept_nodes.source_url lookups for near-duplicate detection (app/db/dedupe.py)
+            from sqlalchemy import text
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_concept_nodes_source_url ON concept_nodes (source_url)"
+            ))
+            # FTS5 search indexes + sync triggers (app/db/search.py)
+            from app.db.search import ensure_search_indexes
+            await ensure_search_indexes(conn)
+
+        # concept_edges backfill from ConceptNode.connections (app/db/graph.py)
+        from app.db.graph import migrate_concept_connections
+        await migrate_concept_connections(conn)
 
 
 async def _sqlite_add_column_if_missing(conn, table: str, column: str, definition: str):
@@ -0,0 +1,256 @@
+"""
+BroCoDDE — Near-duplicate Concepts (MinHash + LSH)
+Repeated Spark sessions on the same paper tend to produce the same concept
+twice. Each concept gets a MinHash signature of its word set: title,
+core_insight and tags, stopwords dropped, plurals and -ing/-ed folded. The
+signature is stored in concept_signatures (uint32 × NUM_PERM) and the share of
+equal positions between two signatures estimates the Jaccard similarity of
+their word sets.
+
+An in-memory LSH index splits each signature into BANDS bands of ROWS values
+and buckets concepts by band, so candidates for a new concept are a handful of
+dict lookups instead of a comparison with every node. Pairs are found with
+probability 1 - (1 - J^ROWS)^BANDS: ~98% at J=0.6, ~54% at J=0.4.
+
+find_similar() flags duplicates (J ≥ CONCEPT_DUPLICATE_THRESHOLD, or the same
+source_url with J ≥ CONCEPT_LINK_THRESHOLD) and link candidates (J ≥
+CONCEPT_LINK_THRESHOLD). index_and_link() records the latter as "similar" edges
+in the concept graph. Measure with `python -m benchmarks.bench_concept_dedupe`.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import ConceptNode, ConceptSignature
+from app.db.vectors import STOPWORDS
+
+if TYPE_CHECKING:
+    import numpy as np
+
+BANDS, ROWS = 30, 4
+NUM_PERM = BANDS * ROWS
+SEED = 20260304
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SUFFIXES = ("ing", "ed", "es", "s")
+_params: tuple[np.ndarray, np.ndarray] | None = None
+
+
+# ── Signatures ────────────────────────────────────────────────────────────────
+
+def stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def shingles(concept: ConceptNode) -> set[str]:
+    text = " ".join([concept.title or "", concept.core_insight or "", *(concept.tags or [])])
+    return {stem(w) for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS}
+
+
+def signature(words: set[str]) -> np.ndarray | None:
+    """MinHash of a word set: NUM_PERM multiply-shift hashes, minimum of each. None for an empty set."""
+    import numpy as np
+
+    global _params
+    if not words:
+        return None
+    if _params is None:
+        rng = np.random.default_rng(SEED)
+        _params = (rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1),
+                   rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64))
+    a, b = _params
+    x = np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64, count=len(words))
+    return ((x[:, None] * a + b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+
+def concept_signature(concept: ConceptNode) -> np.ndarray | None:
+    return signature(shingles(concept))
+
+
+# ── LSH index ─────────────────────────────────────────────────────────────────
+
+class LSHIndex:
+    """Band buckets plus the signatures themselves, for one database. Loaded lazily by ensure()."""
+
+    def __init__(self):
+        self.loaded = False
+        self.signatures: dict[str, np.ndarray] = {}
+        self._buckets: list[dict[bytes, set[str]]] = [defaultdict(set) for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @staticmethod
+    def _bands(sig: np.ndarray) -> list[bytes]:
+        return [sig[i * ROWS:(i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+    async def ensure(self, db: AsyncSession) -> None:
+        """Load every stored signature, computing any that are missing (first use per process)."""
+        if self.loaded:
+            return
+        import numpy as np
+
+        # Signatures from a different NUM_PERM are recomputed below
+        await db.execute(delete(ConceptSignature).where(func.length(ConceptSignature.signature) != NUM_PERM * 4))
+        stored = (await db.execute(select(ConceptSignature.concept_id, ConceptSignature.signature))).all()
+        for concept_id, blob in stored:
+            self.add(concept_id, np.frombuffer(blob, dtype=np.uint32))
+        have = select(ConceptSignature.concept_id)
+        missing = (await db.execute(select(ConceptNode).where(ConceptNode.id.not_in(have)))).scalars().all()
+        for concept in missing:
+            sig = concept_signature(concept)
+            if sig is not None:
+                db.add(ConceptSignature(concept_id=concept.id, signature=sig.tobytes()))
+                self.add(concept.id, sig)
+        if missing:
+            await db.flush()
+        self.loaded = True
+
+    def add(self, concept_id: str, sig: np.ndarray) -> None:
+        self.remove(concept_id)
+        self.signatures[concept_id] = sig
+        for bucket, key in zip(self._buckets, self._bands(sig)):
+            bucket[key].add(concept_id)
+
+    def remove(self, concept_id: str) -> None:
+        sig = self.signatures.pop(concept_id, None)
+        if sig is None:
+            return
+        for bucket, key in zip(self._buckets, self._bands(sig)):
+            members = bucket.get(key)
+            if members is not None:
+                members.discard(concept_id)
+                if not members:
+                    del bucket[key]
+
+    def candidates(self, sig: np.ndarray) -> set[str]:
+        """Ids sharing at least one band with `sig` (unscored)."""
+        found: set[str] = set()
+        for bucket, key in zip(self._buckets, self._bands(sig)):
+            members = bucket.get(key)
+            if members:
+                found |= members
+        return found
+
+    def query(self, sig: np.ndarray, exclude: str | None = None) -> list[tuple[str, float]]:
+        """LSH candidates as (concept id, estimated Jaccard), most similar first."""
+        candidates = self.candidates(sig)
+        candidates.discard(exclude)
+        return self.compare(sig, candidates)
+
+    def compare(self, sig: np.ndarray, ids) -> list[tuple[str, float]]:
+        import numpy as np
+
+        ids = [cid for cid in ids if cid in self.signatures]
+        if not ids:
+            return []
+        estimates = (np.stack([self.signatures[cid] for cid in ids]) == sig).mean(axis=1)
+        return sorted(zip(ids, estimates.tolist()), key=lambda pair: -pair[1])
+
+
+# One index per database, keyed by bind URL
+_indexes: dict[str, LSHIndex] = {}
+
+
+def index_for(db: AsyncSession) -> LSHIndex:
+    return _indexes.setdefault(str(db.get_bind().url), LSHIndex())
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+@dataclass
+class SimilarConcept:
+    concept: ConceptNode
+    similarity: float           # estimated Jaccard similarity of the two word sets
+    same_source: bool
+
+    @property
+    def duplicate(self) -> bool:
+        return self.similarity >= settings.concept_duplicate_threshold or (
+            self.same_source and self.similarity >= settings.concept_link_threshold
+        )
+
+
+async def find_similar(db: AsyncSession, concept: ConceptNode, limit: int = 5) -> list[SimilarConcept]:
+    """
+    Stored concepts whose estimated similarity to `concept` (saved or not) is at
+    least CONCEPT_LINK_THRESHOLD — duplicates first, then most similar.
+    """
+    index = index_for(db)
+    await index.ensure(db)
+    sig = concept_signature(concept)
+    if sig is None:
+        return []
+    scores = dict(index.query(sig, exclude=concept.id))
+    same_source: set[str] = set()
+    if concept.source_url:
+        same_source = set((await db.execute(
+            select(ConceptNode.id).where(ConceptNode.source_url == concept.source_url)
+        )).scalars()) - {concept.id}
+        scores.update(index.compare(sig, same_source - scores.keys()))
+
+    threshold = settings.concept_link_threshold
+    ids = [cid for cid, score in scores.items() if score >= threshold]
+    if not ids:
+        return []
+    nodes = (await db.execute(select(ConceptNode).where(ConceptNode.id.in_(ids)))).scalars()
+    found = [SimilarConcept(node, scores[node.id], node.id in same_source) for node in nodes]
+    found.sort(key=lambda s: (not s.duplicate, not s.same_source, -s.similarity))
+    return found[:limit]
+
+
+async def index_signature(db: AsyncSession, concept: ConceptNode) -> None:
+    """Store a concept's signature and add it to the LSH index. Call after a flush, so it has an id."""
+    index = index_for(db)
+    await index.ensure(db)
+    sig = concept_signature(concept)
+    if sig is None:
+        await unindex_signature(db, concept.id)
+        return
+    await db.merge(ConceptSignature(concept_id=concept.id, signature=sig.tobytes()))
+    await db.flush()
+    index.add(concept.id, sig)
+
+
+async def unindex_signature(db: AsyncSession, concept_id: str) -> None:
+    await db.execute(delete(ConceptSignature).where(ConceptSignature.concept_id == concept_id))
+    index_for(db).remove(concept_id)
+
+
+async def index_and_link(
+    db: AsyncSession, concept: ConceptNode, similar: list[SimilarConcept] | None = None
+) -> list[SimilarConcept]:
+    """
+    For a newly saved concept: find similar ones (unless already found), index
+    its signature, and record each match as a "similar" edge (weight = estimated Jaccard).
+    """
+    from app.db.graph import SIMILAR, add_edge
+
+    if similar is None:
+        similar = await find_similar(db, concept)
+    await index_signature(db, concept)
+    for match in similar:
+        await add_edge(db, concept.id, match.concept.id, kind=SIMILAR, weight=round(match.similarity, 3))
+    return similar
+
+
+def merge_into(target: ConceptNode, new: ConceptNode) -> None:
+    """Fold a duplicate into an existing concept: the newer wording wins, tags are unioned, gaps filled."""
+    target.title = new.title or target.title
+    target.core_insight = new.core_insight or target.core_insight
+    target.tags = list(dict.fromkeys([*(target.tags or []), *(new.tags or [])]))
+    for field in ("source_url", "source_title", "domain", "task_id"):
+        if getattr(target, field) is None:
+            setattr(target, field, getattr(new, field))
@@ -0,0 +1,215 @@
+"""
+BroCoDDE — Concept Graph
+concept_edges holds the knowledge-graph edges (src → dst, kind, weight), indexed
+in both directions so "what links to this concept" is an index lookup rather
+than a scan of every node's JSON list. ConceptNode.connections stays as the
+list of outgoing "link" edges the API exposes; set_links() keeps the two in
+step, and create_tables() backfills the table from those lists once.
+
+neighbors() walks k hops in one recursive CTE, following edges both ways, and
+keeps the strongest `per_depth` concepts at each depth. Agent tools read an
+in-process adjacency map instead (adjacency()), which is reloaded after any
+edge write.
+"""
+
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import delete, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ConceptEdge, ConceptNode
+
+LINK = "link"                   # declared connection, mirrored in ConceptNode.connections
+SIMILAR = "similar"             # proposed by near-duplicate detection (app/db/dedupe.py)
+MAX_DEPTH = 4
+MAX_VISITS = 5000               # rows the recursive walk may produce before it stops expanding
+ADJACENCY_TTL_SECONDS = 60.0    # also picks up edges written by other processes
+
+# node → [(neighbour, kind, weight)], edges in both directions
+Adjacency = dict[str, list[tuple[str, str, float]]]
+
+_adjacency: dict[str, tuple[float, Adjacency]] = {}
+
+
+@dataclass
+class Neighbor:
+    concept: ConceptNode
+    depth: int
+    via: str                    # id of the concept one hop closer to the root
+    kind: str
+    weight: float
+
+
+# ── Migration ─────────────────────────────────────────────────────────────────
+
+async def migrate_concept_connections(conn) -> int:
+    """Backfill concept_edges from ConceptNode.connections when the table is empty. Returns edges added."""
+    if (await conn.execute(select(ConceptEdge.src).limit(1))).first() is not None:
+        return 0
+    rows = (await conn.execute(select(ConceptNode.id, ConceptNode.connections))).all()
+    ids = {row.id for row in rows}
+    edges = [
+        {"src": row.id, "dst": dst, "kind": LINK, "weight": 1.0}
+        for row in rows
+        for dst in dict.fromkeys(row.connections or [])
+        if dst in ids and dst != row.id
+    ]
+    if edges:
+        await conn.execute(insert(ConceptEdge), edges)
+        from app.logger import logger
+        logger.info(f"Migrated {len(edges)} concept connections into concept_edges")
+    return len(edges)
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+def invalidate_adjacency(db: AsyncSession) -> None:
+    _adjacency.pop(str(db.get_bind().url), None)
+
+
+async def set_links(db: AsyncSession, concept: ConceptNode, targets: list[str]) -> list[str]:
+    """
+    Make `targets` the concept's outgoing links (unknown ids and self-links are
+    dropped). Updates concept_edges and ConceptNode.connections; returns the kept ids.
+    """
+    wanted = [t for t in dict.fromkeys(targets) if t != concept.id]
+    known = set((await db.execute(select(ConceptNode.id).where(ConceptNode.id.in_(wanted)))).scalars())
+    wanted = [t for t in wanted if t in known]
+
+    current = set((await db.execute(
+        select(ConceptEdge.dst).where(ConceptEdge.src == concept.id, ConceptEdge.kind == LINK)
+    )).scalars())
+    stale = current - set(wanted)
+    if stale:
+        await db.execute(delete(ConceptEdge).where(
+            ConceptEdge.src == concept.id, ConceptEdge.kind == LINK, ConceptEdge.dst.in_(stale)
+        ))
+    db.add_all(ConceptEdge(src=concept.id, dst=dst, kind=LINK) for dst in wanted if dst not in current)
+    concept.connections = wanted
+    await db.flush()
+    invalidate_adjacency(db)
+    return wanted
+
+
+async def add_edge(db: AsyncSession, src: str, dst: str, kind: str = LINK, weight: float = 1.0) -> None:
+    """Insert or re-weight one edge. Use set_links() for declared links so `connections` stays in step."""
+    await db.merge(ConceptEdge(src=src, dst=dst, kind=kind, weight=weight))
+    await db.flush()
+    invalidate_adjacency(db)
+
+
+async def remove_concept_edges(db: AsyncSession, concept_id: str) -> None:
+    """Drop every edge touching a concept, and remove it from the `connections` of concepts linking to it."""
+    sources = (await db.execute(
+        select(ConceptNode).join(ConceptEdge, ConceptEdge.src == ConceptNode.id)
+        .where(ConceptEdge.dst == concept_id, ConceptEdge.kind == LINK)
+    )).scalars().all()
+    for node in sources:
+        node.connections = [c for c in node.connections or [] if c != concept_id]
+    await db.execute(delete(ConceptEdge).where(or_(ConceptEdge.src == concept_id, ConceptEdge.dst == concept_id)))
+    await db.flush()
+    invalidate_adjacency(db)
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def _neighbors_sql(kind: str | None) -> str:
+    only = " AND e.kind = :kind" if kind else ""
+    return f"""
+        WITH RECURSIVE walk(id, depth) AS (
+            SELECT :root, 0
+            UNION
+            SELECT e.dst, w.depth + 1 FROM walk w JOIN concept_edges e ON e.src = w.id
+            WHERE w.depth < :depth{only}
+            UNION
+            SELECT e.src, w.depth + 1 FROM walk w JOIN concept_edges e ON e.dst = w.id
+            WHERE w.depth < :depth{only}
+            LIMIT :max_visits
+        ),
+        hops AS (SELECT id, MIN(depth) AS depth FROM walk GROUP BY id),
+        links AS (
+            SELECT h.id, h.depth, p.id AS via, e.kind, e.weight,
+                   ROW_NUMBER() OVER (PARTITION BY h.id ORDER BY e.weight DESC, p.id) AS best
+            FROM hops h
+            JOIN hops p ON p.depth = h.depth - 1
+            JOIN concept_edges e ON ((e.src = p.id AND e.dst = h.id) OR (e.src = h.id AND e.dst = p.id)){only}
+        ),
+        ranked AS (
+            SELECT id, depth, via, kind, weight,
+                   ROW_NUMBER() OVER (PARTITION BY depth ORDER BY weight DESC, id) AS rank
+            FROM links WHERE best = 1
+        )
+        SELECT id, depth, via, kind, weight FROM ranked
+        WHERE rank <= :per_depth
+        ORDER BY depth, weight DESC, id
+    """
+
+
+async def neighbors(
+    db: AsyncSession,
+    concept_id: str,
+    depth: int = 1,
+    per_depth: int = 25,
+    kind: str | None = None,
+) -> list[Neighbor]:
+    """
+    Concepts within `depth` hops (edges followed both ways), nearest first and
+    strongest edge first within a depth, at most `per_depth` per depth. The
+    root is excluded. Each concept appears once, at its shortest distance.
+    """
+    depth = max(1, min(depth, MAX_DEPTH))
+    if db.get_bind().dialect.name == "sqlite":
+        params = {"root": concept_id, "depth": depth, "per_depth": per_depth, "max_visits": MAX_VISITS}
+        if kind:
+            params["kind"] = kind
+        rows = [(r.id, r.depth, r.via, r.kind, r.weight)
+                for r in (await db.execute(text(_neighbors_sql(kind)), params)).all()]
+    else:
+        rows = walk(await adjacency(db), concept_id, depth, per_depth, kind)
+
+    if not rows:
+        return []
+    nodes = (await db.execute(select(ConceptNode).where(ConceptNode.id.in_([r[0] for r in rows])))).scalars()
+    by_id = {node.id: node for node in nodes}
+    return [Neighbor(by_id[id_], d, via, k, w) for id_, d, via, k, w in rows if id_ in by_id]
+
+
+async def adjacency(db: AsyncSession) -> Adjacency:
+    """The whole edge list as an in-memory map (cached per database, reloaded after writes)."""
+    url = str(db.get_bind().url)
+    cached = _adjacency.get(url)
+    if cached and time.monotonic() - cached[0] < ADJACENCY_TTL_SECONDS:
+        return cached[1]
+    adj: Adjacency = defaultdict(list)
+    for src, dst, kind, weight in (await db.execute(
+        select(ConceptEdge.src, ConceptEdge.dst, ConceptEdge.kind, ConceptEdge.weight)
+    )).all():
+        adj[src].append((dst, kind, weight))
+        adj[dst].append((src, kind, weight))
+    _adjacency[url] = (time.monotonic(), dict(adj))
+    return _adjacency[url][1]
+
+
+def walk(
+    adj: Adjacency, root: str, depth: int, per_depth: int, kind: str | None = None
+) -> list[tuple[str, int, str, str, float]]:
+    """Breadth-first neighbors() over an adjacency map: (id, depth, via, kind, weight) rows."""
+    seen, frontier, rows = {root}, [root], []
+    for d in range(1, depth + 1):
+        best: dict[str, tuple[str, str, float]] = {}
+        for node in frontier:
+            for other, edge_kind, weight in adj.get(node, ()):
+                if other in seen or (kind and edge_kind != kind):
+                    continue
+                current = best.get(other)
+                if current is None or (-weight, node) < (-current[2], current[0]):
+                    best[other] = (node, edge_kind, weight)
+        if not best:
+            break
+        seen.update(best)
+        frontier = list(best)
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][2], kv[0]))[:per_depth]
+        rows += [(id_, d, via, k, w) for id_, (via, k, w) in ranked]
+    return rows
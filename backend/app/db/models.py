@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, DateTime, ForeignKey, String, Text
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.database import Base
@@ -62,6 +62,14 @@ class CoddeTask(Base):
     final_content: Mapped[str | None] = mapped_column(Text, nullable=True)
     chat_history: Mapped[list[dict]] = mapped_column(JSON, default=list)
 
+    # Rolling compaction (app/agents/compaction.py): summary of chat_history[:history_summary_upto]
+    history_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    history_summary_upto: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    # Optimistic concurrency: every UPDATE is "... WHERE id = ? AND version = ?".
+    # A writer that lost the race gets StaleDataError — see app/db/concurrency.py.
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+
     # Timestamps
     published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=_now)
@@ -72,6 +80,8 @@ class CoddeTask(Base):
         "PublishedPost", back_populates="task", uselist=False
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class MemoryEntry(Base):
     __tablename__ = "memory_entries"
@@ -101,6 +111,41 @@ class MemoryEntry(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=_now, onupdate=_now)
 
 
+class MemoryMerge(Base):
+    """Provenance of consolidation (app/memory/consolidate.py): a memory folded into a canonical one."""
+    __tablename__ = "memory_merges"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    run_id: Mapped[str] = mapped_column(ForeignKey("memory_consolidation_runs.id"), index=True)
+    origin: Mapped[str] = mapped_column(String(20))                  # entry (memory_entries) | agno (agno_memories)
+    canonical_id: Mapped[str] = mapped_column(String, index=True)    # the memory that was kept
+    merged_id: Mapped[str] = mapped_column(String)                   # the memory that was removed
+    # The removed memory as it was
+    type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    text: Mapped[str] = mapped_column(Text)
+    tags: Mapped[list[str]] = mapped_column(JSON, default=list)
+    lifecycle_phases: Mapped[list[str]] = mapped_column(JSON, default=list)
+    similarity: Mapped[float] = mapped_column(Float)                 # Jaccard of its word set with the canonical's
+    created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    merged_at: Mapped[datetime] = mapped_column(DateTime, default=_now)
+
+
+class MemoryConsolidationRun(Base):
+    """One consolidation pass over agent memories, with what it saved."""
+    __tablename__ = "memory_consolidation_runs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    trigger: Mapped[str] = mapped_column(String(20), default="schedule")    # schedule | manual
+    scanned: Mapped[int] = mapped_column(default=0)
+    clusters: Mapped[int] = mapped_column(default=0)
+    merged: Mapped[int] = mapped_column(default=0)
+    tokens_before: Mapped[int] = mapped_column(default=0)
+    tokens_after: Mapped[int] = mapped_column(default=0)
+    truncated: Mapped[bool] = mapped_column(default=False)   # more memories than MEMORY_CONSOLIDATION_MAX_ENTRIES
+    seconds: Mapped[float] = mapped_column(Float, default=0.0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_now, index=True)
+
+
 class KnowledgeDomain(Base):
     __tablename__ = "knowledge_domains"
 
@@ -120,7 +165,7 @@ class ConceptNode(Base):
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
     title: Mapped[str] = mapped_column(String(300))
     core_insight: Mapped[str] = mapped_column(Text)          # 1-sentence crystallized insight
-    source_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    source_url: Mapped[str | None] = mapped_column(String(500), nullable=True, index=True)
     source_title: Mapped[str | None] = mapped_column(String(300), nullable=True)
     domain: Mapped[str | None] = mapped_column(String(200), nullable=True)
     tags: Mapped[list[str]] = mapped_column(JSON, default=list)
@@ -130,6 +175,37 @@ class ConceptNode(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=_now, onupdate=_now)
 
 
+class ConceptEdge(Base):
+    """Directed edge in the concept graph (app/db/graph.py). The primary key serves src → dst lookups."""
+    __tablename__ = "concept_edges"
+    __table_args__ = (Index("ix_concept_edges_dst_src", "dst", "src"),)  # reverse: what links here
+
+    src: Mapped[str] = mapped_column(ForeignKey("concept_nodes.id", ondelete="CASCADE"), primary_key=True)
+    dst: Mapped[str] = mapped_column(ForeignKey("concept_nodes.id", ondelete="CASCADE"), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(30), primary_key=True, default="link")  # link | similar
+    weight: Mapped[float] = mapped_column(Float, default=1.0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_now)
+
+
+class ConceptSignature(Base):
+    """MinHash signature of a ConceptNode (app/db/dedupe.py), loaded into the in-memory LSH index."""
+    __tablename__ = "concept_signatures"
+
+    concept_id: Mapped[str] = mapped_column(ForeignKey("concept_nodes.id", ondelete="CASCADE"), primary_key=True)
+    signature: Mapped[bytes] = mapped_column(LargeBinary)    # uint32 × NUM_PERM
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=_now, onupdate=_now)
+
+
+class ConceptVector(Base):
+    """Local embedding of a ConceptNode (app/db/vectors.py) — the source the search matrix is rebuilt from."""
+    __tablename__ = "concept_vectors"
+
+    concept_id: Mapped[str] = mapped_column(ForeignKey("concept_nodes.id", ondelete="CASCADE"), primary_key=True)
+    vector: Mapped[bytes] = mapped_column(LargeBinary)       # float16 × dim, L2-normalised term vector
+    dim: Mapped[int] = mapped_column(Integer)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=_now, onupdate=_now)
+
+
 class PublishedPost(Base):
     __tablename__ = "published_posts"
 
@@ -143,3 +219,26 @@ class PublishedPost(Base):
     published_at: Mapped[datetime] = mapped_column(DateTime, default=_now)
 
     task: Mapped["CoddeTask"] = relationship("CoddeTask", back_populates="published_post")
+
+
+class UsageLedger(Base):
+    """One agent run attempt: who ran, on which model, and what it cost (app/db/usage.py)."""
+    __tablename__ = "usage_ledger"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
+    task_id: Mapped[str] = mapped_column(String, index=True)
+    stage: Mapped[str] = mapped_column(String(50))
+    agent: Mapped[str] = mapped_column(String(50))
+    model: Mapped[str] = mapped_column(String(200))
+    status: Mapped[str] = mapped_column(String(20), default="ok")   # ok | error | failover | aborted
+    input_tokens: Mapped[int] = mapped_column(default=0)
+    output_tokens: Mapped[int] = mapped_column(default=0)
+    cached_tokens: Mapped[int] = mapped_column(default=0)
+    tool_calls: Mapped[int] = mapped_column(default=0)
+    ttft_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)   # None: nothing streamed
+    total_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+    memory_candidates: Mapped[int] = mapped_column(default=0)     # entries ranked for injection
+    memory_injected: Mapped[int] = mapped_column(default=0)       # entries that made the prompt
+    memory_tokens: Mapped[int] = mapped_column(default=0)
+    memory_seconds: Mapped[float] = mapped_column(Float, default=0.0)   # retrieval + ranking
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_now, index=True)
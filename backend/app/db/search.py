@@ -0,0 +1,367 @@
+"""
+BroCoDDE — Full-text Search (SQLite FTS5)
+
+concept_fts is an external-content FTS5 index over concept_nodes (title,
+core_insight, domain, tags, source_title). Triggers keep it in sync on every
+insert, delete and update of an indexed column; ensure_search_indexes() creates
+the table and triggers and backfills existing rows, and runs from create_tables().
+
+transcript_fts indexes every chat message and draft version of every CoDDE-task.
+Triggers on codde_tasks unpack the chat_history / drafts JSON (json_each) into
+transcript_entries — one row per message or draft, with its position — and
+triggers on that table keep the FTS index in step. An update only touches the
+positions whose content changed, so a chat turn or save_draft indexes just the
+new entries, whichever code path wrote them.
+
+Queries rank by BM25 (title weighted highest), match terms of 3+ characters
+as prefixes ("retriev" finds "retrieval") with porter stemming, and return a
+highlighted snippet. Databases without FTS5 (or a non-SQLite DATABASE_URL)
+fall back to the ILIKE scan. Compare the two with
+`python -m benchmarks.bench_concept_search` and
+`python -m benchmarks.bench_transcript_search`.
+"""
+
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ConceptNode
+
+CONCEPT_FTS_COLUMNS = ("title", "core_insight", "domain", "tags", "source_title")
+# bm25() column weights, same order as CONCEPT_FTS_COLUMNS
+CONCEPT_FTS_WEIGHTS = (10.0, 4.0, 3.0, 3.0, 1.0)
+
+_COLS = ", ".join(CONCEPT_FTS_COLUMNS)
+_NEW = ", ".join(f"new.{c}" for c in CONCEPT_FTS_COLUMNS)
+_OLD = ", ".join(f"old.{c}" for c in CONCEPT_FTS_COLUMNS)
+
+CONCEPT_FTS_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS concept_fts USING fts5(
+        {_COLS}, content='concept_nodes', content_rowid='rowid',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER IF NOT EXISTS concept_fts_ai AFTER INSERT ON concept_nodes BEGIN
+        INSERT INTO concept_fts(rowid, {_COLS}) VALUES (new.rowid, {_NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS concept_fts_ad AFTER DELETE ON concept_nodes BEGIN
+        INSERT INTO concept_fts(concept_fts, rowid, {_COLS}) VALUES ('delete', old.rowid, {_OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS concept_fts_au AFTER UPDATE OF {_COLS} ON concept_nodes BEGIN
+        INSERT INTO concept_fts(concept_fts, rowid, {_COLS}) VALUES ('delete', old.rowid, {_OLD});
+        INSERT INTO concept_fts(rowid, {_COLS}) VALUES (new.rowid, {_NEW});
+    END""",
+)
+
+# ── Transcripts: chat messages + draft versions ──────────────────────────────
+
+_ENTRY_COLS = "task_id, kind, position, stage, role, content, created_at"
+
+
+def _unpack(kind: str, column: str, stage: str, role: str, created: str) -> str:
+    """SELECT of transcript_entries rows from one JSON array column of `new` (a codde_tasks row)."""
+    return f"""
+        SELECT new.id, '{kind}', j.key, {stage}, {role}, json_extract(j.value, '$.content'), {created}
+        FROM json_each(coalesce(new.{column}, '[]')) j
+        WHERE coalesce(json_extract(j.value, '$.content'), '') != ''"""
+
+
+_MESSAGES = _unpack("message", "chat_history", "coalesce(json_extract(j.value, '$.stage'), new.stage)",
+                    "json_extract(j.value, '$.role')", "json_extract(j.value, '$.timestamp')")
+_DRAFTS = _unpack("draft", "drafts", "coalesce(json_extract(j.value, '$.stage'), new.stage)",
+                  "'draft'", "json_extract(j.value, '$.created_at')")
+
+
+def _sync(kind: str, column: str, select_sql: str) -> str:
+    """Trigger body: drop entries whose content changed or vanished, insert the missing positions."""
+    return f"""
+        DELETE FROM transcript_entries WHERE task_id = old.id AND kind = '{kind}' AND id NOT IN (
+            SELECT e.id FROM transcript_entries e
+            JOIN json_each(coalesce(new.{column}, '[]')) j ON e.position = j.key
+            WHERE e.task_id = old.id AND e.kind = '{kind}' AND e.content = json_extract(j.value, '$.content'));
+        INSERT INTO transcript_entries({_ENTRY_COLS}) {select_sql}
+            AND NOT EXISTS (SELECT 1 FROM transcript_entries e
+                            WHERE e.task_id = new.id AND e.kind = '{kind}' AND e.position = j.key);"""
+
+
+TRANSCRIPT_FTS_DDL = (
+    """CREATE TABLE IF NOT EXISTS transcript_entries (
+        id INTEGER PRIMARY KEY,
+        task_id VARCHAR NOT NULL,
+        kind VARCHAR(10) NOT NULL,          -- message | draft
+        position INTEGER NOT NULL,          -- index in chat_history / drafts
+        stage VARCHAR(50),
+        role VARCHAR(20),
+        content TEXT NOT NULL,
+        created_at VARCHAR(40),
+        UNIQUE (task_id, kind, position))""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+        content, content='transcript_entries', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_fts_ai AFTER INSERT ON transcript_entries BEGIN
+        INSERT INTO transcript_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_fts_ad AFTER DELETE ON transcript_entries BEGIN
+        INSERT INTO transcript_fts(transcript_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transcript_task_ai AFTER INSERT ON codde_tasks BEGIN
+        INSERT INTO transcript_entries({_ENTRY_COLS}) {_MESSAGES};
+        INSERT INTO transcript_entries({_ENTRY_COLS}) {_DRAFTS};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transcript_task_messages_au AFTER UPDATE OF chat_history ON codde_tasks BEGIN
+        {_sync("message", "chat_history", _MESSAGES)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transcript_task_drafts_au AFTER UPDATE OF drafts ON codde_tasks BEGIN
+        {_sync("draft", "drafts", _DRAFTS)}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_task_ad AFTER DELETE ON codde_tasks BEGIN
+        DELETE FROM transcript_entries WHERE task_id = old.id;
+    END""",
+)
+
+MIN_PREFIX_CHARS = 3  # shorter terms match whole words only ("no" must not match "noise")
+
+# (bind URL, FTS table) pairs known to exist
+_fts_ready: set[tuple[str, str]] = set()
+
+
+@dataclass
+class ConceptHit:
+    concept: ConceptNode
+    score: float | None = None      # BM25 (lower is better); None on the ILIKE path
+    snippet: str | None = None
+
+
+@dataclass
+class TranscriptHit:
+    task_id: str
+    task_title: str | None
+    kind: str                       # "message" | "draft"
+    position: int                   # index in chat_history / drafts
+    stage: str | None
+    role: str | None                # user | agent | draft
+    created_at: str | None
+    snippet: str
+    score: float | None = None      # BM25 (lower is better); None on the scan path
+
+
+async def _table_exists(conn, name: str) -> bool:
+    return (await conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    )).first() is not None
+
+
+async def ensure_search_indexes(conn) -> bool:
+    """Create the FTS tables and triggers (idempotent). False when SQLite lacks FTS5."""
+    from sqlalchemy.exc import OperationalError
+
+    concepts_exist = await _table_exists(conn, "concept_fts")
+    transcripts_exist = await _table_exists(conn, "transcript_fts")
+    try:
+        for statement in (*CONCEPT_FTS_DDL, *TRANSCRIPT_FTS_DDL):
+            await conn.execute(text(statement))
+    except OperationalError as e:  # e.g. "no such module: fts5"
+        from app.logger import logger
+        logger.warning(f"FTS5 unavailable — concept search falls back to ILIKE, transcript search to a scan: {e}")
+        return False
+    # Backfill rows written before the indexes existed
+    if not concepts_exist:
+        await conn.execute(text("INSERT INTO concept_fts(concept_fts) VALUES ('rebuild')"))
+    if not transcripts_exist:
+        await backfill_transcripts(conn)
+    url = str(conn.engine.url)
+    _fts_ready.update({(url, "concept_fts"), (url, "transcript_fts")})
+    return True
+
+
+async def backfill_transcripts(conn) -> int:
+    """(Re)fill transcript_entries from every task's chat_history and drafts. Returns entries indexed."""
+    await conn.execute(text("DELETE FROM transcript_entries"))
+    for select_sql in (_MESSAGES, _DRAFTS):
+        # The trigger SELECTs read `new`; alias codde_tasks to it for a set-based backfill
+        await conn.execute(text(
+            f"INSERT INTO transcript_entries({_ENTRY_COLS}) "
+            + select_sql.replace("FROM json_each", "FROM codde_tasks AS new, json_each")
+        ))
+    return (await conn.execute(text("SELECT count(*) FROM transcript_entries"))).scalar_one()
+
+
+async def _has_fts(db: AsyncSession, table: str = "concept_fts") -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    key = (str(bind.url), table)
+    if key not in _fts_ready:
+        found = (await db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table}
+        )).first()
+        if found is None:
+            return False
+        _fts_ready.add(key)
+    return True
+
+
+def fts_query(query: str, any_term: bool = False) -> str | None:
+    """User text → FTS5 MATCH expression of quoted (prefix) terms. None if there are no words."""
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    return (" OR " if any_term else " ").join(
+        f'"{t}"*' if len(t) >= MIN_PREFIX_CHARS else f'"{t}"' for t in terms
+    )
+
+
+async def search_concepts(
+    db: AsyncSession,
+    query: str,
+    limit: int = 5,
+    highlight: tuple[str, str] = ("<mark>", "</mark>"),
+) -> list[ConceptHit]:
+    """
+    Most relevant concepts for `query`. Every word must match; if that finds
+    nothing, any word may. ILIKE scan when FTS5 is unavailable.
+    """
+    if not await _has_fts(db):
+        return await search_concepts_ilike(db, query, limit)
+
+    weights = ", ".join(str(w) for w in CONCEPT_FTS_WEIGHTS)
+    sql = text(f"""
+        SELECT c.id, bm25(concept_fts, {weights}) AS score,
+               snippet(concept_fts, -1, :open, :close, '…', 16) AS snippet
+        FROM concept_fts JOIN concept_nodes c ON c.rowid = concept_fts.rowid
+        WHERE concept_fts MATCH :match
+        ORDER BY score
+        LIMIT :limit
+    """)
+    rows = []
+    for any_term in (False, True):
+        match = fts_query(query, any_term)
+        if match is None:
+            return []
+        rows = (await db.execute(sql, {
+            "match": match, "limit": limit, "open": highlight[0], "close": highlight[1],
+        })).all()
+        if rows or " " not in match:
+            break
+
+    if not rows:
+        return []
+    nodes = (await db.execute(select(ConceptNode).where(ConceptNode.id.in_([r.id for r in rows])))).scalars()
+    by_id = {node.id: node for node in nodes}
+    return [ConceptHit(by_id[r.id], r.score, r.snippet) for r in rows if r.id in by_id]
+
+
+async def search_concepts_ilike(db: AsyncSession, query: str, limit: int = 5) -> list[ConceptHit]:
+    """Substring scan across title, core_insight and domain, newest first (pre-FTS behaviour)."""
+    result = await db.execute(
+        select(ConceptNode)
+        .where(or_(
+            ConceptNode.title.ilike(f"%{query}%"),
+            ConceptNode.core_insight.ilike(f"%{query}%"),
+            ConceptNode.domain.ilike(f"%{query}%"),
+        ))
+        .order_by(ConceptNode.created_at.desc())
+        .limit(limit)
+    )
+    return [ConceptHit(c) for c in result.scalars().all()]
+
+
+async def search_transcripts(
+    db: AsyncSession,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    task_id: str | None = None,
+    kind: str | None = None,
+    highlight: tuple[str, str] = ("<mark>", "</mark>"),
+) -> tuple[list[TranscriptHit], bool]:
+    """
+    Chat messages and draft versions matching `query`, best first, as one page:
+    (hits, whether more follow). Every word must match; if that finds nothing, any
+    word may. Scans the tasks' JSON when FTS5 is unavailable.
+    """
+    if not await _has_fts(db, "transcript_fts"):
+        return await search_transcripts_scan(db, query, limit, offset, task_id, kind)
+
+    # Rank inside FTS alone, so only one page of rows is joined and snippeted
+    filters = "".join([
+        " AND rowid IN (SELECT id FROM transcript_entries WHERE task_id = :task_id)" if task_id else "",
+        " AND rowid IN (SELECT id FROM transcript_entries WHERE kind = :kind)" if kind else "",
+    ])
+    sql = text(f"""
+        SELECT e.task_id, t.title, e.kind, e.position, e.stage, e.role, e.created_at, e.content, m.score
+        FROM (SELECT rowid, rank AS score FROM transcript_fts
+              WHERE transcript_fts MATCH :match{filters}
+              ORDER BY rank LIMIT :window) m
+        JOIN transcript_entries e ON e.id = m.rowid
+        LEFT JOIN codde_tasks t ON t.id = e.task_id
+        ORDER BY m.score
+        LIMIT :limit OFFSET :offset
+    """)
+    rows = []
+    for any_term in (False, True):
+        match = fts_query(query, any_term)
+        if match is None:
+            return [], False
+        rows = (await db.execute(sql, {
+            "match": match, "window": offset + limit + 1, "limit": limit + 1, "offset": offset,
+            "task_id": task_id, "kind": kind,
+        })).all()
+        if rows or " " not in match:
+            break
+        if offset and (await db.execute(
+            text("SELECT 1 FROM transcript_fts WHERE transcript_fts MATCH :match LIMIT 1"), {"match": match}
+        )).first():
+            break  # past the last all-words hit — don't switch to any-word results mid-pagination
+    words = re.findall(r"\w+", query.lower())
+    hits = [TranscriptHit(r.task_id, r.title, r.kind, r.position, r.stage, r.role, r.created_at,
+                          _snippet(r.content, words, highlight), r.score) for r in rows[:limit]]
+    return hits, len(rows) > limit
+
+
+def _snippet(content: str, words: list[str], highlight: tuple[str, str], width: int = 60) -> str:
+    """~3×width chars around the first matched word, with word prefixes highlighted."""
+    pattern = re.compile(r"\b(" + "|".join(re.escape(w) for w in words) + r")\w*", re.IGNORECASE)
+    first = pattern.search(content)
+    at = first.start() if first else 0
+    start = max(0, at - width)
+    if start:  # begin on a word boundary
+        start = content.find(" ", start, at) + 1 or start
+    end = min(len(content), at + width * 2)
+    piece = pattern.sub(lambda m: f"{highlight[0]}{m.group(0)}{highlight[1]}", content[start:end])
+    return ("…" if start else "") + piece + ("…" if end < len(content) else "")
+
+
+async def search_transcripts_scan(
+    db: AsyncSession,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    task_id: str | None = None,
+    kind: str | None = None,
+    highlight: tuple[str, str] = ("<mark>", "</mark>"),
+) -> tuple[list[TranscriptHit], bool]:
+    """Load every task's chat_history and drafts and match all words in Python, newest task first (pre-FTS)."""
+    from app.db.models import CoddeTask
+
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return [], False
+    stmt = select(CoddeTask).order_by(CoddeTask.updated_at.desc())
+    if task_id:
+        stmt = stmt.where(CoddeTask.id == task_id)
+    hits: list[TranscriptHit] = []
+    for task in (await db.execute(stmt)).scalars():
+        entries = []
+        if kind in (None, "message"):
+            entries += [("message", i, m.get("stage"), m.get("role"), m.get("timestamp"), m.get("content") or "")
+                        for i, m in enumerate(task.chat_history or [])]
+        if kind in (None, "draft"):
+            entries += [("draft", i, d.get("stage"), "draft", d.get("created_at"), d.get("content") or "")
+                        for i, d in enumerate(task.drafts or [])]
+        for entry_kind, position, stage, role, created, content in entries:
+            lower = content.lower()
+            if all(w in lower for w in words):
+                hits.append(TranscriptHit(task.id, task.title, entry_kind, position, stage or task.stage,
+                                          role, created, _snippet(content, words, highlight)))
+    return hits[offset:offset + limit], len(hits) > offset + limit
@@ -0,0 +1,151 @@
+"""
+BroCoDDE — Usage Ledger
+Token and latency metering per agent run, written by the harness (stream_chat)
+into the `usage_ledger` table and aggregated for GET /observatory/usage.
+
+One row per run *attempt*: a run that fails over to the alt model leaves a
+"failover" row for the failed attempt plus a row for the retry; a run the client
+abandoned mid-stream (disconnect, cancelled turn) leaves an "aborted" row. Token
+counts come from Agno's RunCompleted metrics; TTFT and total time are measured
+by the harness (what the client saw), tool calls are counted from ToolCallStarted.
+Memory columns record the ranked memory injected into the prompt that turn
+(app/memory/ranking.py): entries considered, entries and tokens kept, and the
+time retrieval + ranking took.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import UsageLedger
+
+
+@dataclass
+class TurnUsage:
+    task_id: str
+    stage: str
+    agent: str
+    model: str
+    status: str = "ok"
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    tool_calls: int = 0
+    ttft_seconds: float | None = None
+    memory_candidates: int = 0
+    memory_injected: int = 0
+    memory_tokens: int = 0
+    memory_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    def first_chunk(self) -> None:
+        if self.ttft_seconds is None:
+            self.ttft_seconds = time.perf_counter() - self.started
+
+    def add_metrics(self, metrics: Any) -> None:
+        """Accumulate Agno RunMetrics (input/output/cache_read tokens)."""
+        self.input_tokens += getattr(metrics, "input_tokens", 0) or 0
+        self.output_tokens += getattr(metrics, "output_tokens", 0) or 0
+        self.cached_tokens += getattr(metrics, "cache_read_tokens", 0) or 0
+
+    def finish(self, status: str = "ok") -> None:
+        self.status = status
+        self.finished = time.perf_counter()
+
+    @property
+    def total_seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+
+async def record_usage(usage: TurnUsage) -> None:
+    """Insert one ledger row. Metering never breaks a chat turn — errors are logged."""
+    from app.db.database import AsyncSessionLocal
+    from app.logger import logger
+
+    try:
+        async with AsyncSessionLocal() as session:
+            session.add(UsageLedger(
+                task_id=usage.task_id,
+                stage=usage.stage,
+                agent=usage.agent,
+                model=usage.model,
+                status=usage.status,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cached_tokens=usage.cached_tokens,
+                tool_calls=usage.tool_calls,
+                ttft_seconds=usage.ttft_seconds,
+                total_seconds=usage.total_seconds,
+                memory_candidates=usage.memory_candidates,
+                memory_injected=usage.memory_injected,
+                memory_tokens=usage.memory_tokens,
+                memory_seconds=usage.memory_seconds,
+            ))
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Usage ledger write failed for {usage.task_id}: {e}")
+
+
+def _aggregate_columns() -> list:
+    return [
+        func.count(UsageLedger.id).label("runs"),
+        func.sum(UsageLedger.input_tokens).label("input_tokens"),
+        func.sum(UsageLedger.output_tokens).label("output_tokens"),
+        func.sum(UsageLedger.cached_tokens).label("cached_tokens"),
+        func.sum(UsageLedger.tool_calls).label("tool_calls"),
+        func.avg(UsageLedger.ttft_seconds).label("avg_ttft_seconds"),
+        func.avg(UsageLedger.total_seconds).label("avg_total_seconds"),
+        func.sum(UsageLedger.total_seconds).label("total_seconds"),
+        func.avg(UsageLedger.memory_tokens).label("avg_memory_tokens"),
+        func.avg(UsageLedger.memory_seconds).label("avg_memory_seconds"),
+    ]
+
+
+def _row(row: Any, keys: tuple[str, ...]) -> dict[str, Any]:
+    data = dict(row._mapping)
+    out = {k: data[k] for k in keys}
+    out.update({
+        "runs": data["runs"],
+        "input_tokens": data["input_tokens"] or 0,
+        "output_tokens": data["output_tokens"] or 0,
+        "cached_tokens": data["cached_tokens"] or 0,
+        "tool_calls": data["tool_calls"] or 0,
+        "avg_ttft_seconds": round(data["avg_ttft_seconds"], 3) if data["avg_ttft_seconds"] is not None else None,
+        "avg_total_seconds": round(data["avg_total_seconds"] or 0.0, 3),
+        "total_seconds": round(data["total_seconds"] or 0.0, 3),
+        "avg_memory_tokens": round(data["avg_memory_tokens"] or 0.0, 1),
+        "avg_memory_seconds": round(data["avg_memory_seconds"] or 0.0, 4),
+    })
+    return out
+
+
+async def usage_summary(db: AsyncSession, days: int = 30, task_id: str | None = None) -> dict[str, Any]:
+    """Totals plus per-day and per-(stage, agent) aggregates over the last `days` days."""
+    since = datetime.utcnow() - timedelta(days=days)
+    filters = [UsageLedger.created_at >= since]
+    if task_id:
+        filters.append(UsageLedger.task_id == task_id)
+
+    totals = (await db.execute(select(*_aggregate_columns()).where(*filters))).one()
+
+    day = func.date(UsageLedger.created_at).label("day")
+    by_day = await db.execute(
+        select(day, *_aggregate_columns()).where(*filters).group_by(day).order_by(day)
+    )
+    by_stage = await db.execute(
+        select(UsageLedger.stage, UsageLedger.agent, *_aggregate_columns())
+        .where(*filters)
+        .group_by(UsageLedger.stage, UsageLedger.agent)
+        .order_by(func.sum(UsageLedger.input_tokens + UsageLedger.output_tokens).desc())
+    )
+    return {
+        "since": since.isoformat(),
+        "totals": _row(totals, ()),
+        "by_day": [_row(r, ("day",)) for r in by_day],
+        "by_stage": [_row(r, ("stage", "agent")) for r in by_stage],
+    }
@@ -0,0 +1,364 @@
+"""
+BroCoDDE — Local Concept Vectors
+CPU-only "related concept" search with no embedding API. Each concept is
+embedded by feature hashing: words, word bigrams and character 4-grams (so
+"retrieval"/"retrieving" and "cache"/"caching" share features) are hashed into
+`concept_vector_dim` signed buckets, log-scaled and L2-normalised. That term
+vector is stored as a float16 BLOB in concept_vectors.
+
+Search runs over a memory-mapped float32 matrix of IDF-weighted rows
+(<db name>.vectors/concepts.f32 next to the SQLite file): one NumPy matmul
+over the mapped pages for cosine scores, argpartition for the top k. (float32
+rather than float16 on disk: NumPy has no fast half-precision matmul, and
+converting the mostly-zero rows on every query cost ~10× the matmul.) save_concept_tool and
+the concept routes update it in place. The matrix is rebuilt from the BLOBs
+when its files are missing or out of step with the database, and once enough
+concepts were added since the IDF weights were last computed.
+Measure with `python -m benchmarks.bench_related_concepts`.
+
+The vectors are lexical: they connect rephrasings that share words or word
+stems, not synonyms with no surface overlap.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import ConceptNode, ConceptVector
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Feature weights relative to a whole word
+WORD_WEIGHT, BIGRAM_WEIGHT, CHARGRAM_WEIGHT = 1.0, 0.5, 0.5
+CHARGRAM = 4
+# Concept field → weight in its embedding
+FIELD_WEIGHTS = {"title": 2.0, "core_insight": 1.0, "tags": 1.0, "domain": 0.5, "source_title": 0.5}
+
+REBUILD_CHUNK_ROWS = 8192
+MIN_CAPACITY = 1024
+IDF_REFRESH_MIN_ADDED = 32      # recompute IDF after this many additions…
+IDF_REFRESH_RATIO = 0.25        # …or a quarter of the corpus, whichever is larger
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can do does for from has have how i if in into is it its "
+    "just more most not of on or so than that the their then there these they this to was we "
+    "were what when which while who why will with you your".split()
+)
+
+
+# ── Embedding ─────────────────────────────────────────────────────────────────
+
+def _features(text: str, weight: float, counts: dict[int, float]) -> None:
+    tokens = [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+    for token in tokens:
+        counts[zlib.crc32(f"w:{token}".encode())] += weight * WORD_WEIGHT
+        padded = f"<{token}>"
+        for i in range(max(len(padded) - CHARGRAM + 1, 1)):
+            counts[zlib.crc32(f"c:{padded[i:i + CHARGRAM]}".encode())] += weight * CHARGRAM_WEIGHT
+    for a, b in zip(tokens, tokens[1:]):
+        counts[zlib.crc32(f"b:{a} {b}".encode())] += weight * BIGRAM_WEIGHT
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+
+def embed_fields(fields: list[tuple[str | None, float]], dim: int | None = None) -> np.ndarray:
+    """Weighted texts → L2-normalised float32 term vector of `dim` hashed buckets."""
+    import numpy as np
+
+    dim = dim or settings.concept_vector_dim
+    counts: dict[int, float] = defaultdict(float)
+    for text, weight in fields:
+        if text:
+            _features(text, weight, counts)
+    vec = np.zeros(dim, dtype=np.float32)
+    if counts:
+        keys = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+        values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        signs = np.where(keys >> 31, -1.0, 1.0).astype(np.float32)  # top bit picks the sign
+        np.add.at(vec, keys % dim, signs * values)
+    return _normalize(vec)
+
+
+def embed_text(text: str, dim: int | None = None) -> np.ndarray:
+    return embed_fields([(text, 1.0)], dim)
+
+
+def embed_concept(concept: ConceptNode, dim: int | None = None) -> np.ndarray:
+    fields = [
+        (" ".join(concept.tags or []) if name == "tags" else getattr(concept, name), weight)
+        for name, weight in FIELD_WEIGHTS.items()
+    ]
+    return embed_fields(fields, dim)
+
+
+def to_blob(vec: np.ndarray) -> bytes:
+    import numpy as np
+
+    return vec.astype(np.float16).tobytes()
+
+
+# ── Memory-mapped index ───────────────────────────────────────────────────────
+
+class ConceptVectorIndex:
+    """
+    IDF-weighted concept rows in a memory-mapped float32 matrix, plus sidecar
+    files: row → concept id (one per line, blank once deleted), the IDF
+    weights, and a small JSON header. Loaded lazily by ensure().
+    """
+
+    MATRIX, IDS, IDF, META = "concepts.f32", "concepts.ids", "concepts.idf.npy", "concepts.json"
+
+    def __init__(self, directory: Path | str, dim: int | None = None):
+        self.directory = Path(directory)
+        self.dim = dim or settings.concept_vector_dim
+        self._matrix: np.memmap | None = None
+        self._ids: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._idf: np.ndarray | None = None
+        self._meta: dict = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._matrix is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def ensure(self, db: AsyncSession) -> None:
+        """Open the on-disk matrix, or rebuild it when it is missing or stale."""
+        if self.loaded:
+            return
+        stored = await db.scalar(
+            select(func.count()).select_from(ConceptVector).where(ConceptVector.dim == self.dim)
+        )
+        if not self._load(stored or 0):
+            await self.rebuild(db)
+
+    def _load(self, expected: int) -> bool:
+        import numpy as np
+
+        try:
+            meta = json.loads((self.directory / self.META).read_text())
+            ids = (self.directory / self.IDS).read_text().splitlines()
+            idf = np.load(self.directory / self.IDF)
+            capacity = (self.directory / self.MATRIX).stat().st_size // (self.dim * 4)
+        except (OSError, ValueError):
+            return False
+        rows = {cid: row for row, cid in enumerate(ids) if cid}
+        if (meta.get("dim") != self.dim or meta.get("count") != len(ids) or idf.shape != (self.dim,)
+                or len(rows) != expected or capacity < max(len(ids), 1)):
+            return False
+        self._matrix = np.memmap(self.directory / self.MATRIX, dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dim))
+        self._ids, self._rows, self._idf, self._meta = [cid or None for cid in ids], rows, idf, meta
+        return True
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recompute the IDF weights and rewrite the matrix from the stored vectors,
+        first embedding any concept that has none. Returns the row count.
+        """
+        import numpy as np
+
+        from app.logger import logger
+
+        await db.execute(delete(ConceptVector).where(ConceptVector.dim != self.dim))
+        have = select(ConceptVector.concept_id)
+        missing = (await db.execute(select(ConceptNode).where(ConceptNode.id.not_in(have)))).scalars().all()
+        if missing:
+            db.add_all(
+                ConceptVector(concept_id=c.id, vector=to_blob(embed_concept(c, self.dim)), dim=self.dim)
+                for c in missing
+            )
+            await db.flush()
+
+        stored = (await db.execute(select(ConceptVector.concept_id, ConceptVector.vector))).all()
+        ids = [row.concept_id for row in stored]
+        n = len(ids)
+        tf = np.frombuffer(b"".join(row.vector for row in stored), dtype=np.float16).reshape(n, self.dim)
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._matrix = None
+        capacity = max(MIN_CAPACITY, 1 << (n + n // 4).bit_length())
+        matrix = np.memmap(self.directory / self.MATRIX, dtype=np.float32, mode="w+",
+                           shape=(capacity, self.dim))
+        for start in range(0, n, REBUILD_CHUNK_ROWS):
+            stop = min(start + REBUILD_CHUNK_ROWS, n)
+            matrix[start:stop] = _normalize(tf[start:stop].astype(np.float32) * idf)
+        matrix.flush()
+        np.save(self.directory / self.IDF, idf)
+        (self.directory / self.IDS).write_text("".join(f"{cid}\n" for cid in ids))
+
+        self._matrix, self._idf = matrix, idf
+        self._ids, self._rows = list(ids), {cid: row for row, cid in enumerate(ids)}
+        self._meta = {"dim": self.dim, "count": n, "docs_at_idf": n, "added_since_idf": 0}
+        self._save_meta()
+        logger.info(f"Concept vectors rebuilt: {n} rows ({len(missing)} newly embedded) → {self.directory}")
+        return n
+
+    def _save_meta(self) -> None:
+        (self.directory / self.META).write_text(json.dumps(self._meta))
+
+    def _grow(self) -> None:
+        import numpy as np
+
+        capacity = self._matrix.shape[0] * 2
+        self._matrix.flush()
+        self._matrix = None
+        with open(self.directory / self.MATRIX, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._matrix = np.memmap(self.directory / self.MATRIX, dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dim))
+
+    def _weight(self, tf: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        return _normalize(tf.astype(np.float32) * self._idf)
+
+    def add(self, concept_id: str, tf: np.ndarray) -> bool:
+        """Insert or replace one concept's row. True when the IDF weights are due for a refresh."""
+        row = self._rows.get(concept_id)
+        if row is None:
+            row = len(self._ids)
+            if row >= self._matrix.shape[0]:
+                self._grow()
+        self._matrix[row] = self._weight(tf)
+        self._matrix.flush()
+        if concept_id not in self._rows:
+            self._ids.append(concept_id)
+            self._rows[concept_id] = row
+            with open(self.directory / self.IDS, "a") as f:
+                f.write(f"{concept_id}\n")
+            self._meta["count"] = len(self._ids)
+        self._meta["added_since_idf"] += 1
+        self._save_meta()
+        return self._meta["added_since_idf"] >= max(
+            IDF_REFRESH_MIN_ADDED, IDF_REFRESH_RATIO * self._meta["docs_at_idf"]
+        )
+
+    def remove(self, concept_id: str) -> None:
+        row = self._rows.pop(concept_id, None)
+        if row is None:
+            return
+        self._matrix[row] = 0
+        self._matrix.flush()
+        self._ids[row] = None
+        (self.directory / self.IDS).write_text("".join(f"{cid or ''}\n" for cid in self._ids))
+
+    def row_vector(self, concept_id: str) -> np.ndarray | None:
+        import numpy as np
+
+        row = self._rows.get(concept_id)
+        return None if row is None else np.array(self._matrix[row])
+
+    def search(self, query: np.ndarray, k: int, exclude: set[str] = frozenset(),
+               weighted: bool = False) -> list[tuple[str, float]]:
+        """Top-k (concept id, cosine) for a term vector (or an already IDF-weighted row)."""
+        import numpy as np
+
+        n = len(self._ids)
+        q = query.astype(np.float32) if weighted else self._weight(query)
+        if not n or k < 1 or not q.any():
+            return []
+        scores = np.asarray(self._matrix[:n] @ q)
+        for cid in exclude:
+            if cid in self._rows:
+                scores[self._rows[cid]] = -np.inf
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], float(scores[i])) for i in top
+                if self._ids[i] is not None and np.isfinite(scores[i])]
+
+
+# One index per database, keyed by bind URL
+_indexes: dict[str, ConceptVectorIndex] = {}
+
+
+def vector_dir(database_url: str) -> Path:
+    """Where the matrix for a database lives: CONCEPT_VECTOR_DIR/<db name>, else beside the SQLite file."""
+    path = Path(database_url.split(":///", 1)[-1]) if database_url.startswith("sqlite") else Path("brocodde.db")
+    if settings.concept_vector_dir:
+        return Path(settings.concept_vector_dir) / path.stem
+    return path.with_suffix(".vectors")
+
+
+def index_for(db: AsyncSession) -> ConceptVectorIndex:
+    url = db.get_bind().url.render_as_string(hide_password=False)
+    index = _indexes.get(url)
+    if index is None or index.dim != settings.concept_vector_dim:
+        index = _indexes[url] = ConceptVectorIndex(vector_dir(url))
+    return index
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+@dataclass
+class RelatedHit:
+    concept: ConceptNode
+    score: float        # cosine similarity of the IDF-weighted vectors (1.0 = identical wording)
+
+
+async def index_concept(db: AsyncSession, concept: ConceptNode) -> None:
+    """Store a concept's vector and update the search matrix. Call after a flush, so it has an id."""
+    index = index_for(db)
+    await index.ensure(db)
+    tf = embed_concept(concept, index.dim)
+    await db.merge(ConceptVector(concept_id=concept.id, vector=to_blob(tf), dim=index.dim))
+    await db.flush()
+    if index.add(concept.id, tf):
+        await index.rebuild(db)
+
+
+async def unindex_concept(db: AsyncSession, concept_id: str) -> None:
+    await db.execute(delete(ConceptVector).where(ConceptVector.concept_id == concept_id))
+    index = index_for(db)
+    if index.loaded:
+        index.remove(concept_id)
+
+
+async def related_concepts(
+    db: AsyncSession,
+    query: str | None = None,
+    concept_id: str | None = None,
+    k: int = 5,
+    min_score: float | None = None,
+) -> list[RelatedHit]:
+    """
+    Concepts closest to free text, or to an existing concept (itself excluded),
+    best first. Scores below `min_score` (default CONCEPT_RELATED_MIN_SCORE) are dropped.
+    """
+    index = index_for(db)
+    await index.ensure(db)
+    if concept_id is not None:
+        vec = index.row_vector(concept_id)
+        pairs = [] if vec is None else index.search(vec, k, exclude={concept_id}, weighted=True)
+    else:
+        pairs = index.search(embed_text(query or "", index.dim), k)
+
+    threshold = settings.concept_related_min_score if min_score is None else min_score
+    pairs = [(cid, score) for cid, score in pairs if score >= threshold]
+    if not pairs:
+        return []
+    nodes = (await db.execute(select(ConceptNode).where(ConceptNode.id.in_([cid for cid, _ in pairs])))).scalars()
+    by_id = {node.id: node for node in nodes}
+    return [RelatedHit(by_id[cid], score) for cid, score in pairs if cid in by_id]
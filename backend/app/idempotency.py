@@ -0,0 +1,216 @@
+"""
+BroCoDDE — Idempotency-Key Store
+
+Clients send `Idempotency-Key: <uuid>` on POST /tasks, POST /tasks/{id}/chat,
+POST /tasks/{id}/drafts and POST /tasks/{id}/metrics. A repeated key:
+
+- while the first request is still running → attaches to it. JSON routes await
+  the same result; the chat route subscribes to the in-flight event stream from
+  the first event, so a retry after a dropped connection sees the full response.
+  Chat events are stored transport-neutral, so an SSE request and a WebSocket
+  chat frame (app/routes/ws.py) with the same key share one agent run.
+- after the first request finished → replays the stored response without
+  executing anything (no second agent run, no duplicate rows).
+- with a different request body → 422, the key was reused for another request.
+
+Chat runs started with a key are decoupled from the HTTP connection: the agent
+run keeps going (and persists history) even if the original client disconnects,
+which is exactly when a client retries.
+
+Entries live in process memory with a TTL (IDEMPOTENCY_TTL_SECONDS) and a size
+cap — BroCoDDE runs as a single uvicorn process, and an in-flight stream can only
+be joined from the process that is running it anyway.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyKeyReuseError(Exception):
+    """The same Idempotency-Key was sent with a different request payload."""
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float
+    done: bool = False
+    # JSON routes
+    result: asyncio.Future | None = None
+    status_code: int = 200
+    # Streaming routes
+    frames: list[Any] = field(default_factory=list)
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    producer: asyncio.Task | None = None
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable hash of a request payload (dicts are key-sorted)."""
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for k in [k for k, e in self._entries.items() if e.done and e.expires_at < now]:
+            del self._entries[k]
+        # Size cap: evict the oldest finished entries first
+        while len(self._entries) > self.max_entries:
+            oldest = next((k for k, e in self._entries.items() if e.done), None)
+            if oldest is None:
+                break
+            del self._entries[oldest]
+
+    def _lookup(self, scope: str, key: str, fp: str) -> _Entry | None:
+        self._purge()
+        entry = self._entries.get((scope, key))
+        if entry and entry.fingerprint != fp:
+            raise IdempotencyKeyReuseError(
+                f"Idempotency-Key '{key}' was already used with a different request body"
+            )
+        return entry
+
+    def _new_entry(self, scope: str, key: str, fp: str) -> _Entry:
+        entry = _Entry(fingerprint=fp, expires_at=time.monotonic() + self.ttl_seconds)
+        self._entries[(scope, key)] = entry
+        return entry
+
+    # ── JSON routes ──────────────────────────────────────────────────────────
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        payload: Any,
+        call: Callable[[], Awaitable[Any]],
+        status_code: int = 200,
+    ) -> tuple[int, Any, bool]:
+        """
+        Execute `call` once per (scope, key). Returns (status_code, body, replayed).
+        Exceptions are not stored — the entry is dropped so a retry runs again.
+        """
+        fp = fingerprint(payload)
+        entry = self._lookup(scope, key, fp)
+        if entry is not None and entry.result is not None:
+            body = await asyncio.shield(entry.result)
+            return entry.status_code, body, True
+
+        entry = self._new_entry(scope, key, fp)
+        entry.status_code = status_code
+        entry.result = asyncio.get_running_loop().create_future()
+        try:
+            body = await call()
+        except BaseException as e:
+            self._entries.pop((scope, key), None)
+            entry.result.set_exception(e)
+            entry.result.exception()  # mark retrieved — followers re-raise it themselves
+            raise
+        entry.result.set_result(body)
+        entry.done = True
+        return status_code, body, False
+
+    # ── Streaming routes ─────────────────────────────────────────────────────
+
+    def stream(
+        self,
+        scope: str,
+        key: str,
+        payload: Any,
+        produce: Callable[[], AsyncIterator[Any]],
+    ) -> tuple[AsyncIterator[Any], bool]:
+        """
+        Return (frames, replayed). The first request for a key starts `produce()`
+        as a background task; every request (first or repeat) reads its frames.
+        """
+        fp = fingerprint(payload)
+        entry = self._lookup(scope, key, fp)
+        if entry is not None and entry.result is None:
+            return self._subscribe(entry), True
+
+        entry = self._new_entry(scope, key, fp)
+        entry.producer = asyncio.create_task(self._pump(entry, produce()))
+        return self._subscribe(entry), False
+
+    @staticmethod
+    async def _pump(entry: _Entry, frames: AsyncIterator[Any]) -> None:
+        try:
+            async for frame in frames:
+                async with entry.changed:
+                    entry.frames.append(frame)
+                    entry.changed.notify_all()
+        finally:
+            async with entry.changed:
+                entry.done = True
+                entry.changed.notify_all()
+
+    @staticmethod
+    async def _subscribe(entry: _Entry) -> AsyncIterator[Any]:
+        sent = 0
+        while True:
+            async with entry.changed:
+                while sent == len(entry.frames) and not entry.done:
+                    await entry.changed.wait()
+                pending = entry.frames[sent:]
+                finished = entry.done
+            for frame in pending:
+                yield frame
+            sent += len(pending)
+            if finished and sent == len(entry.frames):
+                return
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.idempotency_ttl_seconds,
+    max_entries=settings.idempotency_max_entries,
+)
+
+
+async def idempotent_json(
+    key: str,
+    scope: str,
+    payload: Any,
+    db: AsyncSession,
+    call: Callable[[], Awaitable[Any]],
+    response_model: type[BaseModel] | None = None,
+    status_code: int = 200,
+) -> JSONResponse:
+    """
+    Route helper: run `call` under an Idempotency-Key and return a JSONResponse.
+
+    The session is committed before the result is stored, so a replay never
+    reports a write that was rolled back.
+    """
+    async def _run() -> Any:
+        result = await call()
+        await db.commit()
+        if response_model is not None:
+            return response_model.model_validate(result).model_dump(mode="json")
+        return jsonable_encoder(result)
+
+    try:
+        status, body, replayed = await idempotency_store.run(scope, key, payload, _run, status_code)
+    except IdempotencyKeyReuseError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    headers = {REPLAYED_HEADER: "true"} if replayed else None
+    return JSONResponse(content=body, status_code=status, headers=headers)
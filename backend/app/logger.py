@@ -1,22 +1,32 @@
 """
 BroCoDDE — Structured Logger & Observability
 Provides a centralized logger and a FastAPI middleware for request tracing.
+
+Logging is non-blocking: the `brocodde` logger only enqueues records through a
+QueueHandler. A QueueListener thread does the formatting and the stdout / rotating
+file writes, so request handlers never touch disk on the event loop thread.
+
+Optional knobs (see config.py):
+- LOG_JSON=true          → emit JSON lines instead of the pipe-delimited text format
+- LOG_GET_SAMPLE_RATE=0.1 → only log ~10% of successful GET requests
 """
 
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
 import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Callable
 
 from fastapi import Request, Response
 
-# ── Logger Setup ──────────────────────────────────────────────────────────────
+from app.config import settings
 
-logger = logging.getLogger("brocodde")
-logger.setLevel(logging.INFO)
-
-import os
-from logging.handlers import RotatingFileHandler
+# ── Formatters ────────────────────────────────────────────────────────────────
 
 # Use a clean, structured format for the console
 formatter = logging.Formatter(
@@ -24,16 +34,93 @@ formatter = logging.Formatter(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
+# LogRecord attributes that are never treated as structured "extra" fields
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render each record as a single JSON line (JSON-lines output)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        # Fields passed via logger.info(..., extra={...}) become top-level keys
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+# ── Logger Setup ──────────────────────────────────────────────────────────────
+
+logger = logging.getLogger("brocodde")
+logger.setLevel(settings.log_level.upper())
+
+_active_formatter = JsonFormatter() if settings.log_json else formatter
+
 handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(formatter)
+handler.setFormatter(_active_formatter)
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that creates LOG_DIR and opens the file on the first record, not at import."""
+
+    def __init__(self, filename: str, **kwargs) -> None:
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
-os.makedirs("logs", exist_ok=True)
-file_handler = RotatingFileHandler("logs/brocodde.log", maxBytes=5*1024*1024, backupCount=5)
-file_handler.setFormatter(formatter)
+
+file_handler = LazyRotatingFileHandler(
+    os.path.join(settings.log_dir, "brocodde.log"), maxBytes=5 * 1024 * 1024, backupCount=5
+)
+file_handler.setFormatter(_active_formatter)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the raw record.
+
+    The stock prepare() formats the message (and any traceback) on the calling
+    thread so the record can be pickled. Our queue never leaves the process, so
+    skip that and let the listener thread do all of the formatting work.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Unbounded queue: enqueueing never blocks the caller. The listener thread owns
+# the real handlers; respect_handler_level lets each sink keep its own level.
+log_queue: queue.Queue = queue.Queue(-1)
+queue_handler = DeferredQueueHandler(log_queue)
+listener = QueueListener(log_queue, handler, file_handler, respect_handler_level=True)
+
+_listener_running = False
 
 if not logger.handlers:
-    logger.addHandler(handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
+    listener.start()
+    _listener_running = True
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread. Safe to call twice."""
+    global _listener_running
+    if _listener_running:
+        listener.stop()
+        _listener_running = False
+
+
+atexit.register(shutdown_logging)
 
 # ── Silence noisy third-party loggers ─────────────────────────────────────────
 # SQLAlchemy SQL echo, httpx (OpenRouter API calls), OpenAI SDK, Agno internals
@@ -49,33 +136,65 @@ for _noisy in (
     logging.getLogger(_noisy).setLevel(logging.WARNING)
 
 
+# ── Sampling ──────────────────────────────────────────────────────────────────
+
+def should_log_request(method: str, status_code: int, sample_rate: float | None = None) -> bool:
+    """
+    Decide whether a completed request gets a log line.
+
+    Mutating requests and any 4xx/5xx response are always logged. Successful GETs
+    (the high-volume polling routes: /tasks, /health, /discovery/feed…) are sampled
+    at LOG_GET_SAMPLE_RATE.
+    """
+    if method == "OPTIONS":
+        return False  # Skip noisy preflight logs
+    if method != "GET" or status_code >= 400:
+        return True
+    rate = settings.log_get_sample_rate if sample_rate is None else sample_rate
+    if rate >= 1.0:
+        return True
+    return random.random() < rate
+
+
 # ── Middleware ────────────────────────────────────────────────────────────────
 
 async def logging_middleware(request: Request, call_next: Callable) -> Response:
     """Trace all HTTP requests with timing and status codes."""
     start_time = time.perf_counter()
-    
+    method = request.method
+    path = request.url.path
+
     # Log request start for mutating endpoints
-    if request.method != "GET" and request.method != "OPTIONS":
-        logger.info(f"→ {request.method} {request.url.path}")
+    if method not in ("GET", "OPTIONS"):
+        logger.info(f"→ {method} {path}", extra={"method": method, "path": path})
 
     try:
         response = await call_next(request)
         process_time = time.perf_counter() - start_time
-        
+
         # Log response status and timing
         status_category = response.status_code // 100
         level = logging.ERROR if status_category == 5 else (logging.WARNING if status_category == 4 else logging.INFO)
-        
-        if request.method != "OPTIONS":  # Skip noisy preflight logs
+
+        if should_log_request(method, response.status_code):
             logger.log(
                 level,
-                f"← {response.status_code} {request.method} {request.url.path} ({process_time * 1000:.1f}ms)"
+                f"← {response.status_code} {method} {path} ({process_time * 1000:.1f}ms)",
+                extra={
+                    "method": method,
+                    "path": path,
+                    "status": response.status_code,
+                    "duration_ms": round(process_time * 1000, 1),
+                },
             )
-            
+
         return response
 
     except Exception as e:
         process_time = time.perf_counter() - start_time
-        logger.exception(f"🧨 500 {request.method} {request.url.path} ({process_time * 1000:.1f}ms) — {str(e)}")
+        logger.exception(
+            f"🧨 500 {method} {path} ({process_time * 1000:.1f}ms) — {str(e)}",
+            extra={"method": method, "path": path, "status": 500,
+                   "duration_ms": round(process_time * 1000, 1)},
+        )
         raise
@@ -5,15 +5,23 @@ AgentOS mounts as the agentic runtime and control plane.
 BroCoDDE domain routes (/tasks, /memory, /series, etc.) mount alongside it.
 """
 
+import sys
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.agents.prefetch import signal_cache
+from app.agents.registry import LazyAgentAPI
 from app.config import settings
 from app.db.database import create_tables
 from app.db.seed import seed_demo_data
-from app.routes import chat, concepts, discovery, memory, metrics, series, skills, tasks, voice
+from app.logger import logger
+from app.memory.consolidate import cancel_consolidation, schedule_consolidation
+from app.models.hedging import hedge_stats_snapshot
+from app.models.router import model_health_snapshot
+from app.routes import chat, concepts, discovery, memory, metrics, search, series, skills, tasks, voice, ws
+from app.warmup import cancel_warmup, schedule_warmup
 
 
 @asynccontextmanager
@@ -22,15 +30,29 @@ async def lifespan(app: FastAPI):
     await create_tables()
     await seed_demo_data()
 
-    # Prime the skills knowledge base (non-blocking if no embedder key)
+    # Build the in-memory skill section index (BM25) behind skill_search
     try:
-        from app.agents.knowledge import get_skills_knowledge
-        get_skills_knowledge()
-    except Exception:
-        pass  # Graceful fallback: skills served via skill_load tool instead
+        from app.agents.knowledge import skill_index
+        skill_index()
+    except Exception as e:
+        logger.warning(f"Skill index build failed: {e}")  # built again on first skill_search
+
+    # Import the deferred SDKs in the background once the server is accepting requests
+    schedule_warmup()
+    # Fold near-duplicate agent memories every MEMORY_CONSOLIDATION_INTERVAL_HOURS
+    schedule_consolidation()
 
     yield
 
+    from app.agents.prefetch import cancel_prefetches
+    await cancel_warmup()
+    await cancel_consolidation()
+    await cancel_prefetches()
+    # Only if discovery tools were used — don't import the toolkit (and agno) just to close it
+    toolkit = sys.modules.get("app.agents.content_discovery_toolkit")
+    if toolkit is not None:
+        await toolkit.close_http_client()
+
 
 app = FastAPI(
     title="BroCoDDE API",
@@ -52,14 +74,10 @@ app.add_middleware(
 app.add_middleware(BaseHTTPMiddleware, dispatch=logging_middleware)
 
 # ── Mount AgentOS (Agno runtime + control plane + monitoring UI) ──────────────
-try:
-    from agno.app.agentapi import AgentAPI
-    from app.agents.registry import get_agent_api
-
-    agent_api: AgentAPI = get_agent_api()
-    app.mount("/agentapi", agent_api.app)
-except ImportError:
-    pass  # Agno not yet installed; agents available via /tasks/:id/chat fallback
+# Built on the first /agentapi request, not at import — see LazyAgentAPI.
+# Without Agno's AgentAPI the mount answers 503; agents stay available via /tasks/:id/chat.
+agent_api = LazyAgentAPI()
+app.mount("/agentapi", agent_api)
 
 # ── BroCoDDE Domain Routes ────────────────────────────────────────────────────
 app.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
@@ -70,7 +88,9 @@ app.include_router(series.router, prefix="/series", tags=["series"])
 app.include_router(skills.router, prefix="/skills", tags=["skills"])
 app.include_router(concepts.router, prefix="/concepts", tags=["concepts"])
 app.include_router(discovery.router, prefix="/discovery", tags=["discovery"])
+app.include_router(search.router, prefix="/search", tags=["search"])
 app.include_router(voice.router, tags=["voice"])
+app.include_router(ws.router, tags=["realtime"])
 
 
 @app.get("/health", tags=["system"])
@@ -81,4 +101,8 @@ async def health() -> dict:
         "service": "BroCoDDE",
         "provider": settings.primary_provider,
         "mock_mode": not settings.has_any_ai_key,
+        "models": model_health_snapshot(),
+        "hedging": hedge_stats_snapshot(),
+        "discovery_cache": signal_cache.snapshot(),
+        "agentos": agent_api.status,
     }
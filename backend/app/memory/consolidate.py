@@ -0,0 +1,334 @@
+"""
+BroCoDDE — Agent Memory Consolidation
+memory_write_tool (source="agent") and Agno's MemoryManager
+(update_memory_on_run on every agent) keep restating the same Pattern or
+Insight in slightly different words, and every restatement is one more ranking
+candidate and more prompt text. consolidate_memories() folds each group of
+near-duplicates into one canonical memory:
+
+- candidates: agent context entries (grouped by type) and Agno memories
+  (grouped by user), the newest MEMORY_CONSOLIDATION_MAX_ENTRIES of each
+- similarity: Jaccard of word sets (ranking.terms — stopwords dropped, plurals
+  and -ing/-ed folded). MinHash + LSH (app/db/dedupe.py) proposes pairs, the
+  exact Jaccard confirms them at MEMORY_CONSOLIDATION_THRESHOLD
+- clusters: stars, not chains — every merged memory is within the threshold of
+  its canonical; the rest of a connected component is clustered again
+- canonical: the member with the most words (newest on a tie) keeps its id and
+  text; tags / topics and lifecycle phases are unioned ([] — every phase —
+  wins), created_at is the earliest and updated_at the latest of the cluster
+- provenance: each removed memory is kept verbatim in memory_merges
+
+User-curated entries are never touched. Every pass is recorded in
+memory_consolidation_runs with memories and prompt tokens before and after;
+schedule_consolidation() runs it every MEMORY_CONSOLIDATION_INTERVAL_HOURS.
+Measure with `python -m benchmarks.bench_memory_consolidation`.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import MemoryConsolidationRun, MemoryEntry, MemoryMerge
+from app.memory.models import ConsolidationCluster, ConsolidationReport
+from app.memory.ranking import MemoryItem, terms
+
+STARTUP_DELAY_SECONDS = 60      # first scheduled pass waits for startup traffic to settle
+
+_schedule: asyncio.Task | None = None
+
+
+@dataclass
+class Memory:
+    id: str
+    origin: str                 # entry | agno
+    group: str                  # entry: type; agno: user_id — only memories in one group merge
+    type: str | None
+    text: str
+    tags: list[str]
+    lifecycle_phases: list[str]
+    created_at: datetime | None
+    updated_at: datetime | None
+    words: frozenset[str] = field(init=False)
+
+    def __post_init__(self):
+        self.words = frozenset(terms(f"{self.text} {' '.join(self.tags)}"))
+
+    @property
+    def tokens(self) -> int:
+        """Prompt tokens when rendered (same format as ranked injection)."""
+        return MemoryItem(self.origin, self.type or "Memory", self.text, self.tags).tokens
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _epoch(value: int | None) -> datetime | None:
+    return datetime.utcfromtimestamp(value) if value else None
+
+
+def _json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+# ── Candidates ────────────────────────────────────────────────────────────────
+
+async def agent_entries(db: AsyncSession, limit: int) -> tuple[list[Memory], bool]:
+    """Newest `limit` agent context entries, and whether older ones were left out."""
+    rows = (await db.execute(
+        select(MemoryEntry.id, MemoryEntry.type, MemoryEntry.text, MemoryEntry.tags,
+               MemoryEntry.lifecycle_phases, MemoryEntry.created_at, MemoryEntry.updated_at)
+        .where(MemoryEntry.source == "agent")
+        .order_by(MemoryEntry.updated_at.desc())
+        .limit(limit + 1)
+    )).all()
+    memories = [Memory(r.id, "entry", r.type, r.type, r.text, list(r.tags or []), list(r.lifecycle_phases or []),
+                       r.created_at, r.updated_at) for r in rows[:limit]]
+    return memories, len(rows) > limit
+
+
+async def agno_entries(db: AsyncSession, limit: int) -> tuple[list[Memory], bool]:
+    """Newest `limit` Agno memories (all users). Empty until Agno has created its table."""
+    try:
+        rows = (await db.execute(text(
+            "SELECT memory_id, user_id, memory, topics, created_at, updated_at FROM agno_memories "
+            "ORDER BY coalesce(updated_at, created_at) DESC LIMIT :limit"
+        ), {"limit": limit + 1})).all()
+    except Exception:
+        return [], False
+    memories = []
+    for row in rows[:limit]:
+        memory, topics = _json(row.memory), _json(row.topics) or []
+        memories.append(Memory(
+            row.memory_id, "agno", row.user_id or "", None,
+            memory if isinstance(memory, str) else str(memory),
+            topics if isinstance(topics, list) else [], [],
+            _epoch(row.created_at), _epoch(row.updated_at or row.created_at),
+        ))
+    return memories, len(rows) > limit
+
+
+# ── Clustering ────────────────────────────────────────────────────────────────
+
+def find_clusters(memories: list[Memory], threshold: float) -> list[list[tuple[Memory, float]]]:
+    """
+    Groups of near-duplicates with two or more members: canonical first, each
+    member paired with its Jaccard similarity to the canonical (≥ threshold).
+    """
+    from app.db.dedupe import LSHIndex, signature
+
+    index = LSHIndex()
+    by_key: dict[str, Memory] = {}
+    parent: dict[str, str] = {}
+
+    def root(key: str) -> str:
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for memory in memories:
+        sig = signature(set(memory.words))
+        if sig is None:
+            continue
+        key = f"{memory.origin}:{memory.id}"
+        parent[key] = key
+        for other_key in index.candidates(sig):
+            other = by_key[other_key]
+            if (other.origin, other.group) != (memory.origin, memory.group) or root(other_key) == root(key):
+                continue
+            if jaccard(memory.words, other.words) >= threshold:
+                parent[root(key)] = root(other_key)
+        index.add(key, sig)
+        by_key[key] = memory
+
+    components: dict[str, list[Memory]] = {}
+    for key, memory in by_key.items():
+        components.setdefault(root(key), []).append(memory)
+
+    # A component can be a chain (A~B~C with A and C unrelated): split it into
+    # stars, each member within the threshold of its canonical
+    clusters = []
+    for members in components.values():
+        while len(members) >= 2:
+            canonical = max(members, key=lambda m: (len(m.words), m.updated_at or datetime.min))
+            similar = [(m, jaccard(m.words, canonical.words)) for m in members if m is not canonical]
+            similar = [(m, score) for m, score in similar if score >= threshold]
+            if similar:
+                clusters.append([(canonical, 1.0)] + similar)
+            taken = {id(canonical), *(id(m) for m, _ in similar)}
+            members = [m for m in members if id(m) not in taken]
+    return clusters
+
+
+def merged_fields(cluster: list[Memory]) -> tuple[list[str], list[str]]:
+    """Union of tags and of lifecycle phases, canonical's first. Any member injected everywhere ([]) keeps that."""
+    tags = list(dict.fromkeys(tag for m in cluster for tag in m.tags))
+    if any(not m.lifecycle_phases for m in cluster):
+        return tags, []
+    return tags, list(dict.fromkeys(phase for m in cluster for phase in m.lifecycle_phases))
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+def _epoch_of(value: datetime | None) -> int | None:
+    return int((value - datetime(1970, 1, 1)).total_seconds()) if value else None
+
+
+async def _apply(db: AsyncSession, run_id: str, clusters: list[list[tuple[Memory, float]]]) -> None:
+    """Write every cluster: canonical rows updated, the rest deleted and recorded — a few batched statements."""
+    entry_updates, agno_updates, removed = [], [], {"entry": [], "agno": []}
+    for cluster in clusters:
+        canonical = cluster[0][0]
+        members = [m for m, _ in cluster]
+        tags, phases = merged_fields(members)
+        created = min((m.created_at for m in members if m.created_at), default=None)
+        updated = max((m.updated_at for m in members if m.updated_at), default=None)
+        if canonical.origin == "entry":
+            entry_updates.append({"id": canonical.id, "tags": tags, "lifecycle_phases": phases,
+                                  "created_at": created, "updated_at": updated})
+        else:
+            agno_updates.append({"id": canonical.id, "topics": json.dumps(tags),
+                                 "created": _epoch_of(created), "updated": _epoch_of(updated)})
+        removed[canonical.origin] += [m.id for m in members[1:]]
+
+    if entry_updates:
+        await db.execute(update(MemoryEntry), entry_updates)   # bulk UPDATE by primary key
+    for chunk in range(0, len(removed["entry"]), 500):
+        await db.execute(delete(MemoryEntry).where(MemoryEntry.id.in_(removed["entry"][chunk:chunk + 500])))
+    if agno_updates:
+        await db.execute(text(
+            "UPDATE agno_memories SET topics = :topics, created_at = :created, updated_at = :updated "
+            "WHERE memory_id = :id"
+        ), agno_updates)
+        await db.execute(text("DELETE FROM agno_memories WHERE memory_id = :id"),
+                         [{"id": memory_id} for memory_id in removed["agno"]])
+
+    db.add_all(
+        MemoryMerge(run_id=run_id, origin=m.origin, canonical_id=cluster[0][0].id, merged_id=m.id, type=m.type,
+                    text=m.text, tags=m.tags, lifecycle_phases=m.lifecycle_phases,
+                    similarity=round(similarity, 3), created_at=m.created_at)
+        for cluster in clusters
+        for m, similarity in cluster[1:]
+    )
+
+
+def _describe(cluster: list[tuple[Memory, float]]) -> ConsolidationCluster:
+    canonical = cluster[0][0]
+    tags, phases = merged_fields([m for m, _ in cluster])
+    return ConsolidationCluster(
+        origin=canonical.origin, canonical_id=canonical.id, type=canonical.type, text=canonical.text,
+        merged_ids=[m.id for m, _ in cluster[1:]], tags=tags, lifecycle_phases=phases,
+    )
+
+
+async def consolidate_memories(
+    db: AsyncSession,
+    dry_run: bool = False,
+    trigger: str = "manual",
+    threshold: float | None = None,
+    max_entries: int | None = None,
+) -> ConsolidationReport:
+    """
+    One consolidation pass. With dry_run nothing is written — the report shows
+    what would be merged. The caller commits.
+    """
+    from app.logger import logger
+
+    start = time.perf_counter()
+    threshold = settings.memory_consolidation_threshold if threshold is None else threshold
+    limit = settings.memory_consolidation_max_entries if max_entries is None else max_entries
+
+    entries, entries_truncated = await agent_entries(db, limit)
+    agno, agno_truncated = await agno_entries(db, limit)
+    memories = entries + agno
+    clusters = find_clusters(memories, threshold)
+
+    tokens_before = sum(m.tokens for m in memories)
+    tokens_after = tokens_before - sum(m.tokens for cluster in clusters for m, _ in cluster[1:])
+    merged = sum(len(cluster) - 1 for cluster in clusters)
+
+    run = None
+    if not dry_run:
+        run = MemoryConsolidationRun(
+            trigger=trigger, scanned=len(memories), clusters=len(clusters), merged=merged,
+            tokens_before=tokens_before, tokens_after=tokens_after,
+            truncated=entries_truncated or agno_truncated,
+        )
+        db.add(run)
+        await db.flush()
+        await _apply(db, run.id, clusters)
+        run.seconds = time.perf_counter() - start
+        await db.flush()
+        if clusters:
+            from app.memory.store import invalidate_composed_context
+            invalidate_composed_context(db)
+
+    report = ConsolidationReport(
+        run_id=run.id if run else None,
+        dry_run=dry_run,
+        scanned=len(memories),
+        clusters=len(clusters),
+        merged=merged,
+        tokens_before=tokens_before,
+        tokens_after=tokens_after,
+        truncated=entries_truncated or agno_truncated,
+        seconds=round(time.perf_counter() - start, 3),
+        groups=[_describe(cluster) for cluster in clusters],
+    )
+    logger.info(
+        f"Memory consolidation{' (dry run)' if dry_run else ''}: {merged} of {len(memories)} memories "
+        f"merged into {len(clusters)} — {tokens_before} → {tokens_after} tokens in {report.seconds:.2f}s"
+    )
+    return report
+
+
+# ── Schedule ──────────────────────────────────────────────────────────────────
+
+async def _run_scheduled() -> None:
+    from app.db.database import AsyncSessionLocal
+    from app.logger import logger
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await consolidate_memories(db, trigger="schedule")
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Memory consolidation failed: {e}")
+
+
+async def _loop(interval: float) -> None:
+    from app.db.database import AsyncSessionLocal
+
+    # Pick up the cadence where the last process left off
+    async with AsyncSessionLocal() as db:
+        last = (await db.execute(
+            select(func.max(MemoryConsolidationRun.created_at)).where(MemoryConsolidationRun.trigger == "schedule")
+        )).scalar()
+    since = (datetime.utcnow() - last).total_seconds() if last else interval
+    await asyncio.sleep(max(STARTUP_DELAY_SECONDS, interval - since))
+    while True:
+        await _run_scheduled()
+        await asyncio.sleep(interval)
+
+
+def schedule_consolidation() -> asyncio.Task | None:
+    """Start the periodic consolidation (app startup). None when the interval is 0."""
+    global _schedule
+    if settings.memory_consolidation_interval_hours <= 0:
+        return None
+    _schedule = asyncio.create_task(_loop(settings.memory_consolidation_interval_hours * 3600))
+    return _schedule
+
+
+async def cancel_consolidation() -> None:
+    """Stop the schedule (app shutdown). A pass in progress is rolled back."""
+    if _schedule is not None and not _schedule.done():
+        _schedule.cancel()
+        await asyncio.gather(_schedule, return_exceptions=True)
@@ -59,6 +59,63 @@ class AgnoMemoryResponse(BaseModel):
     evolved: bool         # True if updated meaningfully after creation
 
 
+# ── Memory consolidation (app/memory/consolidate.py) ──────────────────────────
+
+class ConsolidationCluster(BaseModel):
+    origin: str                     # entry | agno
+    canonical_id: str               # kept, with the merged tags and phases
+    type: str | None
+    text: str
+    merged_ids: list[str]           # removed (recorded in memory_merges)
+    tags: list[str]
+    lifecycle_phases: list[str]
+
+
+class ConsolidationReport(BaseModel):
+    run_id: str | None              # None for a dry run
+    dry_run: bool
+    scanned: int
+    clusters: int
+    merged: int
+    tokens_before: int              # all scanned memories rendered into a prompt
+    tokens_after: int
+    truncated: bool                 # more memories than MEMORY_CONSOLIDATION_MAX_ENTRIES
+    seconds: float
+    groups: list[ConsolidationCluster] = Field(default_factory=list)
+
+
+class ConsolidationRunResponse(BaseModel):
+    id: str
+    trigger: str
+    scanned: int
+    clusters: int
+    merged: int
+    tokens_before: int
+    tokens_after: int
+    truncated: bool
+    seconds: float
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class MemoryMergeResponse(BaseModel):
+    id: str
+    run_id: str
+    origin: str
+    canonical_id: str
+    merged_id: str
+    type: str | None
+    text: str
+    tags: list[str]
+    lifecycle_phases: list[str]
+    similarity: float
+    created_at: datetime | None
+    merged_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
 # ── Knowledge Domain ──────────────────────────────────────────────────────────
 
 class KnowledgeDomainCreate(BaseModel):
@@ -113,11 +170,16 @@ class ComposedContext(BaseModel):
     identity_memory: list[dict[str, Any]] = Field(default_factory=list)
     # Agent-derived context: what agents learned/extracted through conversations
     agent_context: list[dict[str, Any]] = Field(default_factory=list)
+    # Agno MemoryManager memories (auto-extracted), when composed for a user
+    agno_memories: list[dict[str, Any]] = Field(default_factory=list)
     knowledge_domains: list[dict[str, Any]] = Field(default_factory=list)
     performance_patterns: PerformancePatterns | None = None
     recent_tasks: list[dict[str, Any]] = Field(default_factory=list)
     trending_context: list[dict[str, Any]] = Field(default_factory=list)
     task_history: list[dict[str, Any]] = Field(default_factory=list)
+    # Memory ranking (app/memory/ranking.py): entries considered, tokens of those kept
+    memory_candidates: int = 0
+    memory_tokens: int = 0
 
     def to_prompt_text(self) -> str:
         """
@@ -140,6 +202,12 @@ class ComposedContext(BaseModel):
                 tags_str = f" ({', '.join(entry.get('tags', []))})" if entry.get('tags') else ""
                 parts.append(f"- [{entry.get('type', 'Insight')}]{tags_str} {entry.get('text', '')}")
 
+        if self.agno_memories:
+            parts.append("\n## Agent Memory (auto-extracted)")
+            for entry in self.agno_memories:
+                topics_str = f" ({', '.join(entry.get('topics', []))})" if entry.get('topics') else ""
+                parts.append(f"-{topics_str} {entry.get('text', '')}")
+
         if self.knowledge_domains:
             parts.append("\n## Knowledge Domains")
             for domain in self.knowledge_domains:
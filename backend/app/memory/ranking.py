@@ -0,0 +1,208 @@
+"""
+BroCoDDE — Relevance-ranked Memory
+Context entries (memory_entries) and Agno's auto-extracted memories
+(agno_memories) grow for as long as the product is used. Instead of rendering
+all of them into every prompt, each candidate is scored against the current
+message and stage and only the best fit within a token budget is injected:
+
+    score = type prior(stage) × (BM25(query) / best BM25  +  RECENCY_WEIGHT × 0.5^(age / half-life))
+
+BM25 runs over the candidates themselves (text + tags, stopwords dropped,
+plurals and -ing/-ed folded), so there is no index to keep in step. Without a
+query the ranking falls back to stage priors and recency. Entries are taken in
+score order until MEMORY_INJECT_K entries or MEMORY_TOKEN_BUDGET tokens.
+
+Used by compose_context(), memory_read_tool and the harness, which injects the
+selection per turn in place of Agno's add_memories_to_context (apply_memory()).
+"""
+
+import json
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import Row, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.agents.compaction import estimate_tokens
+from app.config import settings
+from app.db.dedupe import stem
+from app.db.models import MemoryEntry
+from app.db.vectors import STOPWORDS
+
+BM25_K1, BM25_B = 1.2, 0.75
+RECENCY_WEIGHT = 0.3
+
+# Memory types that matter more at a stage; everything else has prior 1.0
+TYPE_PRIORS: dict[str, dict[str, float]] = {
+    "discovery":   {"Goal": 1.5, "Research": 1.4, "Current": 1.4, "Pattern": 1.3, "Finding": 1.2},
+    "extraction":  {"Experience": 1.5, "Research": 1.3, "Collaboration": 1.3, "Current": 1.2},
+    "structuring": {"Structural": 1.5, "Pattern": 1.3, "Goal": 1.2},
+    "drafting":    {"Voice": 1.5, "Philosophy": 1.3, "Structural": 1.3},
+    "vetting":     {"Voice": 1.5, "Finding": 1.2},
+    "ready":       {"Voice": 1.3},
+    "post-mortem": {"Finding": 1.5, "Hypothesis": 1.4, "Pattern": 1.3},
+    "observatory": {"Finding": 1.4, "Pattern": 1.4, "Hypothesis": 1.2},
+    "feynman":     {"Research": 1.5, "Experience": 1.3, "Insight": 1.2},
+}
+
+# Columns from_entry() reads — selecting these skips building ORM objects
+ENTRY_COLUMNS = (MemoryEntry.source, MemoryEntry.type, MemoryEntry.text, MemoryEntry.tags,
+                 MemoryEntry.lifecycle_phases, MemoryEntry.created_at, MemoryEntry.updated_at)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=16384)
+def terms(value: str) -> tuple[str, ...]:
+    """BM25 terms of a text (cached: the same entries are ranked turn after turn)."""
+    return tuple(stem(w) for w in _TOKEN.findall(value.lower()) if w not in STOPWORDS)
+
+
+@dataclass
+class MemoryItem:
+    source: str                 # user | agent | agno
+    type: str
+    text: str
+    tags: list[str] = field(default_factory=list)
+    updated_at: datetime | None = None
+    data: dict[str, Any] = field(default_factory=dict)   # what ComposedContext renders
+
+    @property
+    def tokens(self) -> int:
+        tags = f" ({', '.join(self.tags)})" if self.tags else ""
+        return estimate_tokens(f"- [{self.type}]{tags} {self.text}")
+
+
+@dataclass
+class MemorySelection:
+    items: list[MemoryItem]
+    candidates: int
+    tokens: int
+    seconds: float = 0.0
+    rendered: str = ""          # prompt text, filled in by the harness
+
+    def of(self, source: str) -> list[dict[str, Any]]:
+        return [item.data for item in self.items if item.source == source]
+
+
+def from_entry(entry: MemoryEntry | Row) -> MemoryItem:
+    """A MemoryEntry, or a row with the same columns (see ENTRY_COLUMNS), as a ranking candidate."""
+    data = {"type": entry.type, "text": entry.text, "tags": entry.tags}
+    if entry.source == "user":
+        data["source"] = entry.source
+    else:
+        data["lifecycle_phases"] = entry.lifecycle_phases
+    return MemoryItem(
+        source="user" if entry.source == "user" else "agent",
+        type=entry.type,
+        text=entry.text,
+        tags=list(entry.tags or []),
+        updated_at=entry.updated_at or entry.created_at,
+        data=data,
+    )
+
+
+async def agno_memories(db: AsyncSession, user_id: str) -> list[MemoryItem]:
+    """Agno's memories for a user (agno_memories table). Empty until Agno has created the table."""
+    try:
+        rows = (await db.execute(
+            text("SELECT memory, topics, created_at, updated_at FROM agno_memories WHERE user_id = :uid"),
+            {"uid": user_id},
+        )).all()
+    except Exception:
+        return []
+    items = []
+    for row in rows:
+        memory = json.loads(row.memory) if isinstance(row.memory, str) else row.memory
+        topics = json.loads(row.topics) if isinstance(row.topics, str) else (row.topics or [])
+        topics = topics if isinstance(topics, list) else []
+        stamp = row.updated_at or row.created_at
+        items.append(MemoryItem(
+            source="agno",
+            type="Memory",
+            text=memory if isinstance(memory, str) else str(memory),
+            tags=topics,
+            updated_at=datetime.utcfromtimestamp(stamp) if stamp else None,
+            data={"text": memory if isinstance(memory, str) else str(memory), "topics": topics},
+        ))
+    return items
+
+
+def _bm25(docs: list[tuple[str, ...]], query: tuple[str, ...]) -> list[float]:
+    wanted = set(query)
+    n = len(docs)
+    avg_len = sum(map(len, docs)) / n or 1.0
+    matched, df = [], Counter()
+    for idx, doc in enumerate(docs):
+        tf = Counter(t for t in doc if t in wanted)
+        if tf:
+            matched.append((idx, tf))
+            df.update(tf.keys())
+    scores = [0.0] * n
+    for idx, tf in matched:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(docs[idx]) / avg_len)
+        scores[idx] = sum(
+            math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) * f * (BM25_K1 + 1) / (f + norm)
+            for t, f in tf.items()
+        )
+    return scores
+
+
+def rank_memories(
+    items: list[MemoryItem],
+    query: str | None = None,
+    stage: str | None = None,
+    k: int | None = None,
+    token_budget: int | None = None,
+    now: datetime | None = None,
+) -> MemorySelection:
+    """Best-scoring items, in score order, within `k` entries and `token_budget` tokens."""
+    start = time.perf_counter()
+    k = settings.memory_inject_k if k is None else k
+    budget = settings.memory_token_budget if token_budget is None else token_budget
+    if not items:
+        return MemorySelection([], 0, 0, time.perf_counter() - start)
+
+    query_terms = terms(query or "")
+    relevance = [0.0] * len(items)
+    if query_terms:
+        relevance = _bm25([terms(f"{i.text} {' '.join(i.tags)}") for i in items], query_terms)
+        best = max(relevance)
+        relevance = [r / best if best else 0.0 for r in relevance]
+
+    now = now or datetime.utcnow()
+    half_life = settings.memory_recency_half_life_days * 86400
+    priors = TYPE_PRIORS.get(stage or "", {})
+
+    def score(idx: int) -> float:
+        item = items[idx]
+        age = (now - item.updated_at).total_seconds() if item.updated_at else half_life * 4
+        recency = 0.5 ** (max(age, 0.0) / half_life)
+        return priors.get(item.type, 1.0) * (relevance[idx] + RECENCY_WEIGHT * recency)
+
+    chosen, used = [], 0
+    for idx in sorted(range(len(items)), key=score, reverse=True):
+        if len(chosen) >= k:
+            break
+        cost = items[idx].tokens
+        if used + cost > budget:
+            continue            # a smaller entry further down may still fit
+        chosen.append(items[idx])
+        used += cost
+    return MemorySelection(chosen, len(items), used, time.perf_counter() - start)
+
+
+def apply_memory(agent, rendered: str) -> None:
+    """Inject a ranked memory block instead of every Agno memory (keeps any history context)."""
+    agent.add_memories_to_context = False
+    if not rendered:
+        return
+    block = f"<memory>\n{rendered}\n</memory>"
+    existing = getattr(agent, "additional_context", None)
+    agent.additional_context = f"{block}\n\n{existing}" if existing else block
@@ -2,9 +2,10 @@
 BroCoDDE — Memory Store (CRUD for all 6 memory layers)
 """
 
+import time
 from datetime import datetime
 
-from sqlalchemy import func, select, update
+from sqlalchemy import event, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import CoddeTask, KnowledgeDomain, MemoryEntry, PublishedPost
@@ -16,6 +17,22 @@ from app.memory.models import (
     MemoryEntryCreate,
     PerformancePatterns,
 )
+from app.memory.ranking import ENTRY_COLUMNS, MemorySelection, agno_memories, from_entry, rank_memories
+
+
+def invalidate_composed_context(db: AsyncSession | None = None) -> None:
+    """
+    Drop cached compose_context() results after the memory behind them changed.
+    Given the session that made the change, wait for its commit: a compose_context()
+    running before then reads the old rows and would cache them again.
+    """
+    from app.agents.prefetch import signal_cache
+
+    if db is None:
+        signal_cache.invalidate("composed_context")
+        return
+    event.listen(db.sync_session, "after_commit",
+                 lambda _session: signal_cache.invalidate("composed_context"), once=True)
 
 
 # ── Layer 1: Identity Memory ──────────────────────────────────────────────────
@@ -46,6 +63,7 @@ async def create_memory_entry(db: AsyncSession, data: MemoryEntryCreate) -> Memo
     db.add(entry)
     await db.flush()
     await db.refresh(entry)
+    invalidate_composed_context(db)
     return entry
 
 
@@ -56,6 +74,7 @@ async def update_memory_entry(db: AsyncSession, entry_id: str, text: str) -> Mem
     entry.text = text
     entry.updated_at = datetime.utcnow()
     await db.flush()
+    invalidate_composed_context(db)
     return entry
 
 
@@ -64,6 +83,7 @@ async def delete_memory_entry(db: AsyncSession, entry_id: str) -> bool:
     if not entry:
         return False
     await db.delete(entry)
+    invalidate_composed_context(db)
     return True
 
 
@@ -79,6 +99,7 @@ async def create_domain(db: AsyncSession, data: KnowledgeDomainCreate) -> Knowle
     db.add(domain)
     await db.flush()
     await db.refresh(domain)
+    invalidate_composed_context(db)
     return domain
 
 
@@ -165,36 +186,56 @@ async def compute_performance_patterns(db: AsyncSession) -> PerformancePatterns:
 
 # ── Composed Context for Agents ────────────────────────────────────────────────
 
+async def ranked_memory(
+    db: AsyncSession,
+    stage: str,
+    query: str | None = None,
+    user_id: str | None = None,
+) -> MemorySelection:
+    """
+    User and agent context entries valid at this stage (plus the user's Agno
+    memories when user_id is given), ranked against `query` and cut to the
+    memory token budget (app/memory/ranking.py).
+    """
+    start = time.perf_counter()
+    rows = (await db.execute(select(*ENTRY_COLUMNS))).all()
+    # lifecycle_phases=[] means "inject at all stages"
+    items = [from_entry(r) for r in rows if not r.lifecycle_phases or stage in r.lifecycle_phases]
+    if user_id:
+        items += await agno_memories(db, user_id)
+    selection = rank_memories(items, query=query, stage=stage)
+    selection.seconds = time.perf_counter() - start
+    return selection
+
+
 async def compose_context(
     db: AsyncSession,
     stage: str,
     task_id: str | None = None,
     include_trending: list[dict] | None = None,
+    query: str | None = None,
+    user_id: str | None = None,
 ) -> ComposedContext:
     """
     Compose the context window appropriate for the given lifecycle stage.
 
     Separates user-provided context (curated by the human) from
     agent-derived context (extracted from conversations + post-mortems).
-    Both are filtered by lifecycle_phase so agents only receive what's relevant.
+    Both are filtered by lifecycle_phase so agents only receive what's relevant,
+    then ranked against `query` so only the best fit within the memory token
+    budget is kept. Agno memories are included when user_id is given.
     """
-    # User-provided context: filtered to this lifecycle phase
-    user_entries = await get_identity_memory(db, source="user", lifecycle_phase=stage)
-    # Agent-derived context: also filtered to this lifecycle phase
-    agent_entries = await get_identity_memory(db, source="agent", lifecycle_phase=stage)
+    memory = await ranked_memory(db, stage, query=query, user_id=user_id)
 
     domains = await get_domains(db)
     recent = await get_recent_tasks(db, limit=5)
 
     context = ComposedContext(
-        identity_memory=[
-            {"source": e.source, "type": e.type, "text": e.text, "tags": e.tags}
-            for e in user_entries
-        ],
-        agent_context=[
-            {"type": e.type, "text": e.text, "tags": e.tags, "lifecycle_phases": e.lifecycle_phases}
-            for e in agent_entries
-        ],
+        identity_memory=memory.of("user"),
+        agent_context=memory.of("agent"),
+        agno_memories=memory.of("agno"),
+        memory_candidates=memory.candidates,
+        memory_tokens=memory.tokens,
         knowledge_domains=[
             {"id": d.id, "name": d.name, "tags": d.tags, "post_count": d.post_count}
             for d in domains
@@ -0,0 +1,128 @@
+"""
+BroCoDDE — Model Health Tracking
+Per-model error rate, latency EWMA and a circuit breaker. The model router
+(app/models/router.py) consults it to decide between a tier's primary and alt model.
+
+Breaker states:
+- closed     → healthy; requests go to the model.
+- open       → tripped by N consecutive failures, a high error-rate EWMA, or a
+               latency EWMA above MODEL_SLOW_THRESHOLD_SECONDS. Requests go to the alt.
+- half_open  → cooldown elapsed; exactly one probe request is let through. A success
+               closes the breaker (and resets the EWMAs), a failure re-opens it.
+
+Latency is "time to first response": time to the first streamed chunk for agent
+runs, total time for single-shot completions.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import settings
+
+EWMA_ALPHA = 0.2
+
+
+@dataclass
+class ModelHealth:
+    model_id: str
+    state: str = "closed"           # closed | open | half_open
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    error_rate: float = 0.0         # EWMA of 0 (success) / 1 (failure)
+    latency_ewma: float | None = None
+    opened_at: float = 0.0
+    probe_started_at: float = 0.0
+    open_reason: str = ""
+
+    def _ewma(self, current: float | None, sample: float) -> float:
+        return sample if current is None else (1 - EWMA_ALPHA) * current + EWMA_ALPHA * sample
+
+    def _open(self, reason: str, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.open_reason = reason
+
+    def allow_request(self, now: float | None = None) -> bool:
+        """True if a request may go to this model right now (claims the probe when half-open)."""
+        now = time.monotonic() if now is None else now
+        cooldown = settings.model_breaker_cooldown_seconds
+        if self.state == "closed":
+            return True
+        if self.state == "open" and now - self.opened_at >= cooldown:
+            self.state = "half_open"
+            self.probe_started_at = now
+            return True
+        if self.state == "half_open" and now - self.probe_started_at >= cooldown:
+            # The previous probe never reported back (cancelled turn) — allow another
+            self.probe_started_at = now
+            return True
+        return False
+
+    def record_success(self, latency: float, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.calls += 1
+        self.consecutive_failures = 0
+        if self.state == "half_open":
+            # Probe succeeded: start over from this observation
+            self.state = "closed"
+            self.error_rate = 0.0
+            self.latency_ewma = latency
+            self.open_reason = ""
+            return
+        self.error_rate = self._ewma(self.error_rate, 0.0)
+        self.latency_ewma = self._ewma(self.latency_ewma, latency)
+        if (
+            self.state == "closed"
+            and self.calls >= settings.model_health_min_calls
+            and self.latency_ewma > settings.model_slow_threshold_seconds
+        ):
+            self._open(f"slow (latency EWMA {self.latency_ewma:.1f}s)", now)
+
+    def record_failure(self, error: Any = None, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate = self._ewma(self.error_rate, 1.0)
+        if self.state == "half_open":
+            self._open(f"probe failed: {error}", now)
+        elif self.state == "closed":
+            if self.consecutive_failures >= settings.model_failure_threshold:
+                self._open(f"{self.consecutive_failures} consecutive failures (last: {error})", now)
+            elif (
+                self.calls >= settings.model_health_min_calls
+                and self.error_rate > settings.model_error_rate_threshold
+            ):
+                self._open(f"error rate {self.error_rate:.0%} (last: {error})", now)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ewma_s": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "open_reason": self.open_reason or None,
+        }
+
+
+class HealthTracker:
+    def __init__(self) -> None:
+        self._models: dict[str, ModelHealth] = {}
+
+    def get(self, model_id: str) -> ModelHealth:
+        health = self._models.get(model_id)
+        if health is None:
+            health = self._models[model_id] = ModelHealth(model_id)
+        return health
+
+    def reset(self) -> None:
+        self._models.clear()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {model_id: h.snapshot() for model_id, h in self._models.items()}
+
+
+health_tracker = HealthTracker()
@@ -0,0 +1,194 @@
+"""
+BroCoDDE — Hedged Requests
+Tail-latency control for single-shot LLM calls (lint, voice transcription).
+
+When hedging is enabled for a task (HEDGING_ENABLED + HEDGE_TASKS), the first
+request gets a head start equal to that task's recent latency percentile
+(HEDGE_PERCENTILE, from a sliding window). If it has not finished by then, a
+second request fires (alt model, or the same model for a fixed-model call);
+whichever finishes first wins and the other is cancelled.
+
+Extra spend is capped by a token bucket: every call earns HEDGE_BUDGET_RATIO
+credits (up to HEDGE_BUDGET_BURST) and a hedge costs one, so at most ~ratio of
+calls are ever hedged. A primary that *fails* before the hedge deadline starts
+the backup immediately — that is failover, not a hedge, and costs no credit.
+
+Two latency windows per task:
+- primary  → how long the first request takes (a primary cancelled by a winning
+             hedge contributes its elapsed time, a lower bound). Drives the hedge
+             delay and the saving estimate.
+- observed → end-to-end latency callers actually saw (p50/p95/p99 in the stats).
+
+Latency saved by a winning hedge is estimated as E[primary | primary > elapsed]
+− elapsed over the primary window, since the cancelled primary's true finish
+time is never observed. Per-task stats are exposed via hedge_stats_snapshot().
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+LATENCY_WINDOW = 200
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    budget_denied: int = 0
+    failovers: int = 0
+    credits: float = 1.0
+    saved_seconds: float = 0.0
+    primary: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    observed: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def hedge_delay(self) -> float:
+        if len(self.primary) < settings.hedge_min_samples:
+            return settings.hedge_default_delay_seconds
+        return _percentile(list(self.primary), settings.hedge_percentile)
+
+    def estimate_saving(self, elapsed: float) -> float:
+        slower = [s for s in self.primary if s > elapsed]
+        return sum(slower) / len(slower) - elapsed if slower else 0.0
+
+    def earn_credit(self) -> None:
+        self.credits = min(settings.hedge_budget_burst, self.credits + settings.hedge_budget_ratio)
+
+    def try_spend(self) -> bool:
+        if self.credits >= 1.0:
+            self.credits -= 1.0
+            return True
+        self.budget_denied += 1
+        return False
+
+    def snapshot(self) -> dict[str, Any]:
+        window = list(self.observed)
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.budget_denied,
+            "failovers": self.failovers,
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+            "p50_s": round(_percentile(window, 0.5), 3) if window else None,
+            "p95_s": round(_percentile(window, 0.95), 3) if window else None,
+            "p99_s": round(_percentile(window, 0.99), 3) if window else None,
+            "saved_s_total": round(self.saved_seconds, 3),
+        }
+
+
+_stats: dict[str, HedgeStats] = {}
+
+
+def _stats_for(task_name: str) -> HedgeStats:
+    stats = _stats.get(task_name)
+    if stats is None:
+        stats = _stats[task_name] = HedgeStats(credits=settings.hedge_budget_burst)
+    return stats
+
+
+def hedging_enabled(task_name: str) -> bool:
+    tasks = {t.strip() for t in settings.hedge_tasks.split(",")}
+    return settings.hedging_enabled and task_name in tasks
+
+
+def hedge_stats_snapshot() -> dict[str, dict[str, Any]]:
+    return {name: s.snapshot() for name, s in _stats.items()}
+
+
+def reset_hedge_stats() -> None:
+    _stats.clear()
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+
+async def hedged(
+    task_name: str,
+    primary: Callable[[], Awaitable[T]],
+    backup: Callable[[], Awaitable[T]],
+) -> T:
+    """
+    Run `primary`; if it is still running after the task's hedge delay (and the
+    budget allows), also run `backup` and return whichever finishes first.
+    Without hedging enabled for `task_name` this is just `await primary()`.
+    """
+    if not hedging_enabled(task_name):
+        return await primary()
+
+    from app.logger import logger
+
+    stats = _stats_for(task_name)
+    stats.calls += 1
+    stats.earn_credit()
+    delay = stats.hedge_delay()
+    started = time.perf_counter()
+
+    first = asyncio.ensure_future(primary())
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            if first.exception() is None:
+                stats.primary.append(time.perf_counter() - started)
+                stats.observed.append(stats.primary[-1])
+                return first.result()
+            # Failed fast → start the backup right away (failover, costs no hedge credit)
+            stats.failovers += 1
+            result = await backup()
+            stats.observed.append(time.perf_counter() - started)
+            return result
+
+        if not stats.try_spend():
+            result = await first
+            stats.primary.append(time.perf_counter() - started)
+            stats.observed.append(stats.primary[-1])
+            return result
+
+        stats.hedged += 1
+        second = asyncio.ensure_future(backup())
+        pending = {first, second}
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                if finished.exception() is not None:
+                    error = finished.exception()
+                    continue
+                for loser in pending:
+                    await _cancel(loser)
+                elapsed = time.perf_counter() - started
+                stats.observed.append(elapsed)
+                stats.primary.append(elapsed)  # finished, or cancelled still running (lower bound)
+                if finished is second:
+                    stats.hedge_wins += 1
+                    saving = stats.estimate_saving(elapsed)
+                    stats.saved_seconds += saving
+                    logger.info(
+                        f"Hedge won for {task_name} in {elapsed:.2f}s "
+                        f"(fired at {delay:.2f}s, ~{saving:.2f}s saved)",
+                        extra={"hedge_task": task_name, "latency_s": round(elapsed, 3),
+                               "hedge_delay_s": round(delay, 3), "saved_s": round(saving, 3)},
+                    )
+                return finished.result()
+        raise error  # both attempts failed
+    finally:
+        if not first.done():
+            await _cancel(first)
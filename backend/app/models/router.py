@@ -5,12 +5,21 @@ All AI calls go through OpenRouter (https://openrouter.ai) using its
 OpenAI-compatible API. Agno's OpenAIChat with a base_url override handles this.
 """
 
-from agno.models.openai import OpenAIChat
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
 
 from app.config import settings
+from app.models.health import health_tracker
+
+if TYPE_CHECKING:
+    from agno.models.openai import OpenAIChat  # imported on first get_model() call
+
+T = TypeVar("T")
 
 # ── OpenRouter Model Registry ─────────────────────────────────────────────────
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Base URL comes from settings.openrouter_base_url (OPENROUTER_BASE_URL)
 OPENROUTER_EXTRA_HEADERS = {
     "HTTP-Referer": "https://brocodde.prachalabs.com",
     "X-Title": "BroCoDDE",
@@ -59,18 +68,24 @@ TASK_MODEL: dict[str, str] = {
 
 # Max output tokens per tier — prevent Agno's 65536 default from exhausting credits
 _TIER_MAX_TOKENS = {1: 2048, 2: 4096, 3: 8192}
+# Agno's MemoryManager only writes short memory updates
+MEMORY_MANAGER_MAX_TOKENS = 1024
 
-# ── Model Factory ─────────────────────────────────────────────────────────────
+# ── Model Registry ────────────────────────────────────────────────────────────
+# One client per (tier, variant, max_tokens), built on first use and reused for
+# every agent and tool call afterwards — the underlying HTTP connection pool is shared too.
 
-def get_model(tier: int = 2, use_alt: bool = False) -> OpenAIChat:
-    """
-    Return an Agno-compatible OpenAIChat configured for OpenRouter.
-    Falls back to mock-friendly config if no key is set.
-    """
+_MODEL_CACHE: dict[tuple[int, str, int], OpenAIChat] = {}
+_MODEL_KEYS: dict[int, tuple[int, str, int]] = {}    # id(model) → (tier, variant, max_tokens)
+_openai_client = None
+
+
+def _resolve_model_id(tier: int, variant: str) -> str:
     config = OPENROUTER_MODELS.get(tier, OPENROUTER_MODELS[2])
-    model_id = config["alt"] if use_alt else config["primary"]
+    if variant == "alt":
+        return config["alt"]
 
-    # Allow env override per tier
+    # Allow env override per tier (primary only — the alt stays a distinct failover target)
     env_override = {
         1: settings.tier1_model,
         2: settings.tier2_model,
@@ -79,34 +94,196 @@ def get_model(tier: int = 2, use_alt: bool = False) -> OpenAIChat:
 
     # Use env override only if it's a full model path (contains "/")
     if "/" in env_override:
-        model_id = env_override
-
-    return OpenAIChat(
-        id=model_id,
-        api_key=settings.openrouter_api_key or "dummy-key",
-        base_url=OPENROUTER_BASE_URL,
-        default_headers=OPENROUTER_EXTRA_HEADERS,
-        max_tokens=_TIER_MAX_TOKENS.get(tier, 4096),
-    )
+        return env_override
+    return config["primary"]
+
+
+def get_model(tier: int = 2, use_alt: bool = False, max_tokens: int | None = None) -> OpenAIChat:
+    """
+    Return the cached Agno-compatible OpenAIChat for a tier, configured for OpenRouter.
+    `max_tokens` defaults to the tier's cap. Falls back to mock-friendly config if no key is set.
+    """
+    tier = tier if tier in OPENROUTER_MODELS else 2
+    key = (tier, "alt" if use_alt else "primary", max_tokens or _TIER_MAX_TOKENS.get(tier, 4096))
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        from agno.models.openai import OpenAIChat
+
+        model = OpenAIChat(
+            id=_resolve_model_id(tier, key[1]),
+            api_key=settings.openrouter_api_key or "dummy-key",
+            base_url=settings.openrouter_base_url,
+            default_headers=OPENROUTER_EXTRA_HEADERS,
+            max_tokens=key[2],
+        )
+        _MODEL_CACHE[key] = model
+        _MODEL_KEYS[id(model)] = key
+    return model
 
 
 def get_model_for_task(task_name: str, use_alt: bool = False) -> OpenAIChat:
     """Return the configured model for a named task."""
-    tier = TASK_TIERS.get(task_name, 2)
-    model_id = TASK_MODEL.get(task_name, OPENROUTER_MODELS[tier]["primary"])
-
-    if use_alt:
-        model_id = OPENROUTER_MODELS[tier]["alt"]
-
-    return OpenAIChat(
-        id=model_id,
-        api_key=settings.openrouter_api_key or "dummy-key",
-        base_url=OPENROUTER_BASE_URL,
-        default_headers=OPENROUTER_EXTRA_HEADERS,
-        max_tokens=_TIER_MAX_TOKENS.get(tier, 4096),
+    return get_model(TASK_TIERS.get(task_name, 2), use_alt=use_alt)
+
+
+def get_openai_client():
+    """Shared AsyncOpenAI client for single-shot OpenRouter calls (lint, compaction, voice)."""
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+
+        _openai_client = AsyncOpenAI(
+            api_key=settings.openrouter_api_key or "dummy-key",
+            base_url=settings.openrouter_base_url,
+            default_headers=OPENROUTER_EXTRA_HEADERS,
+        )
+    return _openai_client
+
+
+def reset_model_cache() -> None:
+    """Drop cached clients and health state (settings changed, tests)."""
+    global _openai_client
+    _MODEL_CACHE.clear()
+    _MODEL_KEYS.clear()
+    _openai_client = None
+    health_tracker.reset()
+
+
+# ── Health-aware selection & failover ─────────────────────────────────────────
+
+def _log_failover(tier: int, primary: str, alt: str, reason: str) -> None:
+    from app.logger import logger
+
+    logger.warning(
+        f"Model failover (tier {tier}): {primary} → {alt} — {reason}",
+        extra={"tier": tier, "from_model": primary, "to_model": alt, "reason": reason},
     )
 
 
+def get_healthy_model(tier: int = 2, max_tokens: int | None = None, claim_probe: bool = True) -> OpenAIChat:
+    """
+    The tier's primary model, or its alt while the primary's circuit breaker is open.
+
+    A half-open breaker lets one probe through, and whoever takes it must report the
+    outcome (record_model_success / record_model_failure). Callers that never do —
+    agent builders, whose runs the harness reports — pass claim_probe=False and get
+    the alt until the breaker closes.
+    """
+    primary = get_model(tier, max_tokens=max_tokens)
+    if not settings.model_failover_enabled:
+        return primary
+    alt = get_model(tier, use_alt=True, max_tokens=max_tokens)
+    health = health_tracker.get(primary.id)
+    if alt.id == primary.id or (health.allow_request() if claim_probe else health.state == "closed"):
+        return primary
+    _log_failover(tier, primary.id, alt.id, f"circuit open: {health.open_reason}")
+    return alt
+
+
+def get_memory_model() -> OpenAIChat:
+    """Tier-1 model for Agno's MemoryManager, which runs it internally and never reports back."""
+    return get_healthy_model(1, max_tokens=MEMORY_MANAGER_MAX_TOKENS, claim_probe=False)
+
+
+def claim_healthy_model(model: OpenAIChat) -> OpenAIChat:
+    """
+    Re-pick a registry model chosen with claim_probe=False, this time allowed to take
+    the half-open probe — for a caller that reports the outcome (the harness).
+    """
+    key = _MODEL_KEYS.get(id(model))
+    return model if key is None else get_healthy_model(key[0], max_tokens=key[2])
+
+
+def get_tier1_model() -> OpenAIChat:
+    return get_healthy_model(1)
+
+
+def get_tier2_model() -> OpenAIChat:
+    return get_healthy_model(2)
+
+
+def get_tier3_model() -> OpenAIChat:
+    return get_healthy_model(3)
+
+
+def failover_model(model: OpenAIChat, reason: str) -> OpenAIChat | None:
+    """
+    After `model` failed a call: the alt to retry with, or None when there is no
+    distinct alt (model is already the alt, not a registry model, or failover is off).
+    """
+    key = _MODEL_KEYS.get(id(model))
+    if not settings.model_failover_enabled or key is None or key[1] != "primary":
+        return None
+    alt = get_model(key[0], use_alt=True, max_tokens=key[2])
+    if alt.id == model.id:
+        return None
+    _log_failover(key[0], model.id, alt.id, reason)
+    return alt
+
+
+def record_model_success(model: OpenAIChat, latency: float) -> None:
+    health_tracker.get(model.id).record_success(latency)
+
+
+def record_model_failure(model: OpenAIChat, error: Any) -> None:
+    health_tracker.get(model.id).record_failure(error)
+
+
+async def call_with_failover(tier: int, call: Callable[[OpenAIChat], Awaitable[T]]) -> T:
+    """
+    Run a single-shot call against the tier's healthy model, recording latency and
+    errors; on failure retry once on the alt model. `call(model)` uses `model.id`.
+    """
+    model = get_healthy_model(tier)
+    while True:
+        started = time.perf_counter()
+        try:
+            result = await call(model)
+        except Exception as e:
+            record_model_failure(model, e)
+            alt = failover_model(model, f"error: {e}")
+            if alt is None:
+                raise
+            model = alt
+            continue
+        record_model_success(model, time.perf_counter() - started)
+        return result
+
+
+async def call_hedged(task: str, call: Callable[[OpenAIChat], Awaitable[T]]) -> T:
+    """
+    call_with_failover() for TASK_TIERS[task], plus request hedging when enabled
+    for `task` (app/models/hedging.py): the hedge goes to the tier's alt model
+    (HEDGE_USE_ALT) or the same model, and doubles as the failover attempt.
+    """
+    from app.models.hedging import hedged, hedging_enabled
+
+    tier = TASK_TIERS[task]
+    if not hedging_enabled(task):
+        return await call_with_failover(tier, call)
+
+    model = get_healthy_model(tier)
+    backup = get_model(tier, use_alt=True) if settings.hedge_use_alt else model
+    if backup.id == model.id:
+        backup = model
+
+    async def _attempt(m: OpenAIChat) -> T:
+        started = time.perf_counter()
+        try:
+            result = await call(m)
+        except Exception as e:
+            record_model_failure(m, e)
+            raise
+        record_model_success(m, time.perf_counter() - started)
+        return result
+
+    return await hedged(task, lambda: _attempt(model), lambda: _attempt(backup))
+
+
+def model_health_snapshot() -> dict[str, dict[str, Any]]:
+    return health_tracker.snapshot()
+
+
 def is_mock_mode() -> bool:
     """True when no API key is configured — agents return mock responses."""
     return not bool(settings.openrouter_api_key)
@@ -0,0 +1,61 @@
+"""
+BroCoDDE — Realtime Stage Hub
+In-process pub/sub for task updates pushed over the multiplexed WebSocket (/ws).
+
+A WebSocket connection subscribes to any number of task ids; routes that change
+a task's stage publish here and every subscribed connection gets the update
+without polling. Publishing never blocks the publishing route: subscribers
+receive messages through a non-blocking `offer()` and deal with their own
+overflow (see app/routes/ws.py).
+
+BroCoDDE runs as a single uvicorn process, so an in-memory hub is sufficient.
+"""
+
+from collections import defaultdict
+from typing import Any, Protocol
+
+from app.db.models import CoddeTask
+
+
+class Subscriber(Protocol):
+    def offer(self, message: dict[str, Any]) -> None:
+        """Queue `message` for delivery without blocking."""
+
+
+class StageHub:
+    def __init__(self) -> None:
+        self._subscribers: defaultdict[str, set[Subscriber]] = defaultdict(set)
+
+    def subscribe(self, task_id: str, subscriber: Subscriber) -> None:
+        self._subscribers[task_id].add(subscriber)
+
+    def unsubscribe(self, task_id: str, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(task_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[task_id]
+
+    def subscriber_count(self, task_id: str) -> int:
+        return len(self._subscribers.get(task_id, ()))
+
+    def publish(self, task_id: str, message: dict[str, Any]) -> int:
+        """Offer `message` to every subscriber of `task_id`. Returns the fan-out count."""
+        subscribers = list(self._subscribers.get(task_id, ()))
+        for subscriber in subscribers:
+            subscriber.offer(message)
+        return len(subscribers)
+
+
+stage_hub = StageHub()
+
+
+def publish_stage(task: CoddeTask) -> int:
+    """Broadcast a task's current stage to its WebSocket subscribers."""
+    return stage_hub.publish(task.id, {
+        "type": "stage",
+        "task_id": task.id,
+        "stage": task.stage,
+        "version": task.version,
+    })
@@ -9,14 +9,19 @@ Thinking tag handling:
   the chat history saved to the database.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+import re
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.harness import stream_chat
+from app.agents.turn_events import merge_turn_events
 from app.db.database import get_db
 from app.db.models import CoddeTask, Series
+from app.idempotency import REPLAYED_HEADER, IdempotencyKeyReuseError, idempotency_store
 
 router = APIRouter()
 
@@ -102,6 +107,210 @@ def _drain(buf: str, in_thinking: bool) -> tuple[list[tuple[str, str]], str, boo
     return segments, buf, in_thinking
 
 
+# ── Chat turn (transport-neutral) ─────────────────────────────────────────────
+
+ChatEvent = tuple[str, str]
+# ("message", text) | ("thinking", text) | ("tool", name) | ("error", detail)
+# ("title", title)  | ("advance", "next") | ("lint", json) | ("done", "")
+
+
+async def run_chat_turn(task: CoddeTask, body: ChatRequest) -> AsyncIterator[ChatEvent]:
+    """
+    Run one agent turn for `task` and yield transport-neutral (event, data) pairs.
+
+    Shared by the SSE route below and the multiplexed WebSocket transport
+    (app/routes/ws.py): both get identical thinking-tag splitting, macro handling,
+    history persistence, auto-title and series assignment.
+    """
+    from app.logger import logger
+    from datetime import datetime
+
+    task_id = task.id
+    agent_role = task.role or "researcher"
+
+    # Thinking parser state
+    buf = ""
+    in_thinking = False
+    clean_message = ""  # non-thinking content — this is what gets saved to history
+
+    should_advance = False
+    auto_title: str | None = None
+
+    try:
+        # Tools can push structured events (e.g. per-check lint results) mid-run
+        async for kind, chunk in merge_turn_events(stream_chat(
+            message=body.message,
+            task_stage=task.stage,
+            task_id=task_id,
+            role=agent_role,
+            intent=task.intent or "teach",
+            user_id=body.user_id,
+            session_id=task_id,
+            deep_critique=body.deep_critique,
+        )):
+            if kind != "chunk":
+                yield kind, chunk
+                continue
+            if not chunk:
+                continue
+
+            # Fast-path: harness yields [TOOL:name] as a complete standalone chunk.
+            # Intercept here before the drain buffer can split the marker mid-token.
+            if chunk.startswith("[TOOL:") and chunk.endswith("]") and "\n" not in chunk:
+                yield "tool", chunk[6:-1]
+                continue
+
+            buf += chunk
+            segments, buf, in_thinking = _drain(buf, in_thinking)
+
+            for seg_type, text in segments:
+                if not text:
+                    continue
+                if seg_type == "message" and "[ADVANCE_STAGE]" in text:
+                    text = text.replace("[ADVANCE_STAGE]", "")
+                    should_advance = True
+                    if not text.strip():
+                        continue
+                # Intercept [TOOL:name] markers — emit as dedicated tool event, not content
+                if seg_type == "message":
+                    tool_markers = re.findall(r'\[TOOL:([^\]]+)\]', text)
+                    if tool_markers:
+                        for tool_name in tool_markers:
+                            yield "tool", tool_name
+                        text = re.sub(r'\[TOOL:[^\]]+\]', '', text)
+                        if not text.strip():
+                            continue
+                if seg_type == "thinking":
+                    yield "thinking", text
+                else:
+                    clean_message += text
+                    yield "message", text
+
+        # Flush remaining buffer
+        if buf:
+            if in_thinking:
+                yield "thinking", buf
+            else:
+                if "[ADVANCE_STAGE]" in buf:
+                    buf = buf.replace("[ADVANCE_STAGE]", "").strip()
+                    should_advance = True
+                # Strip any [TOOL:...] markers that ended up in the flush buffer
+                buf = re.sub(r'\[TOOL:[^\]]+\]', '', buf).strip()
+                if buf:
+                    clean_message += buf
+                    yield "message", buf
+
+        # ── Strip macros from clean_message before saving ──
+        # Safety net: catch [ADVANCE_STAGE] if split across chunks
+        if "[ADVANCE_STAGE]" in clean_message:
+            should_advance = True
+            clean_message = clean_message.replace("[ADVANCE_STAGE]", "").strip()
+        clean_message = re.sub(r'\s*\[TITLE:[^\]]+\]\s*', ' ', clean_message).strip()
+        clean_message = re.sub(r'\s*\[TOOL:[^\]]+\]\s*', '', clean_message).strip()
+
+        # ── Save clean chat history (no thinking tags) ─────────────────
+        # Only the messages from THIS turn are built here. They are appended to
+        # the history as it exists at save time (not as it was at request start),
+        # under compare-and-swap, so overlapping turns never drop each other's messages.
+        new_messages: list[dict] = []
+        is_auto_msg = body.message.startswith("[AUTO_OPEN]") or body.message.startswith("[AUTO_SPARK]")
+        if not is_auto_msg:
+            new_messages.append({
+                "id": f"msg_u_{datetime.utcnow().timestamp()}",
+                "role": "user",
+                "content": body.message,
+                "stage": task.stage,
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+        new_messages.append({
+            "id": f"msg_a_{datetime.utcnow().timestamp()}",
+            "role": "agent",
+            "content": clean_message,
+            "stage": task.stage,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+
+        from app.db.concurrency import mutate_task
+        from app.db.database import AsyncSessionLocal
+
+        async def _apply(db_task: CoddeTask) -> None:
+            nonlocal auto_title
+            auto_title = None  # reset — this may be a retry after a lost race
+            db_task.chat_history = list(db_task.chat_history or []) + new_messages
+            # ── Auto-derive title from first real user message ──────────────
+            # Only fires when title is still blank/Untitled and this is a real message
+            current_title = (db_task.title or "").strip()
+            is_real_msg = not is_auto_msg and body.message.strip()
+            if is_real_msg and current_title.lower() in ("", "untitled"):
+                raw = body.message.strip()
+                # Truncate at word boundary ≤ 60 chars
+                if len(raw) > 60:
+                    raw = raw[:60].rsplit(" ", 1)[0]
+                derived = raw.strip(".,!?—:").strip()
+                if derived:
+                    db_task.title = derived
+                    auto_title = derived
+
+            # ── Auto-assign to series by domain ────────────────────────────
+            # If task has a domain but no series, find a series whose name
+            # overlaps with the domain string (case-insensitive substring).
+            if not db_task.series_id and db_task.domain:
+                from sqlalchemy import select as _select
+                domain_lc = db_task.domain.lower()
+                series_rows = await session.execute(_select(Series))
+                for s in series_rows.scalars().all():
+                    s_lc = s.name.lower()
+                    if domain_lc in s_lc or s_lc in domain_lc:
+                        db_task.series_id = s.id
+                        break
+
+        async with AsyncSessionLocal() as session:
+            if await mutate_task(session, task_id, _apply):
+                await session.commit()
+
+    except Exception as e:
+        logger.error(f"Stream error on task {task_id}: {str(e)}", exc_info=True)
+        yield "error", str(e)
+
+    # Emit title update event so the sidebar/header refresh without a reload
+    if auto_title:
+        yield "title", auto_title.replace("\n", " ")
+
+    # Emit stage advance event BEFORE done so the client processes it first
+    if should_advance:
+        yield "advance", "next"
+
+    yield "done", ""
+
+
+# ── SSE framing ───────────────────────────────────────────────────────────────
+
+def _sse_frame(event: str, data: str) -> str:
+    """Render one ChatEvent in the SSE wire format the frontend parses (lib/sse.ts)."""
+    if event == "message":
+        escaped = data.replace("\n", "\\n")
+        return f"data: {escaped}\n\n"
+    if event == "thinking":
+        escaped = data.replace("\n", "\\n")
+        return f"event: thinking\ndata: {escaped}\n\n"
+    if event == "error":
+        return f"data: [AgentOS Error: {data}]\n\n"
+    if event == "done":
+        return "data: [DONE]\n\n"
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _sse(events: AsyncIterator[ChatEvent]) -> AsyncIterator[str]:
+    yield "data: \n\n"  # SSE: open connection
+    async for event, data in events:
+        yield _sse_frame(event, data)
+
+
+def chat_idempotency_scope(task_id: str) -> str:
+    """Idempotency scope shared by the SSE and WebSocket chat transports."""
+    return f"POST /tasks/{task_id}/chat"
+
+
 # ── Route ─────────────────────────────────────────────────────────────────────
 
 @router.post("/{task_id}/chat")
@@ -109,177 +318,43 @@ async def chat(
     task_id: str,
     body: ChatRequest,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: str | None = Header(default=None),
 ):
     """
     Stream a chat response for the given CoDDE-task.
     Thinking blocks are emitted as `event: thinking` SSE frames and NOT saved to history.
     Regular content is emitted as default `data:` SSE frames and saved to history.
+
+    With an `Idempotency-Key` header, a repeated key attaches to the in-flight run's
+    stream (or replays the finished one) instead of starting a second agent run.
     """
     task = await db.get(CoddeTask, task_id)
     if not task:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
-
-    async def event_generator():
-        from app.logger import logger
-        from datetime import datetime
-
-        yield "data: \n\n"  # SSE: open connection
-
-        agent_role = task.role or "researcher"
-
-        # Thinking parser state
-        buf = ""
-        in_thinking = False
-        clean_message = ""  # non-thinking content — this is what gets saved to history
-
-        should_advance = False
-
+    # Hand the pooled connection back before streaming. The dependency would otherwise
+    # hold it for the whole agent turn while run_chat_turn() needs a second one to
+    # persist history — enough concurrent turns exhaust the pool and deadlock.
+    await db.close()
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    }
+    if idempotency_key:
         try:
-            async for chunk in stream_chat(
-                message=body.message,
-                task_stage=task.stage,
-                task_id=task_id,
-                role=agent_role,
-                intent=task.intent or "teach",
-                user_id=body.user_id,
-                session_id=task_id,
-                deep_critique=body.deep_critique,
-            ):
-                if not chunk:
-                    continue
-
-                # Fast-path: harness yields [TOOL:name] as a complete standalone chunk.
-                # Intercept here before the drain buffer can split the marker mid-token.
-                if chunk.startswith("[TOOL:") and chunk.endswith("]") and "\n" not in chunk:
-                    yield f"event: tool\ndata: {chunk[6:-1]}\n\n"
-                    continue
-
-                buf += chunk
-                segments, buf, in_thinking = _drain(buf, in_thinking)
-
-                for seg_type, text in segments:
-                    if not text:
-                        continue
-                    if seg_type == "message" and "[ADVANCE_STAGE]" in text:
-                        text = text.replace("[ADVANCE_STAGE]", "")
-                        should_advance = True
-                        if not text.strip():
-                            continue
-                    # Intercept [TOOL:name] markers — emit as dedicated SSE event, not content
-                    import re as _re_tool
-                    if seg_type == "message":
-                        tool_markers = _re_tool.findall(r'\[TOOL:([^\]]+)\]', text)
-                        if tool_markers:
-                            for tool_name in tool_markers:
-                                yield f"event: tool\ndata: {tool_name}\n\n"
-                            text = _re_tool.sub(r'\[TOOL:[^\]]+\]', '', text)
-                            if not text.strip():
-                                continue
-                    escaped = text.replace("\n", "\\n")
-                    if seg_type == "thinking":
-                        yield f"event: thinking\ndata: {escaped}\n\n"
-                    else:
-                        clean_message += text
-                        yield f"data: {escaped}\n\n"
-
-            # Flush remaining buffer
-            if buf:
-                if in_thinking:
-                    escaped = buf.replace("\n", "\\n")
-                    yield f"event: thinking\ndata: {escaped}\n\n"
-                else:
-                    import re as _re_flush
-                    if "[ADVANCE_STAGE]" in buf:
-                        buf = buf.replace("[ADVANCE_STAGE]", "").strip()
-                        should_advance = True
-                    # Strip any [TOOL:...] markers that ended up in the flush buffer
-                    buf = _re_flush.sub(r'\[TOOL:[^\]]+\]', '', buf).strip()
-                    if buf:
-                        escaped = buf.replace("\n", "\\n")
-                        clean_message += buf
-                        yield f"data: {escaped}\n\n"
-
-            # ── Strip macros from clean_message before saving ──
-            import re as _re
-            # Safety net: catch [ADVANCE_STAGE] if split across chunks
-            if "[ADVANCE_STAGE]" in clean_message:
-                should_advance = True
-                clean_message = clean_message.replace("[ADVANCE_STAGE]", "").strip()
-            clean_message = _re.sub(r'\s*\[TITLE:[^\]]+\]\s*', ' ', clean_message).strip()
-            clean_message = _re.sub(r'\s*\[TOOL:[^\]]+\]\s*', '', clean_message).strip()
-
-            # ── Save clean chat history (no thinking tags) ─────────────────
-            history = list(task.chat_history or [])
-            is_auto_msg = body.message.startswith("[AUTO_OPEN]") or body.message.startswith("[AUTO_SPARK]")
-            if not is_auto_msg:
-                history.append({
-                    "id": f"msg_u_{datetime.utcnow().timestamp()}",
-                    "role": "user",
-                    "content": body.message,
-                    "timestamp": datetime.utcnow().isoformat(),
-                })
-            history.append({
-                "id": f"msg_a_{datetime.utcnow().timestamp()}",
-                "role": "agent",
-                "content": clean_message,
-                "timestamp": datetime.utcnow().isoformat(),
-            })
-
-            from app.db.database import AsyncSessionLocal
-            auto_title: str | None = None
-            async with AsyncSessionLocal() as session:
-                db_task = await session.get(CoddeTask, task_id)
-                if db_task:
-                    db_task.chat_history = history
-                    # ── Auto-derive title from first real user message ──────────────
-                    # Only fires when title is still blank/Untitled and this is a real message
-                    current_title = (db_task.title or "").strip()
-                    is_real_msg = not is_auto_msg and body.message.strip()
-                    if is_real_msg and current_title.lower() in ("", "untitled"):
-                        raw = body.message.strip()
-                        # Truncate at word boundary ≤ 60 chars
-                        if len(raw) > 60:
-                            raw = raw[:60].rsplit(" ", 1)[0]
-                        derived = raw.strip(".,!?—:").strip()
-                        if derived:
-                            db_task.title = derived
-                            auto_title = derived
-
-                    # ── Auto-assign to series by domain ────────────────────────────
-                    # If task has a domain but no series, find a series whose name
-                    # overlaps with the domain string (case-insensitive substring).
-                    if not db_task.series_id and db_task.domain:
-                        from sqlalchemy import select as _select
-                        domain_lc = db_task.domain.lower()
-                        series_rows = await session.execute(_select(Series))
-                        for s in series_rows.scalars().all():
-                            s_lc = s.name.lower()
-                            if domain_lc in s_lc or s_lc in domain_lc:
-                                db_task.series_id = s.id
-                                break
-
-                    await session.commit()
-
-        except Exception as e:
-            logger.error(f"Stream error on task {task_id}: {str(e)}", exc_info=True)
-            yield f"data: [AgentOS Error: {str(e)}]\n\n"
-
-        # Emit title update event so the sidebar/header refresh without a reload
-        if auto_title:
-            escaped_title = auto_title.replace("\n", " ")
-            yield f"event: title\ndata: {escaped_title}\n\n"
-
-        # Emit stage advance event BEFORE [DONE] so frontend processes it first
-        if should_advance:
-            yield "event: advance\ndata: next\n\n"
-
-        yield "data: [DONE]\n\n"
+            events, replayed = idempotency_store.stream(
+                chat_idempotency_scope(task_id), idempotency_key, body.model_dump(),
+                lambda: run_chat_turn(task, body),
+            )
+        except IdempotencyKeyReuseError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if replayed:
+            headers[REPLAYED_HEADER] = "true"
+    else:
+        events = run_chat_turn(task, body)
 
     return StreamingResponse(
-        event_generator(),
+        _sse(events),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",
-        },
+        headers=headers,
     )
@@ -52,6 +52,22 @@ class ConceptResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class ConceptSearchResult(ConceptResponse):
+    score: float | None = None      # BM25, lower is more relevant
+    snippet: str | None = None      # best-matching passage, matches wrapped in <mark>
+
+
+class RelatedConcept(ConceptResponse):
+    score: float                    # cosine similarity of local concept vectors, higher is closer
+
+
+class ConceptNeighbor(ConceptResponse):
+    depth: int                      # hops from the requested concept
+    via: str                        # neighbour one hop closer to it
+    kind: str                       # edge kind, e.g. "link"
+    weight: float
+
+
 @router.get("", response_model=list[ConceptResponse])
 async def list_concepts(
     domain: str | None = None,
@@ -67,9 +83,14 @@ async def list_concepts(
 
 @router.post("", response_model=ConceptResponse, status_code=201)
 async def create_concept(data: ConceptCreate, db: AsyncSession = Depends(get_db)):
+    from app.db.dedupe import index_signature
+    from app.db.vectors import index_concept
+
     concept = ConceptNode(**data.model_dump())
     db.add(concept)
     await db.flush()
+    await index_concept(db, concept)
+    await index_signature(db, concept)
     await db.refresh(concept)
     return concept
 
@@ -91,10 +112,21 @@ async def update_concept(
     concept = await db.get(ConceptNode, concept_id)
     if not concept:
         raise HTTPException(status_code=404, detail="Concept not found")
-    for field, value in data.model_dump(exclude_unset=True).items():
+    from app.db.dedupe import index_signature
+    from app.db.vectors import FIELD_WEIGHTS, index_concept
+
+    changes = data.model_dump(exclude_unset=True)
+    links = changes.pop("connections", None)
+    for field, value in changes.items():
         setattr(concept, field, value)
+    if links is not None:
+        from app.db.graph import set_links
+        await set_links(db, concept, links)
     concept.updated_at = datetime.utcnow()
     await db.flush()
+    if changes.keys() & FIELD_WEIGHTS.keys():
+        await index_concept(db, concept)
+        await index_signature(db, concept)
     return concept
 
 
@@ -103,23 +135,72 @@ async def delete_concept(concept_id: str, db: AsyncSession = Depends(get_db)):
     concept = await db.get(ConceptNode, concept_id)
     if not concept:
         raise HTTPException(status_code=404, detail="Concept not found")
+    from app.db.dedupe import unindex_signature
+    from app.db.graph import remove_concept_edges
+    from app.db.vectors import unindex_concept
+
+    await remove_concept_edges(db, concept_id)
+    await unindex_concept(db, concept_id)
+    await unindex_signature(db, concept_id)
     await db.delete(concept)
     await db.commit()
     return {"ok": True}
 
 
-@router.get("/search/query", response_model=list[ConceptResponse])
-async def search_concepts(q: str, db: AsyncSession = Depends(get_db)):
-    """Keyword search across title, core_insight, and domain."""
-    from sqlalchemy import or_
-    result = await db.execute(
-        select(ConceptNode)
-        .where(or_(
-            ConceptNode.title.ilike(f"%{q}%"),
-            ConceptNode.core_insight.ilike(f"%{q}%"),
-            ConceptNode.domain.ilike(f"%{q}%"),
-        ))
-        .order_by(ConceptNode.created_at.desc())
-        .limit(5)
-    )
-    return list(result.scalars().all())
+@router.get("/search/query", response_model=list[ConceptSearchResult])
+async def search_concepts(q: str, limit: int = 5, db: AsyncSession = Depends(get_db)):
+    """Full-text search across title, insight, domain, tags and source — most relevant first."""
+    from app.db.search import search_concepts as fts_search
+
+    hits = await fts_search(db, q, limit=min(max(limit, 1), 50))
+    return [
+        ConceptSearchResult.model_validate(hit.concept).model_copy(update={"score": hit.score, "snippet": hit.snippet})
+        for hit in hits
+    ]
+
+
+def _related_response(hits) -> list[RelatedConcept]:
+    return [
+        RelatedConcept(**ConceptResponse.model_validate(hit.concept).model_dump(), score=hit.score)
+        for hit in hits
+    ]
+
+
+@router.get("/related/query", response_model=list[RelatedConcept])
+async def related_to_text(q: str, k: int = 5, db: AsyncSession = Depends(get_db)):
+    """Concepts describing a similar idea to `q`, even without shared keywords — closest first."""
+    from app.db.vectors import related_concepts
+
+    return _related_response(await related_concepts(db, query=q, k=min(max(k, 1), 50)))
+
+
+@router.get("/{concept_id}/related", response_model=list[RelatedConcept])
+async def related_to_concept(concept_id: str, k: int = 5, db: AsyncSession = Depends(get_db)):
+    """The concepts closest to an existing one (itself excluded)."""
+    from app.db.vectors import related_concepts
+
+    if not await db.get(ConceptNode, concept_id):
+        raise HTTPException(status_code=404, detail="Concept not found")
+    return _related_response(await related_concepts(db, concept_id=concept_id, k=min(max(k, 1), 50)))
+
+
+@router.get("/{concept_id}/neighbors", response_model=list[ConceptNeighbor])
+async def concept_neighbors(
+    concept_id: str,
+    depth: int = 1,
+    limit: int = 25,
+    kind: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Concepts within `depth` hops (1–4, links followed both ways), at most `limit` per depth."""
+    from app.db.graph import MAX_DEPTH, neighbors
+
+    if not await db.get(ConceptNode, concept_id):
+        raise HTTPException(status_code=404, detail="Concept not found")
+    found = await neighbors(db, concept_id, depth=min(max(depth, 1), MAX_DEPTH),
+                            per_depth=min(max(limit, 1), 100), kind=kind)
+    return [
+        ConceptNeighbor(**ConceptResponse.model_validate(n.concept).model_dump(),
+                        depth=n.depth, via=n.via, kind=n.kind, weight=n.weight)
+        for n in found
+    ]
@@ -1,20 +1,27 @@
 """
 BroCoDDE — Memory API Routes
-CRUD for identity memory entries and knowledge domains.
+CRUD for identity memory entries and knowledge domains, plus the composed
+per-stage context agents receive (GET /memory/context) and consolidation of
+near-duplicate agent memories (POST /memory/consolidate).
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
 import json
 
+from app.agents.prefetch import cached_composed_context
 from app.memory.models import (
     AgnoMemoryResponse,
+    ComposedContext,
+    ConsolidationReport,
+    ConsolidationRunResponse,
     KnowledgeDomainCreate,
     KnowledgeDomainResponse,
     MemoryEntryCreate,
     MemoryEntryResponse,
+    MemoryMergeResponse,
 )
 from app.memory.store import (
     create_domain,
@@ -41,6 +48,20 @@ async def list_memory(
     return entries
 
 
+@router.get("/context", response_model=ComposedContext)
+async def get_composed_context(
+    stage: str = "discovery",
+    task_id: str | None = None,
+    q: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Composed context for a stage — warmed by Discovery prefetch, cached until memory changes.
+    Memory entries are ranked against `q` (a message) and cut to the memory token budget.
+    """
+    return await cached_composed_context(db, stage, task_id, q)
+
+
 @router.post("", response_model=MemoryEntryResponse, status_code=201)
 async def add_memory(data: MemoryEntryCreate, db: AsyncSession = Depends(get_db)):
     return await create_memory_entry(db, data)
@@ -106,6 +127,44 @@ async def list_agno_memories(
     return out
 
 
+# ── Consolidation (near-duplicate agent memories) ────────────────────────────
+
+@router.post("/consolidate", response_model=ConsolidationReport)
+async def consolidate(
+    dry_run: bool = False,
+    threshold: float | None = Query(None, ge=0.1, le=1.0),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Merge near-duplicate agent memories now (also runs on a schedule).
+    ?dry_run=true reports the clusters without changing anything.
+    """
+    from app.memory.consolidate import consolidate_memories
+    return await consolidate_memories(db, dry_run=dry_run, trigger="manual", threshold=threshold)
+
+
+@router.get("/consolidations", response_model=list[ConsolidationRunResponse])
+async def list_consolidations(limit: int = Query(20, ge=1, le=200), db: AsyncSession = Depends(get_db)):
+    """Recent consolidation runs, newest first: memories merged and prompt tokens before / after."""
+    from sqlalchemy import select
+    from app.db.models import MemoryConsolidationRun
+    result = await db.execute(
+        select(MemoryConsolidationRun).order_by(MemoryConsolidationRun.created_at.desc()).limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("/{memory_id}/merges", response_model=list[MemoryMergeResponse])
+async def list_merges(memory_id: str, db: AsyncSession = Depends(get_db)):
+    """Provenance: the memories consolidated into this one (context entry or Agno memory id)."""
+    from sqlalchemy import select
+    from app.db.models import MemoryMerge
+    result = await db.execute(
+        select(MemoryMerge).where(MemoryMerge.canonical_id == memory_id).order_by(MemoryMerge.merged_at)
+    )
+    return result.scalars().all()
+
+
 # ── Knowledge Domains (Layer 3) ───────────────────────────────────────────────
 
 @router.get("/domains", response_model=list[KnowledgeDomainResponse])
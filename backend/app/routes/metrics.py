@@ -2,19 +2,25 @@
 BroCoDDE — Metrics and Observatory Routes
 POST /tasks/{id}/metrics — log post-mortem metrics
 GET  /observatory — aggregate analytics for Observatory view
+GET  /observatory/usage — token / latency ledger aggregates (per day, per stage)
 """
 
 from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.prefetch import signal_cache
+from app.db.concurrency import TaskConflictError, mutate_task
 from app.db.database import get_db
 from app.db.models import CoddeTask, PublishedPost
+from app.db.usage import usage_summary
+from app.idempotency import idempotent_json
 from app.memory.store import compute_performance_patterns
+from app.realtime import publish_stage
 
 router = APIRouter()
 
@@ -46,37 +52,65 @@ async def log_metrics(
     task_id: str,
     data: MetricsInput,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: str | None = Header(default=None),
 ):
     """Log post-mortem metrics for a published task. Creates a PublishedPost record."""
-    task = await db.get(CoddeTask, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
-
-    metrics = {
-        "impressions": data.impressions,
-        "saves": data.saves,
-        "comments": data.comments,
-        "dms": data.dms,
-        "reposts": data.reposts,
-        "profile_visits": data.profile_visits,
-        "save_rate": round(data.saves / data.impressions, 4) if data.impressions > 0 else 0.0,
-    }
-
-    post = PublishedPost(
-        task_id=task_id,
-        content=data.content or task.final_content or "",
-        platform=data.platform,
-        metrics=metrics,
-    )
-    db.add(post)
-
-    # Advance task to post-mortem stage if it was in ready
-    if task.stage == "ready":
-        task.stage = "post-mortem"
-        task.published_at = datetime.utcnow()
-
-    await db.flush()
-    return {"task_id": task_id, "metrics": metrics, "post_id": post.id}
+    async def _log() -> dict:
+        task = await db.get(CoddeTask, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+
+        metrics = {
+            "impressions": data.impressions,
+            "saves": data.saves,
+            "comments": data.comments,
+            "dms": data.dms,
+            "reposts": data.reposts,
+            "profile_visits": data.profile_visits,
+            "save_rate": round(data.saves / data.impressions, 4) if data.impressions > 0 else 0.0,
+        }
+
+        # Advance task to post-mortem stage if it was in ready.
+        # Done first: mutate_task() may roll the session back on a version conflict.
+        advanced = False
+
+        def _apply(t: CoddeTask) -> None:
+            nonlocal advanced
+            advanced = t.stage == "ready"
+            if advanced:
+                t.stage = "post-mortem"
+                t.published_at = datetime.utcnow()
+
+        try:
+            task = await mutate_task(db, task_id, _apply)
+        except TaskConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if not task:
+            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+
+        post = PublishedPost(
+            task_id=task_id,
+            content=data.content or task.final_content or "",
+            platform=data.platform,
+            metrics=metrics,
+        )
+        db.add(post)
+
+        # Commit before pushing the stage to /ws subscribers (see advance_stage)
+        await db.commit()
+        # Performance patterns changed — drop their cached copies
+        signal_cache.invalidate("compute_patterns")
+        signal_cache.invalidate("composed_context")
+        if advanced:
+            publish_stage(task)
+        return {"task_id": task_id, "metrics": metrics, "post_id": post.id}
+
+    if idempotency_key:
+        return await idempotent_json(
+            idempotency_key, f"POST /tasks/{task_id}/metrics", data.model_dump(), db, _log,
+            status_code=201,
+        )
+    return await _log()
 
 
 @router.get("/observatory", response_model=ObservatoryResponse)
@@ -135,3 +169,13 @@ async def get_observatory(db: AsyncSession = Depends(get_db)):
         posts=posts_data,
         patterns=patterns.model_dump(),
     )
+
+
+@router.get("/observatory/usage")
+async def get_usage(
+    days: int = Query(default=30, ge=1, le=365),
+    task_id: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Model usage from the ledger: tokens, tool calls and latency per day and per (stage, agent)."""
+    return await usage_summary(db, days=days, task_id=task_id)
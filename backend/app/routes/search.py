@@ -0,0 +1,60 @@
+"""
+BroCoDDE — Transcript Search API Route
+GET /search?q= — chat messages and draft versions across every CoDDE-task,
+ranked by the transcript FTS5 index (app/db/search.py), one page at a time.
+"""
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_db
+
+router = APIRouter()
+
+
+class TranscriptSearchHit(BaseModel):
+    task_id: str
+    task_title: str | None
+    kind: str                   # message | draft
+    position: int               # message offset in chat_history, or drafts index (version - 1)
+    stage: str | None
+    role: str | None
+    created_at: str | None
+    snippet: str
+    score: float | None = None
+
+
+class TranscriptSearchPage(BaseModel):
+    query: str
+    offset: int
+    limit: int
+    hits: list[TranscriptSearchHit]
+    next_offset: int | None = None
+
+
+@router.get("", response_model=TranscriptSearchPage)
+async def search_transcripts(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    task_id: str | None = None,
+    kind: Literal["message", "draft"] | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Where did I talk about X? Matching messages and drafts, most relevant first."""
+    from app.db.search import search_transcripts as fts_search
+
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="Query must not be empty")
+    limit, offset = min(max(limit, 1), 100), max(offset, 0)
+    hits, more = await fts_search(db, q, limit=limit, offset=offset, task_id=task_id, kind=kind)
+    return TranscriptSearchPage(
+        query=q,
+        offset=offset,
+        limit=limit,
+        hits=[TranscriptSearchHit(**vars(hit)) for hit in hits],
+        next_offset=offset + limit if more else None,
+    )
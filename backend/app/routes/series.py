@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.concurrency import TaskConflictError, mutate_task
 from app.db.database import get_db
 from app.db.models import CoddeTask, Series
 
@@ -113,15 +114,34 @@ async def update_series(series_id: str, data: SeriesUpdate, db: AsyncSession = D
     return SeriesResponse(**series.__dict__, post_count=count, progress_pct=progress)
 
 
+async def _set_series_id(
+    db: AsyncSession, task_id: str, series_id: str | None, only_from: str | None = None,
+) -> CoddeTask | None:
+    """
+    Point a task at `series_id` through mutate_task() and commit. With `only_from`, a task
+    that has moved to another series meanwhile is left alone. A lost race is a 409.
+    """
+    def _apply(task: CoddeTask) -> None:
+        if only_from is None or task.series_id == only_from:
+            task.series_id = series_id
+
+    try:
+        task = await mutate_task(db, task_id, _apply)
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await db.commit()
+    return task
+
+
 @router.delete("/{series_id}")
 async def delete_series(series_id: str, db: AsyncSession = Depends(get_db)):
     series = await db.get(Series, series_id)
     if not series:
         raise HTTPException(status_code=404, detail="Series not found")
     # Unlink tasks (set series_id=None) rather than cascade-delete tasks
-    tasks_result = await db.execute(select(CoddeTask).where(CoddeTask.series_id == series_id))
-    for task in tasks_result.scalars().all():
-        task.series_id = None
+    task_ids = await db.execute(select(CoddeTask.id).where(CoddeTask.series_id == series_id))
+    for task_id in task_ids.scalars().all():
+        await _set_series_id(db, task_id, None, only_from=series_id)
     await db.delete(series)
     await db.commit()
     return {"ok": True}
@@ -133,11 +153,8 @@ async def assign_task_to_series(series_id: str, task_id: str, db: AsyncSession =
     series = await db.get(Series, series_id)
     if not series:
         raise HTTPException(status_code=404, detail="Series not found")
-    task = await db.get(CoddeTask, task_id)
-    if not task:
+    if not await _set_series_id(db, task_id, series_id):
         raise HTTPException(status_code=404, detail="Task not found")
-    task.series_id = series_id
-    await db.commit()
     return {"ok": True, "task_id": task_id, "series_id": series_id}
 
 
@@ -147,6 +164,5 @@ async def remove_task_from_series(series_id: str, task_id: str, db: AsyncSession
     task = await db.get(CoddeTask, task_id)
     if not task or task.series_id != series_id:
         raise HTTPException(status_code=404, detail="Task not in this series")
-    task.series_id = None
-    await db.commit()
+    await _set_series_id(db, task_id, None, only_from=series_id)
     return {"ok": True}
@@ -1,12 +1,14 @@
 """
 BroCoDDE — Skills API Routes
 GET /skills — list all available skills (name + description)
+GET /skills/search?q= — skill sections ranked for a query (BM25 section index)
 GET /skills/{name} — load full SKILL.md content for a skill
 GET /skills/{name}/references/{ref} — load a reference file
 """
 
 from fastapi import APIRouter, HTTPException
 
+from app.agents.knowledge import load_skill, skill_index
 from app.agents.tools import skill_list, skill_load, skill_load_reference
 
 router = APIRouter()
@@ -18,10 +20,23 @@ async def list_skills():
     return await skill_list()
 
 
+@router.get("/search")
+async def search_skills(q: str, k: int = 5, skill: str | None = None):
+    """Skill sections (SKILL.md + references) ranked for a query, with token counts."""
+    if not q.strip():
+        raise HTTPException(status_code=422, detail="Query must not be empty")
+    hits = skill_index().search(q, k=max(1, min(k, 20)), skill=skill)
+    return [
+        {"skill": section.skill, "source": section.source, "heading": section.heading,
+         "tokens": section.tokens, "score": round(score, 3), "content": section.text}
+        for section, score in hits
+    ]
+
+
 @router.get("/{skill_name}")
 async def get_skill(skill_name: str):
-    """Load the full SKILL.md content for a named skill."""
-    content = await skill_load(skill_name)
+    """Load the full SKILL.md content for a named skill (skill_load outlines long skills for agents)."""
+    content = load_skill(skill_name) or await skill_load(skill_name)
     if "not found" in content.lower():
         raise HTTPException(status_code=404, detail=content)
     return {"name": skill_name, "content": content}
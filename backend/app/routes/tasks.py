@@ -5,17 +5,25 @@ GET  /tasks — list tasks (with optional filters)
 GET  /tasks/{id} — get a single task
 PATCH /tasks/{id}/stage — advance lifecycle stage
 PATCH /tasks/{id} — update task fields
+
+Entering `discovery` (on create or via PATCH /stage) starts a background
+prefetch of the task's discovery signals (app/agents/prefetch.py).
 """
 
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.prefetch import schedule_discovery_prefetch
+from app.db.concurrency import TaskConflictError, mutate_task
 from app.db.database import get_db
 from app.db.models import CoddeTask
+from app.idempotency import idempotent_json
+from app.memory.store import invalidate_composed_context
+from app.realtime import publish_stage
 
 router = APIRouter()
 
@@ -65,6 +73,7 @@ class TaskResponse(BaseModel):
     lint_results: dict | None
     skeleton: dict | None
     chat_history: list[dict] | None = None
+    version: int = 1
     created_at: datetime
     updated_at: datetime
 
@@ -79,26 +88,52 @@ def _generate_task_id() -> str:
     return f"codde-{now.strftime('%Y%m%d')}-{random.randint(100, 999)}"
 
 
+async def _mutate_or_raise(db: AsyncSession, task_id: str, mutate) -> CoddeTask:
+    """mutate_task() with the HTTP error mapping shared by every mutation route."""
+    try:
+        task = await mutate_task(db, task_id, mutate)
+    except TaskConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not task:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    return task
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 @router.post("", response_model=TaskResponse, status_code=201)
-async def create_task(data: TaskCreate, db: AsyncSession = Depends(get_db)):
-    initial_stage = "feynman" if data.task_type == "spark" else "discovery"
-    task = CoddeTask(
-        id=_generate_task_id(),
-        role=data.role,
-        intent=data.intent,
-        domain=data.domain,
-        series_id=data.series_id,
-        title=data.title,
-        task_type=data.task_type,
-        source_url=data.source_url,
-        stage=initial_stage,
-    )
-    db.add(task)
-    await db.flush()
-    await db.refresh(task)
-    return task
+async def create_task(
+    data: TaskCreate,
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: str | None = Header(default=None),
+):
+    async def _create() -> CoddeTask:
+        initial_stage = "feynman" if data.task_type == "spark" else "discovery"
+        task = CoddeTask(
+            id=_generate_task_id(),
+            role=data.role,
+            intent=data.intent,
+            domain=data.domain,
+            series_id=data.series_id,
+            title=data.title,
+            task_type=data.task_type,
+            source_url=data.source_url,
+            stage=initial_stage,
+        )
+        db.add(task)
+        await db.flush()
+        await db.refresh(task)
+        invalidate_composed_context(db)  # recent_tasks changed
+        if task.stage == "discovery":
+            schedule_discovery_prefetch(task.id, task.domain)
+        return task
+
+    if idempotency_key:
+        return await idempotent_json(
+            idempotency_key, "POST /tasks", data.model_dump(), db, _create,
+            response_model=TaskResponse, status_code=201,
+        )
+    return await _create()
 
 
 @router.get("", response_model=list[TaskResponse])
@@ -131,14 +166,23 @@ async def advance_stage(
     data: StageUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    task = await db.get(CoddeTask, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
     if data.stage not in VALID_STAGES:
+        if not await db.get(CoddeTask, task_id):
+            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
         raise HTTPException(status_code=400, detail=f"Invalid stage: {data.stage}")
-    task.stage = data.stage
-    task.updated_at = datetime.utcnow()
-    await db.flush()
+
+    def _apply(task: CoddeTask) -> None:
+        task.stage = data.stage
+        task.updated_at = datetime.utcnow()
+
+    task = await _mutate_or_raise(db, task_id, _apply)
+    # Commit before pushing to /ws subscribers: a client that re-fetches on the
+    # message must read the new stage and version, not the pre-commit row
+    await db.commit()
+    invalidate_composed_context()
+    publish_stage(task)
+    if task.stage == "discovery":
+        schedule_discovery_prefetch(task.id, task.domain)
     return task
 
 
@@ -148,13 +192,15 @@ async def update_task(
     data: TaskUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    task = await db.get(CoddeTask, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
-    for field, value in data.model_dump(exclude_none=True).items():
-        setattr(task, field, value)
-    task.updated_at = datetime.utcnow()
-    await db.flush()
+    changes = data.model_dump(exclude_none=True)
+
+    def _apply(task: CoddeTask) -> None:
+        for field, value in changes.items():
+            setattr(task, field, value)
+        task.updated_at = datetime.utcnow()
+
+    task = await _mutate_or_raise(db, task_id, _apply)
+    invalidate_composed_context(db)
     return task
 
 
@@ -163,18 +209,27 @@ async def save_draft(
     task_id: str,
     body: dict,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: str | None = Header(default=None),
 ):
     """Append a draft version to the task's drafts list."""
-    task = await db.get(CoddeTask, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
-    drafts = list(task.drafts or [])
-    drafts.append({
-        "version": len(drafts) + 1,
-        "content": body.get("content", ""),
-        "created_at": datetime.utcnow().isoformat(),
-    })
-    task.drafts = drafts
-    task.updated_at = datetime.utcnow()
-    await db.flush()
-    return {"version": len(drafts), "saved": True}
+    def _apply(task: CoddeTask) -> None:
+        # Re-read on every attempt so a concurrent save is never overwritten
+        drafts = list(task.drafts or [])
+        drafts.append({
+            "version": len(drafts) + 1,
+            "content": body.get("content", ""),
+            "stage": task.stage,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+        task.drafts = drafts
+        task.updated_at = datetime.utcnow()
+
+    async def _save() -> dict:
+        task = await _mutate_or_raise(db, task_id, _apply)
+        return {"version": len(task.drafts), "saved": True}
+
+    if idempotency_key:
+        return await idempotent_json(
+            idempotency_key, f"POST /tasks/{task_id}/drafts", body, db, _save,
+        )
+    return await _save()
@@ -9,10 +9,10 @@ import json
 
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
-from openai import AsyncOpenAI
 
 from app.config import settings
-from app.models.router import OPENROUTER_BASE_URL, OPENROUTER_EXTRA_HEADERS
+from app.models.hedging import hedged
+from app.models.router import get_openai_client
 
 router = APIRouter()
 
@@ -42,14 +42,10 @@ async def transcribe_audio(file: UploadFile = File(...)):
     if content_type not in ("audio/wav", "audio/mpeg", "audio/webm", "audio/mp4"):
         content_type = "audio/webm"
 
-    client = AsyncOpenAI(
-        api_key=settings.openrouter_api_key,
-        base_url=OPENROUTER_BASE_URL,
-        default_headers=OPENROUTER_EXTRA_HEADERS,
-    )
+    client = get_openai_client()
 
-    try:
-        response = await client.chat.completions.create(
+    async def _transcribe():
+        return await client.chat.completions.create(
             model=AUDIO_MODEL,
             messages=[
                 {
@@ -71,6 +67,11 @@ async def transcribe_audio(file: UploadFile = File(...)):
             ],
             max_tokens=1000,
         )
+
+    try:
+        # Fixed model: a hedge (HEDGING_ENABLED) re-sends to the same model, which
+        # OpenRouter may route to another provider
+        response = await hedged("voice_transcription", _transcribe, _transcribe)
         transcript = response.choices[0].message.content or ""
         return JSONResponse({"transcript": transcript.strip()})
 
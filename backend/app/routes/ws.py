@@ -0,0 +1,224 @@
+"""
+BroCoDDE — Multiplexed WebSocket Transport
+WS /ws — chat turns, tool/thinking/title/advance events and stage updates for any
+number of CoDDE-tasks over one connection.
+
+The SSE route (POST /tasks/{id}/chat) opens one HTTP connection per turn. A client
+working several tasks at once can instead keep a single socket open and tag each
+frame with a task id and a client-chosen turn id.
+
+Client → server (JSON text frames):
+    {"type": "subscribe",   "task_id": "..."}
+    {"type": "unsubscribe", "task_id": "..."}
+    {"type": "chat", "task_id": "...", "turn_id": "...", "message": "...",
+     "user_id": "default_user", "deep_critique": false, "idempotency_key": "..."}
+    {"type": "cancel", "turn_id": "..."}
+    {"type": "ping"}
+
+Server → client:
+    {"type": "event", "task_id", "turn_id", "event", "data"}
+        event ∈ message | thinking | tool | error | title | advance | done
+        (`data` is raw text — no SSE newline escaping)
+    {"type": "stage", "task_id", "stage", "version"}   (subscribed tasks only)
+    {"type": "error", "detail", "turn_id"?}
+    {"type": "pong"}
+
+Turns run through the same run_chat_turn() as the SSE route, so history
+persistence, macros, auto-title and Idempotency-Key replay behave identically.
+
+Backpressure: every connection has one writer task draining a bounded outbox.
+Agent turns `await` space in the outbox, so a slow reader pauses its own turns
+(and with them the upstream model stream) instead of buffering without limit.
+A turn that waits longer than WS_SEND_TIMEOUT_SECONDS, or a stage broadcast that
+finds the outbox full, closes the connection as a slow consumer (code 1013).
+"""
+
+import asyncio
+from typing import Any
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import CoddeTask
+from app.idempotency import IdempotencyKeyReuseError, idempotency_store
+from app.logger import logger
+from app.realtime import stage_hub
+from app.routes.chat import ChatRequest, chat_idempotency_scope, run_chat_turn
+
+router = APIRouter()
+
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "try again later"
+
+
+class SlowConsumerError(Exception):
+    """The client is not reading fast enough to keep its outbox from overflowing."""
+
+
+class _Connection:
+    """One /ws client: bounded outbox, running turns and task subscriptions."""
+
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.outbox: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.turns: dict[str, asyncio.Task] = {}
+        self.subscriptions: set[str] = set()
+        self.slow_consumer = asyncio.Event()
+
+    # ── Outbound ─────────────────────────────────────────────────────────────
+
+    async def send(self, message: dict[str, Any]) -> None:
+        """Queue a frame, waiting for space. Used by turns — this is the backpressure point."""
+        try:
+            await asyncio.wait_for(self.outbox.put(message), timeout=settings.ws_send_timeout_seconds)
+        except asyncio.TimeoutError:
+            self.slow_consumer.set()
+            raise SlowConsumerError()
+
+    def offer(self, message: dict[str, Any]) -> None:
+        """Queue a frame without waiting. Used by the stage hub, which must never block."""
+        try:
+            self.outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            self.slow_consumer.set()
+
+    async def write_loop(self) -> None:
+        while True:
+            message = await self.outbox.get()
+            await self.ws.send_json(message)
+
+    # ── Inbound ──────────────────────────────────────────────────────────────
+
+    async def read_loop(self) -> None:
+        while True:
+            try:
+                frame = await self.ws.receive_json()
+            except WebSocketDisconnect:
+                return
+            except ValueError:
+                self.offer({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            if not isinstance(frame, dict):
+                self.offer({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            await self.dispatch(frame)
+
+    async def dispatch(self, frame: dict[str, Any]) -> None:
+        kind = frame.get("type")
+        task_id = frame.get("task_id")
+
+        if kind == "ping":
+            self.offer({"type": "pong"})
+        elif kind == "subscribe" and isinstance(task_id, str):
+            self.subscriptions.add(task_id)
+            stage_hub.subscribe(task_id, self)
+        elif kind == "unsubscribe" and isinstance(task_id, str):
+            self.subscriptions.discard(task_id)
+            stage_hub.unsubscribe(task_id, self)
+        elif kind == "chat":
+            self.start_turn(frame)
+        elif kind == "cancel":
+            turn = self.turns.get(frame.get("turn_id"))
+            if turn:
+                turn.cancel()
+        else:
+            self.offer({"type": "error", "detail": f"Unknown or malformed frame: {kind!r}"})
+
+    # ── Turns ────────────────────────────────────────────────────────────────
+
+    def start_turn(self, frame: dict[str, Any]) -> None:
+        task_id = frame.get("task_id")
+        turn_id = frame.get("turn_id")
+        if not isinstance(task_id, str) or not isinstance(turn_id, str):
+            self.offer({"type": "error", "detail": "chat frames need task_id and turn_id"})
+            return
+        if turn_id in self.turns:
+            self.offer({"type": "error", "turn_id": turn_id, "detail": f"Turn {turn_id} is already running"})
+            return
+        if len(self.turns) >= settings.ws_max_concurrent_turns:
+            self.offer({
+                "type": "error", "turn_id": turn_id,
+                "detail": f"At most {settings.ws_max_concurrent_turns} concurrent turns per connection",
+            })
+            return
+        try:
+            body = ChatRequest.model_validate(frame)
+        except ValidationError as e:
+            self.offer({"type": "error", "turn_id": turn_id, "detail": str(e)})
+            return
+
+        turn = asyncio.create_task(self.run_turn(task_id, turn_id, body, frame.get("idempotency_key")))
+        self.turns[turn_id] = turn
+        turn.add_done_callback(lambda _: self.turns.pop(turn_id, None))
+
+    async def run_turn(self, task_id: str, turn_id: str, body: ChatRequest, idempotency_key: str | None) -> None:
+        try:
+            await self._stream_turn(task_id, turn_id, body, idempotency_key)
+        except SlowConsumerError:
+            logger.warning(f"WS slow consumer — dropping turn {turn_id} on task {task_id}")
+
+    async def _stream_turn(self, task_id: str, turn_id: str, body: ChatRequest, idempotency_key: str | None) -> None:
+        def _frame(event: str, data: str) -> dict[str, Any]:
+            return {"type": "event", "task_id": task_id, "turn_id": turn_id, "event": event, "data": data}
+
+        async with AsyncSessionLocal() as session:
+            task = await session.get(CoddeTask, task_id)
+        if not task:
+            await self.send(_frame("error", f"Task {task_id} not found"))
+            await self.send(_frame("done", ""))
+            return
+
+        if idempotency_key:
+            try:
+                events, _ = idempotency_store.stream(
+                    chat_idempotency_scope(task_id), idempotency_key, body.model_dump(),
+                    lambda: run_chat_turn(task, body),
+                )
+            except IdempotencyKeyReuseError as e:
+                await self.send(_frame("error", str(e)))
+                await self.send(_frame("done", ""))
+                return
+        else:
+            events = run_chat_turn(task, body)
+
+        try:
+            async for event, data in events:
+                await self.send(_frame(event, data))
+        finally:
+            await events.aclose()
+
+    async def close(self) -> None:
+        for turn in list(self.turns.values()):
+            turn.cancel()
+        for task_id in self.subscriptions:
+            stage_hub.unsubscribe(task_id, self)
+        self.subscriptions.clear()
+
+
+# ── Route ─────────────────────────────────────────────────────────────────────
+
+@router.websocket("/ws")
+async def chat_socket(ws: WebSocket):
+    await ws.accept()
+    conn = _Connection(ws)
+    reader = asyncio.create_task(conn.read_loop())
+    writer = asyncio.create_task(conn.write_loop())
+    overflow = asyncio.create_task(conn.slow_consumer.wait())
+
+    try:
+        done, _ = await asyncio.wait({reader, writer, overflow}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        await conn.close()
+        for t in (reader, writer, overflow):
+            t.cancel()
+    for t in done:
+        if not t.cancelled() and t.exception():
+            logger.info(f"WS connection ended: {t.exception()!r}")
+
+    if overflow in done:
+        logger.warning("WS closing slow consumer")
+        try:
+            await ws.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="slow consumer")
+        except RuntimeError:
+            pass  # already closed
@@ -0,0 +1,73 @@
+"""
+BroCoDDE — Deferred Import Warm-up
+The heavy SDKs (agno, openai, exa_py, huggingface_hub) are imported on first
+use, not at startup, so the server answers /health as soon as the app module
+is loaded. Once it is up, schedule_warmup() imports them in a worker thread so
+the first chat turn or discovery call does not pay for them either.
+
+Check the cold-start import cost with `python -m benchmarks.bench_importtime`.
+"""
+
+import asyncio
+import importlib
+import time
+
+from app.config import settings
+
+# Imported on first use across app/agents, app/db/vectors.py, app/routes/discovery.py and app/routes/voice.py
+DEFERRED_IMPORTS: tuple[str, ...] = (
+    "openai",
+    "agno.models.openai",
+    "agno.agent",
+    "agno.memory",
+    "agno.tools.memory",
+    "agno.db.sqlite",
+    "app.agents.content_discovery_toolkit",
+    "huggingface_hub",
+    "exa_py",
+    "numpy",
+)
+
+_warmup: asyncio.Task | None = None
+
+
+def warm_imports(modules: tuple[str, ...] = DEFERRED_IMPORTS) -> dict[str, bool]:
+    """Import each module (blocking). Returns which imports succeeded."""
+    outcome: dict[str, bool] = {}
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            outcome[name] = True
+        except Exception:
+            outcome[name] = False  # optional SDK not installed — its tools report that on use
+    return outcome
+
+
+async def _run(delay: float) -> dict[str, bool]:
+    from app.logger import logger
+
+    await asyncio.sleep(delay)  # let the server start accepting requests first
+    start = time.perf_counter()
+    outcome = await asyncio.to_thread(warm_imports)
+    missing = [name for name, ok in outcome.items() if not ok]
+    logger.info(
+        f"Deferred imports warmed in {time.perf_counter() - start:.2f}s"
+        + (f" — unavailable: {', '.join(missing)}" if missing else "")
+    )
+    return outcome
+
+
+def schedule_warmup() -> asyncio.Task | None:
+    """Start the background warm-up (app startup). None when disabled."""
+    global _warmup
+    if not settings.import_warmup_enabled:
+        return None
+    _warmup = asyncio.create_task(_run(settings.import_warmup_delay_seconds))
+    return _warmup
+
+
+async def cancel_warmup() -> None:
+    """Stop a warm-up that has not finished (app shutdown). An import already running completes."""
+    if _warmup is not None and not _warmup.done():
+        _warmup.cancel()
+        await asyncio.gather(_warmup, return_exceptions=True)
@@ -0,0 +1,199 @@
+"""
+BroCoDDE — Chat Transport Benchmark
+SSE (one HTTP connection per turn) vs the multiplexed WebSocket at /ws.
+
+Starts the real app under uvicorn on a free port, in mock mode against a
+throwaway SQLite file, then drives `--clients` simulated browsers. Each client
+works `--tasks` CoDDE-tasks concurrently and sends `--turns` turns per task.
+
+- SSE: every turn is a fresh POST /tasks/{id}/chat connection (keep-alive off,
+  matching a browser's streaming fetch that holds its connection for the turn).
+- WS: every client opens ONE socket and multiplexes all of its tasks' turns.
+
+Reports connections opened, time-to-first-token and full-turn latency. Run from backend/:
+
+    python -m benchmarks.bench_chat_transport --clients 20 --tasks 2 --turns 5
+
+With `--stub` the app talks to the local OpenAI-compatible stub
+(benchmarks/llm_stub.py) instead of mock mode, so every turn runs through
+Agno, the tools and memory with the stub's TTFT and tokens/sec.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int, app=None):
+    """Run an app (default: app.main) under uvicorn in a background thread; returns the Server."""
+    import uvicorn
+
+    if app is None:
+        from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _summary(label: str, ttft: list[float], total: list[float], connections: int, wall: float) -> None:
+    def pct(xs: list[float], p: float) -> float:
+        xs = sorted(xs)
+        return xs[min(len(xs) - 1, int(len(xs) * p))] * 1000
+
+    print(
+        f"{label:<4} turns={len(total):<5} connections={connections:<5} wall={wall:6.2f}s  "
+        f"ttft p50={pct(ttft, .5):7.1f}ms p95={pct(ttft, .95):7.1f}ms  "
+        f"turn p50={pct(total, .5):7.1f}ms p95={pct(total, .95):7.1f}ms  "
+        f"mean={statistics.mean(total) * 1000:7.1f}ms"
+    )
+
+
+# ── SSE ───────────────────────────────────────────────────────────────────────
+
+async def _sse_client(base: str, task_ids: list[str], turns: int, ttft: list, total: list) -> int:
+    import httpx
+
+    opened = 0
+
+    async def _task_loop(task_id: str) -> None:
+        nonlocal opened
+        for i in range(turns):
+            # Keep-alive off: one TCP connection per streamed turn
+            async with httpx.AsyncClient(base_url=base, timeout=60,
+                                         limits=httpx.Limits(max_keepalive_connections=0)) as http:
+                opened += 1
+                start = time.perf_counter()
+                first = None
+                async with http.stream("POST", f"/tasks/{task_id}/chat",
+                                       json={"message": f"turn {i}", "user_id": "bench"}) as resp:
+                    async for line in resp.aiter_lines():
+                        if first is None and line.startswith("data: ") and line[6:] and line[6:] != "[DONE]":
+                            first = time.perf_counter() - start
+                        if line == "data: [DONE]":
+                            break
+                total.append(time.perf_counter() - start)
+                ttft.append(first if first is not None else total[-1])
+
+    await asyncio.gather(*[_task_loop(t) for t in task_ids])
+    return opened
+
+
+# ── WebSocket ─────────────────────────────────────────────────────────────────
+
+async def _ws_client(ws_url: str, task_ids: list[str], turns: int, ttft: list, total: list) -> int:
+    import websockets
+
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        inboxes: dict[str, asyncio.Queue] = {}
+
+        async def _reader() -> None:
+            async for raw in ws:
+                frame = json.loads(raw)
+                inbox = inboxes.get(frame.get("turn_id"))
+                if inbox:
+                    inbox.put_nowait(frame)
+
+        async def _task_loop(task_id: str) -> None:
+            for i in range(turns):
+                turn_id = uuid.uuid4().hex
+                inbox = inboxes[turn_id] = asyncio.Queue()
+                start = time.perf_counter()
+                first = None
+                await ws.send(json.dumps({"type": "chat", "task_id": task_id, "turn_id": turn_id,
+                                          "message": f"turn {i}", "user_id": "bench"}))
+                while True:
+                    frame = await inbox.get()
+                    if frame.get("type") == "error":
+                        raise RuntimeError(frame["detail"])
+                    if first is None and frame["event"] == "message":
+                        first = time.perf_counter() - start
+                    if frame["event"] == "done":
+                        break
+                total.append(time.perf_counter() - start)
+                ttft.append(first if first is not None else total[-1])
+                del inboxes[turn_id]
+
+        reader = asyncio.create_task(_reader())
+        try:
+            await asyncio.gather(*[_task_loop(t) for t in task_ids])
+        finally:
+            reader.cancel()
+    return 1
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+
+async def main(clients: int, tasks: int, turns: int, port: int, backend: str = "mock agent stream") -> None:
+    import httpx
+
+    base = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base) as http:
+        all_tasks = []
+        while len(all_tasks) < clients * tasks:
+            resp = await http.post("/tasks", json={"role": "researcher", "intent": "teach"})
+            if resp.status_code == 201:  # task ids are short random suffixes — retry collisions
+                all_tasks.append(resp.json()["id"])
+    per_client = [all_tasks[i * tasks:(i + 1) * tasks] for i in range(clients)]
+
+    print(f"{clients} clients × {tasks} tasks × {turns} turns ({backend})")
+    for label, run in (("sse", lambda ids, a, b: _sse_client(base, ids, turns, a, b)),
+                       ("ws", lambda ids, a, b: _ws_client(f"ws://127.0.0.1:{port}/ws", ids, turns, a, b))):
+        ttft: list[float] = []
+        total: list[float] = []
+        start = time.perf_counter()
+        opened = await asyncio.gather(*[run(ids, ttft, total) for ids in per_client])
+        _summary(label, ttft, total, sum(opened), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=2, help="concurrent tasks per client")
+    parser.add_argument("--turns", type=int, default=5, help="turns per task")
+    parser.add_argument("--stub", action="store_true", help="real agent path against the local LLM stub")
+    parser.add_argument("--stub-ttft", type=float, default=0.4)
+    parser.add_argument("--stub-tps", type=float, default=80.0)
+    args = parser.parse_args()
+
+    # Throwaway database, mock mode or the stub — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ["OPENROUTER_API_KEY"] = ""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    servers = []
+    backend = "mock agent stream"
+    if args.stub:
+        from benchmarks.llm_stub import StubConfig, create_app
+
+        stub_port = _free_port()
+        servers.append(_start_server(stub_port, create_app(StubConfig(ttft=args.stub_ttft, tps=args.stub_tps))))
+        os.environ["OPENROUTER_API_KEY"] = "stub"
+        os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+        backend = f"LLM stub, ttft={args.stub_ttft}s, {args.stub_tps} tok/s"
+
+    port = _free_port()
+    servers.append(_start_server(port))
+    try:
+        asyncio.run(main(args.clients, args.tasks, args.turns, port, backend))
+    finally:
+        for server, thread in servers:
+            server.should_exit = True
+            thread.join(timeout=5)
@@ -0,0 +1,122 @@
+"""
+BroCoDDE — Near-duplicate Detection Benchmark
+MinHash + LSH (app/db/dedupe.py) over `--rows` synthetic concepts in a
+throwaway SQLite database, against exact pairwise Jaccard over every stored
+word set (what saving would cost without the index). Words are drawn from a
+Zipf-distributed `--vocab`, like real text: a few very common terms and a long
+tail. Reports:
+
+- build:  first use — signatures computed for every concept, LSH index filled
+- lookup: LSH candidates + signature comparison for one new concept, p50 / p95
+- find:   find_similar() end to end (includes loading the matched rows)
+- pairwise: exact Jaccard against every concept
+- recall: planted near-duplicates (one word of the insight replaced) found as duplicates
+
+Run from backend/:
+
+    python -m benchmarks.bench_concept_dedupe --rows 50000 --repeat 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from itertools import accumulate
+
+
+def _summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    return f"p50={statistics.median(samples):8.3f}ms p95={samples[int(len(samples) * .95) - 1]:8.3f}ms"
+
+
+class Corpus:
+    def __init__(self, vocab: int, rng: random.Random):
+        self.words = [f"term{i}" for i in range(vocab)]
+        self.cum = list(accumulate(1 / (rank + 1) for rank in range(vocab)))
+        self.rng = rng
+
+    def sample(self, k: int) -> list[str]:
+        return self.rng.choices(self.words, cum_weights=self.cum, k=k)
+
+    def concepts(self, n: int):
+        from app.db.models import ConceptNode
+
+        for i in range(n):
+            yield ConceptNode(title=" ".join(self.sample(4)), core_insight=" ".join(self.sample(16)) + ".",
+                              tags=self.sample(2))
+
+    def variant(self, concept):
+        """The same concept re-saved: one insight word replaced."""
+        from app.db.models import ConceptNode
+
+        words = concept.core_insight.rstrip(".").split()
+        words[self.rng.randrange(len(words))] = self.sample(1)[0]
+        return ConceptNode(title=concept.title, core_insight=" ".join(words) + ".", tags=list(concept.tags))
+
+
+async def main(rows: int, repeat: int, vocab: int) -> None:
+    from sqlalchemy import select
+
+    from app.db.database import AsyncSessionLocal, create_tables
+    from app.db.dedupe import concept_signature, find_similar, index_for, shingles
+    from app.db.models import ConceptNode
+
+    await create_tables()
+    corpus = Corpus(vocab, random.Random(3))
+    async with AsyncSessionLocal() as db:
+        db.add_all(corpus.concepts(rows))
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        index = index_for(db)
+        await index.ensure(db)
+        await db.commit()
+        print(f"build:    {len(index)} signatures computed + indexed in {time.perf_counter() - start:.2f}s")
+
+        stored = (await db.execute(select(ConceptNode))).scalars().all()
+        word_sets = {c.id: shingles(c) for c in stored}
+        probes = [corpus.variant(c) for c in corpus.rng.sample(stored, repeat)]
+
+        lookup, candidates = [], []
+        for probe in probes:
+            t = time.perf_counter()
+            found = index.query(concept_signature(probe))
+            lookup.append((time.perf_counter() - t) * 1000)
+            candidates.append(len(found))
+        print(f"lookup:   {_summary(lookup)}  (median {statistics.median(candidates):.0f} candidates compared)")
+
+        find, hits = [], 0
+        for probe in probes:
+            t = time.perf_counter()
+            similar = await find_similar(db, probe)
+            find.append((time.perf_counter() - t) * 1000)
+            hits += any(s.duplicate for s in similar)
+        print(f"find:     {_summary(find)}")
+
+        pairwise = []
+        for probe in probes[:max(5, repeat // 20)]:
+            words = shingles(probe)
+            t = time.perf_counter()
+            max(len(words & other) / len(words | other) for other in word_sets.values())
+            pairwise.append((time.perf_counter() - t) * 1000)
+        print(f"pairwise: {_summary(pairwise)}")
+        print(f"recall:   {hits}/{len(probes)} planted near-duplicates flagged")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--vocab", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-dedupe-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'dedupe.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main(args.rows, args.repeat, args.vocab))
@@ -0,0 +1,104 @@
+"""
+BroCoDDE — Concept Graph Benchmark
+k-hop neighbourhoods over `--rows` synthetic concepts with `--degree` random
+links each, in a throwaway SQLite database. The links are written as JSON
+`connections` lists and migrated into concept_edges by create_tables(), as an
+existing database would be. Compares, per depth:
+
+- scan:      load every node and walk the JSON lists in Python (the old way)
+- cte:       neighbors() — one recursive CTE over the indexed edge table
+- adjacency: walk() over the cached in-memory map the agent tools use
+
+Run from backend/:
+
+    python -m benchmarks.bench_concept_graph --rows 50000 --degree 3 --repeat 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+
+async def _scan(db, root: str, depth: int) -> int:
+    from sqlalchemy import select
+
+    from app.db.models import ConceptNode
+
+    rows = (await db.execute(select(ConceptNode.id, ConceptNode.connections))).all()
+    seen, frontier = {root}, {root}
+    for _ in range(depth):
+        nxt = set()
+        for node_id, connections in rows:       # incoming links need the full scan
+            for other in connections or []:
+                if node_id in frontier and other not in seen:
+                    nxt.add(other)
+                if other in frontier and node_id not in seen:
+                    nxt.add(node_id)
+        seen |= nxt
+        frontier = nxt
+    return len(seen) - 1
+
+
+async def main(rows: int, degree: int, repeat: int, per_depth: int) -> None:
+    from app.db.database import AsyncSessionLocal, Base, create_tables, engine
+    from app.db.graph import adjacency, neighbors
+    from app.db.models import ConceptNode
+
+    rng = random.Random(5)
+    ids = [f"c{i:06d}" for i in range(rows)]
+    now = datetime.utcnow()
+    async with engine.begin() as conn:  # links only in the JSON lists; concept_edges starts empty
+        await conn.run_sync(Base.metadata.create_all)
+        for start in range(0, rows, 5000):
+            await conn.execute(ConceptNode.__table__.insert(), [
+                {"id": i, "title": f"Concept {i}", "core_insight": ".", "tags": [],
+                 "connections": rng.sample(ids, degree), "created_at": now, "updated_at": now}
+                for i in ids[start:start + 5000]
+            ])
+    start = time.perf_counter()
+    await create_tables()
+    print(f"{rows} concepts × {degree} links migrated to concept_edges in {time.perf_counter() - start:.2f}s")
+
+    roots = rng.sample(ids, repeat)
+    print(f"\n{'depth':>5} {'path':<10} {'p50 ms':>9} {'max ms':>9}")
+    async with AsyncSessionLocal() as db:
+        await adjacency(db)  # warm the cache, as a long-running server would have
+        for depth in (1, 2, 3):
+            paths = {
+                "scan": lambda root: _scan(db, root, depth),
+                "cte": lambda root: neighbors(db, root, depth=depth, per_depth=per_depth),
+                "adjacency": lambda root: _walk(db, root, depth),
+            }
+            for name, fn in paths.items():
+                samples = []
+                for root in roots:
+                    t = time.perf_counter()
+                    await fn(root)
+                    samples.append((time.perf_counter() - t) * 1000)
+                print(f"{depth:>5} {name:<10} {statistics.median(samples):9.2f} {max(samples):9.2f}")
+
+
+async def _walk(db, root: str, depth: int):
+    from app.db.graph import adjacency, walk
+
+    return walk(await adjacency(db), root, depth, per_depth=25)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--per-depth", type=int, default=25)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-graph-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'graph.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main(args.rows, args.degree, args.repeat, args.per_depth))
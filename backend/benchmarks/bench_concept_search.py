@@ -0,0 +1,99 @@
+"""
+BroCoDDE — Concept Search Benchmark
+FTS5 (BM25, prefix terms, snippets) vs the old ILIKE scan over `--rows`
+synthetic concepts in a throwaway SQLite database created by create_tables(),
+so the FTS table and its sync triggers are the real ones. Reports insert cost
+with the triggers and per-query latency for both paths. Run from backend/:
+
+    python -m benchmarks.bench_concept_search --rows 50000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+VOCAB = (
+    "retrieval evaluation drift label noise budget speculative decoding kv cache quantization "
+    "distillation routing latency throughput attention sparse mixture experts alignment reward "
+    "hacking preference data curriculum tokenizer embedding index rerank agent memory planning "
+    "tool calling context window compression summarization benchmark contamination calibration "
+    "uncertainty ensemble pruning lora adapters inference serving batching scheduling cache"
+).split()
+DOMAINS = ("Machine Learning", "Cognitive Science", "Systems", "Product", "Statistics", "Economics")
+QUERIES = ("retrieval drift", "speculative", "kv cach", "label noise budget", "quantization lora",
+           "calibration uncertainty ensemble", "tool", "zzz-no-match")
+
+
+def _concepts(n: int, rng: random.Random):
+    from app.db.models import ConceptNode
+
+    for i in range(n):
+        words = rng.sample(VOCAB, 12)
+        yield ConceptNode(
+            title=" ".join(words[:3]).title(),
+            core_insight=f"{' '.join(words[3:10])} — observation {i}.",
+            domain=rng.choice(DOMAINS),
+            tags=words[10:12],
+            source_title=f"Source {i % 997}",
+        )
+
+
+async def _time(fn, repeat: int) -> tuple[list[float], int]:
+    samples, hits = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = len(await fn())
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, hits
+
+
+async def main(rows: int, repeat: int, limit: int) -> None:
+    from app.db.database import AsyncSessionLocal, create_tables
+    from app.db.search import search_concepts, search_concepts_ilike
+
+    await create_tables()
+    rng = random.Random(11)
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        batch = []
+        for concept in _concepts(rows, rng):
+            batch.append(concept)
+            if len(batch) == 5000:
+                db.add_all(batch)
+                await db.commit()
+                batch = []
+        db.add_all(batch)
+        await db.commit()
+    print(f"{rows} concepts inserted (FTS triggers on) in {time.perf_counter() - start:.1f}s")
+
+    print(f"\n{'query':<34} {'path':<6} {'hits':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    totals = {"fts": [], "ilike": []}
+    async with AsyncSessionLocal() as db:
+        for query in QUERIES:
+            for path, fn in (("fts", lambda: search_concepts(db, query, limit)),
+                             ("ilike", lambda: search_concepts_ilike(db, query, limit))):
+                samples, hits = await _time(fn, repeat)
+                samples.sort()
+                totals[path].extend(samples)
+                print(f"{query:<34} {path:<6} {hits:>5} {statistics.median(samples):9.2f} "
+                      f"{samples[int(len(samples) * .95) - 1]:9.2f}")
+    fts, ilike = statistics.median(totals["fts"]), statistics.median(totals["ilike"])
+    print(f"\nmedian over all queries: fts={fts:.2f}ms ilike={ilike:.2f}ms ({ilike / fts:.0f}× faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-search-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'search.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main(args.rows, args.repeat, args.limit))
@@ -0,0 +1,83 @@
+"""
+BroCoDDE — Hedged Request Benchmark
+Tail latency with and without hedging (app/models/hedging.py) against a
+simulated upstream: log-normal latency plus a `--slow-rate` fraction of calls
+that stall for `--slow-seconds` (a cold or overloaded provider).
+
+Time is scaled down (`--scale`) so a run takes seconds, not minutes. Reports
+p50/p95/p99 end-to-end latency and the extra request rate the hedges cost.
+Run from backend/:
+
+    python -m benchmarks.bench_hedging --calls 400 --budget 0.1
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+
+def _pct(xs: list[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))]
+
+
+async def _run(calls: int, concurrency: int, hedge: bool, args) -> None:
+    from app.config import settings
+    from app.models.hedging import hedge_stats_snapshot, hedged, reset_hedge_stats
+
+    settings.hedging_enabled = hedge
+    settings.hedge_tasks = "bench"
+    settings.hedge_percentile = args.percentile
+    settings.hedge_budget_ratio = args.budget
+    settings.hedge_min_samples = 20
+    settings.hedge_default_delay_seconds = 3.0 * args.scale
+    reset_hedge_stats()
+
+    rng = random.Random(42)
+    upstream_requests = 0
+    latencies: list[float] = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def _upstream() -> str:
+        nonlocal upstream_requests
+        upstream_requests += 1
+        latency = rng.lognormvariate(0.0, 0.35)          # ~1s median
+        if rng.random() < args.slow_rate:
+            latency += args.slow_seconds
+        await asyncio.sleep(latency * args.scale)
+        return "ok"
+
+    async def _call() -> None:
+        async with gate:
+            start = time.perf_counter()
+            await hedged("bench", _upstream, _upstream)
+            latencies.append((time.perf_counter() - start) / args.scale)
+
+    await asyncio.gather(*[_call() for _ in range(calls)])
+    label = "hedged" if hedge else "plain"
+    print(
+        f"{label:<7} p50={_pct(latencies, .5):5.2f}s p95={_pct(latencies, .95):5.2f}s "
+        f"p99={_pct(latencies, .99):5.2f}s  extra requests={upstream_requests / calls - 1:5.1%}"
+    )
+    if hedge:
+        print(f"        {hedge_stats_snapshot()['bench']}")
+
+
+async def main(args) -> None:
+    print(f"{args.calls} calls, {args.slow_rate:.0%} stall +{args.slow_seconds}s, "
+          f"hedge at p{int(args.percentile * 100)}, budget {args.budget:.0%}")
+    await _run(args.calls, args.concurrency, False, args)
+    await _run(args.calls, args.concurrency, True, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-seconds", type=float, default=8.0)
+    parser.add_argument("--percentile", type=float, default=0.9)
+    parser.add_argument("--budget", type=float, default=0.1)
+    parser.add_argument("--scale", type=float, default=0.01, help="wall seconds per simulated second")
+    asyncio.run(main(parser.parse_args()))
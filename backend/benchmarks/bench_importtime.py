@@ -0,0 +1,86 @@
+"""
+BroCoDDE — Import-time Report
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and reports:
+
+- the cumulative import time of app.main (median over `--runs`)
+- the slowest top-level packages and app modules (cumulative, from the median run)
+- any module from app.warmup.DEFERRED_IMPORTS that was imported at startup
+
+Exits non-zero when the median exceeds `--max-ms` or a deferred SDK is imported
+eagerly again. Run from backend/:
+
+    python -m benchmarks.bench_importtime --runs 5 --max-ms 1500
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def importtime(target: str = "app.main") -> dict[str, tuple[int, int, int]]:
+    """module → (self µs, cumulative µs, nesting depth) for one cold import of `target`."""
+    env = dict(os.environ, OPENROUTER_API_KEY="", LOG_LEVEL="WARNING",
+               LOG_DIR=os.path.join(tempfile.gettempdir(), "brocodde-importtime-logs"))
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                         cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    modules: dict[str, tuple[int, int, int]] = {}
+    for line in out.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(own), int(cumulative), len(indent) // 2)
+    return modules
+
+
+def report(modules: dict[str, tuple[int, int, int]], top: int) -> None:
+    packages: dict[str, int] = defaultdict(int)
+    for name, (own, _, _) in modules.items():
+        packages[name.split(".")[0]] += own
+    print(f"\n{'package (self time summed)':<40} {'ms':>8}")
+    for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{name:<40} {us / 1000:8.1f}")
+
+    app_modules = [(n, m) for n, m in modules.items() if n.startswith("app.")]
+    print(f"\n{'app module (cumulative)':<40} {'ms':>8}")
+    for name, (_, cumulative, _) in sorted(app_modules, key=lambda kv: -kv[1][1])[:top]:
+        print(f"{name:<40} {cumulative / 1000:8.1f}")
+
+
+def main(args) -> int:
+    from app.warmup import DEFERRED_IMPORTS
+
+    runs = [importtime(args.target) for _ in range(args.runs)]
+    totals = [r[args.target][1] / 1000 for r in runs]
+    median = statistics.median(totals)
+    median_run = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    print(f"import {args.target}: median={median:.1f}ms min={min(totals):.1f}ms max={max(totals):.1f}ms "
+          f"({args.runs} cold runs, {len(median_run)} modules)")
+    report(median_run, args.top)
+
+    failed = False
+    eager = [name for name in DEFERRED_IMPORTS if name in median_run]
+    if eager:
+        failed = True
+        print(f"\nREGRESSION: deferred imports loaded at startup: {', '.join(eager)}")
+    if args.max_ms is not None and median > args.max_ms:
+        failed = True
+        print(f"\nREGRESSION: median import {median:.1f}ms > {args.max_ms:.0f}ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=12, help="rows per table")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median import exceeds this")
+    sys.exit(main(parser.parse_args()))
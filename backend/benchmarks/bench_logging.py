@@ -0,0 +1,113 @@
+"""
+BroCoDDE — Logging Benchmark
+Request latency under log load: synchronous handlers vs the QueueHandler setup.
+
+Each request emits `--lines` log records (one with exc_info, like the chat route's
+stream-error path) before responding. Run from backend/:
+
+    python -m benchmarks.bench_logging --requests 500 --lines 20 [--fsync]
+
+--fsync forces every record to disk, approximating a slow or contended volume.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app import logger as app_logger
+
+
+class _FsyncFileHandler(RotatingFileHandler):
+    """File handler that fsyncs each record — a stand-in for slow disk I/O."""
+
+    def emit(self, record):
+        super().emit(record)
+        if self.stream:
+            os.fsync(self.stream.fileno())
+
+
+def _build_app(lines: int) -> FastAPI:
+    bench_app = FastAPI()
+    bench_app.add_middleware(BaseHTTPMiddleware, dispatch=app_logger.logging_middleware)
+
+    @bench_app.get("/work")
+    async def work() -> dict:
+        for i in range(lines):
+            if i == 0:
+                try:
+                    raise RuntimeError("simulated agent failure")
+                except RuntimeError:
+                    app_logger.logger.error("stream error", exc_info=True)
+            else:
+                app_logger.logger.info(f"tool call {i} finished")
+        return {"ok": True}
+
+    return bench_app
+
+
+async def _measure(bench_app: FastAPI, requests: int) -> list[float]:
+    timings: list[float] = []
+    async with AsyncClient(transport=ASGITransport(app=bench_app), base_url="http://bench") as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/work")
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(label: str, timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return (
+        f"{label:<8} mean={statistics.mean(ordered):6.2f}ms  "
+        f"p50={statistics.median(ordered):6.2f}ms  p95={p95:6.2f}ms"
+    )
+
+
+async def main(requests: int, lines: int, fsync: bool) -> None:
+    logger = app_logger.logger
+    bench_app = _build_app(lines)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        handler_cls = _FsyncFileHandler if fsync else RotatingFileHandler
+        sync_file = handler_cls(f"{tmp}/sync.log", maxBytes=50 * 1024 * 1024)
+        sync_file.setFormatter(app_logger.formatter)
+        queued_file = handler_cls(f"{tmp}/queued.log", maxBytes=50 * 1024 * 1024)
+        queued_file.setFormatter(app_logger.formatter)
+
+        original_handlers = list(logger.handlers)
+        try:
+            # Synchronous baseline: file handler attached directly to the logger
+            logger.handlers = [sync_file]
+            sync_timings = await _measure(bench_app, requests)
+
+            # Queue path: only the QueueHandler on the logger, file writes on a thread
+            listener = QueueListener(app_logger.log_queue, queued_file)
+            logger.handlers = [app_logger.queue_handler]
+            app_logger.shutdown_logging()
+            listener.start()
+            queued_timings = await _measure(bench_app, requests)
+            listener.stop()
+        finally:
+            logger.handlers = original_handlers
+
+    print(f"{requests} requests × {lines} log lines each{' (fsync)' if fsync else ''}")
+    print(_summary("sync", sync_timings))
+    print(_summary("queued", queued_timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--fsync", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.lines, args.fsync))
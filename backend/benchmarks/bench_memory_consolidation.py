@@ -0,0 +1,115 @@
+"""
+BroCoDDE — Memory Consolidation Benchmark
+One consolidation pass (app/memory/consolidate.py) over `--entries` synthetic
+agent memories in a throwaway SQLite database: `--distinct` underlying
+observations, each restated several times with a word dropped, swapped or
+added — what memory_write_tool and Agno's MemoryManager accumulate. Reports:
+
+- pass:    time for a dry run and for the real pass (clustering + writes)
+- shrink:  memories and prompt tokens (all rendered) before / after
+- ranking: ranked_memory() candidates and p50 latency before / after
+- again:   a second pass — should find (almost) nothing left to merge
+
+Run from backend/:
+
+    python -m benchmarks.bench_memory_consolidation --entries 5000 --distinct 800
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+TYPES = ("Pattern", "Insight", "Finding", "Hypothesis")
+VOCAB = (
+    "hook thread carousel audience saves comments reposts opening claim story failure benchmark latency "
+    "kv cache quantization retrieval evaluation drift label noise speculative decoding distillation routing "
+    "paper explainer analogy diagram code snippet question contrarian take numbers chart newsletter weekday "
+    "morning evening length sentence emoji jargon citation figure table example counterexample"
+).split()
+FILLER = ("posts", "with", "that", "get", "more", "than", "usually", "when", "the", "a", "tend", "to")
+PHASES = ("discovery", "structuring", "drafting", "vetting", "post-mortem")
+QUERY = "how should I open the thread about kv cache quantization?"
+
+
+def _variant(words: list[str], rng: random.Random) -> str:
+    words = list(words)
+    edit = rng.random()
+    if edit < .3:
+        words.pop(rng.randrange(len(words)))
+    elif edit < .6:
+        words.insert(rng.randrange(len(words)), rng.choice(FILLER))
+    elif edit < .8:
+        words[rng.randrange(len(words))] = rng.choice(FILLER)
+    return " ".join(words).capitalize() + "."
+
+
+def _entries(entries: int, distinct: int, rng: random.Random):
+    from app.db.models import MemoryEntry
+
+    bases = [(rng.choice(TYPES), rng.sample(VOCAB, 6) + rng.sample(FILLER, 5)) for _ in range(distinct)]
+    for _ in range(entries):
+        type_, words = rng.choice(bases)
+        rng.shuffle(words) if rng.random() < .05 else None
+        yield MemoryEntry(source="agent", type=type_, text=_variant(words, rng), tags=rng.sample(VOCAB, 2),
+                          lifecycle_phases=rng.sample(PHASES, rng.choice((0, 1, 2))))
+
+
+async def _ranking(repeat: int) -> tuple[int, float]:
+    from app.db.database import AsyncSessionLocal
+    from app.memory.store import ranked_memory
+
+    samples, candidates = [], 0
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            selection = await ranked_memory(db, "drafting", query=QUERY)
+            samples.append((time.perf_counter() - start) * 1000)
+            candidates = selection.candidates
+    return candidates, statistics.median(samples)
+
+
+async def main(entries: int, distinct: int, repeat: int) -> None:
+    from app.db.database import AsyncSessionLocal, create_tables
+    from app.memory.consolidate import consolidate_memories
+
+    await create_tables()
+    async with AsyncSessionLocal() as db:
+        db.add_all(_entries(entries, distinct, random.Random(5)))
+        await db.commit()
+    candidates, latency = await _ranking(repeat)
+
+    async with AsyncSessionLocal() as db:
+        dry = await consolidate_memories(db, dry_run=True)
+    async with AsyncSessionLocal() as db:
+        report = await consolidate_memories(db, trigger="manual")
+        await db.commit()
+    print(f"pass:    dry run {dry.seconds:.2f}s, consolidation {report.seconds:.2f}s "
+          f"({report.clusters} clusters from {report.scanned} memories)")
+    print(f"shrink:  {report.scanned} → {report.scanned - report.merged} memories "
+          f"(-{report.merged / report.scanned:.0%}), {report.tokens_before} → {report.tokens_after} tokens "
+          f"(-{1 - report.tokens_after / report.tokens_before:.0%})")
+
+    after_candidates, after_latency = await _ranking(repeat)
+    print(f"ranking: {candidates} → {after_candidates} candidates, p50 {latency:.1f}ms → {after_latency:.1f}ms")
+
+    async with AsyncSessionLocal() as db:
+        again = await consolidate_memories(db, dry_run=True)
+    print(f"again:   {again.merged} more merges found in {again.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-consolidate-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'consolidate.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main(args.entries, args.distinct, args.repeat))
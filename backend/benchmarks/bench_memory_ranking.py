@@ -0,0 +1,91 @@
+"""
+BroCoDDE — Memory Ranking Benchmark
+Prompt size and per-turn cost of memory injection as memory grows. For each
+`--sizes` count of synthetic context entries (throwaway SQLite database),
+compares:
+
+- all:    every entry rendered, as compose_context() / add_memories_to_context did
+- ranked: ranked_memory() against a chat message — top MEMORY_INJECT_K within
+          MEMORY_TOKEN_BUDGET (app/memory/ranking.py), p50 / p95 latency
+
+Run from backend/:
+
+    python -m benchmarks.bench_memory_ranking --sizes 50,500,5000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+TYPES = ("Experience", "Research", "Voice", "Goal", "Pattern", "Insight", "Finding", "Structural")
+TOPICS = ("distributed systems", "label noise", "kv cache", "speculative decoding", "rlhf", "retrieval",
+          "gpu scheduling", "evaluation", "hiring", "writing voice", "threads", "carousel posts")
+MESSAGES = ("how should I open the post about kv cache quantization?",
+            "find an angle on label noise in evaluation sets",
+            "draft a thread on speculative decoding speedups")
+
+
+def _summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    return f"p50={statistics.median(samples):7.2f}ms p95={samples[int(len(samples) * .95) - 1]:7.2f}ms"
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    from sqlalchemy import delete
+
+    from app.agents.compaction import estimate_tokens
+    from app.db.database import AsyncSessionLocal, create_tables
+    from app.db.models import MemoryEntry
+    from app.memory.models import ComposedContext
+    from app.memory.ranking import from_entry
+    from app.memory.store import get_identity_memory, ranked_memory
+
+    await create_tables()
+    rng = random.Random(11)
+    print(f"{'entries':>8} {'all tok':>9} {'ranked tok':>11}  latency")
+    for size in sizes:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(MemoryEntry))
+            db.add_all(
+                MemoryEntry(
+                    source=rng.choice(("user", "agent")),
+                    type=rng.choice(TYPES),
+                    text=f"Notes on {rng.choice(TOPICS)}: " + " ".join(rng.sample(TOPICS, 3)) + f" (#{i}).",
+                    tags=rng.sample(TOPICS, 2),
+                    lifecycle_phases=[],
+                )
+                for i in range(size)
+            )
+            await db.commit()
+
+        async with AsyncSessionLocal() as db:
+            items = [from_entry(e) for e in await get_identity_memory(db, lifecycle_phase="drafting")]
+            everything = ComposedContext(
+                identity_memory=[i.data for i in items if i.source == "user"],
+                agent_context=[i.data for i in items if i.source == "agent"],
+            ).to_prompt_text()
+
+            samples, tokens = [], 0
+            for n in range(repeat):
+                start = time.perf_counter()
+                selection = await ranked_memory(db, "drafting", query=MESSAGES[n % len(MESSAGES)])
+                samples.append((time.perf_counter() - start) * 1000)
+                tokens = selection.tokens
+        print(f"{size:>8} {estimate_tokens(everything):>9} {tokens:>11}  {_summary(samples)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,500,5000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-memory-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'memory.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main([int(s) for s in args.sizes.split(",")], args.repeat))
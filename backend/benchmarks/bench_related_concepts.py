@@ -0,0 +1,95 @@
+"""
+BroCoDDE — Related Concepts Benchmark
+Local concept vectors (app/db/vectors.py) over `--rows` synthetic concepts in a
+throwaway SQLite database. Reports:
+
+- build:  first use with no stored vectors (embed every concept, write BLOBs and matrix)
+- reopen: a fresh process opening the existing memory-mapped matrix
+- query:  related_concepts() by free text and by concept id, p50 / p95
+- add:    index_concept() for a new concept (vector BLOB + one matrix row)
+
+Run from backend/:
+
+    python -m benchmarks.bench_related_concepts --rows 50000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_concept_search import _concepts
+
+QUERIES = ("noisy labels feed back into retrieval evaluation", "speculative decoding with a draft model",
+           "quantizing the kv cache for cheaper serving", "reward model exploited by the policy")
+
+
+def _summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    return f"p50={statistics.median(samples):7.2f}ms p95={samples[int(len(samples) * .95) - 1]:7.2f}ms"
+
+
+async def main(rows: int, repeat: int, k: int) -> None:
+    from app.db.database import AsyncSessionLocal, create_tables
+    from app.db.vectors import ConceptVectorIndex, index_concept, index_for, related_concepts
+
+    await create_tables()
+    rng = random.Random(7)
+    async with AsyncSessionLocal() as db:
+        db.add_all(_concepts(rows, rng))
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        index = index_for(db)
+        await index.ensure(db)
+        await db.commit()
+        print(f"build:  {rows} concepts embedded + indexed in {time.perf_counter() - start:.2f}s "
+              f"(matrix {(index.directory / index.MATRIX).stat().st_size / 2**20:.1f} MiB, dim {index.dim})")
+
+        start = time.perf_counter()
+        await ConceptVectorIndex(index.directory).ensure(db)
+        print(f"reopen: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        by_text = []
+        for _ in range(repeat):
+            for query in QUERIES:
+                start = time.perf_counter()
+                await related_concepts(db, query=query, k=k)
+                by_text.append((time.perf_counter() - start) * 1000)
+        print(f"query (text):    {_summary(by_text)}")
+
+        ids = rng.sample(index._ids, min(repeat, len(index)))
+        by_id = []
+        for concept_id in ids:
+            start = time.perf_counter()
+            await related_concepts(db, concept_id=concept_id, k=k)
+            by_id.append((time.perf_counter() - start) * 1000)
+        print(f"query (concept): {_summary(by_id)}")
+
+        adds = []
+        for concept in _concepts(repeat, rng):
+            db.add(concept)
+            await db.flush()
+            start = time.perf_counter()
+            await index_concept(db, concept)
+            adds.append((time.perf_counter() - start) * 1000)
+        await db.commit()
+        print(f"add:             {_summary(adds)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-vectors-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'vectors.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main(args.rows, args.repeat, args.k))
@@ -0,0 +1,109 @@
+"""
+BroCoDDE — Startup Benchmark
+Cold-start cost of the backend, each sample in a fresh interpreter:
+
+- import:  `import app.main` wall time
+- ready:   process spawn → first 200 from GET /health (uvicorn, throwaway SQLite)
+- agentos: first request to the lazily built /agentapi mount (any status)
+
+Exits non-zero when a median exceeds `--max-import` / `--max-ready`, so CI can
+run it as a startup regression check. Run from backend/:
+
+    python -m benchmarks.bench_startup --runs 5 --max-import 6 --max-ready 10
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env(db_dir: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(db_dir, 'startup.db')}",
+        "OPENROUTER_API_KEY": "",
+        "LOG_LEVEL": "WARNING",
+        "LOG_DIR": os.path.join(db_dir, "logs"),
+    })
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(env: dict[str, str]) -> float:
+    """Seconds to `import app.main` in a fresh interpreter."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_ready(env: dict[str, str], timeout: float = 60.0) -> tuple[float, float]:
+    """(seconds from spawn until /health answers 200, seconds for the first /agentapi response)."""
+    import httpx
+
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as http:
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"server exited: {proc.stderr.read().decode()[-500:]}")
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"/health not ready after {timeout}s")
+                try:
+                    if http.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+            ready = time.perf_counter() - start
+
+            first = time.perf_counter()
+            http.get("/agentapi/", timeout=60)
+            return ready, time.perf_counter() - first
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main(args) -> int:
+    db_dir = tempfile.mkdtemp(prefix="brocodde-startup-")
+    env = _env(db_dir)
+    imports = [measure_import(env) for _ in range(args.runs)]
+    ready, agentos = zip(*[measure_ready(env) for _ in range(args.runs)])
+
+    failed = False
+    for label, xs, limit in (("import", imports, args.max_import), ("ready", ready, args.max_ready),
+                             ("agentos", agentos, None)):
+        median = statistics.median(xs)
+        over = limit is not None and median > limit
+        failed |= over
+        print(f"{label:<8} median={median * 1000:8.1f}ms  min={min(xs) * 1000:8.1f}ms  "
+              f"max={max(xs) * 1000:8.1f}ms" + (f"  limit={limit * 1000:.0f}ms" if limit else "")
+              + ("  REGRESSION" if over else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import", type=float, default=None, help="fail if median import exceeds (s)")
+    parser.add_argument("--max-ready", type=float, default=None, help="fail if median time-to-/health exceeds (s)")
+    sys.exit(main(parser.parse_args()))
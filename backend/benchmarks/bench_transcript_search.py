@@ -0,0 +1,124 @@
+"""
+BroCoDDE — Transcript Search Benchmark
+FTS5 over chat messages and drafts (transcript_fts) vs loading every task's
+chat_history / drafts JSON and scanning it in Python, on `--tasks` synthetic
+CoDDE-tasks holding `--messages` messages in total, in a throwaway SQLite
+database created by create_tables() — so the triggers that unpack the JSON are
+the real ones. Reports insert cost with the triggers, the cost of one more chat
+turn on a long task, and per-query latency (first page and a deep page) for
+both paths. Run from backend/:
+
+    python -m benchmarks.bench_transcript_search --tasks 500 --messages 100000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+VOCAB = (
+    "retrieval evaluation drift label noise budget speculative decoding kv cache quantization "
+    "distillation routing latency throughput attention sparse mixture experts alignment reward "
+    "hacking preference data curriculum tokenizer embedding index rerank agent memory planning "
+    "tool calling context window compression summarization benchmark contamination calibration "
+    "uncertainty ensemble pruning lora adapters inference serving batching scheduling cache "
+    "hook thread carousel audience story opening claim evidence example analogy"
+).split()
+FILLER = "the a of to and in that it is for on with as this we you what how".split()
+STAGES = ("discovery", "extraction", "structuring", "drafting", "vetting")
+QUERIES = ("jepa", "speculative decoding", "kv cach", "label noise budget", "hook", "zzz-no-match")
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCAB) if rng.random() < .4 else rng.choice(FILLER) for _ in range(words))
+
+
+def _tasks(n: int, messages: int, rng: random.Random):
+    from app.db.models import CoddeTask
+
+    per_task = max(1, messages // n)
+    for i in range(n):
+        history = []
+        for m in range(per_task):
+            content = _text(rng, rng.randint(15, 80))
+            if rng.random() < .002:
+                content += " what about jepa world models?"
+            history.append({"role": "user" if m % 2 == 0 else "agent", "content": content,
+                            "stage": STAGES[m * len(STAGES) // per_task]})
+        drafts = [{"content": _text(rng, 300), "version": v + 1, "stage": "drafting"} for v in range(3)]
+        yield CoddeTask(id=f"codde-bench-{i:05d}", title=_text(rng, 5), stage="drafting",
+                        chat_history=history, drafts=drafts)
+
+
+def _summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    return f"{statistics.median(samples):9.2f} {samples[int(len(samples) * .95) - 1]:9.2f}"
+
+
+async def main(tasks: int, messages: int, repeat: int, limit: int) -> None:
+    from sqlalchemy import text
+
+    from app.db.database import AsyncSessionLocal, create_tables
+    from app.db.models import CoddeTask
+    from app.db.search import search_transcripts, search_transcripts_scan
+
+    await create_tables()
+    rng = random.Random(7)
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        batch = []
+        for task in _tasks(tasks, messages, rng):
+            batch.append(task)
+            if len(batch) == 50:
+                db.add_all(batch)
+                await db.commit()
+                batch = []
+        db.add_all(batch)
+        await db.commit()
+        indexed = (await db.execute(text("SELECT count(*) FROM transcript_entries"))).scalar_one()
+    print(f"{tasks} tasks, {indexed} messages + drafts inserted (triggers on) in {time.perf_counter() - start:.1f}s")
+
+    async with AsyncSessionLocal() as db:
+        task = await db.get(CoddeTask, "codde-bench-00000")
+        samples = []
+        for n in range(repeat):
+            task.chat_history = [*task.chat_history, {"role": "user", "content": _text(rng, 40), "stage": "drafting"}]
+            start = time.perf_counter()
+            await db.commit()
+            samples.append((time.perf_counter() - start) * 1000)
+    print(f"one chat turn on a {len(task.chat_history)}-message task (commit + re-index): p50/p95 {_summary(samples)} ms")
+
+    print(f"\n{'query':<24} {'path':<5} {'page':>5} {'hits':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    totals = {"fts": [], "scan": []}
+    async with AsyncSessionLocal() as db:
+        for query in QUERIES:
+            for offset in (0, limit * 5):
+                for path, fn in (("fts", search_transcripts), ("scan", search_transcripts_scan)):
+                    runs = repeat if path == "fts" else max(2, repeat // 10)
+                    samples, hits = [], 0
+                    for _ in range(runs):
+                        start = time.perf_counter()
+                        hits = len((await fn(db, query, limit=limit, offset=offset))[0])
+                        samples.append((time.perf_counter() - start) * 1000)
+                    totals[path].extend(samples)
+                    print(f"{query:<24} {path:<5} {offset // limit + 1:>5} {hits:>5} {_summary(samples)}")
+    fts, scan = statistics.median(totals["fts"]), statistics.median(totals["scan"])
+    print(f"\nmedian over all queries: fts={fts:.2f}ms scan={scan:.2f}ms ({scan / fts:.0f}× faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    # Throwaway database — must be set before the app is imported
+    db_dir = tempfile.mkdtemp(prefix="brocodde-transcripts-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'transcripts.db')}"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(main(args.tasks, args.messages, args.repeat, args.limit))
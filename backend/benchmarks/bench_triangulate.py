@@ -0,0 +1,109 @@
+"""
+BroCoDDE — Triangulate Benchmark
+LLM turns and wall-clock for covering one Discovery topic with the five
+individual search tools (one tool call per model turn, as the Strategist used
+to) vs one `triangulate` call.
+
+Sources and the model are simulated: each source sleeps for its latency
+(`--latencies`, seconds, jittered), and each model turn costs TTFT + context
+prefill + the tool-call/answer tokens it writes. Tool results are appended to
+the context, so every later turn prefills more. The real toolkit methods run
+on top of the simulated sources. Run from backend/:
+
+    python -m benchmarks.bench_triangulate --runs 3
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+QUERY = "speculative decoding"
+INDIVIDUAL = ("asearch_hf_papers", "asearch_hackernews", "asearch_news", "asearch_research", "asearch_underrated")
+
+
+def _simulated_toolkit(latency: dict[str, float], rng: random.Random):
+    from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+
+    toolkit = ContentDiscoveryToolkit(exa_api_key="bench")
+
+    def _jitter(source: str) -> float:
+        return latency[source] * rng.uniform(0.7, 1.3)
+
+    def _hf(query, limit):
+        time.sleep(_jitter("HF"))
+        return [SimpleNamespace(id=f"2401.{i}", title=f"HF paper {i} on {query}", upvotes=50 - i,
+                                summary="Abstract. " * 20) for i in range(limit)]
+
+    async def _ahn(query, limit):
+        await asyncio.sleep(_jitter("HN"))
+        return [{"title": f"HN story {i} on {query}", "url": f"https://blog{i}.example.com/{query}",
+                 "points": 200 - i, "num_comments": 40, "objectID": str(i)} for i in range(limit)]
+
+    def _exa(query, num_results, category, include_domains=None):
+        source = {"news": "News", "research paper": "Research"}.get(category, "Underrated")
+        time.sleep(_jitter(source))
+        # One result per source overlaps with HN, as real coverage does
+        return [SimpleNamespace(title=f"{source} {i} on {query}", text="Excerpt. " * 40,
+                                url=f"https://blog{i}.example.com/{query}" if i == 0 else f"https://{source}.example.com/{i}")
+                for i in range(num_results)]
+
+    toolkit._hf_papers, toolkit._ahn_hits, toolkit._exa_results = _hf, _ahn, _exa
+    return toolkit
+
+
+async def _model_turn(context_tokens: int, output_tokens: int, args) -> None:
+    await asyncio.sleep(args.ttft + context_tokens / args.prefill_tps + output_tokens / args.decode_tps)
+
+
+async def _individual(toolkit, args) -> tuple[float, int, int]:
+    start, context, turns = time.perf_counter(), args.base_context, 0
+    for name in INDIVIDUAL:
+        await _model_turn(context, args.tool_call_tokens, args)
+        turns += 1
+        result = await getattr(toolkit, name)(QUERY, 3)
+        context += len(result) // 4
+    await _model_turn(context, args.answer_tokens, args)
+    return time.perf_counter() - start, turns + 1, context - args.base_context
+
+
+async def _triangulated(toolkit, args) -> tuple[float, int, int]:
+    start, context = time.perf_counter(), args.base_context
+    await _model_turn(context, args.tool_call_tokens, args)
+    result = await toolkit.atriangulate(QUERY, 3)
+    context += len(result) // 4
+    await _model_turn(context, args.answer_tokens, args)
+    return time.perf_counter() - start, 2, context - args.base_context
+
+
+async def main(args) -> None:
+    from app.config import settings
+
+    settings.triangulate_source_timeout_seconds = args.timeout
+    latency = dict(zip(("HF", "HN", "News", "Research", "Underrated"), args.latencies))
+    rng = random.Random(7)
+    toolkit = _simulated_toolkit(latency, rng)
+
+    print(f"simulated sources {latency}, {args.runs} runs per path")
+    for label, path in (("individual", _individual), ("triangulate", _triangulated)):
+        runs = [await path(toolkit, args) for _ in range(args.runs)]
+        walls = [r[0] for r in runs]
+        print(f"{label:<12} turns={runs[0][1]}  mean={statistics.mean(walls):6.2f}s  "
+              f"min={min(walls):6.2f}s  max={max(walls):6.2f}s  tool-result tokens={runs[0][2]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latencies", type=float, nargs=5, default=[1.2, 0.4, 1.5, 1.8, 1.6],
+                        metavar=("HF", "HN", "NEWS", "RESEARCH", "UNDERRATED"), help="source latency, seconds")
+    parser.add_argument("--timeout", type=float, default=8.0, help="triangulate per-source timeout")
+    parser.add_argument("--ttft", type=float, default=0.8, help="simulated model seconds to first token")
+    parser.add_argument("--prefill-tps", type=float, default=4000.0)
+    parser.add_argument("--decode-tps", type=float, default=60.0)
+    parser.add_argument("--base-context", type=int, default=6000, help="tokens of instructions + history")
+    parser.add_argument("--tool-call-tokens", type=int, default=40)
+    parser.add_argument("--answer-tokens", type=int, default=250)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,237 @@
+"""
+BroCoDDE — Local LLM Stub Server
+An OpenAI-compatible chat-completions endpoint for offline end-to-end load
+tests. Mock mode short-circuits the harness; pointing the app at this stub
+instead runs the real path: harness → Agno → tools → SSE.
+
+    python -m benchmarks.llm_stub --port 8900 --ttft 0.4 --tps 80
+    OPENROUTER_API_KEY=stub OPENROUTER_BASE_URL=http://127.0.0.1:8900/v1 uvicorn app.main:app
+
+What it does for each POST /v1/chat/completions (stream or not):
+
+- waits `--ttft` seconds, then emits tokens at `--tps` tokens/sec
+- streams `--reasoning-tokens` of `delta.reasoning` before the answer
+- answers JSON-mode requests (lint, structured calls) with a verdict for every
+  "- key" line of the prompt
+- follows a tool-call script (`--script file.json`, default SCRIPT below): the
+  first rule whose `match` regex hits the last user message emits its
+  `tool_calls` — if the request offers those tools — and the next request, which
+  carries the tool result, gets the rule's `after` text (or a default line)
+- sends a usage chunk when `stream_options.include_usage` is set
+
+Script rules: {"match": "<regex>", "tool_calls": [{"name": ..., "arguments": {...}}],
+"after": "<text after the tool results>", "content": "<text instead of tool calls>",
+"reasoning": "<reasoning text>"}. GET /stats reports request and token counts.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+# Drives a Discovery opening and a lint pass through real tools
+SCRIPT: list[dict[str, Any]] = [
+    {
+        "match": r"\[AUTO_OPEN\]",
+        "reasoning": "Patterns first, then the frontier scan, then the brief.",
+        "tool_calls": [{"name": "compute_patterns_tool", "arguments": {}}],
+        "after": (
+            "| Option | Angle | Why Now | Source |\n|---|---|---|---|\n"
+            "| A | Eval drift in retrieval | Offline sets go stale | [Post](https://example.com/a) |\n"
+            "| B | Label noise budgets | Cheap to audit | [Paper](https://example.com/b) |\n"
+            "| C | Small-model routing | Cost pressure | [Thread](https://example.com/c) |\n\n"
+            "Which of these pulls you?"
+        ),
+    },
+    {
+        "match": r"\blint\b",
+        "tool_calls": [{"name": "lint_draft_tool", "arguments": {
+            "draft_content": "Most eval suites measure the wrong thing.\n\nWe re-labelled 200 live queries weekly."}}],
+        "after": "Lint is back — the opening holds; tighten the second paragraph.",
+    },
+]
+
+WORDS = ("the quick practitioner notes that eval sets drift while labels stay noisy so "
+         "weekly sampling from live traffic catches regressions before shipping").split()
+
+
+@dataclass
+class StubConfig:
+    ttft: float = 0.4
+    tps: float = 80.0
+    reply_tokens: int = 120
+    reasoning_tokens: int = 0
+    script: list[dict[str, Any]] = field(default_factory=lambda: list(SCRIPT))
+
+
+@dataclass
+class _Reply:
+    content: str = ""
+    reasoning: str = ""
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _words(n: int, offset: int = 0) -> str:
+    return " ".join(WORDS[(offset + i) % len(WORDS)] for i in range(n))
+
+
+def _tokens(text: str) -> list[str]:
+    """Split text into ~word tokens, whitespace kept, so the stream reassembles exactly."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _text(message: dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):  # multimodal parts
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _plan(body: dict[str, Any], config: StubConfig) -> _Reply:
+    messages = body.get("messages") or []
+    last = messages[-1] if messages else {}
+    offered = {t.get("function", {}).get("name") for t in body.get("tools") or []}
+    reasoning = _words(config.reasoning_tokens, 3) if config.reasoning_tokens else ""
+
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        keys = re.findall(r"^- ([a-z_]+)\s*$", _text(last), flags=re.MULTILINE)
+        return _Reply(json.dumps({k: {"pass": True, "notes": ""} for k in keys}))
+
+    last_user = next((_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+    rule = next((r for r in config.script if re.search(r.get("match", "$^"), last_user)), None)
+
+    if last.get("role") == "tool":
+        done = [m.get("name") or "tool" for m in messages if m.get("role") == "tool"]
+        after = (rule or {}).get("after") or f"Done with {done[-1]}. {_words(config.reply_tokens // 4)}"
+        return _Reply(after, reasoning)
+
+    if rule:
+        reasoning = rule.get("reasoning", reasoning)
+        calls = [c for c in rule.get("tool_calls", []) if c["name"] in offered]
+        if calls:
+            return _Reply("", reasoning, calls)
+        if rule.get("content"):
+            return _Reply(rule["content"], reasoning)
+    return _Reply(_words(config.reply_tokens), reasoning)
+
+
+def create_app(config: StubConfig | None = None):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    config = config or StubConfig()
+    app = FastAPI(title="BroCoDDE LLM stub")
+    stats = {"requests": 0, "streamed": 0, "completion_tokens": 0, "tool_calls": 0}
+
+    def _chunk(completion_id: str, model: str, delta: dict | None, finish: str | None = None,
+               usage: dict | None = None) -> str:
+        payload: dict[str, Any] = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": model,
+            "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }
+        if usage is not None:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def _stream(reply: _Reply, model: str, usage: dict | None) -> AsyncIterator[str]:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        await asyncio.sleep(config.ttft)
+        yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+
+        interval = 1 / config.tps if config.tps > 0 else 0.0
+        for field_name, text in (("reasoning", reply.reasoning), ("content", reply.content)):
+            for token in _tokens(text):
+                yield _chunk(completion_id, model, {field_name: token})
+                await asyncio.sleep(interval)
+
+        for index, call in enumerate(reply.tool_calls):
+            yield _chunk(completion_id, model, {"tool_calls": [{
+                "index": index, "id": f"call_{uuid.uuid4().hex[:10]}", "type": "function",
+                "function": {"name": call["name"], "arguments": ""},
+            }]})
+            for piece in _tokens(json.dumps(call.get("arguments", {}))):
+                yield _chunk(completion_id, model, {"tool_calls": [{"index": index, "function": {"arguments": piece}}]})
+                await asyncio.sleep(interval)
+
+        yield _chunk(completion_id, model, {}, "tool_calls" if reply.tool_calls else "stop")
+        if usage is not None:
+            yield _chunk(completion_id, model, None, usage=usage)
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        reply = _plan(body, config)
+
+        prompt_tokens = sum(len(_text(m)) for m in body.get("messages") or []) // 4
+        completion_tokens = len(_tokens(reply.reasoning)) + len(_tokens(reply.content)) + 10 * len(reply.tool_calls)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        stats["requests"] += 1
+        stats["completion_tokens"] += completion_tokens
+        stats["tool_calls"] += len(reply.tool_calls)
+
+        if body.get("stream"):
+            stats["streamed"] += 1
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(_stream(reply, model, usage if include_usage else None),
+                                     media_type="text/event-stream")
+
+        await asyncio.sleep(config.ttft + completion_tokens / config.tps if config.tps > 0 else config.ttft)
+        message: dict[str, Any] = {"role": "assistant", "content": reply.content or None}
+        if reply.reasoning:
+            message["reasoning"] = reply.reasoning
+        if reply.tool_calls:
+            message["tool_calls"] = [
+                {"id": f"call_{uuid.uuid4().hex[:10]}", "type": "function",
+                 "function": {"name": c["name"], "arguments": json.dumps(c.get("arguments", {}))}}
+                for c in reply.tool_calls
+            ]
+        return JSONResponse({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion",
+            "created": int(time.time()), "model": model, "usage": usage,
+            "choices": [{"index": 0, "message": message,
+                         "finish_reason": "tool_calls" if reply.tool_calls else "stop"}],
+        })
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "brocodde"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main(args) -> None:
+    import uvicorn
+
+    script = SCRIPT
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    config = StubConfig(ttft=args.ttft, tps=args.tps, reply_tokens=args.reply_tokens,
+                        reasoning_tokens=args.reasoning_tokens, script=script)
+    print(f"LLM stub on http://{args.host}:{args.port}/v1 — ttft={config.ttft}s, {config.tps} tok/s, "
+          f"{len(script)} script rules")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft", type=float, default=0.4, help="seconds before the first token")
+    parser.add_argument("--tps", type=float, default=80.0, help="streamed tokens per second")
+    parser.add_argument("--reply-tokens", type=int, default=120, help="length of unscripted replies")
+    parser.add_argument("--reasoning-tokens", type=int, default=0, help="reasoning deltas before each reply")
+    parser.add_argument("--script", help="JSON list of tool-call script rules (default: built-in SCRIPT)")
+    main(parser.parse_args())
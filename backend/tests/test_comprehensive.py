@@ -35,8 +35,10 @@ async def override_get_db():
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def setup_test_db():
+    from app.db.search import ensure_search_indexes
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await ensure_search_indexes(conn)
     yield
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -45,6 +47,8 @@ async def setup_test_db():
         os.remove("./test_brocodde.db")
     except FileNotFoundError:
         pass
+    import shutil
+    shutil.rmtree("./test_brocodde.vectors", ignore_errors=True)  # concept vector matrix (app/db/vectors.py)
 
 
 @pytest_asyncio.fixture
@@ -1004,3 +1008,2331 @@ class TestConfig:
         assert t1 is not None
         assert t2 is not None
         assert t3 is not None
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 13. LOGGING (queue handler, JSON lines, sampling)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestLogging:
+    def test_logger_only_enqueues(self):
+        from logging.handlers import QueueHandler
+        from app.logger import logger
+        assert logger.handlers
+        assert all(isinstance(h, QueueHandler) for h in logger.handlers)
+
+    def test_json_formatter_emits_one_json_line(self):
+        import logging
+        from app.logger import JsonFormatter
+        record = logging.makeLogRecord({
+            "name": "brocodde", "levelname": "INFO", "levelno": logging.INFO,
+            "msg": "← 200 GET /tasks", "path": "/tasks", "status": 200,
+        })
+        line = JsonFormatter().format(record)
+        assert "\n" not in line
+        payload = json.loads(line)
+        assert payload["message"] == "← 200 GET /tasks"
+        assert payload["path"] == "/tasks"
+        assert payload["status"] == 200
+
+    def test_json_formatter_includes_traceback(self):
+        import logging
+        import sys
+        from app.logger import JsonFormatter
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.makeLogRecord({"msg": "failed", "exc_info": sys.exc_info()})
+        payload = json.loads(JsonFormatter().format(record))
+        assert "ValueError: boom" in payload["exc_info"]
+
+    def test_sampling_never_drops_mutations_or_errors(self):
+        from app.logger import should_log_request
+        assert should_log_request("POST", 201, sample_rate=0.0)
+        assert should_log_request("GET", 404, sample_rate=0.0)
+        assert should_log_request("GET", 500, sample_rate=0.0)
+        assert not should_log_request("OPTIONS", 200, sample_rate=1.0)
+
+    def test_sampling_applies_to_successful_gets(self):
+        from app.logger import should_log_request
+        assert not should_log_request("GET", 200, sample_rate=0.0)
+        assert should_log_request("GET", 200, sample_rate=1.0)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 14. CONCURRENCY — optimistic versioning, no lost updates
+# ══════════════════════════════════════════════════════════════════════════════
+
+async def committing_get_db():
+    """Like app.db.database.get_db — commits at the end of each request."""
+    async with TestSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+@pytest_asyncio.fixture
+async def committing_client(monkeypatch):
+    import uuid
+    from app.routes import tasks as tasks_routes
+    # Rows persist across tests here — the 3-digit random ids would start colliding
+    monkeypatch.setattr(tasks_routes, "_generate_task_id", lambda: f"codde-test-{uuid.uuid4().hex[:12]}")
+    app.dependency_overrides[get_db] = committing_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+class TestConcurrency:
+    async def _new_task(self, client) -> str:
+        resp = await client.post("/tasks", json={"role": "researcher", "intent": "teach"})
+        assert resp.status_code == 201, resp.text
+        return resp.json()["id"]
+
+    async def test_task_version_increments_on_update(self, committing_client):
+        task_id = await self._new_task(committing_client)
+        before = (await committing_client.get(f"/tasks/{task_id}")).json()["version"]
+        await committing_client.patch(f"/tasks/{task_id}", json={"title": "Versioned"})
+        after = (await committing_client.get(f"/tasks/{task_id}")).json()["version"]
+        assert after == before + 1
+
+    async def test_parallel_draft_saves_lose_nothing(self, committing_client):
+        import asyncio
+        task_id = await self._new_task(committing_client)
+        n = 8
+        responses = await asyncio.gather(*[
+            committing_client.post(f"/tasks/{task_id}/drafts", json={"content": f"draft {i}"})
+            for i in range(n)
+        ])
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses]
+        assert sorted(r.json()["version"] for r in responses) == list(range(1, n + 1))
+
+        async with TestSessionLocal() as session:
+            from app.db.models import CoddeTask
+            task = await session.get(CoddeTask, task_id)
+            assert sorted(d["content"] for d in task.drafts) == sorted(f"draft {i}" for i in range(n))
+
+    async def test_parallel_chat_turns_lose_nothing(self, committing_client):
+        import asyncio
+        task_id = await self._new_task(committing_client)
+        messages = [f"parallel message {i}" for i in range(5)]
+        responses = await asyncio.gather(*[
+            committing_client.post(f"/tasks/{task_id}/chat", json={"message": m, "user_id": "test_user"})
+            for m in messages
+        ])
+        assert all(r.status_code == 200 for r in responses)
+
+        history = (await committing_client.get(f"/tasks/{task_id}")).json()["chat_history"]
+        user_msgs = sorted(m["content"] for m in history if m["role"] == "user")
+        agent_msgs = [m for m in history if m["role"] == "agent"]
+        assert user_msgs == sorted(messages)
+        assert len(agent_msgs) == len(messages)
+
+    async def test_series_links_survive_a_concurrent_write(self, committing_client):
+        import sqlite3
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        from app.db.models import CoddeTask
+
+        task_id = await self._new_task(committing_client)
+        series_id = (await committing_client.post("/series", json={"name": "Race series"})).json()["id"]
+        rivals = []
+
+        def _rival_commits_first(session, flush_context, instances):
+            """A chat turn commits between the route's read and its flush."""
+            if any(isinstance(o, CoddeTask) and o.id == task_id for o in session.dirty) and not rivals:
+                rivals.append(task_id)
+                with sqlite3.connect("./test_brocodde.db") as conn:
+                    conn.execute("UPDATE codde_tasks SET version = version + 1 WHERE id = ?", (task_id,))
+
+        event.listen(Session, "before_flush", _rival_commits_first)
+        try:
+            for request in (
+                lambda: committing_client.patch(f"/series/{series_id}/tasks/{task_id}"),
+                lambda: committing_client.delete(f"/series/{series_id}/tasks/{task_id}"),
+                lambda: committing_client.patch(f"/series/{series_id}/tasks/{task_id}"),
+                lambda: committing_client.delete(f"/series/{series_id}"),
+            ):
+                rivals.clear()
+                resp = await request()
+                assert resp.status_code == 200, resp.text
+                assert rivals == [task_id]
+        finally:
+            event.remove(Session, "before_flush", _rival_commits_first)
+        assert (await committing_client.get(f"/tasks/{task_id}")).json()["series_id"] is None
+
+    async def test_mutate_task_retries_after_lost_race(self):
+        from app.db.concurrency import mutate_task
+        from app.db.models import CoddeTask
+
+        task_id = "codde-cas-retry-001"
+        async with TestSessionLocal() as session:
+            session.add(CoddeTask(id=task_id, role="researcher", intent="teach", drafts=[]))
+            await session.commit()
+
+        calls = 0
+
+        async def _apply(task):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                # A competing writer commits between our read and our write
+                async with TestSessionLocal() as other:
+                    rival = await other.get(CoddeTask, task_id)
+                    rival.drafts = [{"version": 1, "content": "rival"}]
+                    await other.commit()
+            task.drafts = list(task.drafts or []) + [{"version": len(task.drafts or []) + 1, "content": "mine"}]
+
+        async with TestSessionLocal() as session:
+            task = await mutate_task(session, task_id, _apply)
+            await session.commit()
+
+        assert calls == 2
+        assert [d["content"] for d in task.drafts] == ["rival", "mine"]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 15. IDEMPOTENCY KEYS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestIdempotency:
+    async def test_create_task_replays_same_task(self, committing_client):
+        headers = {"Idempotency-Key": "idem-create-1"}
+        payload = {"role": "researcher", "intent": "teach", "title": "Idempotent"}
+        first = await committing_client.post("/tasks", json=payload, headers=headers)
+        second = await committing_client.post("/tasks", json=payload, headers=headers)
+        assert first.status_code == second.status_code == 201
+        assert first.json()["id"] == second.json()["id"]
+        assert second.headers.get("Idempotent-Replayed") == "true"
+
+    async def test_key_reuse_with_different_body_rejected(self, committing_client):
+        headers = {"Idempotency-Key": "idem-create-2"}
+        await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"}, headers=headers)
+        resp = await committing_client.post("/tasks", json={"role": "coder", "intent": "teach"}, headers=headers)
+        assert resp.status_code == 422
+
+    async def test_draft_saved_once_per_key(self, committing_client):
+        task_id = (await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"})).json()["id"]
+        headers = {"Idempotency-Key": "idem-draft-1"}
+        for _ in range(3):
+            resp = await committing_client.post(
+                f"/tasks/{task_id}/drafts", json={"content": "only once"}, headers=headers,
+            )
+            assert resp.json() == {"version": 1, "saved": True}
+
+        async with TestSessionLocal() as session:
+            from app.db.models import CoddeTask
+            task = await session.get(CoddeTask, task_id)
+            assert len(task.drafts) == 1
+
+    async def test_metrics_logged_once_per_key(self, committing_client):
+        from sqlalchemy import func, select
+        from app.db.models import PublishedPost
+        task_id = (await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"})).json()["id"]
+        headers = {"Idempotency-Key": "idem-metrics-1"}
+        payload = {"impressions": 1000, "saves": 40}
+        first = await committing_client.post(f"/tasks/{task_id}/metrics", json=payload, headers=headers)
+        second = await committing_client.post(f"/tasks/{task_id}/metrics", json=payload, headers=headers)
+        assert first.status_code == second.status_code == 201
+        assert first.json()["post_id"] == second.json()["post_id"]
+
+        async with TestSessionLocal() as session:
+            count = await session.scalar(
+                select(func.count()).select_from(PublishedPost).where(PublishedPost.task_id == task_id)
+            )
+            assert count == 1
+
+    async def test_chat_retry_replays_stream_without_second_run(self, committing_client):
+        task_id = (await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"})).json()["id"]
+        headers = {"Idempotency-Key": "idem-chat-1"}
+        body = {"message": "Only run me once.", "user_id": "test_user"}
+        first = await committing_client.post(f"/tasks/{task_id}/chat", json=body, headers=headers)
+        second = await committing_client.post(f"/tasks/{task_id}/chat", json=body, headers=headers)
+        assert first.text == second.text
+        assert "[DONE]" in second.text
+        assert second.headers.get("Idempotent-Replayed") == "true"
+
+        history = (await committing_client.get(f"/tasks/{task_id}")).json()["chat_history"]
+        assert [m["role"] for m in history] == ["user", "agent"]
+
+    async def test_parallel_chat_with_same_key_attaches_to_inflight_run(self, committing_client):
+        import asyncio
+        task_id = (await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"})).json()["id"]
+        headers = {"Idempotency-Key": "idem-chat-2"}
+        body = {"message": "Double click.", "user_id": "test_user"}
+        responses = await asyncio.gather(*[
+            committing_client.post(f"/tasks/{task_id}/chat", json=body, headers=headers)
+            for _ in range(3)
+        ])
+        assert len({r.text for r in responses}) == 1
+
+        history = (await committing_client.get(f"/tasks/{task_id}")).json()["chat_history"]
+        assert len([m for m in history if m["role"] == "user"]) == 1
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 16. WEBSOCKET TRANSPORT
+# ══════════════════════════════════════════════════════════════════════════════
+
+class _WSClient:
+    """Minimal in-process ASGI WebSocket client (httpx's ASGITransport is HTTP-only)."""
+
+    def __init__(self, path: str = "/ws", recv_buffer: int = 0):
+        import asyncio
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue(maxsize=recv_buffer)
+        self._app_task = None
+
+    async def __aenter__(self):
+        import asyncio
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws",
+            "path": self.path, "raw_path": self.path.encode(), "root_path": "",
+            "query_string": b"", "headers": [], "subprotocols": [],
+            "server": ("test", 80), "client": ("127.0.0.1", 12345),
+        }
+        await self._to_app.put({"type": "websocket.connect"})
+        self._app_task = asyncio.create_task(app(scope, self._to_app.get, self._from_app.put))
+        accepted = await self._from_app.get()
+        assert accepted["type"] == "websocket.accept", accepted
+        return self
+
+    async def __aexit__(self, *exc):
+        import asyncio
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        while not self._from_app.empty():
+            self._from_app.get_nowait()
+        await asyncio.wait_for(self._app_task, timeout=5)
+
+    async def send(self, frame: dict) -> None:
+        await self._to_app.put({"type": "websocket.receive", "text": json.dumps(frame)})
+
+    async def receive(self, timeout: float = 5.0) -> dict:
+        """Next server message; a close is returned as {"type": "close", "code": ...}."""
+        import asyncio
+        message = await asyncio.wait_for(self._from_app.get(), timeout=timeout)
+        if message["type"] == "websocket.close":
+            return {"type": "close", "code": message.get("code")}
+        return json.loads(message["text"])
+
+
+class TestWebSocket:
+    async def _new_task(self, client) -> str:
+        resp = await client.post("/tasks", json={"role": "researcher", "intent": "teach"})
+        return resp.json()["id"]
+
+    async def test_ping(self):
+        async with _WSClient() as ws:
+            await ws.send({"type": "ping"})
+            assert await ws.receive() == {"type": "pong"}
+
+    async def test_two_tasks_multiplexed_on_one_socket(self, committing_client):
+        task_a = await self._new_task(committing_client)
+        task_b = await self._new_task(committing_client)
+
+        events: dict[str, list[dict]] = {"t1": [], "t2": []}
+        async with _WSClient() as ws:
+            await ws.send({"type": "chat", "task_id": task_a, "turn_id": "t1", "message": "About task A"})
+            await ws.send({"type": "chat", "task_id": task_b, "turn_id": "t2", "message": "About task B"})
+            done = set()
+            while done != {"t1", "t2"}:
+                msg = await ws.receive()
+                assert msg["type"] == "event", msg
+                events[msg["turn_id"]].append(msg)
+                if msg["event"] == "done":
+                    done.add(msg["turn_id"])
+
+        assert {e["task_id"] for e in events["t1"]} == {task_a}
+        assert {e["task_id"] for e in events["t2"]} == {task_b}
+        for turn in events.values():
+            assert any(e["event"] == "message" and e["data"] for e in turn)
+            assert turn[-1]["event"] == "done"
+
+        # Same persistence path as SSE: each task got its own user + agent message
+        for task_id, text in ((task_a, "About task A"), (task_b, "About task B")):
+            history = (await committing_client.get(f"/tasks/{task_id}")).json()["chat_history"]
+            assert [m["role"] for m in history] == ["user", "agent"]
+            assert history[0]["content"] == text
+
+    async def test_idempotency_key_shared_with_sse(self, committing_client):
+        task_id = await self._new_task(committing_client)
+        body = {"message": "One run, two transports.", "user_id": "test_user"}
+        await committing_client.post(
+            f"/tasks/{task_id}/chat", json=body, headers={"Idempotency-Key": "idem-ws-1"},
+        )
+        async with _WSClient() as ws:
+            await ws.send({"type": "chat", "task_id": task_id, "turn_id": "t1",
+                           "idempotency_key": "idem-ws-1", **body})
+            while (await ws.receive())["event"] != "done":
+                pass
+
+        history = (await committing_client.get(f"/tasks/{task_id}")).json()["chat_history"]
+        assert len([m for m in history if m["role"] == "user"]) == 1
+
+    async def test_stage_updates_pushed_to_subscribers(self, committing_client):
+        task_id = await self._new_task(committing_client)
+        async with _WSClient() as ws:
+            await ws.send({"type": "subscribe", "task_id": task_id})
+            await ws.send({"type": "ping"})
+            assert await ws.receive() == {"type": "pong"}  # subscribe has been processed
+
+            resp = await committing_client.patch(f"/tasks/{task_id}/stage", json={"stage": "extraction"})
+            assert resp.status_code == 200
+            msg = await ws.receive()
+            assert msg["type"] == "stage"
+            assert msg["task_id"] == task_id
+            assert msg["stage"] == "extraction"
+
+        from app.realtime import stage_hub
+        assert stage_hub.subscriber_count(task_id) == 0
+
+    async def test_stage_published_only_after_commit(self, committing_client):
+        """A subscriber that re-reads the task on the message sees the committed stage."""
+        import sqlite3
+        from app.realtime import stage_hub
+
+        task_id = await self._new_task(committing_client)
+        seen: list[tuple[str, str]] = []
+
+        class _Reader:
+            def offer(self, message):
+                with sqlite3.connect("./test_brocodde.db") as conn:
+                    row = conn.execute("SELECT stage FROM codde_tasks WHERE id = ?", (task_id,)).fetchone()
+                seen.append((message["stage"], row[0]))
+
+        reader = _Reader()
+        stage_hub.subscribe(task_id, reader)
+        try:
+            await committing_client.patch(f"/tasks/{task_id}/stage", json={"stage": "ready"})
+            await committing_client.post(f"/tasks/{task_id}/metrics", json={"impressions": 100, "saves": 5})
+        finally:
+            stage_hub.unsubscribe(task_id, reader)
+        assert seen == [("ready", "ready"), ("post-mortem", "post-mortem")]
+
+    async def test_concurrent_turn_cap(self, committing_client, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "ws_max_concurrent_turns", 1)
+        task_id = await self._new_task(committing_client)
+        async with _WSClient() as ws:
+            await ws.send({"type": "chat", "task_id": task_id, "turn_id": "t1", "message": "first"})
+            await ws.send({"type": "chat", "task_id": task_id, "turn_id": "t2", "message": "second"})
+            rejected = None
+            while True:
+                msg = await ws.receive()
+                if msg["type"] == "error":
+                    rejected = msg
+                elif msg["event"] == "done":
+                    break
+            assert rejected and rejected["turn_id"] == "t2"
+
+    async def test_slow_consumer_is_disconnected(self, committing_client, monkeypatch):
+        import asyncio
+        from app.config import settings
+        monkeypatch.setattr(settings, "ws_send_queue_size", 1)
+        monkeypatch.setattr(settings, "ws_send_timeout_seconds", 0.05)
+        task_id = await self._new_task(committing_client)
+
+        async with _WSClient(recv_buffer=1) as ws:
+            await ws.send({"type": "chat", "task_id": task_id, "turn_id": "t1", "message": "Never read"})
+            await asyncio.sleep(0.5)  # don't read — the turn must stall, not buffer forever
+            while (msg := await ws.receive())["type"] != "close":
+                pass
+            assert msg["code"] == 1013
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 17. HISTORY COMPACTION
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestHistoryCompaction:
+    async def _task_with_history(self, n_messages: int, words: int = 50) -> str:
+        import uuid
+        from app.db.models import CoddeTask
+        history = [
+            {"id": f"m{i}", "role": "user" if i % 2 == 0 else "agent",
+             "content": f"message {i} " + "word " * words}
+            for i in range(n_messages)
+        ]
+        task_id = f"compact-{uuid.uuid4().hex[:8]}"
+        async with TestSessionLocal() as session:
+            session.add(CoddeTask(id=task_id, role="researcher", intent="teach", chat_history=history))
+            await session.commit()
+        return task_id
+
+    @pytest.fixture
+    def small_budget(self, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "history_token_budget", 300)
+        monkeypatch.setattr(settings, "history_keep_recent_messages", 4)
+
+    async def test_under_budget_sends_full_history_without_model_call(self, small_budget):
+        from app.agents.compaction import prepare_history
+        task_id = await self._task_with_history(3)
+        summarize = AsyncMock(return_value="unused")
+
+        ctx = await prepare_history(task_id, summarize=summarize)
+        summarize.assert_not_called()
+        assert ctx.summary is None
+        assert [m["id"] for m in ctx.recent] == ["m0", "m1", "m2"]
+
+    async def test_over_budget_folds_older_turns_and_persists(self, small_budget):
+        from app.agents.compaction import prepare_history
+        from app.db.models import CoddeTask
+        task_id = await self._task_with_history(10)
+        summarize = AsyncMock(return_value="- summary of m0..m5")
+
+        ctx = await prepare_history(task_id, summarize=summarize)
+        previous, folded = summarize.call_args.args
+        assert previous is None
+        assert [m["id"] for m in folded] == ["m0", "m1", "m2", "m3", "m4", "m5"]
+        assert ctx.compacted and ctx.summary == "- summary of m0..m5"
+        assert [m["id"] for m in ctx.recent] == ["m6", "m7", "m8", "m9"]
+        assert "<conversation_summary>" in ctx.render() and "message 9" in ctx.render()
+
+        async with TestSessionLocal() as session:
+            task = await session.get(CoddeTask, task_id)
+            assert task.history_summary == "- summary of m0..m5"
+            assert task.history_summary_upto == 6
+
+    async def test_second_fold_is_incremental(self, small_budget):
+        from app.agents.compaction import prepare_history
+        from app.db.models import CoddeTask
+        task_id = await self._task_with_history(10)
+        await prepare_history(task_id, summarize=AsyncMock(return_value="S1"))
+
+        # Six more messages arrive → the tail is over budget again
+        async with TestSessionLocal() as session:
+            task = await session.get(CoddeTask, task_id)
+            task.chat_history = task.chat_history + [
+                {"id": f"n{i}", "role": "user", "content": "more " * 50} for i in range(6)
+            ]
+            await session.commit()
+
+        summarize = AsyncMock(return_value="S2")
+        ctx = await prepare_history(task_id, summarize=summarize)
+        previous, folded = summarize.call_args.args
+        assert previous == "S1"
+        # Only the messages after the first fold are sent — never the whole transcript
+        assert [m["id"] for m in folded] == ["m6", "m7", "m8", "m9", "n0", "n1"]
+        assert ctx.summary == "S2" and len(ctx.recent) == 4
+
+    async def test_failed_fold_falls_back_to_sliding_window(self, small_budget):
+        from app.agents.compaction import prepare_history
+        from app.db.models import CoddeTask
+        task_id = await self._task_with_history(10)
+
+        ctx = await prepare_history(task_id, summarize=AsyncMock(side_effect=RuntimeError("boom")))
+        assert not ctx.compacted
+        assert ctx.recent and ctx.recent[-1]["id"] == "m9"
+        assert ctx.recent_tokens <= 300 + 60  # newest messages that fit the budget
+        assert ctx.dropped == 10 - len(ctx.recent)
+
+        async with TestSessionLocal() as session:
+            assert (await session.get(CoddeTask, task_id)).history_summary_upto == 0
+
+    def test_apply_history_replaces_fixed_window(self):
+        from types import SimpleNamespace
+        from app.agents.compaction import HistoryContext, apply_history
+        agent = SimpleNamespace(add_history_to_context=True, additional_context=None)
+        apply_history(agent, HistoryContext(summary="S", recent=[{"role": "user", "content": "hi"}]))
+        assert agent.add_history_to_context is False
+        assert "S" in agent.additional_context and "User: hi" in agent.additional_context
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 18. MODEL REGISTRY & FAILOVER
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestModelFailover:
+    @pytest.fixture(autouse=True)
+    def fresh_registry(self):
+        from app.models.router import reset_model_cache
+        reset_model_cache()
+        yield
+        reset_model_cache()
+
+    def test_clients_are_memoized_per_tier_and_variant(self):
+        from app.models.router import get_model, get_model_for_task
+        assert get_model(3) is get_model(3)
+        assert get_model(3, use_alt=True) is get_model(3, use_alt=True)
+        assert get_model(3) is not get_model(3, use_alt=True)
+        assert get_model_for_task("deep_critique") is get_model(3)
+
+    def test_breaker_opens_after_consecutive_failures_and_fails_over(self, caplog):
+        import logging
+        from app.models.router import get_healthy_model, get_model, record_model_failure
+        primary, alt = get_model(3), get_model(3, use_alt=True)
+        for _ in range(3):
+            record_model_failure(primary, "502 Bad Gateway")
+
+        with caplog.at_level(logging.WARNING, logger="brocodde"):
+            assert get_healthy_model(3) is alt
+        assert any("Model failover" in r.getMessage() for r in caplog.records)
+
+    def test_memory_model_keeps_its_own_token_cap(self):
+        from app.models.router import MEMORY_MANAGER_MAX_TOKENS, get_memory_model, get_model
+        assert get_memory_model().max_tokens == MEMORY_MANAGER_MAX_TOKENS == 1024
+        assert get_memory_model() is get_memory_model()
+        assert get_model(1).max_tokens == 2048
+
+    def test_builders_leave_the_half_open_probe_to_the_harness(self):
+        import time
+        from app.config import settings
+        from app.models.health import health_tracker
+        from app.models.router import claim_healthy_model, get_healthy_model, get_model, record_model_failure
+        primary, alt = get_model(3), get_model(3, use_alt=True)
+        for _ in range(3):
+            record_model_failure(primary, "502 Bad Gateway")
+        health = health_tracker.get(primary.id)
+        health.opened_at = time.monotonic() - settings.model_breaker_cooldown_seconds - 1
+
+        built = get_healthy_model(3, claim_probe=False)    # what an agent builder gets
+        assert built is alt and health.state == "open"     # probe still available
+        assert claim_healthy_model(built) is primary       # the harness run takes it
+        assert health.state == "half_open"
+
+    def test_half_open_probe_closes_breaker_on_success(self):
+        from app.models.health import ModelHealth
+        h = ModelHealth("m")
+        for _ in range(3):
+            h.record_failure("boom", now=0.0)
+        assert h.state == "open" and not h.allow_request(now=1.0)
+
+        assert h.allow_request(now=61.0)           # cooldown elapsed → one probe
+        assert not h.allow_request(now=61.5)       # probe in flight → others use the alt
+        h.record_success(0.8, now=62.0)
+        assert h.state == "closed" and h.latency_ewma == 0.8
+
+    def test_slow_model_trips_on_latency_ewma(self):
+        from app.models.health import ModelHealth
+        h = ModelHealth("m")
+        for _ in range(5):
+            h.record_success(45.0, now=0.0)
+        assert h.state == "open"
+        assert "slow" in h.open_reason
+
+    async def test_call_with_failover_retries_on_alt(self):
+        from app.models.router import call_with_failover, get_model, model_health_snapshot
+        seen = []
+
+        async def _call(model):
+            seen.append(model.id)
+            if model is get_model(3):
+                raise RuntimeError("upstream timeout")
+            return "ok"
+
+        assert await call_with_failover(3, _call) == "ok"
+        assert seen == [get_model(3).id, get_model(3, use_alt=True).id]
+        assert model_health_snapshot()[get_model(3).id]["failures"] == 1
+
+    async def test_no_failover_when_alt_is_the_same_model(self):
+        from app.models.router import call_with_failover
+
+        async def _call(model):
+            raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            await call_with_failover(1, _call)  # tier 1 primary == alt
+
+    async def test_agent_run_fails_over_before_first_token(self, monkeypatch):
+        from types import SimpleNamespace
+        from app.agents import harness
+        from app.config import settings
+        from app.models.router import get_model
+
+        class _FakeAgent:
+            def __init__(self):
+                self.model = get_model(3)
+
+            async def arun(self, message, **kwargs):
+                if self.model is get_model(3):
+                    raise RuntimeError("gemini 503")
+                yield SimpleNamespace(event="RunContent", content=f"answer from {self.model.id}")
+
+        monkeypatch.setattr(harness, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(harness, "build_strategist", lambda **kw: _FakeAgent())
+        monkeypatch.setattr(settings, "history_compaction_enabled", False)
+
+        chunks = [c async for c in harness.stream_chat("hi", task_stage="discovery", task_id="t-failover")]
+        assert chunks == [f"answer from {get_model(3, use_alt=True).id}"]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 19. HEDGED REQUESTS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestHedging:
+    @pytest.fixture(autouse=True)
+    def hedging_on(self, monkeypatch):
+        from app.config import settings
+        from app.models.hedging import reset_hedge_stats
+        from app.models.router import reset_model_cache
+        monkeypatch.setattr(settings, "hedging_enabled", True)
+        monkeypatch.setattr(settings, "hedge_tasks", "lint_analysis,bench")
+        monkeypatch.setattr(settings, "hedge_default_delay_seconds", 0.05)
+        reset_hedge_stats()
+        reset_model_cache()
+        yield
+        reset_hedge_stats()
+        reset_model_cache()
+
+    @staticmethod
+    def _attempt(delay, value, log):
+        import asyncio
+
+        async def _run():
+            log.append(f"start:{value}")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                log.append(f"cancelled:{value}")
+                raise
+            return value
+        return _run
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        from app.models.hedging import hedge_stats_snapshot, hedged
+        log = []
+        result = await hedged("bench", self._attempt(1.0, "primary", log), self._attempt(0.01, "hedge", log))
+        assert result == "hedge"
+        assert "cancelled:primary" in log
+        stats = hedge_stats_snapshot()["bench"]
+        assert stats["hedged"] == 1 and stats["hedge_wins"] == 1 and stats["hedge_rate"] == 1.0
+
+    async def test_fast_primary_never_fires_the_hedge(self):
+        from app.models.hedging import hedge_stats_snapshot, hedged
+        log = []
+        assert await hedged("bench", self._attempt(0, "primary", log), self._attempt(0, "hedge", log)) == "primary"
+        assert log == ["start:primary"]
+        assert hedge_stats_snapshot()["bench"]["hedged"] == 0
+
+    async def test_budget_caps_hedges(self, monkeypatch):
+        from app.config import settings
+        from app.models.hedging import hedge_stats_snapshot, hedged
+        monkeypatch.setattr(settings, "hedge_budget_ratio", 0.0)
+        monkeypatch.setattr(settings, "hedge_budget_burst", 1.0)
+        log = []
+        for _ in range(2):
+            await hedged("bench", self._attempt(0.1, "primary", log), self._attempt(0, "hedge", log))
+        stats = hedge_stats_snapshot()["bench"]
+        assert stats["hedged"] == 1 and stats["budget_denied"] == 1
+
+    async def test_hedge_delay_tracks_latency_percentile(self, monkeypatch):
+        from app.config import settings
+        from app.models.hedging import HedgeStats
+        monkeypatch.setattr(settings, "hedge_min_samples", 10)
+        stats = HedgeStats()
+        assert stats.hedge_delay() == 0.05                      # default until enough samples
+        stats.primary.extend([0.1 * i for i in range(1, 11)])
+        assert stats.hedge_delay() == pytest.approx(1.0)        # p90 of 0.1 … 1.0
+        assert stats.estimate_saving(0.75) == pytest.approx(0.15)
+
+    async def test_disabled_task_runs_primary_only(self):
+        from app.models.hedging import hedge_stats_snapshot, hedged
+        log = []
+        assert await hedged("voice_transcription", self._attempt(0.1, "primary", log),
+                            self._attempt(0, "hedge", log)) == "primary"
+        assert log == ["start:primary"] and hedge_stats_snapshot() == {}
+
+    async def test_call_hedged_sends_hedge_to_alt_model(self):
+        import asyncio
+        from app.models.router import call_hedged, get_model
+        seen = []
+
+        async def _lint(model):
+            seen.append(model.id)
+            await asyncio.sleep(1.0 if model is get_model(2) else 0)
+            return model.id
+
+        assert await call_hedged("lint_analysis", _lint) == get_model(2, use_alt=True).id
+        assert seen == [get_model(2).id, get_model(2, use_alt=True).id]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 20. USAGE LEDGER
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestUsageLedger:
+    @pytest.fixture(autouse=True)
+    def fresh_registry(self):
+        from app.models.router import reset_model_cache
+        reset_model_cache()
+        yield
+        reset_model_cache()
+
+    @staticmethod
+    def _fake_agent(model, fail_on=None):
+        from types import SimpleNamespace
+
+        class _FakeAgent:
+            def __init__(self):
+                self.model = model
+
+            async def arun(self, message, **kwargs):
+                if fail_on is not None and self.model is fail_on:
+                    raise RuntimeError("upstream 503")
+                yield SimpleNamespace(event="ToolCallStarted", tool=SimpleNamespace(tool_name="search_exa"))
+                yield SimpleNamespace(event="RunContent", content="angle")
+                yield SimpleNamespace(event="RunCompleted", metrics=SimpleNamespace(
+                    input_tokens=1200, output_tokens=300, cache_read_tokens=800))
+
+        return _FakeAgent()
+
+    @pytest.fixture
+    def live_harness(self, monkeypatch):
+        from app.agents import harness
+        from app.config import settings
+        monkeypatch.setattr(harness, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(settings, "history_compaction_enabled", False)
+        return harness
+
+    async def _rows(self, task_id):
+        from sqlalchemy import select
+        from app.db.models import UsageLedger
+        async with TestSessionLocal() as session:
+            result = await session.execute(
+                select(UsageLedger).where(UsageLedger.task_id == task_id).order_by(UsageLedger.created_at))
+            return list(result.scalars())
+
+    async def test_run_writes_ledger_row(self, live_harness, monkeypatch):
+        import uuid
+        from app.models.router import get_model
+        monkeypatch.setattr(live_harness, "build_strategist", lambda **kw: self._fake_agent(get_model(3)))
+        task_id = f"usage-{uuid.uuid4().hex[:8]}"
+
+        chunks = [c async for c in live_harness.stream_chat("hi", task_stage="discovery", task_id=task_id)]
+        assert chunks == ["[TOOL:search_exa]", "angle"]
+
+        [row] = await self._rows(task_id)
+        assert (row.stage, row.agent, row.model, row.status) == ("discovery", "strategist", get_model(3).id, "ok")
+        assert (row.input_tokens, row.output_tokens, row.cached_tokens, row.tool_calls) == (1200, 300, 800, 1)
+        assert row.ttft_seconds is not None and row.total_seconds >= row.ttft_seconds
+
+    async def test_failover_meters_both_attempts(self, live_harness, monkeypatch):
+        import uuid
+        from app.models.router import get_model
+        monkeypatch.setattr(live_harness, "build_strategist",
+                            lambda **kw: self._fake_agent(get_model(3), fail_on=get_model(3)))
+        task_id = f"usage-{uuid.uuid4().hex[:8]}"
+        [c async for c in live_harness.stream_chat("hi", task_stage="discovery", task_id=task_id)]
+
+        rows = await self._rows(task_id)
+        assert [(r.model, r.status) for r in rows] == [
+            (get_model(3).id, "failover"), (get_model(3, use_alt=True).id, "ok")]
+        assert rows[0].ttft_seconds is None and rows[0].input_tokens == 0
+
+    async def test_abandoned_stream_is_metered_as_aborted(self, live_harness, monkeypatch):
+        import uuid
+        from app.models.router import get_model
+        monkeypatch.setattr(live_harness, "build_strategist", lambda **kw: self._fake_agent(get_model(3)))
+        task_id = f"usage-{uuid.uuid4().hex[:8]}"
+
+        stream = live_harness.stream_chat("hi", task_stage="discovery", task_id=task_id)
+        assert await stream.__anext__() == "[TOOL:search_exa]"
+        await stream.aclose()  # client disconnected after the first chunk
+
+        [row] = await self._rows(task_id)
+        assert (row.status, row.tool_calls) == ("aborted", 1)
+        assert row.ttft_seconds is not None
+
+    async def test_usage_endpoint_aggregates_by_day_and_stage(self, client, live_harness, monkeypatch):
+        import uuid
+        from app.models.router import get_model
+        monkeypatch.setattr(live_harness, "build_strategist", lambda **kw: self._fake_agent(get_model(3)))
+        task_id = f"usage-{uuid.uuid4().hex[:8]}"
+        for _ in range(2):
+            [c async for c in live_harness.stream_chat("hi", task_stage="discovery", task_id=task_id)]
+
+        resp = await client.get("/observatory/usage", params={"task_id": task_id, "days": 7})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["totals"]["runs"] == 2 and body["totals"]["input_tokens"] == 2400
+        assert len(body["by_day"]) == 1 and body["by_day"][0]["tool_calls"] == 2
+        assert body["by_stage"] == [{**body["by_stage"][0], "stage": "discovery", "agent": "strategist"}]
+        assert body["by_stage"][0]["cached_tokens"] == 1600
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 21. HEURISTIC PRE-LINT
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestHeuristicPrelint:
+    GOOD = (
+        "Most teams underestimate label noise.\n\n"
+        "We audited 12 projects at Stripe and found 8% of labels wrong, because annotators "
+        "skipped edge cases. The fix: one afternoon of label review before training cut "
+        "our debugging time by 40%."
+    )
+
+    def test_schema_matches_model_linter(self):
+        from app.agents.prelint import LINT_CHECKS, heuristic_lint
+        result = heuristic_lint(self.GOOD)
+        for key in LINT_CHECKS:
+            assert set(result[key]) == {"pass", "notes"}
+        assert result["overall_pass"] is True and result["engine"] == "heuristic"
+
+    def test_phrase_rules_fail_conclusively_with_citations(self):
+        from app.agents.prelint import heuristic_lint
+        result = heuristic_lint("As a Columbia PhD student, I see this daily. What do you think? 🚀🚀🚀")
+        assert result["credential_stating"]["pass"] is False
+        assert "As a Columbia PhD student" in result["credential_stating"]["notes"]
+        assert result["engagement_bait"]["pass"] is False
+        assert result["conclusive"] is True and result["overall_pass"] is False
+
+    def test_ordinary_prose_is_not_credential_or_bait(self):
+        from app.agents.prelint import heuristic_lint
+        prose = heuristic_lint("Our cache ran 3 years in production without a restart. "
+                               "Share and compare your numbers with the baseline. " + self.GOOD)
+        assert prose["credential_stating"]["pass"] and prose["engagement_bait"]["pass"]
+        assert not prose["conclusive"]
+        pitch = heuristic_lint("I've spent 10 years in ML infra. Like and share if this helped! " + self.GOOD)
+        assert not pitch["credential_stating"]["pass"] and not pitch["engagement_bait"]["pass"]
+        assert pitch["conclusive"]
+
+    def test_emoji_overuse_and_fluff(self):
+        from app.agents.prelint import heuristic_lint
+        assert heuristic_lint(self.GOOD + " 🚀 ✅ 🔥")["engagement_bait"]["pass"] is False
+        fluff = heuristic_lint("In today's rapidly changing world, data matters. " + self.GOOD)
+        assert fluff["fluff_detection"]["pass"] is False and fluff["conclusive"]
+
+    def test_opening_hook_score(self):
+        from app.agents.prelint import hook_score
+        weak, reasons = hook_score("I have been thinking about evaluation for a while now?")
+        strong, _ = hook_score("Most eval suites measure the wrong thing.")
+        assert weak < 50 <= strong
+        assert any("I" in r for r in reasons)
+
+    def test_rant_needs_multiple_signals(self):
+        from app.agents.prelint import heuristic_lint
+        rant = ("Everyone is WRONG about this! Nobody gets it! Wake up! "
+                "The entire industry is STUPID! This makes me so angry!")
+        result = heuristic_lint(rant)
+        assert result["rant_detection"]["pass"] is False
+        assert result["conclusive"] is False  # tone is a judgement call — the model still decides
+
+    async def test_conclusive_failure_skips_model_call(self, monkeypatch):
+        from app.agents import tools
+        from app.models import router
+        monkeypatch.setattr(router, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(router, "call_hedged", AsyncMock(side_effect=AssertionError("model called")))
+        result = await tools.lint_draft_tool("With 6+ years of experience in ML, I know. Thoughts?")
+        assert result["engine"] == "heuristic" and result["credential_stating"]["pass"] is False
+
+    async def test_model_failure_falls_back_to_heuristics(self, monkeypatch):
+        from app.agents import tools
+        from app.models import router
+        monkeypatch.setattr(router, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(router, "call_hedged", AsyncMock(side_effect=RuntimeError("502")))
+        result = await tools.lint_draft_tool(self.GOOD)
+        assert "502" in result["error"]
+        assert result["engine"] == "heuristic" and result["overall_pass"] is True
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 22. FAN-OUT LINT & TURN EVENTS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class _FakeLintCompletions:
+    """chat.completions.create() stand-in that answers whichever checks the prompt asks for."""
+
+    def __init__(self, delay=0.05, fail_checks=()):
+        self.delay, self.fail_checks = delay, set(fail_checks)
+        self.in_flight = self.max_in_flight = self.calls = 0
+
+    async def create(self, *, messages, **kwargs):
+        import asyncio
+        from types import SimpleNamespace
+        from app.agents.prelint import LINT_CHECKS
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        checks = [c for c in LINT_CHECKS if f"- {c}" in messages[-1]["content"]]
+        if self.fail_checks & set(checks):
+            raise RuntimeError("upstream 502")
+        content = json.dumps({c: {"pass": c != "opening_strength", "notes": f"note for {c}"} for c in checks})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class TestFanoutLint:
+    DRAFT = TestHeuristicPrelint.GOOD
+
+    @pytest.fixture
+    def fake_model(self, monkeypatch):
+        from types import SimpleNamespace
+        from app.config import settings
+        from app.models import router
+        fake = _FakeLintCompletions()
+        monkeypatch.setattr(router, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(router, "get_openai_client",
+                            lambda: SimpleNamespace(chat=SimpleNamespace(completions=fake)))
+        monkeypatch.setattr(settings, "lint_mode", "fanout")
+        return fake
+
+    async def _collect(self, coro_factory):
+        """Run the lint inside a turn and return (result, lint events)."""
+        from app.agents.turn_events import merge_turn_events
+        box = {}
+
+        async def _turn():
+            box["result"] = await coro_factory()
+            yield "done"
+
+        events = [(k, d) async for k, d in merge_turn_events(_turn()) if k == "lint"]
+        return box["result"], [json.loads(d) for _, d in events]
+
+    async def test_fanout_runs_checks_concurrently_and_streams_each(self, fake_model):
+        from app.agents.tools import lint_draft_tool
+        result, events = await self._collect(lambda: lint_draft_tool(self.DRAFT))
+        assert fake_model.calls == 6 and fake_model.max_in_flight == 6
+        assert sorted(e["check"] for e in events) == sorted(
+            ["rant_detection", "fluff_detection", "opening_strength",
+             "credential_stating", "engagement_bait", "micro_learning"])
+        assert result["opening_strength"] == {"pass": False, "notes": "note for opening_strength"}
+        assert result["overall_pass"] is False and result["engine"] == "model"
+
+    async def test_shared_semaphore_caps_in_flight_calls(self, fake_model, monkeypatch):
+        from app.agents.tools import lint_draft_tool
+        from app.config import settings
+        monkeypatch.setattr(settings, "lint_max_concurrency", 2)
+        import app.agents.vetting as vetting
+        monkeypatch.setattr(vetting, "_semaphore", None)
+        await lint_draft_tool(self.DRAFT)
+        assert fake_model.max_in_flight == 2
+
+    async def test_groups_and_partial_failure_keep_heuristic_verdicts(self, fake_model, monkeypatch):
+        from app.agents.tools import lint_draft_tool
+        from app.config import settings
+        monkeypatch.setattr(settings, "lint_fanout_groups", "rant_detection,fluff_detection;micro_learning")
+        fake_model.fail_checks = {"micro_learning"}
+        result = await lint_draft_tool(self.DRAFT)
+        assert fake_model.calls == 5  # one grouped call + micro_learning + three singles
+        assert result["heuristic_checks"] == ["micro_learning"]
+        assert result["micro_learning"]["pass"] is True and result["micro_learning"]["notes"] == ""
+        assert result["rant_detection"]["notes"] == "note for rant_detection"
+
+    async def test_single_mode_uses_one_call(self, fake_model, monkeypatch):
+        from app.agents.tools import lint_draft_tool
+        from app.config import settings
+        monkeypatch.setattr(settings, "lint_mode", "single")
+        result, events = await self._collect(lambda: lint_draft_tool(self.DRAFT))
+        assert fake_model.calls == 1 and len(events) == 6 and result["engine"] == "model"
+
+    async def test_lint_events_reach_the_sse_stream(self, committing_client, monkeypatch):
+        from app.agents.turn_events import emit_turn_event
+        from app.routes import chat as chat_routes
+
+        async def _fake_stream(**kwargs):
+            yield "Running lint on the whole draft now. "  # longer than the partial-tag holdback
+            emit_turn_event("lint", json.dumps({"check": "engagement_bait", "pass": False, "notes": "x"}))
+            yield "Done."
+
+        monkeypatch.setattr(chat_routes, "stream_chat", _fake_stream)
+        task_id = (await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"})).json()["id"]
+        resp = await committing_client.post(f"/tasks/{task_id}/chat", json={"message": "lint it"})
+        body = resp.text
+        assert 'event: lint\ndata: {"check": "engagement_bait"' in body
+        assert body.index("Running lint") < body.index("event: lint") < body.index("Done.")
+
+    async def test_emit_outside_a_turn_is_a_noop(self):
+        from app.agents.turn_events import emit_turn_event
+        assert emit_turn_event("lint", "{}") is False
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 23. CHUNKED (MAP-REDUCE) LINT
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestChunkedLint:
+    SECTION = TestHeuristicPrelint.GOOD
+
+    def _long_draft(self, sections=20):
+        return "\n\n".join(f"## Section {i}\n\n{self.SECTION}" for i in range(sections))
+
+    @pytest.fixture
+    def fake_model(self, monkeypatch):
+        from types import SimpleNamespace
+        from app.config import settings
+        from app.models import router
+        fake = _FakeLintCompletions()
+        fake.prompts = []
+        create = fake.create
+
+        async def _recording_create(*, messages, **kwargs):
+            fake.prompts.append(messages[-1]["content"])
+            return await create(messages=messages, **kwargs)
+
+        fake.create = _recording_create
+        monkeypatch.setattr(router, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(router, "get_openai_client",
+                            lambda: SimpleNamespace(chat=SimpleNamespace(completions=fake)))
+        monkeypatch.setattr(settings, "lint_mode", "single")
+        monkeypatch.setattr(settings, "lint_chunk_max_tokens", 200)
+        return fake
+
+    def test_chunks_cover_the_draft_at_section_boundaries(self):
+        from app.agents.vetting import chunk_draft
+        draft = self._long_draft()
+        chunks = chunk_draft(draft, 200)
+        assert len(chunks) > 1
+        assert all(draft[c.start:c.end] == c.text and len(c.text) <= 800 for c in chunks)
+        assert all(c.text.startswith("## Section") for c in chunks)
+        assert chunks[-1].end == len(draft.rstrip())
+        assert chunks[1].line_start == draft.count("\n", 0, chunks[1].start) + 1
+        assert chunk_draft(self.SECTION, 2000)[0].text == self.SECTION
+
+    def test_oversized_paragraph_is_split_at_sentences(self):
+        from app.agents.vetting import chunk_draft
+        draft = "We measured it. " * 300
+        chunks = chunk_draft(draft, 100)
+        assert len(chunks) > 1 and all(len(c.text) <= 400 for c in chunks)
+        assert all(c.text.endswith(".") for c in chunks)
+
+    def test_budget_is_the_chunk_setting(self, monkeypatch):
+        from app.agents.vetting import MIN_CHUNK_TOKENS, chunk_token_budget
+        from app.config import settings
+        assert chunk_token_budget() == settings.lint_chunk_max_tokens
+        monkeypatch.setattr(settings, "lint_chunk_max_tokens", 3000)
+        assert chunk_token_budget() == 3000
+        monkeypatch.setattr(settings, "lint_chunk_max_tokens", 10)
+        assert chunk_token_budget() == MIN_CHUNK_TOKENS
+
+    async def test_long_draft_is_linted_in_concurrent_chunks(self, fake_model):
+        from app.agents.tools import lint_draft_tool
+        from app.config import settings
+        draft = self._long_draft()
+        result = await lint_draft_tool(draft)
+        chunks = result["chunks"]
+        assert len(chunks) > 1 and fake_model.calls == len(chunks)
+        assert fake_model.max_in_flight == min(len(chunks), settings.lint_max_concurrency)
+        # Nothing past the old 4000-char cut is dropped
+        assert len(draft) > 4000 and "## Section 19" in "".join(fake_model.prompts)
+        # opening_strength is only asked of the first chunk
+        assert sum("- opening_strength" in p for p in fake_model.prompts) == 1
+        assert result["opening_strength"]["notes"].startswith("[part 1, lines 1–")
+        assert result["opening_strength"]["locations"][0]["index"] == 0
+        assert result["rant_detection"] == {"pass": True, "notes": ""}
+        assert result["overall_pass"] is False and result["engine"] == "model"
+
+    async def test_failed_chunk_keeps_the_rest(self, fake_model):
+        from app.agents.tools import lint_draft_tool
+        fake_model.fail_checks = {"opening_strength"}  # only the first chunk's call asks for it
+        result = await lint_draft_tool(self._long_draft())
+        assert result["heuristic_checks"] == ["opening_strength"]
+        assert "upstream 502" in result["error"]
+        assert result["rant_detection"]["pass"] is True and result["engine"] == "model"
+
+    def test_reduce_rules_and_line_locations(self):
+        from app.agents.vetting import DraftChunk, reduce_chunk_results
+        from app.agents.prelint import heuristic_lint
+        chunks = [DraftChunk(0, "Hook.\nBody.", 0, 11, 1, 2),
+                  DraftChunk(1, "More.\nWhat do you think?", 13, 37, 4, 5)]
+        ok = {"pass": True, "notes": ""}
+        first = {c: ok for c in ("rant_detection", "fluff_detection", "opening_strength",
+                                 "credential_stating", "engagement_bait")}
+        first["micro_learning"] = {"pass": False, "notes": "nothing concrete"}
+        second = {**first, "micro_learning": ok,
+                  "engagement_bait": {"pass": False, "notes": 'Ends with "What do you think?"'}}
+        result = reduce_chunk_results(chunks, [first, second], heuristic_lint("x"))
+        assert result["micro_learning"] == ok                       # any chunk teaching is enough
+        assert result["engagement_bait"]["pass"] is False           # any chunk failing fails
+        assert result["engagement_bait"]["notes"].startswith("[line 5] ")
+        assert result["engagement_bait"]["locations"][0]["offset"] == 19
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 24. ASYNC DISCOVERY TOOLS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestAsyncDiscoveryTools:
+    TOOLS = ("get_hf_daily_papers", "search_hf_papers", "search_hackernews",
+             "search_news", "search_research", "search_underrated", "triangulate")
+
+    def test_every_tool_has_an_async_twin(self):
+        import inspect
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+        toolkit = ContentDiscoveryToolkit()
+        async_functions = toolkit.get_async_functions()
+        assert tuple(async_functions) == self.TOOLS
+        for name in self.TOOLS:
+            fn = async_functions[name]
+            assert inspect.iscoroutinefunction(fn.entrypoint)
+            assert fn.entrypoint.__doc__ == toolkit.functions[name].entrypoint.__doc__
+
+    async def test_hackernews_uses_the_shared_async_client(self, monkeypatch):
+        import httpx
+        from app.agents import content_discovery_toolkit as cdt
+
+        def _handler(request):
+            assert request.url.params["query"] == "ai agents"
+            return httpx.Response(200, json={"hits": [
+                {"title": "Agents in prod", "points": 120, "num_comments": 40,
+                 "objectID": "1", "url": "https://example.com/a"}]})
+
+        from app.agents.prefetch import signal_cache
+        signal_cache.clear()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        monkeypatch.setattr(cdt, "_http_client", lambda: client)
+        result = await cdt.ContentDiscoveryToolkit().asearch_hackernews("ai agents")
+        assert "**1. Agents in prod** (120 pts, 40 comments)" in result
+        assert "Article: https://example.com/a" in result
+        await client.aclose()
+
+    def test_paper_search_reports_a_missing_sdk(self, monkeypatch):
+        import sys
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+        monkeypatch.setitem(sys.modules, "huggingface_hub", None)  # import raises ImportError
+        result = ContentDiscoveryToolkit().search_hf_papers("rlhf")
+        assert result == "[ContentDiscovery] huggingface_hub not installed."
+
+    async def test_chats_keep_streaming_while_an_sdk_call_is_in_flight(self, committing_client, monkeypatch):
+        import asyncio
+        import time
+        from types import SimpleNamespace
+        import huggingface_hub
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+        from app.routes import chat as chat_routes
+
+        class _SlowHfApi:
+            def __init__(self, token=None):
+                pass
+
+            def list_papers(self, query):
+                time.sleep(1.0)  # the blocking SDK call
+                return [SimpleNamespace(id="2401.1", title="Slow paper", upvotes=50, summary="s")]
+
+        async def _fake_stream(**kwargs):
+            for word in ("Streaming ", "through ", "the ", "tool ", "call."):
+                await asyncio.sleep(0.01)
+                yield word
+
+        monkeypatch.setattr(huggingface_hub, "HfApi", _SlowHfApi)
+        monkeypatch.setattr(chat_routes, "stream_chat", _fake_stream)
+        task_id = (await committing_client.post("/tasks", json={"role": "researcher", "intent": "teach"})).json()["id"]
+
+        tool = asyncio.create_task(ContentDiscoveryToolkit().asearch_hf_papers("slow"))
+        await asyncio.sleep(0.05)  # the worker thread is now blocked in list_papers
+        start = time.perf_counter()
+        resp = await committing_client.post(f"/tasks/{task_id}/chat", json={"message": "hi"})
+        elapsed = time.perf_counter() - start
+
+        assert "call." in resp.text and not tool.done()
+        assert elapsed < 0.8
+        assert "Slow paper" in await tool
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 25. TRIANGULATE DISCOVERY TOOL
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestTriangulate:
+    HN_HIT = {"title": "Spec decoding in prod", "url": "https://www.example.com/post/",
+              "points": 90, "num_comments": 12, "objectID": "9"}
+
+    @pytest.fixture
+    def toolkit(self, monkeypatch):
+        import time
+        from types import SimpleNamespace
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+        from app.config import settings
+        from app.agents.prefetch import signal_cache
+        monkeypatch.setattr(settings, "triangulate_source_timeout_seconds", 0.3)
+        signal_cache.clear()
+        toolkit = ContentDiscoveryToolkit(exa_api_key="test-key")
+
+        def _hf(query, limit):
+            time.sleep(0.1)
+            return [SimpleNamespace(id="2401.1", title="Speculative Decoding Survey", upvotes=40)]
+
+        async def _ahn(query, limit):
+            import asyncio
+            await asyncio.sleep(0.1)
+            return [self.HN_HIT]
+
+        def _exa(query, num_results, category, include_domains=None):
+            if category == "research paper":
+                time.sleep(1.0)  # slower than the per-source timeout
+            return [SimpleNamespace(title="Spec decoding in prod", url="https://example.com/post", text="excerpt")]
+
+        toolkit._hf_papers = _hf
+        toolkit._ahn_hits = _ahn
+        toolkit._hn_hits = lambda query, limit: [self.HN_HIT]
+        toolkit._exa_results = _exa
+        return toolkit
+
+    def _assert_digest(self, digest):
+        assert digest.startswith("## Triangulation — 'spec decoding'")
+        assert "Research timed out after 0.3s" in digest
+        assert "HF 1 · HN 1 · News 1" in digest and "(2 duplicates merged)" in digest
+        assert "- [Speculative Decoding Survey](https://huggingface.co/papers/2401.1) — 40 upvotes" in digest
+        assert digest.count("Spec decoding in prod") == 1
+        assert "(also on News, Underrated)" in digest
+
+    async def test_async_sources_run_concurrently_under_a_timeout(self, toolkit):
+        import time
+        start = time.perf_counter()
+        digest = await toolkit.atriangulate("spec decoding")
+        assert time.perf_counter() - start < 0.6
+        self._assert_digest(digest)
+
+    def test_sync_variant_matches(self, toolkit):
+        import time
+        start = time.perf_counter()
+        digest = toolkit.triangulate("spec decoding")
+        assert time.perf_counter() - start < 0.6
+        self._assert_digest(digest)
+
+    def test_missing_exa_key_and_errors_are_reported_per_source(self, toolkit, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "exa_api_key", "")
+        toolkit._exa_api_key = None
+
+        def _broken(query, limit):
+            raise RuntimeError("hub down")
+
+        toolkit._hf_papers = _broken
+        digest = toolkit.triangulate("spec decoding")
+        assert "HF error: hub down" in digest
+        assert "News skipped (no EXA_API_KEY)" in digest
+        assert "[Spec decoding in prod](https://www.example.com/post/)" in digest
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 26. DISCOVERY PREFETCH & SIGNAL CACHE
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestDiscoveryPrefetch:
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self):
+        from app.agents.prefetch import signal_cache
+        signal_cache.clear()
+        yield
+        signal_cache.clear()
+
+    @pytest.fixture
+    def sources(self, monkeypatch):
+        """Count real source fetches behind the toolkit's cached async tools."""
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+        from app.models import router
+        calls = {"daily": 0, "triangulate": []}
+
+        def _daily(self, date=None, limit=5):
+            calls["daily"] += 1
+            return "## HuggingFace Daily Papers — Today\n**1. Paper** (40 upvotes)"
+
+        async def _triangulate(self, query, limit):
+            calls["triangulate"].append(query)
+            return f"## Triangulation — '{query}'\nSources: HF 1 · HN 1 · News 0 · Research 0 · Underrated 0"
+
+        monkeypatch.setattr(ContentDiscoveryToolkit, "get_hf_daily_papers", _daily)
+        monkeypatch.setattr(ContentDiscoveryToolkit, "_atriangulate", _triangulate)
+        monkeypatch.setattr(router, "is_mock_mode", lambda: False)
+        return calls
+
+    async def _drain_prefetches(self):
+        import asyncio
+        from app.agents import prefetch
+        await asyncio.gather(*prefetch._background)
+
+    async def test_cache_normalises_keys_and_joins_in_flight_fetches(self):
+        import asyncio
+        from app.agents.prefetch import signal_cache
+        fetches = 0
+
+        async def _fetch():
+            nonlocal fetches
+            fetches += 1
+            await asyncio.sleep(0.05)
+            return "signals"
+
+        results = await asyncio.gather(
+            signal_cache.get_or_fetch(("triangulate", "LLM Inference", 3), _fetch),
+            signal_cache.get_or_fetch(("triangulate", " llm  inference", 3), _fetch),
+        )
+        assert results == ["signals", "signals"] and fetches == 1
+        assert await signal_cache.get_or_fetch(("triangulate", "llm inference", 3), _fetch) == "signals"
+        stats = signal_cache.snapshot()
+        assert (stats["lookups"], stats["hits"], stats["joined_in_flight"]) == (3, 2, 1)
+
+        signal_cache.invalidate("triangulate")
+        await signal_cache.get_or_fetch(("triangulate", "llm inference", 3), _fetch)
+        assert fetches == 2
+
+    async def test_errors_and_partial_results_are_not_cached(self, sources, monkeypatch):
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+
+        async def _partial(self, query, limit):
+            sources["triangulate"].append(query)
+            return f"## Triangulation — '{query}'\nSources: HF timed out after 8s · HN 1"
+
+        monkeypatch.setattr(ContentDiscoveryToolkit, "_atriangulate", _partial)
+        toolkit = ContentDiscoveryToolkit()
+        await toolkit.atriangulate("rag")
+        await toolkit.atriangulate("rag")
+        assert sources["triangulate"] == ["rag", "rag"]
+
+    async def test_task_creation_warms_the_first_turn(self, committing_client, sources):
+        from app.agents.content_discovery_toolkit import ContentDiscoveryToolkit
+        from app.agents.prefetch import signal_cache
+        from app.agents.tools import compute_patterns_tool
+
+        resp = await committing_client.post("/tasks", json={
+            "role": "researcher", "intent": "teach", "domain": "LLM Inference"})
+        assert resp.status_code == 201
+        await self._drain_prefetches()
+        assert sources == {"daily": 1, "triangulate": ["LLM Inference"]}
+
+        # The Strategist's opening tool calls now hit warm data
+        toolkit = ContentDiscoveryToolkit()
+        assert "Paper" in await toolkit.aget_hf_daily_papers()
+        assert "llm inference" in (await toolkit.atriangulate("llm inference")).lower()
+        await compute_patterns_tool()
+        assert sources == {"daily": 1, "triangulate": ["LLM Inference"]}
+
+        stats = signal_cache.snapshot()
+        assert stats["prefetch_runs"] == 1 and stats["prefetched"] == 3
+        assert stats["prefetch_used"] == 3 and stats["prefetch_hit_rate"] == 1.0
+        health = await committing_client.get("/health")
+        assert health.json()["discovery_cache"]["prefetch_hit_rate"] == 1.0
+
+    async def test_stage_patch_into_discovery_prefetches(self, committing_client, sources):
+        from app.agents.prefetch import signal_cache
+        task = (await committing_client.post("/tasks", json={
+            "role": "researcher", "intent": "teach", "task_type": "spark"})).json()
+        await self._drain_prefetches()
+        assert sources["daily"] == 0  # spark tasks start in feynman
+
+        await committing_client.patch(f"/tasks/{task['id']}/stage", json={"stage": "extraction"})
+        await self._drain_prefetches()
+        assert signal_cache.prefetch_runs == 0
+
+        await committing_client.patch(f"/tasks/{task['id']}/stage", json={"stage": "discovery"})
+        await self._drain_prefetches()
+        assert signal_cache.prefetch_runs == 1 and sources["daily"] == 1
+        assert sources["triangulate"] == []  # no domain, no triangulation
+
+    async def test_memory_writes_invalidate_cached_context(self, committing_client):
+        from app.agents.prefetch import signal_cache
+        first = (await committing_client.get("/memory/context")).json()
+        await committing_client.post("/memory", json={
+            "source": "user", "type": "Voice", "text": "Dry, specific, no hype.", "tags": []})
+        second = (await committing_client.get("/memory/context")).json()
+        assert len(second["identity_memory"]) == len(first["identity_memory"]) + 1
+        assert signal_cache.hits == 0
+
+    async def test_context_invalidated_only_on_commit(self):
+        from app.agents.prefetch import signal_cache
+        from app.memory.models import MemoryEntryCreate
+        from app.memory.store import create_memory_entry
+
+        async def _fetch():
+            return "old context"
+
+        await signal_cache.get_or_fetch(("composed_context", "u"), _fetch)
+        async with TestSessionLocal() as db:
+            await create_memory_entry(db, MemoryEntryCreate(type="Voice", text="Plain words."))
+            # Not committed yet: a concurrent compose_context() would read the old rows
+            assert signal_cache._fresh(("composed_context", "u")) is not None
+            await db.commit()
+        assert signal_cache._fresh(("composed_context", "u")) is None
+
+    async def test_invalidate_discards_a_fetch_already_in_flight(self):
+        import asyncio
+        from app.agents.prefetch import signal_cache
+        release, calls = asyncio.Event(), []
+
+        async def _fetch():
+            calls.append(1)
+            await release.wait()
+            return f"context v{len(calls)}"
+
+        pending = asyncio.ensure_future(signal_cache.get_or_fetch(("compute_patterns",), _fetch))
+        await asyncio.sleep(0)
+        signal_cache.invalidate("compute_patterns")   # the data changed mid-fetch
+        release.set()
+        assert await pending == "context v1"          # the caller still gets its answer
+        assert await signal_cache.get_or_fetch(("compute_patterns",), _fetch) == "context v2"
+        assert len(calls) == 2
+
+    async def test_task_writes_invalidate_cached_context(self, committing_client):
+        recent = lambda: committing_client.get("/memory/context")
+        await recent()
+        task = (await committing_client.post("/tasks", json={
+            "role": "researcher", "intent": "teach", "task_type": "spark", "title": "Fresh task"})).json()
+        listed = {t["id"]: t for t in (await recent()).json()["recent_tasks"]}
+        assert listed[task["id"]]["stage"] == "feynman"
+
+        await committing_client.patch(f"/tasks/{task['id']}/stage", json={"stage": "extraction"})
+        await committing_client.patch(f"/tasks/{task['id']}", json={"title": "Renamed task"})
+        listed = {t["id"]: t for t in (await recent()).json()["recent_tasks"]}
+        assert (listed[task["id"]]["stage"], listed[task["id"]]["title"]) == ("extraction", "Renamed task")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 27. LOCAL LLM STUB (benchmarks/llm_stub.py)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestLLMStub:
+    @pytest.fixture
+    def stub_app(self):
+        from benchmarks.llm_stub import StubConfig, create_app
+        return create_app(StubConfig(ttft=0.0, tps=0, reply_tokens=8, reasoning_tokens=3))
+
+    @pytest.fixture
+    def stub_server(self, stub_app, monkeypatch):
+        """Serve the stub on a real port and point the model registry at it."""
+        from benchmarks.bench_chat_transport import _free_port, _start_server
+        from app.config import settings
+        from app.models.router import reset_model_cache
+
+        port = _free_port()
+        server, thread = _start_server(port, stub_app)
+        monkeypatch.setattr(settings, "openrouter_api_key", "stub")
+        monkeypatch.setattr(settings, "openrouter_base_url", f"http://127.0.0.1:{port}/v1")
+        monkeypatch.setattr(settings, "history_compaction_enabled", False)
+        reset_model_cache()
+        yield f"http://127.0.0.1:{port}"
+        reset_model_cache()
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    async def _frames(self, stub_app, body: dict) -> list:
+        async with AsyncClient(transport=ASGITransport(app=stub_app), base_url="http://stub") as http:
+            resp = await http.post("/v1/chat/completions", json=body)
+        assert resp.status_code == 200
+        lines = [line[6:] for line in resp.text.splitlines() if line.startswith("data: ")]
+        assert lines[-1] == "[DONE]"
+        return [json.loads(line) for line in lines[:-1]]
+
+    async def test_streams_reasoning_content_and_usage(self, stub_app):
+        frames = await self._frames(stub_app, {
+            "model": "m", "stream": True, "stream_options": {"include_usage": True},
+            "messages": [{"role": "user", "content": "hello"}]})
+        deltas = [f["choices"][0]["delta"] for f in frames if f["choices"]]
+        assert deltas[0]["role"] == "assistant"
+        reasoning = "".join(d.get("reasoning", "") for d in deltas)
+        content = "".join(d.get("content") or "" for d in deltas)
+        assert len(reasoning.split()) == 3 and len(content.split()) == 8
+        assert frames[-2]["choices"][0]["finish_reason"] == "stop"
+        assert frames[-1]["choices"] == [] and frames[-1]["usage"]["completion_tokens"] == 11
+
+    async def test_scripted_tool_call_only_when_tool_is_offered(self, stub_app):
+        body = {"model": "m", "stream": True, "messages": [{"role": "user", "content": "please lint this"}]}
+        frames = await self._frames(stub_app, body)
+        assert not any(d.get("tool_calls") for f in frames for d in [f["choices"][0]["delta"]])
+
+        body["tools"] = [{"type": "function", "function": {"name": "lint_draft_tool", "parameters": {}}}]
+        frames = await self._frames(stub_app, body)
+        calls = [c for f in frames for c in f["choices"][0]["delta"].get("tool_calls", [])]
+        assert calls[0]["function"]["name"] == "lint_draft_tool"
+        arguments = json.loads("".join(c["function"]["arguments"] for c in calls))
+        assert "draft_content" in arguments
+        assert frames[-1]["choices"][0]["finish_reason"] == "tool_calls"
+
+    async def test_json_mode_answers_every_listed_check(self, stub_app):
+        async with AsyncClient(transport=ASGITransport(app=stub_app), base_url="http://stub") as http:
+            resp = await http.post("/v1/chat/completions", json={
+                "model": "m", "response_format": {"type": "json_object"},
+                "messages": [{"role": "user", "content": "Checks:\n- opening_strength\n- fluff_detection\n"}]})
+        verdicts = json.loads(resp.json()["choices"][0]["message"]["content"])
+        assert set(verdicts) == {"opening_strength", "fluff_detection"}
+
+    async def test_real_agent_path_runs_tools_against_the_stub(self, stub_server):
+        import httpx
+        from app.agents.harness import stream_chat
+
+        chunks = [c async for c in stream_chat("[AUTO_OPEN]", "discovery", "codde-stub-001")]
+        text = "".join(chunks)
+        assert "[TOOL:compute_patterns_tool]" in chunks
+        assert "<thinking>" in chunks and "Patterns first" in text
+        assert "Which of these pulls you?" in text
+
+        stats = httpx.get(f"{stub_server}/stats").json()
+        assert stats["tool_calls"] == 1 and stats["streamed"] >= 2
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 28. LAZY AGENTOS MOUNT & STARTUP
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestLazyAgentOS:
+    def _sub_app(self, builds: list):
+        from fastapi import FastAPI
+
+        def _factory():
+            builds.append(1)
+            sub = FastAPI()
+
+            @sub.get("/agents")
+            async def agents():
+                return ["strategist", "interviewer", "shaper", "analyst"]
+
+            return sub
+
+        return _factory
+
+    async def test_builds_once_on_first_request(self):
+        import asyncio
+        from fastapi import FastAPI
+        from app.agents.registry import LazyAgentAPI
+
+        builds: list = []
+        lazy = LazyAgentAPI(self._sub_app(builds))
+        host = FastAPI()
+        host.mount("/agentapi", lazy)
+        assert lazy.status == "not loaded" and builds == []
+
+        async with AsyncClient(transport=ASGITransport(app=host), base_url="http://test") as ac:
+            responses = await asyncio.gather(*[ac.get("/agentapi/agents") for _ in range(5)])
+        assert all(r.status_code == 200 for r in responses)
+        assert len(builds) == 1 and lazy.status == "loaded"
+
+    async def test_missing_agentapi_answers_503(self):
+        from fastapi import FastAPI
+        from app.agents.registry import LazyAgentAPI
+
+        def _factory():
+            raise ImportError("No module named 'agno.app'")
+
+        lazy = LazyAgentAPI(_factory)
+        host = FastAPI()
+        host.mount("/agentapi", lazy)
+        async with AsyncClient(transport=ASGITransport(app=host), base_url="http://test") as ac:
+            resp = await ac.get("/agentapi/agents")
+        assert resp.status_code == 503 and "agno.app" in resp.json()["detail"]
+        assert lazy.status == "unavailable"
+
+    async def test_app_import_does_not_build_agents(self, client):
+        from app import main
+        from app.agents.registry import LazyAgentAPI
+        assert isinstance(main.agent_api, LazyAgentAPI)
+        assert (await client.get("/health")).json()["agentos"] == "not loaded"
+        await client.get("/agentapi/")
+        assert main.agent_api.status in ("loaded", "unavailable")
+
+    def test_startup_benchmark_measures_import_and_readiness(self, tmp_path):
+        from benchmarks.bench_startup import _env, measure_import, measure_ready
+        env = _env(str(tmp_path))
+        assert 0 < measure_import(env) < 30
+        ready, agentos = measure_ready(env)
+        assert 0 < ready < 60 and agentos >= 0
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 29. DEFERRED IMPORTS & WARM-UP
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestDeferredImports:
+    def test_cold_start_imports_no_heavy_sdk(self):
+        from benchmarks.bench_importtime import importtime
+        from app.warmup import DEFERRED_IMPORTS
+        modules = importtime("app.main")
+        assert "app.main" in modules and "app.agents.harness" in modules
+        assert [m for m in DEFERRED_IMPORTS if m in modules] == []
+
+    def test_log_dir_is_created_on_first_record(self, tmp_path):
+        import logging
+        from app.logger import LazyRotatingFileHandler
+        log_dir = tmp_path / "logs"
+        handler = LazyRotatingFileHandler(str(log_dir / "brocodde.log"), maxBytes=1024, backupCount=1)
+        assert not log_dir.exists()
+        handler.emit(logging.makeLogRecord({"msg": "first"}))
+        handler.close()
+        assert (log_dir / "brocodde.log").read_text().strip() == "first"
+
+    async def test_warmup_imports_in_background(self, monkeypatch):
+        from app import warmup
+        from app.config import settings
+        monkeypatch.setattr(warmup, "DEFERRED_IMPORTS", ("json", "brocodde_no_such_sdk"))
+        monkeypatch.setattr(warmup, "warm_imports", lambda modules=warmup.DEFERRED_IMPORTS: {
+            m: m == "json" for m in modules})
+        monkeypatch.setattr(settings, "import_warmup_delay_seconds", 0.0)
+
+        task = warmup.schedule_warmup()
+        assert await task == {"json": True, "brocodde_no_such_sdk": False}
+
+        monkeypatch.setattr(settings, "import_warmup_enabled", False)
+        assert warmup.schedule_warmup() is None
+
+    def test_warm_imports_skips_missing_sdks(self):
+        from app.warmup import warm_imports
+        assert warm_imports(("json", "brocodde_no_such_sdk")) == {"json": True, "brocodde_no_such_sdk": False}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 30. CONCEPT FULL-TEXT SEARCH (FTS5)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestConceptSearch:
+    async def _concept(self, client, **fields) -> dict:
+        body = {"title": "Untitled", "core_insight": "Nothing yet.", "tags": [], **fields}
+        resp = await client.post("/concepts", json=body)
+        assert resp.status_code == 201, resp.text
+        return resp.json()
+
+    async def test_ranks_by_relevance_with_prefix_and_tags(self, committing_client):
+        tag = f"fts{os.urandom(3).hex()}"
+        weak = await self._concept(committing_client, title="Caching notes",
+                                   core_insight=f"Mentions {tag}retrieval once in passing.")
+        strong = await self._concept(committing_client, title=f"{tag}Retrieval drift",
+                                     core_insight=f"Why {tag}retrieval evals go stale.", tags=["evals"])
+        resp = await committing_client.get("/concepts/search/query", params={"q": f"{tag}retriev"})
+        hits = resp.json()
+        assert [h["id"] for h in hits] == [strong["id"], weak["id"]]
+        assert "<mark>" in hits[0]["snippet"] and hits[0]["score"] < hits[1]["score"]
+
+        # Tags are indexed; ILIKE only looked at title / insight / domain
+        tagged = await self._concept(committing_client, title="Label noise", core_insight="Audit labels.",
+                                     tags=[f"{tag}budget"])
+        hits = (await committing_client.get("/concepts/search/query", params={"q": f"{tag}budget"})).json()
+        assert [h["id"] for h in hits] == [tagged["id"]]
+
+    async def test_triggers_follow_updates_and_deletes(self, committing_client):
+        word = f"fts{os.urandom(3).hex()}"
+        concept = await self._concept(committing_client, title=f"{word} original")
+        await committing_client.patch(f"/concepts/{concept['id']}", json={"title": "Renamed concept"})
+        assert (await committing_client.get("/concepts/search/query", params={"q": word})).json() == []
+
+        await committing_client.patch(f"/concepts/{concept['id']}", json={"core_insight": f"Now about {word}."})
+        hits = (await committing_client.get("/concepts/search/query", params={"q": word})).json()
+        assert [h["id"] for h in hits] == [concept["id"]]
+
+        await committing_client.delete(f"/concepts/{concept['id']}")
+        assert (await committing_client.get("/concepts/search/query", params={"q": word})).json() == []
+
+    async def test_any_term_fallback_and_query_sanitising(self, committing_client):
+        from app.db.search import fts_query
+        word = f"fts{os.urandom(3).hex()}"
+        concept = await self._concept(committing_client, title=f"{word} speculative decoding")
+        hits = (await committing_client.get("/concepts/search/query",
+                                            params={"q": f"{word} zzzunmatched"})).json()
+        assert [h["id"] for h in hits] == [concept["id"]]
+
+        assert fts_query('drift" OR title:*') == '"drift"* "or" "title"*'
+        assert fts_query("  ?! ") is None
+        assert (await committing_client.get("/concepts/search/query", params={"q": '"*'})).json() == []
+
+    async def test_tool_uses_fts(self, committing_client, monkeypatch):
+        from app.agents import tools
+        from app.db import database
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestSessionLocal)
+        word = f"fts{os.urandom(3).hex()}"
+        await self._concept(committing_client, title="Label budgets", core_insight="Audit first.",
+                            tags=[f"{word}labels"])
+        result = await tools.search_concepts_tool(word)
+        assert "Label budgets" in result and f"**{word}labels**" in result
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 31. LOCAL CONCEPT VECTORS (RELATED CONCEPTS)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestConceptVectors:
+    @pytest.fixture(autouse=True)
+    def fresh_index(self, tmp_path, monkeypatch):
+        from app.config import settings
+        from app.db import vectors
+        monkeypatch.setattr(settings, "concept_vector_dir", str(tmp_path))
+        monkeypatch.setattr(vectors, "_indexes", {})
+        return tmp_path
+
+    async def _concept(self, client, **fields) -> dict:
+        body = {"title": "Untitled", "core_insight": "Nothing yet.", "tags": [], **fields}
+        resp = await client.post("/concepts", json=body)
+        assert resp.status_code == 201, resp.text
+        return resp.json()
+
+    def test_embedding_links_rephrasings(self):
+        from app.config import settings
+        from app.db.vectors import embed_text, to_blob
+        a = embed_text("Reward hacking: the policy exploits the reward model")
+        same = embed_text("policies exploiting flaws in learned rewards")
+        other = embed_text("KV cache quantization saves memory at inference")
+        assert float(a @ same) > settings.concept_related_min_score > float(a @ other)
+        assert len(to_blob(a)) == 2 * settings.concept_vector_dim
+
+    async def test_related_endpoints_follow_creates_and_deletes(self, committing_client, fresh_index):
+        from app.config import settings
+        word = f"vec{os.urandom(3).hex()}"
+        hacking = await self._concept(committing_client, title=f"Reward hacking {word}",
+                                      core_insight="The policy exploits flaws in the learned reward model.")
+        gaming = await self._concept(committing_client, title=f"Specification gaming {word}",
+                                     core_insight="Optimisers exploit rewards that miss the intended goal.")
+        unrelated = await self._concept(committing_client, title="KV cache quantization",
+                                        core_insight="Int8 caches halve inference memory.")
+
+        hits = (await committing_client.get("/concepts/related/query",
+                                            params={"q": f"policies exploiting learned rewards {word}"})).json()
+        assert hits[0]["id"] == hacking["id"] and hits[0]["score"] > settings.concept_related_min_score
+        assert unrelated["id"] not in [h["id"] for h in hits]
+
+        related = (await committing_client.get(f"/concepts/{hacking['id']}/related")).json()
+        assert related[0]["id"] == gaming["id"] and hacking["id"] not in [h["id"] for h in related]
+        assert (fresh_index / "test_brocodde" / "concepts.f32").exists()
+
+        await committing_client.delete(f"/concepts/{gaming['id']}")
+        related = (await committing_client.get(f"/concepts/{hacking['id']}/related")).json()
+        assert gaming["id"] not in [h["id"] for h in related]
+        assert (await committing_client.get("/concepts/missing-id/related")).status_code == 404
+
+    async def test_index_reopens_from_disk_and_rebuilds_when_stale(self, committing_client, fresh_index, monkeypatch):
+        from app.db.vectors import ConceptVectorIndex
+        concept = await self._concept(committing_client, title=f"Label noise {os.urandom(3).hex()}")
+        directory = fresh_index / "test_brocodde"
+
+        async def no_rebuild(self, db):
+            raise AssertionError("rebuild not expected")
+
+        async with TestSessionLocal() as db:
+            reopened = ConceptVectorIndex(directory)
+            with monkeypatch.context() as m:
+                m.setattr(ConceptVectorIndex, "rebuild", no_rebuild)
+                await reopened.ensure(db)
+            assert concept["id"] in reopened._rows
+
+            (directory / ConceptVectorIndex.IDS).unlink()
+            rebuilt = ConceptVectorIndex(directory)
+            await rebuilt.ensure(db)
+            assert len(rebuilt) == len(reopened)
+
+    async def test_matrix_grows_in_place(self, committing_client, fresh_index):
+        from app.db.vectors import ConceptVectorIndex, embed_text
+        async with TestSessionLocal() as db:
+            index = ConceptVectorIndex(fresh_index / "grow")
+            await index.ensure(db)
+        capacity = index._matrix.shape[0]
+        for i in range(capacity - len(index._ids) + 1):
+            index.add(f"synthetic-{i}", embed_text(f"synthetic concept number {i}"))
+        assert index._matrix.shape[0] == 2 * capacity
+        last = f"synthetic-{i}"
+        assert index.search(embed_text(f"synthetic concept number {i}"), 1)[0][0] == last
+
+    async def test_tools_index_on_save_and_find_related(self, committing_client, monkeypatch):
+        from app.agents import tools
+        from app.db import database
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestSessionLocal)
+        word = f"vec{os.urandom(3).hex()}"
+        first = json.loads(await tools.save_concept_tool(
+            title=f"Feedback loops in label noise {word}",
+            core_insight="Noisy labels feed back into the next training round."))
+        second = json.loads(await tools.save_concept_tool(
+            title=f"Label noise feedback {word}",
+            core_insight="Training on noisy labels loops the noise back into new labels."))
+        assert first["ok"] and [r["id"] for r in second["related"]][:1] == [first["id"]]
+
+        result = await tools.related_concepts_tool(f"noisy labels feeding back into training {word}")
+        assert f"Feedback loops in label noise {word}" in result and "similarity" in result
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 32. CONCEPT GRAPH EDGES & NEIGHBORHOODS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestConceptGraph:
+    async def _concept(self, client, title: str) -> str:
+        resp = await client.post("/concepts", json={"title": title, "core_insight": "Insight.", "tags": []})
+        assert resp.status_code == 201, resp.text
+        return resp.json()["id"]
+
+    async def _link(self, client, src: str, *dst: str) -> dict:
+        resp = await client.patch(f"/concepts/{src}", json={"connections": list(dst)})
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
+    async def test_neighbors_walk_both_directions_with_per_depth_limit(self, committing_client):
+        a, b, c, d, e = [await self._concept(committing_client, f"Graph {n}") for n in "abcde"]
+        body = await self._link(committing_client, a, b, c, "missing-id", a)
+        assert body["connections"] == [b, c]            # unknown ids and self-links dropped
+        await self._link(committing_client, d, a)       # incoming only
+        await self._link(committing_client, c, e)
+
+        one = (await committing_client.get(f"/concepts/{a}/neighbors")).json()
+        assert {n["id"] for n in one} == {b, c, d} and all(n["depth"] == 1 for n in one)
+
+        two = (await committing_client.get(f"/concepts/{a}/neighbors", params={"depth": 2})).json()
+        assert [(n["id"], n["depth"], n["via"]) for n in two if n["depth"] == 2] == [(e, 2, c)]
+        assert a not in {n["id"] for n in two}
+
+        capped = (await committing_client.get(f"/concepts/{a}/neighbors",
+                                              params={"depth": 2, "limit": 1})).json()
+        assert [n["depth"] for n in capped] == [1, 2]
+        assert (await committing_client.get("/concepts/missing-id/neighbors")).status_code == 404
+
+    async def test_unlink_and_delete_keep_connections_in_step(self, committing_client):
+        a, b, c = [await self._concept(committing_client, f"Unlink {n}") for n in "abc"]
+        await self._link(committing_client, a, b, c)
+        await self._link(committing_client, a, c)
+        assert [n["id"] for n in (await committing_client.get(f"/concepts/{a}/neighbors")).json()] == [c]
+
+        await committing_client.delete(f"/concepts/{c}")
+        assert (await committing_client.get(f"/concepts/{a}")).json()["connections"] == []
+        assert (await committing_client.get(f"/concepts/{a}/neighbors")).json() == []
+
+    async def test_sql_and_adjacency_walks_agree(self, committing_client):
+        from app.db.graph import adjacency, neighbors, walk
+        ids = [await self._concept(committing_client, f"Agree {n}") for n in range(5)]
+        await self._link(committing_client, ids[0], ids[1], ids[2])
+        await self._link(committing_client, ids[3], ids[1])
+        await self._link(committing_client, ids[4], ids[3])
+        async with TestSessionLocal() as db:
+            sql = [(n.concept.id, n.depth, n.via) for n in await neighbors(db, ids[0], depth=3)]
+            mem = [(id_, d, via) for id_, d, via, _, _ in walk(await adjacency(db), ids[0], 3, 25)]
+        assert sql == mem and [d for _, d, _ in sql] == [1, 1, 2, 3]
+
+    async def test_migration_backfills_from_json_connections(self, tmp_path):
+        from datetime import datetime
+        from sqlalchemy import select
+        from app.db.graph import migrate_concept_connections
+        from app.db.models import ConceptEdge, ConceptNode
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'graph.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(ConceptNode.__table__.insert(), [
+                {"id": "a", "title": "A", "core_insight": ".", "tags": [], "connections": ["b", "ghost", "b"],
+                 "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                {"id": "b", "title": "B", "core_insight": ".", "tags": [], "connections": ["a"],
+                 "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+            ])
+            assert await migrate_concept_connections(conn) == 2
+            assert await migrate_concept_connections(conn) == 0
+            edges = (await conn.execute(select(ConceptEdge.src, ConceptEdge.dst))).all()
+        await engine.dispose()
+        assert sorted(edges) == [("a", "b"), ("b", "a")]
+
+    async def test_neighbors_tool_uses_cached_adjacency(self, committing_client, monkeypatch):
+        from app.agents import tools
+        from app.db import database
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestSessionLocal)
+        word = f"graph{os.urandom(3).hex()}"
+        root = await self._concept(committing_client, f"{word} root")
+        leaf = await self._concept(committing_client, f"{word} leaf")
+        assert "no linked concepts" in await tools.concept_neighbors_tool(root)
+
+        await self._link(committing_client, root, leaf)   # write invalidates the cached map
+        result = await tools.concept_neighbors_tool(f"{word} root")
+        assert f"**{word} leaf** (link)" in result
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 33. NEAR-DUPLICATE CONCEPTS (MINHASH + LSH)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestConceptDedupe:
+    @pytest.fixture(autouse=True)
+    def tool_db(self, monkeypatch):
+        from app.db import database
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestSessionLocal)
+
+    async def _save(self, **fields) -> dict:
+        from app.agents import tools
+        return json.loads(await tools.save_concept_tool(**fields))
+
+    def test_signature_estimates_jaccard(self):
+        from app.db.dedupe import NUM_PERM, signature
+        a = {f"w{i}" for i in range(60)}
+        b = {f"w{i}" for i in range(20, 80)}          # true Jaccard 40 / 80 = 0.5
+        sa, sb = signature(a), signature(b)
+        assert sa.shape == (NUM_PERM,) and abs(float((sa == sb).mean()) - 0.5) < 0.15
+        assert signature(set()) is None and (signature(a) == sa).all()
+
+    async def test_flags_duplicate_and_proposes_similar_link(self, committing_client):
+        word = "dedupeprobe"  # fixed text: LSH recall is probabilistic below the duplicate threshold
+        first = await self._save(
+            title=f"Speculative decoding {word}",
+            core_insight="A small draft model proposes tokens that the large model verifies in parallel.")
+        again = await self._save(
+            title=f"Speculative decoding {word}",
+            core_insight="The large model verifies tokens a small draft model proposes, in parallel.")
+        assert [d["id"] for d in again["duplicates"]] == [first["id"]] and again["id"] != first["id"]
+
+        near = await self._save(
+            title=f"Draft models {word}",
+            core_insight="A small draft model proposes tokens the large model verifies; acceptance rate sets the speedup.")
+        proposed = {p["id"] for p in near["proposed_connections"]}
+        assert first["id"] in proposed and not near["duplicates"]
+        similar = (await committing_client.get(f"/concepts/{near['id']}/neighbors",
+                                               params={"kind": "similar"})).json()
+        assert first["id"] in {n["id"] for n in similar}
+
+    async def test_merge_upserts_same_source(self, committing_client):
+        word = f"dup{os.urandom(3).hex()}"
+        url = f"https://arxiv.org/abs/{word}"
+        first = await self._save(title=f"Reward hacking {word}", tags=["rlhf"], source_url=url,
+                                 core_insight="The policy exploits flaws in the learned reward model.")
+        merged = await self._save(title=f"Reward hacking in RLHF {word}", tags=["alignment"], source_url=url,
+                                  core_insight="The policy learns to exploit the reward model instead of improving.",
+                                  merge_duplicate=True)
+        assert merged["merged_into"] == first["id"] == merged["id"]
+        concept = (await committing_client.get(f"/concepts/{first['id']}")).json()
+        assert concept["title"] == f"Reward hacking in RLHF {word}" and concept["tags"] == ["rlhf", "alignment"]
+
+    async def test_deleted_concepts_leave_the_index(self, committing_client):
+        word = f"dup{os.urandom(3).hex()}"
+        first = await self._save(title=f"Label noise budget {word}",
+                                 core_insight="Audit a small label sample before cleaning everything.")
+        await committing_client.delete(f"/concepts/{first['id']}")
+        again = await self._save(title=f"Label noise budget {word}",
+                                 core_insight="Audit a small label sample before cleaning everything.")
+        assert again["duplicates"] == []
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 34. RELEVANCE-RANKED MEMORY INJECTION
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestMemoryRanking:
+    @pytest.fixture(autouse=True)
+    def tool_db(self, monkeypatch):
+        from app.db import database
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestSessionLocal)
+
+    @staticmethod
+    def _item(text, type_="Insight", days_old=0, source="agent"):
+        from datetime import datetime, timedelta
+        from app.memory.ranking import MemoryItem
+        return MemoryItem(source=source, type=type_, text=text,
+                          updated_at=datetime.utcnow() - timedelta(days=days_old), data={"text": text})
+
+    async def _write(self, word, **fields):
+        from app.memory.models import MemoryEntryCreate
+        from app.memory.store import create_memory_entry
+        async with TestSessionLocal() as session:
+            entries = [await create_memory_entry(session, MemoryEntryCreate(**fields, text=f"{text} {word}"))
+                       for text in ("Spent six years on distributed consensus and Raft clusters.",
+                                    "Prefers short declarative sentences, no hype words.",
+                                    "Goal: grow a following among ML infra engineers.")]
+            await session.commit()
+        return entries
+
+    def test_relevant_entry_beats_recent_one_within_budget(self):
+        from app.memory.ranking import rank_memories
+        items = [self._item("Ran the GPU inference fleet at a large lab", days_old=300),
+                 *[self._item(f"Unrelated fresh note number {i}") for i in range(20)]]
+        selection = rank_memories(items, query="gpu inference costs", stage="discovery", k=3, token_budget=1000)
+        assert selection.items[0] is items[0] and len(selection.items) == 3 and selection.candidates == 21
+
+        tight = rank_memories(items, query="gpu inference", k=50, token_budget=30)
+        assert tight.tokens <= 30 and sum(i.tokens for i in tight.items) == tight.tokens
+
+    def test_stage_priors_and_recency_without_query(self):
+        from app.memory.ranking import rank_memories
+        goal, voice = self._item("Reach 10k readers", "Goal"), self._item("Dry, specific, no emoji", "Voice")
+        assert rank_memories([goal, voice], stage="drafting", k=1).items == [voice]
+        assert rank_memories([goal, voice], stage="discovery", k=1).items == [goal]
+        old, new = self._item("old note", days_old=90), self._item("new note")
+        assert rank_memories([old, new], k=1).items == [new]
+
+    async def test_compose_context_keeps_top_entries(self, db_session, monkeypatch):
+        from app.config import settings
+        from app.memory.store import compose_context
+        word = f"mem{os.urandom(3).hex()}"
+        await self._write(word, type="Experience")
+        monkeypatch.setattr(settings, "memory_inject_k", 2)
+        ctx = await compose_context(db_session, stage="extraction", query=f"raft consensus {word}")
+        assert len(ctx.identity_memory) <= 2 and ctx.memory_candidates >= 3
+        assert "Raft" in ctx.identity_memory[0]["text"] and word in ctx.identity_memory[0]["text"]
+        assert "## User Context" in ctx.to_prompt_text()
+
+    async def test_memory_read_tool_ranks_by_query(self):
+        from app.agents.tools import memory_read_tool
+        word = f"mem{os.urandom(3).hex()}"
+        await self._write(word, type="Voice")
+        result = await memory_read_tool(memory_type="Voice", query=f"declarative sentences {word}", k=1)
+        first = result.splitlines()[0]
+        assert first.startswith("[USER:Voice] Prefers short declarative") and word in first
+
+    async def test_harness_injects_ranked_memory_and_meters_it(self, monkeypatch):
+        import uuid
+        from types import SimpleNamespace
+        from sqlalchemy import select
+        from app.agents import harness
+        from app.config import settings
+        from app.db.models import UsageLedger
+        from app.models.router import get_model
+        monkeypatch.setattr(harness, "is_mock_mode", lambda: False)
+        monkeypatch.setattr(settings, "history_compaction_enabled", False)
+        word = f"mem{os.urandom(3).hex()}"
+        await self._write(word, type="Goal")
+
+        class _FakeAgent:
+            model, add_memories_to_context, additional_context = get_model(3), True, None
+
+            async def arun(self, message, **kwargs):
+                yield SimpleNamespace(event="RunContent", content="ok")
+                yield SimpleNamespace(event="RunCompleted", metrics=SimpleNamespace(input_tokens=900))
+
+        agent = _FakeAgent()
+        monkeypatch.setattr(harness, "build_strategist", lambda **kw: agent)
+        task_id = f"mem-{uuid.uuid4().hex[:8]}"
+        [c async for c in harness.stream_chat(f"ML infra engineers {word}", task_stage="discovery", task_id=task_id)]
+
+        assert agent.add_memories_to_context is False
+        assert agent.additional_context.startswith("<memory>") and word in agent.additional_context
+        async with TestSessionLocal() as session:
+            row = (await session.execute(select(UsageLedger).where(UsageLedger.task_id == task_id))).scalar_one()
+        assert row.memory_candidates >= 3 and 0 < row.memory_injected <= settings.memory_inject_k
+        assert 0 < row.memory_tokens <= settings.memory_token_budget and row.memory_seconds > 0
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 35. SKILL SECTION INDEX (BM25)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestSkillIndex:
+    async def test_startup_survives_a_failed_index_build(self, monkeypatch):
+        from app import main
+        from app.config import settings
+        monkeypatch.setattr(main, "create_tables", AsyncMock())
+        monkeypatch.setattr(main, "seed_demo_data", AsyncMock())
+        monkeypatch.setattr(settings, "import_warmup_enabled", False)
+        monkeypatch.setattr(settings, "memory_consolidation_interval_hours", 0)
+        with patch("app.agents.knowledge.skill_index", side_effect=OSError("skills dir unreadable")):
+            async with main.lifespan(main.app):
+                pass
+
+    def test_split_sections_follows_headings_outside_code(self):
+        from app.agents.knowledge import split_sections
+        content = ("---\nname: demo\n---\n# Demo Skill\nIntro line.\n\n## Hooks\n- Keep it short.\n"
+                   "```python\n# not a heading\n```\n---\n### Length\nUnder 12 words.\n## Empty\n### Child\nText.\n")
+        sections = split_sections(content, "demo")
+        assert [s.heading for s in sections] == ["Demo Skill", "Hooks", "Hooks › Length", "Empty › Child"]
+        assert "# not a heading" in sections[1].text and sections[1].text.startswith("- Keep")
+        assert all(s.tokens > 0 and s.skill == "demo" for s in sections)
+
+    def test_search_returns_relevant_sections_only(self):
+        from app.agents.knowledge import skill_index
+        hits = skill_index().search("engagement bait", k=2)
+        assert hits and hits[0][0].skill == "content-vetting" and "Engagement Bait" in hits[0][0].heading
+        assert all(s.tokens < 1000 for s, _ in hits)
+        only = skill_index().search("session id", k=3, skill="agno")
+        assert only and {s.skill for s, _ in only} == {"agno-architecture"}
+
+    async def test_skill_search_tool_reports_tokens(self):
+        from app.agents.tools import skill_search
+        result = await skill_search("hook opening line", k=2)
+        assert result.count("### ") == 2 and "tokens)" in result and result.rstrip().endswith("tokens]")
+        assert "No skill sections" in await skill_search("zzqxv")
+
+    async def test_long_skill_is_outlined_not_cut_mid_section(self):
+        from app.agents.tools import _SKILL_MAX_CHARS, skill_load
+        content = await skill_load("agno-architecture")
+        head, _, outline = content.partition("[Remaining sections")
+        assert len(head) <= _SKILL_MAX_CHARS + 200 and "Feature Decision Table" in outline
+
+    def test_knowledge_object_retrieves_sections(self):
+        from app.agents.knowledge import get_skills_knowledge
+        knowledge = get_skills_knowledge()
+        docs = knowledge.retrieve("linkedin formatting rules", max_results=2)
+        assert len(docs) == 2 and docs[0].meta_data["skill"] == "platform-linkedin"
+        assert "skill_search" in knowledge.build_context()
+
+    async def test_search_endpoint_and_full_skill_route(self, client):
+        resp = await client.get("/skills/search", params={"q": "engagement bait", "k": 1})
+        assert resp.status_code == 200
+        [hit] = resp.json()
+        assert hit["skill"] == "content-vetting" and hit["tokens"] > 0
+        full = (await client.get("/skills/agno-architecture")).json()["content"]
+        assert "Feature Decision Table" in full and "[Remaining sections" not in full
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 36. TRANSCRIPT SEARCH (CHAT MESSAGES + DRAFTS, FTS5)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestTranscriptSearch:
+    async def _new_task(self, client, title: str = "Transcript search") -> dict:
+        resp = await client.post("/tasks", json={"role": "researcher", "intent": "teach", "title": title})
+        assert resp.status_code == 201, resp.text
+        return resp.json()
+
+    async def _set_history(self, task_id: str, history: list[dict]) -> None:
+        """Rewrite chat_history server-side, as compaction and the chat routes do."""
+        from app.db.models import CoddeTask
+        async with TestSessionLocal() as session:
+            task = await session.get(CoddeTask, task_id)
+            task.chat_history = [dict(m) for m in history]
+            await session.commit()
+
+    async def _search(self, client, q, **params) -> dict:
+        resp = await client.get("/search", params={"q": q, **params})
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
+    async def test_chat_turn_and_draft_are_indexed(self, committing_client):
+        word = f"jepa{os.urandom(3).hex()}"
+        task = await self._new_task(committing_client)
+        resp = await committing_client.post(f"/tasks/{task['id']}/chat",
+                                            json={"message": f"What about {word} world models?", "user_id": "t"})
+        assert resp.status_code == 200
+        await committing_client.post(f"/tasks/{task['id']}/drafts", json={"content": f"Draft on {word}."})
+
+        page = await self._search(committing_client, word)
+        hits = {(h["kind"], h["position"]) for h in page["hits"]}
+        assert hits == {("message", 0), ("draft", 0)} and page["next_offset"] is None
+        message = next(h for h in page["hits"] if h["kind"] == "message")
+        assert message["task_id"] == task["id"] and message["stage"] == task["stage"] and message["role"] == "user"
+        assert f"<mark>{word}</mark>" in message["snippet"] and message["task_title"]
+        drafts = await self._search(committing_client, word, kind="draft")
+        assert [h["kind"] for h in drafts["hits"]] == ["draft"]
+
+    async def test_edits_and_deletes_keep_the_index_in_step(self, committing_client):
+        old, new = f"old{os.urandom(3).hex()}", f"new{os.urandom(3).hex()}"
+        task = await self._new_task(committing_client)
+        history = [{"role": "user", "content": f"first {old}"}, {"role": "agent", "content": "reply"}]
+        await self._set_history(task["id"], history)
+        assert len((await self._search(committing_client, old))["hits"]) == 1
+
+        history[0]["content"] = f"first {new}"
+        history.append({"role": "user", "content": f"again {new}"})
+        await self._set_history(task["id"], history)
+        assert (await self._search(committing_client, old))["hits"] == []
+        assert sorted(h["position"] for h in (await self._search(committing_client, new))["hits"]) == [0, 2]
+
+        from app.db.models import CoddeTask
+        async with TestSessionLocal() as session:
+            await session.delete(await session.get(CoddeTask, task["id"]))
+            await session.commit()
+        assert (await self._search(committing_client, new))["hits"] == []
+
+    async def test_pages_are_disjoint_and_end(self, committing_client):
+        word = f"page{os.urandom(3).hex()}"
+        task = await self._new_task(committing_client)
+        history = [{"role": "user", "content": f"{word} " * (i + 1) + "note"} for i in range(5)]
+        await self._set_history(task["id"], history)
+
+        seen, offset = [], 0
+        while offset is not None:
+            page = await self._search(committing_client, word, limit=2, offset=offset, task_id=task["id"])
+            seen += [h["position"] for h in page["hits"]]
+            offset = page["next_offset"]
+        assert sorted(seen) == [0, 1, 2, 3, 4] and seen[0] == 4   # most repetitions ranks first
+
+    async def test_backfill_and_scan_agree_with_fts(self, committing_client, db_session):
+        from app.db.search import backfill_transcripts, search_transcripts, search_transcripts_scan
+        word = f"scan{os.urandom(3).hex()}"
+        task = await self._new_task(committing_client)
+        await self._set_history(task["id"], [
+            {"role": "user", "content": f"{word} one"}, {"role": "agent", "content": f"{word} two"}])
+
+        async with test_engine.begin() as conn:
+            assert await backfill_transcripts(conn) > 0
+        fts, _ = await search_transcripts(db_session, word)
+        scan, more = await search_transcripts_scan(db_session, word)
+        assert {(h.task_id, h.position) for h in fts} == {(h.task_id, h.position) for h in scan} == {
+            (task["id"], 0), (task["id"], 1)} and not more
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 37. AGENT MEMORY CONSOLIDATION
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestMemoryConsolidation:
+    async def _agent_entries(self, word: str) -> list[str]:
+        from app.db.models import MemoryEntry
+        entries = [
+            MemoryEntry(source="agent", type="Pattern", tags=["hooks"], lifecycle_phases=["drafting"],
+                        text=f"Posts that open with a concrete {word} failure story get twice the saves."),
+            MemoryEntry(source="agent", type="Pattern", tags=["saves", "hooks"], lifecycle_phases=["vetting"],
+                        text=f"Posts opening with a concrete {word} failure story get twice the saves "
+                             f"of posts opening with a claim."),
+            MemoryEntry(source="agent", type="Pattern", tags=["engagement"], lifecycle_phases=["drafting"],
+                        text=f"Posts that open with concrete {word} failure stories get twice the saves."),
+            MemoryEntry(source="agent", type="Insight", tags=[], lifecycle_phases=[],
+                        text=f"Posts that open with a concrete {word} failure story get twice the saves."),
+            MemoryEntry(source="user", type="Voice", tags=[], lifecycle_phases=[],
+                        text=f"Posts that open with a concrete {word} failure story get twice the saves."),
+        ]
+        async with TestSessionLocal() as session:
+            session.add_all(entries)
+            await session.commit()
+        return [e.id for e in entries]
+
+    def test_clusters_respect_threshold_and_group(self):
+        from app.memory.consolidate import Memory, find_clusters
+        memory = lambda i, text, type_="Pattern": Memory(str(i), "entry", type_, type_, text, [], [], None, None)
+        memories = [memory(1, "Carousel posts with one idea per slide hold attention longest"),
+                    memory(2, "Carousel posts with one idea per slide hold attention the longest"),
+                    memory(3, "Carousel posts with one idea per slide hold attention longest", "Insight"),
+                    memory(4, "Threads outperform single posts for paper explainers"),
+                    memory(5, "Carousel posts with one idea per slide hold reader attention longest and drive saves")]
+        clusters = find_clusters(memories, threshold=0.6)         # stopwords aside, 1 and 2 are identical; 5 is J=0.75
+        assert [{m.id: round(s, 2) for m, s in c} for c in clusters] == [{"5": 1.0, "1": 0.75, "2": 0.75}]
+        assert [{m.id for m, _ in c} for c in find_clusters(memories, threshold=0.9)] == [{"1", "2"}]
+
+    def test_chains_are_not_merged_end_to_end(self):
+        from app.memory.consolidate import Memory, find_clusters, jaccard
+        words = "alpha bravo charlie delta echo foxtrot golf hotel india juliet".split()
+        extra = "kilo lima mike november".split()
+        memories = []
+        for i in range(5):   # each neighbour J=0.82, first and last J=0.43
+            memories.append(Memory(str(i), "entry", "Pattern", "Pattern", " ".join(words), [], [], None, None))
+            words = words[1:] + extra[i:i + 1]
+        assert jaccard(memories[0].words, memories[4].words) < 0.6
+
+        clusters = find_clusters(memories, threshold=0.6)
+        assert all(score >= 0.6 for cluster in clusters for _, score in cluster)
+        assert all(jaccard(m.words, cluster[0][0].words) >= 0.6 for cluster in clusters for m, _ in cluster)
+        assert [[m.id for m, _ in c] for c in clusters] == [["0", "1", "2"], ["3", "4"]]
+
+    async def test_dry_run_then_merge_keeps_tags_phases_and_provenance(self, committing_client):
+        word = f"oncall{os.urandom(3).hex()}"
+        short, canonical, plural, insight, user = await self._agent_entries(word)
+
+        dry = (await committing_client.post("/memory/consolidate", params={"dry_run": True})).json()
+        group = next(g for g in dry["groups"] if g["canonical_id"] == canonical)
+        assert dry["run_id"] is None and set(group["merged_ids"]) == {short, plural}
+        assert group["tags"] == ["saves", "hooks", "engagement"] and group["lifecycle_phases"] == ["vetting", "drafting"]
+        entries = {e["id"]: e for e in (await committing_client.get("/memory")).json()}
+        assert short in entries and plural in entries            # dry run changes nothing
+
+        report = (await committing_client.post("/memory/consolidate")).json()
+        assert report["run_id"] and report["merged"] >= 2 and report["tokens_after"] < report["tokens_before"]
+        entries = {e["id"]: e for e in (await committing_client.get("/memory")).json()}
+        assert short not in entries and plural not in entries
+        assert {canonical, insight, user} <= entries.keys()      # other type and user entries untouched
+        assert entries[canonical]["tags"] == ["saves", "hooks", "engagement"]
+        assert sorted(entries[canonical]["lifecycle_phases"]) == ["drafting", "vetting"]
+
+        merges = (await committing_client.get(f"/memory/{canonical}/merges")).json()
+        assert {m["merged_id"] for m in merges} == {short, plural}
+        assert all(m["run_id"] == report["run_id"] and word in m["text"] and 0.6 <= m["similarity"] < 1 for m in merges)
+        runs = (await committing_client.get("/memory/consolidations")).json()
+        assert runs[0]["id"] == report["run_id"] and runs[0]["trigger"] == "manual"
+
+        again = (await committing_client.post("/memory/consolidate", params={"dry_run": True})).json()
+        assert all(g["canonical_id"] != canonical for g in again["groups"])
+
+    async def test_agno_memories_merge_per_user(self, db_session):
+        from sqlalchemy import text
+        from app.memory.consolidate import consolidate_memories
+        rows = [("a1", "u1", ["latency"]), ("a2", "u1", ["serving"]), ("a3", "u2", ["latency"])]
+        async with test_engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TABLE agno_memories (memory_id VARCHAR PRIMARY KEY, user_id VARCHAR, memory JSON, "
+                "topics JSON, input VARCHAR, agent_id VARCHAR, team_id VARCHAR, feedback VARCHAR, "
+                "created_at BIGINT, updated_at BIGINT)"))
+            for n, (memory_id, user_id, topics) in enumerate(rows):
+                memory = "User works on LLM inference serving latency" + (" at scale" if n == 1 else "")
+                await conn.execute(text(
+                    "INSERT INTO agno_memories (memory_id, user_id, memory, topics, created_at) "
+                    "VALUES (:id, :uid, :memory, :topics, :at)"),
+                    {"id": memory_id, "uid": user_id, "memory": json.dumps(memory),
+                     "topics": json.dumps(topics), "at": 1_700_000_000 + n})
+        try:
+            report = await consolidate_memories(db_session, trigger="manual")
+            await db_session.commit()
+            group = next(g for g in report.groups if g.origin == "agno")
+            assert (group.canonical_id, group.merged_ids, group.tags) == ("a2", ["a1"], ["serving", "latency"])
+            left = (await db_session.execute(text("SELECT memory_id, topics FROM agno_memories ORDER BY memory_id"))).all()
+            assert [(r.memory_id, json.loads(r.topics)) for r in left] == [("a2", ["serving", "latency"]),
+                                                                          ("a3", ["latency"])]
+        finally:
+            async with test_engine.begin() as conn:
+                await conn.execute(text("DROP TABLE agno_memories"))
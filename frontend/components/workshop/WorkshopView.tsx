@@ -252,6 +252,11 @@ export function WorkshopView({ taskId }: WorkshopViewProps) {
             onToolCall: (name) => {
                 setToolLog(prev => prev.includes(name) ? prev : [...prev, name]);
             },
+            onLint: (result) => {
+                // Per-check verdicts stream in while lint_draft_tool is still running
+                const entry = `${result.check}: ${result.pass ? "pass" : "fail"}`;
+                setToolLog(prev => prev.includes(entry) ? prev : [...prev, entry]);
+            },
             onThinking: (chunk) => {
                 thinkingRef.current += chunk;
                 setThinkingActive(true);
@@ -599,11 +604,14 @@ function friendlyToolName(raw: string): string {
         web_fetch: "Fetching article",
         web_fetch_tool: "Fetching article",
         skill_load: "Loading skill",
+        skill_search: "Searching skills",
         lint_draft_tool: "Running lint checks",
         export_task_tool: "Exporting task",
         format_for_platform_tool: "Formatting for platform",
         save_concept_tool: "Saving concept",
         search_concepts_tool: "Searching concepts",
+        related_concepts_tool: "Finding related concepts",
+        concept_neighbors_tool: "Walking the concept graph",
     };
     return map[raw] ?? raw.replace(/_/g, " ");
 }
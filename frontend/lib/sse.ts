@@ -6,9 +6,16 @@
  *   (default) — regular message content → onChunk
  *   event: thinking — model reasoning/thinking → onThinking
  *   event: advance — stage advancement signal → onAdvanceStage
+ *   event: lint — one lint check's verdict (JSON), as soon as it lands → onLint
  *   data: [DONE] — stream complete → onDone
+ *
+ * With NEXT_PUBLIC_CHAT_TRANSPORT=ws the same API runs over the shared,
+ * multiplexed WebSocket instead (see ws.ts).
  */
 
+import type { LintCheckEvent } from "./types";
+import { streamChatWS } from "./ws";
+
 const BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
 export interface StreamOptions {
@@ -16,11 +23,15 @@ export interface StreamOptions {
     message: string;
     userId?: string;
     deepCritique?: boolean;
+    // Reuse the same key when retrying a turn — the backend replays or attaches
+    // to the original run instead of starting a second one.
+    idempotencyKey?: string;
     onAdvanceStage?: () => void;
     onChunk: (text: string) => void;
     onThinking?: (text: string) => void;
     onTitleUpdate?: (title: string) => void;
     onToolCall?: (toolName: string) => void;
+    onLint?: (result: LintCheckEvent) => void;
     onDone: () => void;
     onError: (err: Error) => void;
 }
@@ -30,12 +41,17 @@ export interface StreamOptions {
  * Uses fetch + ReadableStream since EventSource doesn't support POST.
  */
 export async function streamChat(options: StreamOptions): Promise<void> {
+    if (process.env.NEXT_PUBLIC_CHAT_TRANSPORT === "ws") {
+        return streamChatWS(options);
+    }
+
     const { taskId, message, userId = "default_user", deepCritique = false, onChunk, onDone, onError } = options;
+    const idempotencyKey = options.idempotencyKey ?? crypto.randomUUID();
 
     try {
         const response = await fetch(`${BASE_URL}/tasks/${taskId}/chat`, {
             method: "POST",
-            headers: { "Content-Type": "application/json" },
+            headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKey },
             body: JSON.stringify({
                 message,
                 user_id: userId,
@@ -87,6 +103,12 @@ export async function streamChat(options: StreamOptions): Promise<void> {
 
                 if (!data) continue;
 
+                if (currentEventType === "lint") {
+                    // JSON payload — parse before newline unescaping, which would break string escapes
+                    options.onLint?.(JSON.parse(data) as LintCheckEvent);
+                    continue;
+                }
+
                 // Unescape newlines encoded by the backend
                 let unescaped = data.replace(/\\n/g, "\n");
 
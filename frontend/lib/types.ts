@@ -92,6 +92,15 @@ export interface LintResults {
     engagement_bait: { pass: boolean; notes: string };
     micro_learning: { pass: boolean; notes: string };
     error?: string;
+    engine?: "model" | "heuristic";   // heuristic = rule-based pre-lint (short-circuit or fallback)
+}
+
+/** One check's verdict, streamed mid-turn as `event: lint` while the linter runs. */
+export interface LintCheckEvent {
+    check: Exclude<keyof LintResults, "overall_pass" | "error" | "engine">;
+    pass: boolean;
+    notes: string;
+    engine: "model" | "heuristic";
 }
 
 export interface Draft {
@@ -123,6 +132,7 @@ export interface CoddeTask {
     skeleton: Skeleton | null;
     chat_history?: ChatMessage[];
     final_content?: string | null;
+    version?: number;  // optimistic-concurrency counter, bumped on every task write
     created_at: string;
     updated_at: string;
 }
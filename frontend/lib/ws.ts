@@ -0,0 +1,176 @@
+/**
+ * BroCoDDE — Multiplexed WebSocket client
+ * One shared socket to /ws carries chat turns for every open task plus
+ * stage updates for subscribed tasks. Enable with NEXT_PUBLIC_CHAT_TRANSPORT=ws;
+ * streamChat() in sse.ts delegates here and keeps the same StreamOptions API.
+ *
+ * Server frames:
+ *   { type: "event", task_id, turn_id, event, data } — event: message | thinking |
+ *       tool | lint | error | title | advance | done (data is raw, not newline-escaped)
+ *   { type: "stage", task_id, stage, version }
+ *   { type: "error", detail, turn_id? }
+ */
+
+import type { StreamOptions } from "./sse";
+import type { LintCheckEvent } from "./types";
+
+const BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+const WS_URL = BASE_URL.replace(/^http/, "ws") + "/ws";
+
+interface ServerFrame {
+    type: "event" | "stage" | "error" | "pong";
+    task_id?: string;
+    turn_id?: string;
+    event?: string;
+    data?: string;
+    stage?: string;
+    version?: number;
+    detail?: string;
+}
+
+type StageListener = (stage: string, version?: number) => void;
+
+let socket: WebSocket | null = null;
+let opening: Promise<WebSocket> | null = null;
+const turns = new Map<string, StreamOptions>();
+const stageListeners = new Map<string, Set<StageListener>>();
+
+function connect(): Promise<WebSocket> {
+    if (socket && socket.readyState === WebSocket.OPEN) return Promise.resolve(socket);
+    if (opening) return opening;
+
+    opening = new Promise((resolve, reject) => {
+        const ws = new WebSocket(WS_URL);
+        ws.onopen = () => {
+            socket = ws;
+            opening = null;
+            // Re-subscribe after a reconnect
+            for (const taskId of stageListeners.keys()) {
+                ws.send(JSON.stringify({ type: "subscribe", task_id: taskId }));
+            }
+            resolve(ws);
+        };
+        ws.onmessage = (e) => dispatch(JSON.parse(e.data) as ServerFrame);
+        ws.onerror = () => {
+            opening = null;
+            reject(new Error("WebSocket connection failed"));
+        };
+        ws.onclose = (e) => {
+            socket = null;
+            opening = null;
+            // Fail in-flight turns; the caller retries with the same idempotency key
+            const err = new Error(`WebSocket closed (${e.code})`);
+            for (const options of turns.values()) options.onError(err);
+            turns.clear();
+        };
+    });
+    return opening;
+}
+
+function dispatch(frame: ServerFrame): void {
+    if (frame.type === "stage" && frame.task_id && frame.stage) {
+        stageListeners.get(frame.task_id)?.forEach((fn) => fn(frame.stage!, frame.version));
+        return;
+    }
+    const options = frame.turn_id ? turns.get(frame.turn_id) : undefined;
+    if (!options) return;
+
+    if (frame.type === "error") {
+        turns.delete(frame.turn_id!);
+        options.onError(new Error(frame.detail || "Chat request failed"));
+        return;
+    }
+    if (frame.type !== "event") return;
+
+    const data = frame.data ?? "";
+    switch (frame.event) {
+        case "message": {
+            let text = data;
+            // Same [TITLE:] macro handling as the SSE reader
+            if (text.includes("[TITLE:")) {
+                const titleMatch = text.match(/\[TITLE:\s*([^\]]+)\]/);
+                if (titleMatch) options.onTitleUpdate?.(titleMatch[1].trim());
+                text = text.replace(/\s*\[TITLE:[^\]]+\]\s*/g, " ").trim();
+            }
+            if (text.length > 0) options.onChunk(text);
+            break;
+        }
+        case "thinking":
+            if (data.length > 0) options.onThinking?.(data);
+            break;
+        case "tool":
+            options.onToolCall?.(data.trim());
+            break;
+        case "lint":
+            options.onLint?.(JSON.parse(data) as LintCheckEvent);
+            break;
+        case "title":
+            if (data.trim()) options.onTitleUpdate?.(data.trim());
+            break;
+        case "advance":
+            options.onAdvanceStage?.();
+            break;
+        case "error":
+            // Rendered inline, exactly like the SSE transport's error frame
+            options.onChunk(`[AgentOS Error: ${data}]`);
+            break;
+        case "done":
+            turns.delete(frame.turn_id!);
+            options.onDone();
+            break;
+    }
+}
+
+/** Stream one chat turn over the shared socket. Resolves when the turn finishes, like streamChat(). */
+export async function streamChatWS(options: StreamOptions): Promise<void> {
+    const { taskId, message, userId = "default_user", deepCritique = false } = options;
+    const idempotencyKey = options.idempotencyKey ?? crypto.randomUUID();
+    const turnId = crypto.randomUUID();
+
+    let finish: () => void = () => {};
+    const finished = new Promise<void>((resolve) => { finish = resolve; });
+
+    try {
+        const ws = await connect();
+        turns.set(turnId, {
+            ...options,
+            onDone: () => { options.onDone(); finish(); },
+            onError: (err) => { options.onError(err); finish(); },
+        });
+        ws.send(JSON.stringify({
+            type: "chat",
+            task_id: taskId,
+            turn_id: turnId,
+            message,
+            user_id: userId,
+            deep_critique: deepCritique,
+            idempotency_key: idempotencyKey,
+        }));
+    } catch (err) {
+        turns.delete(turnId);
+        options.onError(err instanceof Error ? err : new Error(String(err)));
+        return;
+    }
+    return finished;
+}
+
+/** Receive pushed stage changes for a task. Returns an unsubscribe function. */
+export function subscribeStage(taskId: string, listener: StageListener): () => void {
+    let listeners = stageListeners.get(taskId);
+    if (!listeners) {
+        listeners = new Set();
+        stageListeners.set(taskId, listeners);
+        connect()
+            .then((ws) => ws.send(JSON.stringify({ type: "subscribe", task_id: taskId })))
+            .catch(() => { /* re-subscribed on the next successful connect */ });
+    }
+    listeners.add(listener);
+
+    return () => {
+        listeners!.delete(listener);
+        if (listeners!.size === 0) {
+            stageListeners.delete(taskId);
+            socket?.send(JSON.stringify({ type: "unsubscribe", task_id: taskId }));
+        }
+    };
+}